@@ -0,0 +1,79 @@
+-- -----------------------------------------------------
+-- Migration: daily sales rollup for finance dashboards
+-- -----------------------------------------------------
+-- 每日 / 店家 / 銷售人員 / 銷售類別 / 付款方式 彙總一筆。
+-- NULL 維度以 0 或 '' 儲存，使其可作為主鍵的一部分。
+START TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS `sales_daily_rollup` (
+  `sale_date` date NOT NULL,
+  `source` enum('product','therapy','sales_order') COLLATE utf8mb4_unicode_ci NOT NULL,
+  `store_id` int NOT NULL DEFAULT 0,
+  `staff_id` int NOT NULL DEFAULT 0,
+  `category` varchar(50) COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT '',
+  `payment_method` varchar(20) COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT '',
+  `txn_count` int NOT NULL DEFAULT 0,
+  `quantity` int NOT NULL DEFAULT 0,
+  `gross_amount` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `discount_amount` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `net_amount` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sale_date`,`source`,`store_id`,`staff_id`,`category`,`payment_method`),
+  KEY `idx_sales_rollup_store_date` (`store_id`,`sale_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill from existing history
+DELETE FROM sales_daily_rollup;
+
+INSERT INTO sales_daily_rollup (
+    sale_date, source, store_id, staff_id, category, payment_method,
+    txn_count, quantity, gross_amount, discount_amount, net_amount
+)
+SELECT
+    ps.date, 'product', ps.store_id, COALESCE(ps.staff_id, 0),
+    COALESCE(ps.sale_category, ''), COALESCE(ps.payment_method, ''),
+    COUNT(*), COALESCE(SUM(ps.quantity), 0),
+    COALESCE(SUM(ps.unit_price * ps.quantity), 0),
+    COALESCE(SUM(ps.discount_amount), 0),
+    COALESCE(SUM(ps.final_price), 0)
+FROM product_sell ps
+WHERE ps.date IS NOT NULL
+GROUP BY ps.date, ps.store_id, COALESCE(ps.staff_id, 0),
+         COALESCE(ps.sale_category, ''), COALESCE(ps.payment_method, '');
+
+INSERT INTO sales_daily_rollup (
+    sale_date, source, store_id, staff_id, category, payment_method,
+    txn_count, quantity, gross_amount, discount_amount, net_amount
+)
+SELECT
+    ts.date, 'therapy', COALESCE(ts.store_id, 0), COALESCE(ts.staff_id, 0),
+    COALESCE(ts.sale_category, ''), COALESCE(ts.payment_method, ''),
+    COUNT(*), COALESCE(SUM(ts.amount), 0),
+    COALESCE(SUM(ts.final_price + COALESCE(ts.discount, 0)), 0),
+    COALESCE(SUM(ts.discount), 0),
+    COALESCE(SUM(ts.final_price), 0)
+FROM therapy_sell ts
+WHERE ts.date IS NOT NULL
+GROUP BY ts.date, COALESCE(ts.store_id, 0), COALESCE(ts.staff_id, 0),
+         COALESCE(ts.sale_category, ''), COALESCE(ts.payment_method, '');
+
+INSERT INTO sales_daily_rollup (
+    sale_date, source, store_id, staff_id, category, payment_method,
+    txn_count, quantity, gross_amount, discount_amount, net_amount
+)
+SELECT
+    so.order_date, 'sales_order', so.store_id, COALESCE(so.staff_id, 0),
+    COALESCE(so.sale_category, ''), '',
+    COUNT(*), COALESCE(SUM(items.quantity), 0),
+    COALESCE(SUM(so.subtotal), 0),
+    COALESCE(SUM(so.total_discount), 0),
+    COALESCE(SUM(so.grand_total), 0)
+FROM sales_orders so
+LEFT JOIN (
+    SELECT order_id, SUM(quantity) AS quantity
+    FROM sales_order_items
+    GROUP BY order_id
+) items ON items.order_id = so.order_id
+GROUP BY so.order_date, so.store_id, COALESCE(so.staff_id, 0), COALESCE(so.sale_category, '');
+
+COMMIT;
@@ -0,0 +1,57 @@
+-- -----------------------------------------------------
+-- Migration: compact storage for stress test answers
+-- -----------------------------------------------------
+-- 1. question_no 統一補零為兩碼，並移除重複作答（保留最新一筆），
+--    以便 (ipn_stress_id, question_no) 唯一鍵支援 upsert。
+-- 2. ipn_stress.answers_packed：每份測驗一個 20 字元的答案字串，
+--    第 n 個字元為第 n 題答案（A = 甲、B = 乙、- = 未作答）。
+START TRANSACTION;
+
+UPDATE ipn_stress_answer
+SET question_no = LPAD(question_no, 2, '0')
+WHERE CHAR_LENGTH(question_no) < 2;
+
+DELETE older
+FROM ipn_stress_answer older
+JOIN ipn_stress_answer newer
+  ON newer.ipn_stress_id = older.ipn_stress_id
+ AND newer.question_no = older.question_no
+ AND newer.id > older.id;
+
+ALTER TABLE `ipn_stress_answer`
+  ADD UNIQUE KEY `uq_stress_answer_question` (`ipn_stress_id`, `question_no`);
+
+ALTER TABLE `ipn_stress`
+  ADD COLUMN `answers_packed` char(20) CHARACTER SET ascii COLLATE ascii_bin DEFAULT NULL
+  COMMENT '第 n 字元為第 n 題答案：A=甲、B=乙、-=未作答';
+
+UPDATE ipn_stress s
+JOIN (
+    SELECT a.ipn_stress_id, CONCAT(
+        COALESCE(MAX(CASE WHEN a.question_no = '01' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '02' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '03' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '04' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '05' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '06' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '07' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '08' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '09' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '10' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '11' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '12' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '13' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '14' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '15' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '16' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '17' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '18' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '19' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-'),
+        COALESCE(MAX(CASE WHEN a.question_no = '20' THEN CASE WHEN a.answer IN ('甲', 'A') THEN 'A' WHEN a.answer IN ('乙', 'B') THEN 'B' END END), '-')
+    ) AS packed
+    FROM ipn_stress_answer a
+    GROUP BY a.ipn_stress_id
+) p ON p.ipn_stress_id = s.ipn_stress_id
+SET s.answers_packed = p.packed;
+
+COMMIT;
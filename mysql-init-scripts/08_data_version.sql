@@ -0,0 +1,320 @@
+-- -----------------------------------------------------
+-- Migration: per-table data version counters
+-- -----------------------------------------------------
+-- data_version 每個資料表一列，任何 INSERT / UPDATE / DELETE 都會透過觸發器
+-- 將 version + 1。API 以相關資料表的版本計算 ETag，資料未變動時直接回傳 304。
+-- member / master_stock / inventory 等每筆銷售都會寫入的資料表不追蹤：版本列在交易中鎖定到提交為止，
+-- 會讓所有分店的寫入排隊。新增受追蹤的資料表時，需同步更新 app/models/data_version_model.py 的 VERSIONED_TABLES。
+START TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS `data_version` (
+  `table_name` varchar(64) NOT NULL,
+  `version` bigint unsigned NOT NULL DEFAULT 0,
+  `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`table_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO `data_version` (`table_name`, `version`) VALUES
+  ('store', 1),
+  ('store_account', 1),
+  ('staff', 1),
+  ('category', 1),
+  ('product', 1),
+  ('product_category', 1),
+  ('product_price_tier', 1),
+  ('therapy', 1),
+  ('therapy_category', 1),
+  ('therapy_price_tier', 1),
+  ('product_bundles', 1),
+  ('product_bundle_items', 1),
+  ('product_bundle_category', 1),
+  ('product_bundle_price_tier', 1),
+  ('therapy_bundles', 1),
+  ('therapy_bundle_items', 1),
+  ('therapy_bundle_category', 1),
+  ('therapy_bundle_price_tier', 1),
+  ('master_product', 1),
+  ('product_variant', 1);
+
+COMMIT;
+
+-- store
+DROP TRIGGER IF EXISTS `trg_store_dv_ins`;
+CREATE TRIGGER `trg_store_dv_ins` AFTER INSERT ON `store` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_store_dv_upd`;
+CREATE TRIGGER `trg_store_dv_upd` AFTER UPDATE ON `store` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_store_dv_del`;
+CREATE TRIGGER `trg_store_dv_del` AFTER DELETE ON `store` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- store_account
+DROP TRIGGER IF EXISTS `trg_store_account_dv_ins`;
+CREATE TRIGGER `trg_store_account_dv_ins` AFTER INSERT ON `store_account` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store_account', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_store_account_dv_upd`;
+CREATE TRIGGER `trg_store_account_dv_upd` AFTER UPDATE ON `store_account` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store_account', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_store_account_dv_del`;
+CREATE TRIGGER `trg_store_account_dv_del` AFTER DELETE ON `store_account` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('store_account', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- staff
+DROP TRIGGER IF EXISTS `trg_staff_dv_ins`;
+CREATE TRIGGER `trg_staff_dv_ins` AFTER INSERT ON `staff` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('staff', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_staff_dv_upd`;
+CREATE TRIGGER `trg_staff_dv_upd` AFTER UPDATE ON `staff` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('staff', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_staff_dv_del`;
+CREATE TRIGGER `trg_staff_dv_del` AFTER DELETE ON `staff` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('staff', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- category
+DROP TRIGGER IF EXISTS `trg_category_dv_ins`;
+CREATE TRIGGER `trg_category_dv_ins` AFTER INSERT ON `category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_category_dv_upd`;
+CREATE TRIGGER `trg_category_dv_upd` AFTER UPDATE ON `category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_category_dv_del`;
+CREATE TRIGGER `trg_category_dv_del` AFTER DELETE ON `category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product
+DROP TRIGGER IF EXISTS `trg_product_dv_ins`;
+CREATE TRIGGER `trg_product_dv_ins` AFTER INSERT ON `product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_dv_upd`;
+CREATE TRIGGER `trg_product_dv_upd` AFTER UPDATE ON `product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_dv_del`;
+CREATE TRIGGER `trg_product_dv_del` AFTER DELETE ON `product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_category
+DROP TRIGGER IF EXISTS `trg_product_category_dv_ins`;
+CREATE TRIGGER `trg_product_category_dv_ins` AFTER INSERT ON `product_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_category_dv_upd`;
+CREATE TRIGGER `trg_product_category_dv_upd` AFTER UPDATE ON `product_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_category_dv_del`;
+CREATE TRIGGER `trg_product_category_dv_del` AFTER DELETE ON `product_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_price_tier
+DROP TRIGGER IF EXISTS `trg_product_price_tier_dv_ins`;
+CREATE TRIGGER `trg_product_price_tier_dv_ins` AFTER INSERT ON `product_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_price_tier_dv_upd`;
+CREATE TRIGGER `trg_product_price_tier_dv_upd` AFTER UPDATE ON `product_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_price_tier_dv_del`;
+CREATE TRIGGER `trg_product_price_tier_dv_del` AFTER DELETE ON `product_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy
+DROP TRIGGER IF EXISTS `trg_therapy_dv_ins`;
+CREATE TRIGGER `trg_therapy_dv_ins` AFTER INSERT ON `therapy` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_dv_upd`;
+CREATE TRIGGER `trg_therapy_dv_upd` AFTER UPDATE ON `therapy` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_dv_del`;
+CREATE TRIGGER `trg_therapy_dv_del` AFTER DELETE ON `therapy` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_category
+DROP TRIGGER IF EXISTS `trg_therapy_category_dv_ins`;
+CREATE TRIGGER `trg_therapy_category_dv_ins` AFTER INSERT ON `therapy_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_category_dv_upd`;
+CREATE TRIGGER `trg_therapy_category_dv_upd` AFTER UPDATE ON `therapy_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_category_dv_del`;
+CREATE TRIGGER `trg_therapy_category_dv_del` AFTER DELETE ON `therapy_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_price_tier
+DROP TRIGGER IF EXISTS `trg_therapy_price_tier_dv_ins`;
+CREATE TRIGGER `trg_therapy_price_tier_dv_ins` AFTER INSERT ON `therapy_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_price_tier_dv_upd`;
+CREATE TRIGGER `trg_therapy_price_tier_dv_upd` AFTER UPDATE ON `therapy_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_price_tier_dv_del`;
+CREATE TRIGGER `trg_therapy_price_tier_dv_del` AFTER DELETE ON `therapy_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_bundles
+DROP TRIGGER IF EXISTS `trg_product_bundles_dv_ins`;
+CREATE TRIGGER `trg_product_bundles_dv_ins` AFTER INSERT ON `product_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundles_dv_upd`;
+CREATE TRIGGER `trg_product_bundles_dv_upd` AFTER UPDATE ON `product_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundles_dv_del`;
+CREATE TRIGGER `trg_product_bundles_dv_del` AFTER DELETE ON `product_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_bundle_items
+DROP TRIGGER IF EXISTS `trg_product_bundle_items_dv_ins`;
+CREATE TRIGGER `trg_product_bundle_items_dv_ins` AFTER INSERT ON `product_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_items_dv_upd`;
+CREATE TRIGGER `trg_product_bundle_items_dv_upd` AFTER UPDATE ON `product_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_items_dv_del`;
+CREATE TRIGGER `trg_product_bundle_items_dv_del` AFTER DELETE ON `product_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_bundle_category
+DROP TRIGGER IF EXISTS `trg_product_bundle_category_dv_ins`;
+CREATE TRIGGER `trg_product_bundle_category_dv_ins` AFTER INSERT ON `product_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_category_dv_upd`;
+CREATE TRIGGER `trg_product_bundle_category_dv_upd` AFTER UPDATE ON `product_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_category_dv_del`;
+CREATE TRIGGER `trg_product_bundle_category_dv_del` AFTER DELETE ON `product_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_bundle_price_tier
+DROP TRIGGER IF EXISTS `trg_product_bundle_price_tier_dv_ins`;
+CREATE TRIGGER `trg_product_bundle_price_tier_dv_ins` AFTER INSERT ON `product_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_price_tier_dv_upd`;
+CREATE TRIGGER `trg_product_bundle_price_tier_dv_upd` AFTER UPDATE ON `product_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_bundle_price_tier_dv_del`;
+CREATE TRIGGER `trg_product_bundle_price_tier_dv_del` AFTER DELETE ON `product_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_bundles
+DROP TRIGGER IF EXISTS `trg_therapy_bundles_dv_ins`;
+CREATE TRIGGER `trg_therapy_bundles_dv_ins` AFTER INSERT ON `therapy_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundles_dv_upd`;
+CREATE TRIGGER `trg_therapy_bundles_dv_upd` AFTER UPDATE ON `therapy_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundles_dv_del`;
+CREATE TRIGGER `trg_therapy_bundles_dv_del` AFTER DELETE ON `therapy_bundles` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundles', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_bundle_items
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_items_dv_ins`;
+CREATE TRIGGER `trg_therapy_bundle_items_dv_ins` AFTER INSERT ON `therapy_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_items_dv_upd`;
+CREATE TRIGGER `trg_therapy_bundle_items_dv_upd` AFTER UPDATE ON `therapy_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_items_dv_del`;
+CREATE TRIGGER `trg_therapy_bundle_items_dv_del` AFTER DELETE ON `therapy_bundle_items` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_items', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_bundle_category
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_category_dv_ins`;
+CREATE TRIGGER `trg_therapy_bundle_category_dv_ins` AFTER INSERT ON `therapy_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_category_dv_upd`;
+CREATE TRIGGER `trg_therapy_bundle_category_dv_upd` AFTER UPDATE ON `therapy_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_category_dv_del`;
+CREATE TRIGGER `trg_therapy_bundle_category_dv_del` AFTER DELETE ON `therapy_bundle_category` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_category', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- therapy_bundle_price_tier
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_price_tier_dv_ins`;
+CREATE TRIGGER `trg_therapy_bundle_price_tier_dv_ins` AFTER INSERT ON `therapy_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_price_tier_dv_upd`;
+CREATE TRIGGER `trg_therapy_bundle_price_tier_dv_upd` AFTER UPDATE ON `therapy_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_therapy_bundle_price_tier_dv_del`;
+CREATE TRIGGER `trg_therapy_bundle_price_tier_dv_del` AFTER DELETE ON `therapy_bundle_price_tier` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('therapy_bundle_price_tier', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- master_product
+DROP TRIGGER IF EXISTS `trg_master_product_dv_ins`;
+CREATE TRIGGER `trg_master_product_dv_ins` AFTER INSERT ON `master_product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('master_product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_master_product_dv_upd`;
+CREATE TRIGGER `trg_master_product_dv_upd` AFTER UPDATE ON `master_product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('master_product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_master_product_dv_del`;
+CREATE TRIGGER `trg_master_product_dv_del` AFTER DELETE ON `master_product` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('master_product', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
+-- product_variant
+DROP TRIGGER IF EXISTS `trg_product_variant_dv_ins`;
+CREATE TRIGGER `trg_product_variant_dv_ins` AFTER INSERT ON `product_variant` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_variant', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_variant_dv_upd`;
+CREATE TRIGGER `trg_product_variant_dv_upd` AFTER UPDATE ON `product_variant` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_variant', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+DROP TRIGGER IF EXISTS `trg_product_variant_dv_del`;
+CREATE TRIGGER `trg_product_variant_dv_del` AFTER DELETE ON `product_variant` FOR EACH ROW
+  INSERT INTO `data_version` (`table_name`, `version`) VALUES ('product_variant', 1)
+  ON DUPLICATE KEY UPDATE `version` = `version` + 1;
+
@@ -0,0 +1,31 @@
+-- -----------------------------------------------------
+-- Migration: composite indexes for hot access paths
+-- -----------------------------------------------------
+-- 1. therapy_sell / therapy_record：剩餘堂數以 (member_id, therapy_id) 查詢與彙總
+-- 2. stock_transaction：門市庫存以 store_id 篩選、依 master_product_id 分組，並可加上 created_at 區間
+-- 3. product_sell：門市銷售列表 / 庫存明細以 store_id 篩選並依 date 排序或取區間
+-- 新索引以原本的單欄索引欄位開頭，外鍵仍有索引可用，因此移除被涵蓋的單欄索引以減少寫入成本。
+-- 各查詢的執行計畫由 server/benchmarks/query_plans.py 檢查。
+START TRANSACTION;
+
+ALTER TABLE `therapy_sell`
+  ADD KEY `idx_therapy_sell_member_therapy` (`member_id`, `therapy_id`);
+ALTER TABLE `therapy_sell`
+  DROP KEY `member_id`;
+
+ALTER TABLE `therapy_record`
+  ADD KEY `idx_therapy_record_member_therapy` (`member_id`, `therapy_id`);
+ALTER TABLE `therapy_record`
+  DROP KEY `member_id`;
+
+ALTER TABLE `stock_transaction`
+  ADD KEY `idx_stock_txn_store_master_created` (`store_id`, `master_product_id`, `created_at`);
+ALTER TABLE `stock_transaction`
+  DROP KEY `idx_stock_txn_store`;
+
+ALTER TABLE `product_sell`
+  ADD KEY `idx_product_sell_store_date` (`store_id`, `date`);
+ALTER TABLE `product_sell`
+  DROP KEY `store_id`;
+
+COMMIT;
@@ -0,0 +1,270 @@
+-- -----------------------------------------------------
+-- Migration: yearly range partitions for sales / ledger tables
+-- -----------------------------------------------------
+-- product_sell、therapy_sell、therapy_record 依 date，stock_transaction 依 created_at 按年分割。
+-- 帶日期條件的查詢（報表、?since= / 設定 SALES_RECENT_DAYS 後的列表）只會讀取相關分割區；
+-- SALES_RECENT_DAYS 預設 0，列表與匯出不帶日期條件時仍讀取所有分割區。
+--
+-- MySQL 的分割表限制：
+-- 1. 分割欄位必須包含在主鍵中 → 主鍵改為 (id, 日期欄位)，id 仍為 AUTO_INCREMENT 且為主鍵第一欄。
+-- 2. 分割欄位不可為 NULL → therapy_sell / therapy_record 的 date 改為 NOT NULL，
+--    舊資料的 NULL 日期回填為 1970-01-01（落在 p_legacy，原本的「未填日期」無法再與此日期區分），
+--    新資料由觸發器補上當天日期。
+-- 3. 分割表不支援外鍵 → 移除這四張表的外鍵，改以觸發器維持原本的行為：
+--    RESTRICT 的關聯在刪除父資料前檢查；stock_transaction 的 SET NULL / CASCADE 在刪除後處理；
+--    新增 / 修改時由 BEFORE 觸發器檢查參照的會員、員工、分店、產品、療程是否存在，
+--    不存在時以與外鍵相同的錯誤碼 1452 拒絕。觸發器的檢查不鎖定父資料列，
+--    與同時刪除父資料的交易之間仍有極短的競態，由刪除端的 RESTRICT 觸發器補足大部分情況。
+--
+-- 每年需新增下一年度的分割區：python maintain_partitions.py（會把 p_future 拆出新年度）。
+START TRANSACTION;
+
+-- 1. 移除外鍵（底層索引保留）
+ALTER TABLE `product_sell`
+  DROP FOREIGN KEY `product_sell_ibfk_1`,
+  DROP FOREIGN KEY `product_sell_ibfk_2`,
+  DROP FOREIGN KEY `product_sell_ibfk_3`,
+  DROP FOREIGN KEY `product_sell_ibfk_4`;
+ALTER TABLE `therapy_sell`
+  DROP FOREIGN KEY `therapy_sell_ibfk_1`,
+  DROP FOREIGN KEY `therapy_sell_ibfk_2`,
+  DROP FOREIGN KEY `therapy_sell_ibfk_3`,
+  DROP FOREIGN KEY `therapy_sell_ibfk_4`;
+ALTER TABLE `therapy_record`
+  DROP FOREIGN KEY `therapy_record_ibfk_1`,
+  DROP FOREIGN KEY `therapy_record_ibfk_2`,
+  DROP FOREIGN KEY `therapy_record_ibfk_3`,
+  DROP FOREIGN KEY `therapy_record_ibfk_4`;
+ALTER TABLE `stock_transaction`
+  DROP FOREIGN KEY `fk_stock_txn_master`,
+  DROP FOREIGN KEY `fk_stock_txn_variant`,
+  DROP FOREIGN KEY `fk_stock_txn_store`,
+  DROP FOREIGN KEY `fk_stock_txn_staff`;
+
+-- 2. 日期欄位改為 NOT NULL
+UPDATE `therapy_sell` SET `date` = '1970-01-01' WHERE `date` IS NULL;
+UPDATE `therapy_record` SET `date` = '1970-01-01' WHERE `date` IS NULL;
+ALTER TABLE `therapy_sell` MODIFY `date` date NOT NULL;
+ALTER TABLE `therapy_record` MODIFY `date` date NOT NULL;
+
+-- 3. 主鍵加入分割欄位
+ALTER TABLE `product_sell`
+  DROP PRIMARY KEY, ADD PRIMARY KEY (`product_sell_id`, `date`);
+ALTER TABLE `therapy_sell`
+  DROP PRIMARY KEY, ADD PRIMARY KEY (`therapy_sell_id`, `date`);
+ALTER TABLE `therapy_record`
+  DROP PRIMARY KEY, ADD PRIMARY KEY (`therapy_record_id`, `date`);
+ALTER TABLE `stock_transaction`
+  DROP PRIMARY KEY, ADD PRIMARY KEY (`txn_id`, `created_at`);
+
+-- 4. 年度分割區（p_legacy 收 2023 年以前，p_future 收尚未建立年度的資料）
+ALTER TABLE `product_sell` PARTITION BY RANGE COLUMNS(`date`) (
+  PARTITION p_legacy VALUES LESS THAN ('2023-01-01'),
+  PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+  PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+  PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+  PARTITION p2026 VALUES LESS THAN ('2027-01-01'),
+  PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+ALTER TABLE `therapy_sell` PARTITION BY RANGE COLUMNS(`date`) (
+  PARTITION p_legacy VALUES LESS THAN ('2023-01-01'),
+  PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+  PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+  PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+  PARTITION p2026 VALUES LESS THAN ('2027-01-01'),
+  PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+ALTER TABLE `therapy_record` PARTITION BY RANGE COLUMNS(`date`) (
+  PARTITION p_legacy VALUES LESS THAN ('2023-01-01'),
+  PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+  PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+  PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+  PARTITION p2026 VALUES LESS THAN ('2027-01-01'),
+  PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+ALTER TABLE `stock_transaction` PARTITION BY RANGE COLUMNS(`created_at`) (
+  PARTITION p_legacy VALUES LESS THAN ('2023-01-01 00:00:00'),
+  PARTITION p2023 VALUES LESS THAN ('2024-01-01 00:00:00'),
+  PARTITION p2024 VALUES LESS THAN ('2025-01-01 00:00:00'),
+  PARTITION p2025 VALUES LESS THAN ('2026-01-01 00:00:00'),
+  PARTITION p2026 VALUES LESS THAN ('2027-01-01 00:00:00'),
+  PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+COMMIT;
+
+-- 5. 未提供日期時補上當天（原本允許 NULL 的欄位）
+DROP TRIGGER IF EXISTS `trg_therapy_sell_date_ins`;
+CREATE TRIGGER `trg_therapy_sell_date_ins` BEFORE INSERT ON `therapy_sell` FOR EACH ROW
+  SET NEW.`date` = COALESCE(NEW.`date`, CURDATE());
+DROP TRIGGER IF EXISTS `trg_therapy_sell_date_upd`;
+CREATE TRIGGER `trg_therapy_sell_date_upd` BEFORE UPDATE ON `therapy_sell` FOR EACH ROW
+  SET NEW.`date` = COALESCE(NEW.`date`, OLD.`date`);
+DROP TRIGGER IF EXISTS `trg_therapy_record_date_ins`;
+CREATE TRIGGER `trg_therapy_record_date_ins` BEFORE INSERT ON `therapy_record` FOR EACH ROW
+  SET NEW.`date` = COALESCE(NEW.`date`, CURDATE());
+DROP TRIGGER IF EXISTS `trg_therapy_record_date_upd`;
+CREATE TRIGGER `trg_therapy_record_date_upd` BEFORE UPDATE ON `therapy_record` FOR EACH ROW
+  SET NEW.`date` = COALESCE(NEW.`date`, OLD.`date`);
+
+-- 6. 取代外鍵的刪除行為
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS `trg_member_sales_restrict`$$
+CREATE TRIGGER `trg_member_sales_restrict` BEFORE DELETE ON `member` FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM `product_sell` WHERE `member_id` = OLD.`member_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_sell` WHERE `member_id` = OLD.`member_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_record` WHERE `member_id` = OLD.`member_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Cannot delete member: sales or therapy records still reference it';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_staff_sales_restrict`$$
+CREATE TRIGGER `trg_staff_sales_restrict` BEFORE DELETE ON `staff` FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM `product_sell` WHERE `staff_id` = OLD.`staff_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_sell` WHERE `staff_id` = OLD.`staff_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_record` WHERE `staff_id` = OLD.`staff_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Cannot delete staff: sales or therapy records still reference it';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_staff_stock_txn_set_null`$$
+CREATE TRIGGER `trg_staff_stock_txn_set_null` AFTER DELETE ON `staff` FOR EACH ROW
+BEGIN
+  UPDATE `stock_transaction` SET `staff_id` = NULL WHERE `staff_id` = OLD.`staff_id`;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_store_sales_restrict`$$
+CREATE TRIGGER `trg_store_sales_restrict` BEFORE DELETE ON `store` FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM `product_sell` WHERE `store_id` = OLD.`store_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_sell` WHERE `store_id` = OLD.`store_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_record` WHERE `store_id` = OLD.`store_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Cannot delete store: sales or therapy records still reference it';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_store_stock_txn_set_null`$$
+CREATE TRIGGER `trg_store_stock_txn_set_null` AFTER DELETE ON `store` FOR EACH ROW
+BEGIN
+  UPDATE `stock_transaction` SET `store_id` = NULL WHERE `store_id` = OLD.`store_id`;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_product_sales_restrict`$$
+CREATE TRIGGER `trg_product_sales_restrict` BEFORE DELETE ON `product` FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM `product_sell` WHERE `product_id` = OLD.`product_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Cannot delete product: product_sell still references it';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_product_stock_txn_set_null`$$
+CREATE TRIGGER `trg_product_stock_txn_set_null` AFTER DELETE ON `product` FOR EACH ROW
+BEGIN
+  UPDATE `stock_transaction` SET `variant_id` = NULL WHERE `variant_id` = OLD.`product_id`;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_therapy_sales_restrict`$$
+CREATE TRIGGER `trg_therapy_sales_restrict` BEFORE DELETE ON `therapy` FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM `therapy_sell` WHERE `therapy_id` = OLD.`therapy_id`)
+     OR EXISTS (SELECT 1 FROM `therapy_record` WHERE `therapy_id` = OLD.`therapy_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Cannot delete therapy: sales or therapy records still reference it';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_master_product_stock_txn_cascade`$$
+CREATE TRIGGER `trg_master_product_stock_txn_cascade` AFTER DELETE ON `master_product` FOR EACH ROW
+BEGIN
+  DELETE FROM `stock_transaction` WHERE `master_product_id` = OLD.`master_product_id`;
+END$$
+
+-- 7. 取代外鍵的新增 / 修改檢查（未變更的欄位以 NULL 傳入，不重複檢查）
+DROP PROCEDURE IF EXISTS `check_sale_references`$$
+CREATE PROCEDURE `check_sale_references`(
+  IN p_member_id INT, IN p_staff_id INT, IN p_store_id INT, IN p_product_id INT, IN p_therapy_id INT
+)
+BEGIN
+  IF p_member_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `member` WHERE `member_id` = p_member_id) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: member does not exist';
+  END IF;
+  IF p_staff_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `staff` WHERE `staff_id` = p_staff_id) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: staff does not exist';
+  END IF;
+  IF p_store_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `store` WHERE `store_id` = p_store_id) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: store does not exist';
+  END IF;
+  IF p_product_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `product` WHERE `product_id` = p_product_id) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: product does not exist';
+  END IF;
+  IF p_therapy_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `therapy` WHERE `therapy_id` = p_therapy_id) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: therapy does not exist';
+  END IF;
+END$$
+
+DROP TRIGGER IF EXISTS `trg_product_sell_refs_ins`$$
+CREATE TRIGGER `trg_product_sell_refs_ins` BEFORE INSERT ON `product_sell` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(NEW.`member_id`, NEW.`staff_id`, NEW.`store_id`, NEW.`product_id`, NULL);
+END$$
+
+DROP TRIGGER IF EXISTS `trg_product_sell_refs_upd`$$
+CREATE TRIGGER `trg_product_sell_refs_upd` BEFORE UPDATE ON `product_sell` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(
+    IF(NEW.`member_id` <=> OLD.`member_id`, NULL, NEW.`member_id`),
+    IF(NEW.`staff_id` <=> OLD.`staff_id`, NULL, NEW.`staff_id`),
+    IF(NEW.`store_id` <=> OLD.`store_id`, NULL, NEW.`store_id`),
+    IF(NEW.`product_id` <=> OLD.`product_id`, NULL, NEW.`product_id`),
+    NULL
+  );
+END$$
+
+DROP TRIGGER IF EXISTS `trg_therapy_sell_refs_ins`$$
+CREATE TRIGGER `trg_therapy_sell_refs_ins` BEFORE INSERT ON `therapy_sell` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(NEW.`member_id`, NEW.`staff_id`, NEW.`store_id`, NULL, NEW.`therapy_id`);
+END$$
+
+DROP TRIGGER IF EXISTS `trg_therapy_sell_refs_upd`$$
+CREATE TRIGGER `trg_therapy_sell_refs_upd` BEFORE UPDATE ON `therapy_sell` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(
+    IF(NEW.`member_id` <=> OLD.`member_id`, NULL, NEW.`member_id`),
+    IF(NEW.`staff_id` <=> OLD.`staff_id`, NULL, NEW.`staff_id`),
+    IF(NEW.`store_id` <=> OLD.`store_id`, NULL, NEW.`store_id`),
+    NULL,
+    IF(NEW.`therapy_id` <=> OLD.`therapy_id`, NULL, NEW.`therapy_id`)
+  );
+END$$
+
+DROP TRIGGER IF EXISTS `trg_therapy_record_refs_ins`$$
+CREATE TRIGGER `trg_therapy_record_refs_ins` BEFORE INSERT ON `therapy_record` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(NEW.`member_id`, NEW.`staff_id`, NEW.`store_id`, NULL, NEW.`therapy_id`);
+END$$
+
+DROP TRIGGER IF EXISTS `trg_therapy_record_refs_upd`$$
+CREATE TRIGGER `trg_therapy_record_refs_upd` BEFORE UPDATE ON `therapy_record` FOR EACH ROW
+BEGIN
+  CALL check_sale_references(
+    IF(NEW.`member_id` <=> OLD.`member_id`, NULL, NEW.`member_id`),
+    IF(NEW.`staff_id` <=> OLD.`staff_id`, NULL, NEW.`staff_id`),
+    IF(NEW.`store_id` <=> OLD.`store_id`, NULL, NEW.`store_id`),
+    NULL,
+    IF(NEW.`therapy_id` <=> OLD.`therapy_id`, NULL, NEW.`therapy_id`)
+  );
+END$$
+
+DROP TRIGGER IF EXISTS `trg_stock_txn_refs_ins`$$
+CREATE TRIGGER `trg_stock_txn_refs_ins` BEFORE INSERT ON `stock_transaction` FOR EACH ROW
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM `master_product` WHERE `master_product_id` = NEW.`master_product_id`) THEN
+    SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452, MESSAGE_TEXT = 'Cannot add or update row: master product does not exist';
+  END IF;
+  CALL check_sale_references(NULL, NEW.`staff_id`, NEW.`store_id`, NEW.`variant_id`, NULL);
+END$$
+
+DELIMITER ;
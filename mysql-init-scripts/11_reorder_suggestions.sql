@@ -0,0 +1,46 @@
+-- -----------------------------------------------------
+-- Migration: sales-velocity reorder suggestions
+-- -----------------------------------------------------
+-- 依 stock_transaction 的 OUTBOUND 紀錄計算每個 master 商品 / 分店的日均出貨量、波動與可銷天數，
+-- 產生動態安全庫存（reorder_point）與建議補貨量，供低庫存與 master 庫存總覽讀取。
+--   * reorder_daily_outbound：每日出貨量彙總，增量刷新時只重算有新異動的日期；
+--   * reorder_suggestion：最近一次計算的結果；
+--   * reorder_refresh_state：已處理到的 stock_transaction.txn_id。
+-- 由 python refresh_reorder.py 排程刷新（建議每 15 分鐘），--full 可完整重建。
+START TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS `reorder_daily_outbound` (
+  `master_product_id` int NOT NULL,
+  `store_id` int NOT NULL,
+  `sale_date` date NOT NULL,
+  `quantity` int NOT NULL DEFAULT 0,
+  PRIMARY KEY (`master_product_id`,`store_id`,`sale_date`),
+  KEY `idx_reorder_daily_date` (`sale_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `reorder_suggestion` (
+  `master_product_id` int NOT NULL,
+  `store_id` int NOT NULL,
+  `window_days` int NOT NULL,
+  `avg_daily_demand` decimal(12,4) NOT NULL DEFAULT '0.0000',
+  `demand_stddev` decimal(12,4) NOT NULL DEFAULT '0.0000',
+  `reorder_point` int NOT NULL DEFAULT 0 COMMENT '動態安全庫存：庫存不高於此值即列入低庫存',
+  `order_up_to` int NOT NULL DEFAULT 0 COMMENT '補貨後的目標庫存',
+  `quantity_on_hand` int NOT NULL DEFAULT 0 COMMENT '計算當下的庫存',
+  `days_of_cover` decimal(12,2) DEFAULT NULL COMMENT '計算當下的可銷天數，無出貨時為 NULL',
+  `suggested_qty` int NOT NULL DEFAULT 0 COMMENT '計算當下的建議補貨量',
+  `computed_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`master_product_id`,`store_id`),
+  KEY `idx_reorder_suggestion_store` (`store_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `reorder_refresh_state` (
+  `id` tinyint NOT NULL,
+  `last_txn_id` bigint NOT NULL DEFAULT 0,
+  `refreshed_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO reorder_refresh_state (id, last_txn_id, refreshed_at) VALUES (1, 0, NULL);
+
+COMMIT;
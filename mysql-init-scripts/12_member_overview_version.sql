@@ -0,0 +1,19 @@
+-- -----------------------------------------------------
+-- Migration: cross-worker invalidation for member overview cache
+-- -----------------------------------------------------
+-- 每個 worker 各自快取會員總覽（/api/member/<id>/overview），寫入請求成功後
+-- 在交易外將相關會員的版本 + 1，其他 worker 讀取時版本不同即視為過期。
+--   * member_id = 0 為全域版本：以紀錄 ID 修改 / 刪除（無法得知原會員）時遞增，使全部總覽失效。
+-- 每位會員各自一列，不會在銷售交易中形成共用的熱點列。
+START TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS `member_overview_version` (
+  `member_id` int NOT NULL,
+  `version` bigint unsigned NOT NULL DEFAULT 0,
+  `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`member_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO `member_overview_version` (`member_id`, `version`) VALUES (0, 0);
+
+COMMIT;
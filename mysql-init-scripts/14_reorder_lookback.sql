@@ -0,0 +1,12 @@
+-- -----------------------------------------------------
+-- Migration: indexes for reorder lookback recompute
+-- -----------------------------------------------------
+-- refresh_reorder.py 每次重算上次刷新當日起（至少回溯 REORDER_LOOKBACK_MINUTES 分鐘）的每日出貨，
+-- 不再依 txn_id 累加，避免略過晚提交的異動；銷售刪除 / 修改以原單號寫回的 INBOUND 視為退貨扣除。
+--   * idx_stock_txn_created：依 created_at 讀取最近的異動；
+--   * idx_stock_txn_reference：以單號找出同一筆銷售的 OUTBOUND。
+-- reorder_refresh_state.last_txn_id 保留為刷新時的最大 txn_id，僅供查看。
+ALTER TABLE `stock_transaction`
+  ADD KEY `idx_stock_txn_created` (`created_at`);
+ALTER TABLE `stock_transaction`
+  ADD KEY `idx_stock_txn_reference` (`reference_no`, `master_product_id`, `store_id`);
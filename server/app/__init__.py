@@ -1,25 +1,94 @@
 from flask import Flask, request, make_response, jsonify
 from flask_cors import CORS
-from app.routes.therapy import therapy_bp
-from app.routes.member import member_bp
-from app.routes.medical_record import medical_bp
-from app.routes.login import login_bp
-from app.routes.stress_test import stress_test
-from app.routes.therapy_sell import therapy_sell
-from app.routes.inventory import inventory_bp
-from app.routes.health_check import health_check_bp
-from app.routes.staff import staff_bp
-from app.routes.pure_medical_record import pure_medical_bp
-from app.routes.product_bundle import product_bundle_bp
-from app.routes.therapy_bundle import therapy_bundle_bp
-from app.routes.product import product_bp
-from app.routes.items import items_bp
-from .routes.sales_order_routes import sales_order_bp
-from app.routes.store import store_bp
-from app.routes.category import category_bp
+import importlib
+import os
+from app.config import (
+    JSON_ENCODER,
+    RESPONSE_COMPRESS_MIN_BYTES,
+    RESPONSE_COMPRESS_LEVEL,
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+    PROFILER_ENABLED,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_KEEP,
+)
+from app.json_provider import init_json_provider
+from app.compression import init_compression
+from app.metrics import init_metrics
+from app.profiler import init_profiler
+from app.query_budget import init_query_budget
 
-def create_app():
+# 藍圖登記表：(功能組, 模組, 藍圖變數, URL 前綴)
+# create_app 只會 import 啟用中功能組的模組，其餘路由（及其相依套件）完全不載入。
+BLUEPRINTS = [
+    ("sales", "app.routes.therapy", "therapy_bp", "/api/therapy"),
+    ("core", "app.routes.member", "member_bp", "/api/member"),
+    ("health", "app.routes.medical_record", "medical_bp", "/api/medical-record"),
+    ("core", "app.routes.login", "login_bp", "/api/login"),
+    ("health", "app.routes.stress_test", "stress_test", "/api/stress-test"),
+    ("staff", "app.routes.staff", "staff_bp", "/api/staff"),
+    ("sales", "app.routes.product_bundle", "product_bundle_bp", "/api/product-bundles"),
+    ("sales", "app.routes.therapy_bundle", "therapy_bundle_bp", "/api/therapy-bundles"),
+    ("sales", "app.routes.product", "product_bp", "/api/product"),
+    ("core", "app.routes.store", "store_bp", "/api/stores"),
+    ("core", "app.routes.items", "items_bp", "/api/items"),
+    ("core", "app.routes.category", "category_bp", "/api/categories"),
+    # 產品銷售路由
+    ("sales", "app.routes.product_sell", "product_sell_bp", "/api/product-sell"),
+    # 療程銷售路由
+    ("sales", "app.routes.therapy_sell", "therapy_sell", "/api/therapy-sell"),
+    # 購物車報價路由
+    ("sales", "app.routes.pricing", "pricing_bp", "/api/pricing"),
+    # 庫存路由
+    ("inventory", "app.routes.inventory", "inventory_bp", "/api/inventory"),
+    # 健康檢查路由
+    ("health", "app.routes.health_check", "health_check_bp", "/api/health-check"),
+    # 淨化健康紀錄路由
+    ("health", "app.routes.pure_medical_record", "pure_medical_bp", "/api/pure-medical-record"),
+    # 銷售單路由（藍圖本身已帶 url_prefix）
+    ("sales", "app.routes.sales_order_routes", "sales_order_bp", None),
+    # 報表路由
+    ("reports", "app.routes.report", "report_bp", "/api/reports"),
+    # 管理員請求剖析結果
+    ("core", "app.routes.profiling", "profiling_bp", "/api/admin"),
+]
+FEATURES = tuple(dict.fromkeys(feature for feature, *_ in BLUEPRINTS))
+
+
+def _enabled_features(features=None):
+    """功能組：參數優先，其次為 APP_FEATURES 環境變數（逗號分隔），預設全部啟用。"""
+    if features is None:
+        raw = os.getenv("APP_FEATURES", "")
+        features = [part.strip() for part in raw.split(",") if part.strip()] or FEATURES
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"未知的功能組: {', '.join(sorted(unknown))}")
+    return set(features)
+
+
+def register_blueprints(app, features=None):
+    enabled = _enabled_features(features)
+    for feature, module_name, attribute, url_prefix in BLUEPRINTS:
+        if feature not in enabled:
+            continue
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        if url_prefix:
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+        else:
+            app.register_blueprint(blueprint)
+
+
+def create_app(features=None):
     app = Flask(__name__)
+    init_json_provider(app, JSON_ENCODER)
+    if METRICS_ENABLED:
+        # 最先註冊，after_request 最後執行，延遲才會包含壓縮等處理
+        init_metrics(app, METRICS_TOKEN)
+    if PROFILER_ENABLED:
+        init_profiler(app, PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_KEEP)
+    # 在 metrics 之後包裝 pymysql.connect，逾時的查詢仍會計入查詢耗時
+    init_query_budget(app)
 
     # 設定 CORS，允許所有來源的跨域請求
     CORS(app, supports_credentials=True)
@@ -35,10 +104,11 @@ def create_app():
             response.headers.set('Access-Control-Allow-Origin', '*')
         
         # 添加其他 CORS 標頭
-        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Store-ID, X-Store-Level, Accept, Origin')
+        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Store-ID, X-Store-Level, Accept, Origin, If-None-Match, X-Profile')
         response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         response.headers.set('Access-Control-Max-Age', '600')
         response.headers.set('Access-Control-Allow-Credentials', 'true')
+        response.headers.set('Access-Control-Expose-Headers', 'ETag, X-Profile-ID, Retry-After')
         
         # 確保響應類型
         if request.method == 'OPTIONS':
@@ -57,44 +127,17 @@ def create_app():
         else:
             response.headers.set('Access-Control-Allow-Origin', '*')
         
-        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Store-ID, X-Store-Level, Accept, Origin')
+        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Store-ID, X-Store-Level, Accept, Origin, If-None-Match, X-Profile')
         response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         response.headers.set('Access-Control-Max-Age', '600')
         response.headers.set('Access-Control-Allow-Credentials', 'true')
         return response
 
-    # 註冊路由 - 確保 URL 前綴沒有尾部斜杠
-    app.register_blueprint(therapy_bp, url_prefix='/api/therapy')
-    app.register_blueprint(member_bp, url_prefix='/api/member')
-    app.register_blueprint(medical_bp, url_prefix='/api/medical-record')
-    app.register_blueprint(login_bp, url_prefix='/api/login')
-    app.register_blueprint(stress_test, url_prefix='/api/stress-test')
-    app.register_blueprint(staff_bp, url_prefix='/api/staff')
-    app.register_blueprint(product_bundle_bp, url_prefix='/api/product-bundles')
-    app.register_blueprint(therapy_bundle_bp, url_prefix='/api/therapy-bundles')
-    app.register_blueprint(product_bp, url_prefix='/api/product')
-    app.register_blueprint(store_bp, url_prefix='/api/stores')
-    app.register_blueprint(items_bp, url_prefix='/api/items')
-    app.register_blueprint(category_bp, url_prefix='/api/categories')
+    # 大型列表回應依 Accept-Encoding 壓縮
+    init_compression(app, RESPONSE_COMPRESS_MIN_BYTES, RESPONSE_COMPRESS_LEVEL)
 
-    # 註冊產品銷售路由
-    from app.routes.product_sell import product_sell_bp
-    app.register_blueprint(product_sell_bp, url_prefix='/api/product-sell')
-    
-    # 註冊療程銷售路由
-    app.register_blueprint(therapy_sell, url_prefix='/api/therapy-sell')
-    
-    # 註冊庫存路由
-    app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
-    
-    # 註冊健康檢查路由
-    app.register_blueprint(health_check_bp, url_prefix='/api/health-check')
-    
-    # 註冊淨化健康紀錄路由
-    app.register_blueprint(pure_medical_bp, url_prefix='/api/pure-medical-record')
-
-    # 銷售單路由
-    app.register_blueprint(sales_order_bp)
+    # 註冊路由 - 確保 URL 前綴沒有尾部斜杠
+    register_blueprints(app, features)
 
     # 添加根路徑的處理函數
     @app.route('/', methods=['GET', 'OPTIONS'])
@@ -0,0 +1,91 @@
+# server/app/compression.py
+"""
+回應壓縮：依 Accept-Encoding 協商 brotli（有安裝 brotli 套件時）或 gzip，
+只壓縮超過門檻大小的 JSON / 文字回應。串流回應與已編碼的回應不處理。
+"""
+import gzip
+
+from flask import request
+
+try:  # brotli 為選用相依套件
+    import brotli
+except ImportError:  # pragma: no cover - 依環境而定
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+def _accepted_encodings(header: str | None) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def choose_encoding(header: str | None, brotli_available: bool | None = None) -> str | None:
+    """依 Accept-Encoding 選擇 "br"、"gzip" 或 None（不壓縮）。"""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_q:
+            best, best_q = encoding, quality
+    return best
+
+
+def compress_body(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(max(level, 0), 11))
+    return gzip.compress(data, compresslevel=min(max(level, 1), 9), mtime=0)
+
+
+def init_compression(app, min_size: int = 1024, level: int = 5):
+    """註冊 after_request：大於 min_size 位元組的回應才壓縮。min_size < 0 代表停用。"""
+    if min_size < 0:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if not encoding:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(compress_body(data, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        return response
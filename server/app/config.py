@@ -31,3 +31,90 @@ if not JWT_SECRET_KEY:
 
 # JWT過期時間，默認1天（86400秒）
 JWT_EXPIRATION = int(os.getenv("JWT_EXPIRATION", 86400))
+
+# 會員總覽 (/api/member/<id>/overview) 快取與並行設定
+MEMBER_OVERVIEW_CACHE_TTL = int(os.getenv("MEMBER_OVERVIEW_CACHE_TTL", 300))
+MEMBER_OVERVIEW_CACHE_SIZE = int(os.getenv("MEMBER_OVERVIEW_CACHE_SIZE", 1024))
+MEMBER_OVERVIEW_WORKERS = int(os.getenv("MEMBER_OVERVIEW_WORKERS", 1))
+
+# 已驗證 JWT 的快取筆數（token 摘要 → claims），0 表示停用
+JWT_VERIFY_CACHE_SIZE = int(os.getenv("JWT_VERIFY_CACHE_SIZE", 1024))
+
+# API 回應 JSON 編碼器：auto（有 orjson 時使用）、orjson、stdlib
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+# 回應大於此位元組數才壓縮（gzip / brotli），設為 -1 停用
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+RESPONSE_COMPRESS_LEVEL = int(os.getenv("RESPONSE_COMPRESS_LEVEL", 5))
+
+# NDJSON 串流模式每次自伺服器端游標讀取的筆數
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", 500))
+
+# /metrics（Prometheus 文字格式）；預設關閉，需帶 Authorization: Bearer <METRICS_TOKEN>。
+# 未設定 METRICS_TOKEN 時不註冊 /metrics（端點清單、耗時與連線池狀態不公開）
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# 管理員請求剖析（X-Profile: 1 或 ?__profile=1）
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() not in ("0", "false", "no")
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+
+# 銷售 / 療程紀錄 / 庫存明細列表預設只讀取最近 N 天（對應年度分割區）；
+# 請求帶 ?range=all 或 ?since=YYYY-MM-DD 可覆寫，0 表示預設讀取完整歷史。
+# 前端尚未提供 range / since 的操作，預設維持完整歷史；前端支援後再設為 365 等值
+SALES_RECENT_DAYS = int(os.getenv("SALES_RECENT_DAYS", 0))
+
+# 唯讀複本：設定 DB_REPLICA_HOST 後，匯出與報表改由複本讀取（列表與搜尋仍讀主庫）；
+# 未設定的連線參數沿用主庫。複本延遲超過 REPLICA_MAX_LAG_SECONDS、無法連線或
+# 讀不到複寫狀態（帳號需 REPLICATION CLIENT 權限）時自動改讀主庫。
+REPLICA_DB_CONFIG = None
+if os.getenv("DB_REPLICA_HOST"):
+    REPLICA_DB_CONFIG = {
+        **DB_CONFIG,
+        "host": os.getenv("DB_REPLICA_HOST"),
+        "port": int(os.getenv("DB_REPLICA_PORT", DB_CONFIG["port"])),
+        "user": os.getenv("DB_REPLICA_USER", DB_CONFIG["user"]),
+        "password": os.getenv("DB_REPLICA_PASSWORD", DB_CONFIG["password"]),
+        "database": os.getenv("DB_REPLICA_DATABASE", DB_CONFIG["database"]),
+    }
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 30))
+# 複本狀態的檢查間隔（秒）；判定不可用後在此期間內直接讀主庫
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 10))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))
+
+# 查詢時間預算（毫秒）：依端點類別以 MAX_EXECUTION_TIME 限制 SELECT，GET 請求另設驅動程式讀取逾時；
+# 超過時回傳 504 並附 Retry-After。0 表示該類別不限制
+QUERY_BUDGET_INTERACTIVE_MS = int(os.getenv("QUERY_BUDGET_INTERACTIVE_MS", 5000))
+QUERY_BUDGET_REPORT_MS = int(os.getenv("QUERY_BUDGET_REPORT_MS", 30000))
+QUERY_BUDGET_EXPORT_MS = int(os.getenv("QUERY_BUDGET_EXPORT_MS", 120000))
+# 每個 worker 同時執行的報表 / 匯出請求上限，額滿時回傳 503；0 表示不限制
+QUERY_BUDGET_REPORT_SLOTS = int(os.getenv("QUERY_BUDGET_REPORT_SLOTS", 4))
+QUERY_BUDGET_EXPORT_SLOTS = int(os.getenv("QUERY_BUDGET_EXPORT_SLOTS", 2))
+QUERY_RETRY_AFTER_SECONDS = int(os.getenv("QUERY_RETRY_AFTER_SECONDS", 30))
+
+# 相同參數的昂貴讀取（組合列表、療程方案…）同時進行時只執行一次，其餘請求共用結果
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() not in ("0", "false", "no")
+# 等待執行中查詢的上限（秒），逾時則自行查詢
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 60))
+
+# 分店、員工、分類、會員身份別等參考資料在記憶體中的版本檢查間隔（秒）；
+# 本 worker 的寫入會立即失效，其他 worker 的寫入最多延遲此秒數生效
+REFERENCE_DATA_CHECK_INTERVAL = float(os.getenv("REFERENCE_DATA_CHECK_INTERVAL", 2))
+
+# 價格矩陣（產品、療程、組合的各身份別售價與組合內容）在記憶體中的版本檢查間隔（秒）；
+# 報價依此間隔檢查，銷售寫入每次都會核對版本
+PRICING_CHECK_INTERVAL = float(os.getenv("PRICING_CHECK_INTERVAL", 2))
+
+# 補貨建議（refresh_reorder.py）：以最近 REORDER_WINDOW_DAYS 天的 OUTBOUND 出貨計算日均量與波動，
+# 動態安全庫存 = 前置天數內的平均需求 + z × 標準差 × √前置天數，
+# 補貨目標 = (前置天數 + 檢視週期) 內的平均需求 + 對應的安全量
+REORDER_WINDOW_DAYS = int(os.getenv("REORDER_WINDOW_DAYS", 56))
+REORDER_LEAD_TIME_DAYS = int(os.getenv("REORDER_LEAD_TIME_DAYS", 7))
+REORDER_REVIEW_DAYS = int(os.getenv("REORDER_REVIEW_DAYS", 7))
+REORDER_SERVICE_Z = float(os.getenv("REORDER_SERVICE_Z", 1.65))
+# 每次刷新重算上次刷新當日起、且至少回溯此分鐘數所涵蓋日期的出貨彙總，
+# 讓晚提交的異動與銷售退回（以原單號寫回的 INBOUND）都能計入
+REORDER_LOOKBACK_MINUTES = int(os.getenv("REORDER_LOOKBACK_MINUTES", 60))
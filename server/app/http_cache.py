@@ -0,0 +1,76 @@
+# server/app/http_cache.py
+"""
+條件式 GET：以相關資料表的版本號 + 呼叫者的店家 / 權限計算 ETag。
+If-None-Match 相符時直接回傳 304，不執行路由的查詢。
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+from app.metrics import record_cache
+from app.middleware import get_auth_context
+from app.models.data_version_model import get_table_versions
+
+
+def compute_etag(path: str, query: list, versions: dict, scope: tuple) -> str:
+    parts = [path, repr(sorted(query)), repr(sorted(versions.items())), repr(scope)]
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # 比對時忽略弱驗證前綴
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def conditional_get(*tables):
+    """
+    放在 auth_required / login_required 之後使用：
+        @auth_required
+        @conditional_get("store", "store_account")
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != "GET":
+                return f(*args, **kwargs)
+            try:
+                versions = get_table_versions(tables)
+            except Exception as e:
+                print(f"讀取資料版本失敗，略過 ETag: {e}")
+                versions = None
+            if versions is None:
+                return f(*args, **kwargs)
+
+            ctx = get_auth_context()
+            scope = (ctx.store_id, ctx.store_level, ctx.permission, ctx.store_type)
+            etag = compute_etag(request.path, list(request.args.items(multi=True)), versions, scope)
+
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                record_cache("etag", hits=1)
+                response = make_response("", 304)
+            else:
+                record_cache("etag", misses=1)
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,97 @@
+# server/app/json_provider.py
+"""
+API 回應的 JSON 編碼器。
+
+Flask 預設的 DefaultJSONProvider 會把 Decimal 轉成字串、date 轉成 HTTP 日期格式，
+因此過去各 model 逐列手動轉換。這裡統一處理：
+  * Decimal  -> float
+  * date / datetime / time -> ISO 8601（YYYY-MM-DD、YYYY-MM-DDTHH:MM:SS）
+  * timedelta（MySQL TIME 欄位）-> "HH:MM:SS"
+安裝 orjson 時使用 orjson 編碼，否則退回標準函式庫 json。
+JSON_ENCODER 設定可指定 "auto"（預設）、"orjson" 或 "stdlib"。
+"""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:  # orjson 為選用相依套件
+    import orjson
+except ImportError:  # pragma: no cover - 依環境而定
+    orjson = None
+
+
+def _encode_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        total = int(value.total_seconds())
+        sign = "-" if total < 0 else ""
+        hours, rest = divmod(abs(total), 3600)
+        minutes, seconds = divmod(rest, 60)
+        return f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """以 orjson（若可用）輸出 UTF-8 JSON，並內建 Decimal / 日期支援。"""
+
+    ensure_ascii = False
+    sort_keys = False
+    encoder = "auto"
+
+    @property
+    def use_orjson(self) -> bool:
+        return orjson is not None and self.encoder in ("auto", "orjson")
+
+    def dump_bytes(self, obj) -> bytes:
+        if self.use_orjson:
+            try:
+                return orjson.dumps(
+                    obj,
+                    default=_encode_default,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                )
+            except TypeError:
+                # 例如超過 64 位元的整數，交給標準函式庫處理
+                pass
+        return self._stdlib_dumps(obj).encode("utf-8")
+
+    def _stdlib_dumps(self, obj, **kwargs) -> str:
+        kwargs.setdefault("default", _encode_default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return self._stdlib_dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj), mimetype=self.mimetype)
+
+
+def init_json_provider(app, encoder: str = "auto"):
+    if encoder not in ("auto", "orjson", "stdlib"):
+        raise ValueError(f"未知的 JSON_ENCODER: {encoder}")
+    if encoder == "orjson" and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson 但未安裝 orjson")
+    provider = FastJSONProvider(app)
+    provider.encoder = encoder
+    app.json = provider
+    return provider
@@ -0,0 +1,279 @@
+# server/app/metrics.py
+"""
+行程內的請求 / 資料庫 / 快取指標，並以 Prometheus 文字格式輸出於 /metrics。
+
+* ipn_http_requests_total / ipn_http_request_errors_total / ipn_http_request_duration_seconds
+  以路由規則、HTTP 方法、store_id、store_level 為標籤（店家資訊取自本次請求的 AuthContext）。
+* ipn_db_connections_*：各 model 每次呼叫都會自行連線，因此以連線建立次數、
+  目前開啟中的連線數與連線耗時代替連線池指標；ipn_db_query_duration_seconds 為各路由的查詢耗時。
+* ipn_cache_requests_total / ipn_cache_hit_ratio：JWT 驗證、會員總覽與 ETag 的命中率。
+
+指標只存在於目前的行程中；以多個 worker 部署時每個 worker 需分別抓取。
+"""
+import threading
+import time
+
+import pymysql
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HELP = {
+    "ipn_http_requests_total": ("counter", "HTTP requests by route"),
+    "ipn_http_request_errors_total": ("counter", "HTTP requests answered with status >= 500"),
+    "ipn_http_request_duration_seconds": ("histogram", "HTTP request latency by route"),
+    "ipn_db_connections_opened_total": ("counter", "Database connections opened"),
+    "ipn_db_connections_in_use": ("gauge", "Database connections currently open"),
+    "ipn_db_connect_duration_seconds": ("histogram", "Time spent opening database connections"),
+    "ipn_db_query_duration_seconds": ("histogram", "Database query latency by route"),
+    "ipn_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "ipn_cache_hit_ratio": ("gauge", "Cache hit ratio since process start"),
+}
+
+
+def _label_key(labels: dict | None) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    escaped = []
+    for name, value in items:
+        text = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{text}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._gauges: dict[tuple, float] = {}
+        self._histograms: dict[tuple, list] = {}
+
+    def inc(self, name: str, labels: dict | None = None, value: float = 1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_gauge(self, name: str, value: float, labels: dict | None = None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: dict | None = None, buckets=DEFAULT_BUCKETS):
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [tuple(buckets), [0] * len(buckets), 0.0, 0]
+            bounds, counts, _, _ = entry
+            for index, bound in enumerate(bounds):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            entry[2] += value
+            entry[3] += 1
+
+    def counter_value(self, name: str, labels: dict | None = None) -> float:
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def _cache_ratios(self) -> dict:
+        totals: dict[str, list] = {}
+        for (name, key), value in self._counters.items():
+            if name != "ipn_cache_requests_total":
+                continue
+            labels = dict(key)
+            bucket = totals.setdefault(labels.get("cache", ""), [0, 0])
+            bucket[0 if labels.get("result") == "hit" else 1] += value
+        return {
+            ("ipn_cache_hit_ratio", (("cache", cache),)): hits / (hits + misses)
+            for cache, (hits, misses) in totals.items()
+            if hits + misses
+        }
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            gauges.update(self._cache_ratios())
+            histograms = {key: (bounds, list(counts), total, count)
+                          for key, (bounds, counts, total, count) in self._histograms.items()}
+
+        lines: list[str] = []
+        names = sorted({name for name, _ in list(counters) + list(gauges) + list(histograms)})
+        for name in names:
+            kind, help_text = _HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, key), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for (metric, key), value in sorted(gauges.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for (metric, key), (bounds, counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(bounds, counts):
+                    cumulative += bucket_count
+                    le = (("le", _format_value(float(bound))),)
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                lines.append(f'{name}_bucket{_format_labels(key, (("le", "+Inf"),))} {count}')
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0):
+    """記錄快取命中 / 未命中次數。"""
+    if hits:
+        registry.inc("ipn_cache_requests_total", {"cache": cache, "result": "hit"}, hits)
+    if misses:
+        registry.inc("ipn_cache_requests_total", {"cache": cache, "result": "miss"}, misses)
+
+
+def _current_route() -> str:
+    try:
+        rule = request.url_rule
+    except RuntimeError:
+        # 不在請求中（例如背景批次作業）
+        return "-"
+    return rule.rule if rule is not None else "unmatched"
+
+
+# --- 資料庫連線與查詢 ---
+_original_connect = None
+_timed_cursor_classes: dict[type, type] = {}
+# 每次查詢後呼叫 listener(query, args, elapsed)，供請求剖析器（app.profiler）收集 SQL 明細
+_query_listeners: list = []
+
+
+def add_query_listener(listener):
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+
+
+def remove_query_listener(listener):
+    if listener in _query_listeners:
+        _query_listeners.remove(listener)
+
+
+def _timed_cursor_class(base: type) -> type:
+    cls = _timed_cursor_classes.get(base)
+    if cls is None:
+        def execute(self, query, args=None):
+            started = time.perf_counter()
+            try:
+                return base.execute(self, query, args)
+            finally:
+                elapsed = time.perf_counter() - started
+                registry.observe("ipn_db_query_duration_seconds", elapsed, {"route": _current_route()})
+                for listener in _query_listeners:
+                    listener(query, args, elapsed)
+
+        cls = type(f"Timed{base.__name__}", (base,), {"execute": execute})
+        _timed_cursor_classes[base] = cls
+    return cls
+
+
+def install_db_instrumentation():
+    """
+    包裝 pymysql.connect：計算連線數與連線 / 查詢耗時。
+    各 model 皆以 pymysql.connect(...) 於呼叫時取得連線，因此不需修改 model。
+    """
+    global _original_connect
+    if _original_connect is not None:
+        return
+    _original_connect = pymysql.connect
+
+    def instrumented_connect(*args, **kwargs):
+        started = time.perf_counter()
+        conn = _original_connect(*args, **kwargs)
+        registry.observe("ipn_db_connect_duration_seconds", time.perf_counter() - started)
+        registry.inc("ipn_db_connections_opened_total")
+        registry.add_gauge("ipn_db_connections_in_use", 1)
+
+        conn.cursorclass = _timed_cursor_class(conn.cursorclass)
+        original_close = conn.close
+        state = {"open": True}
+
+        def close():
+            if state["open"]:
+                state["open"] = False
+                registry.add_gauge("ipn_db_connections_in_use", -1)
+            return original_close()
+
+        conn.close = close
+        return conn
+
+    pymysql.connect = instrumented_connect
+
+
+def uninstall_db_instrumentation():
+    global _original_connect
+    if _original_connect is not None:
+        pymysql.connect = _original_connect
+        _original_connect = None
+
+
+# --- Flask 整合 ---
+def _request_labels() -> dict:
+    ctx = g.get("_auth_context")
+    return {
+        "route": _current_route(),
+        "method": request.method,
+        "store_id": str(ctx.store_id) if ctx is not None and ctx.store_id is not None else "",
+        "store_level": (ctx.store_level or "") if ctx is not None else "",
+    }
+
+
+def init_metrics(app, token: str = ""):
+    install_db_instrumentation()
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        labels = _request_labels()
+        registry.observe("ipn_http_request_duration_seconds", time.perf_counter() - started, labels)
+        registry.inc("ipn_http_requests_total", {**labels, "status": str(response.status_code)})
+        if response.status_code >= 500:
+            registry.inc("ipn_http_request_errors_total", labels)
+        return response
+
+    if not token:
+        print("未設定 METRICS_TOKEN，不註冊 /metrics")
+        return
+
+    @app.route("/metrics", methods=["GET"], endpoint="metrics")
+    def metrics():
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
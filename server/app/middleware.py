@@ -1,9 +1,14 @@
 # server\app\middleware.py
 from flask import request, jsonify, g
 from functools import wraps
+from collections import OrderedDict
+import hashlib
+import threading
+import time
 import jwt
 import datetime
-from app.config import JWT_SECRET_KEY
+from app.config import JWT_SECRET_KEY, JWT_VERIFY_CACHE_SIZE
+from app.metrics import record_cache
 
 
 def _as_int(value):
@@ -15,96 +20,169 @@ def _as_int(value):
     except (TypeError, ValueError):
         return value
 
+
+# --- 已驗證 token 的 LRU 快取：SHA-256(token) -> (claims, exp) ---
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def verify_token(token: str) -> dict:
+    """
+    驗證 JWT 並回傳 claims。相同 token 在到期前只做一次 HMAC 驗證；
+    過期或無效時拋出與 jwt.decode 相同的例外。
+    快取的 claims 在多個請求間共用，回傳的是複本，呼叫端（例如 g.user）修改不會互相影響。
+    """
+    digest = _token_digest(token)
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            claims, exp = cached
+            if exp is None or exp > now:
+                _token_cache.move_to_end(digest)
+                record_cache("jwt", hits=1)
+                return dict(claims)
+            del _token_cache[digest]
+
+    record_cache("jwt", misses=1)
+
+    claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+    if JWT_VERIFY_CACHE_SIZE > 0:
+        exp = claims.get("exp")
+        with _token_cache_lock:
+            _token_cache[digest] = (claims, float(exp) if exp is not None else None)
+            _token_cache.move_to_end(digest)
+            while len(_token_cache) > JWT_VERIFY_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return dict(claims)
+
+
+def clear_token_cache():
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+class AuthContext:
+    """
+    單一請求的認證資訊，由 get_auth_context() 在每個請求建立一次。
+    source 為 "token"（Authorization: Bearer）、"headers"（舊版 X-Store-* 標頭）或 None。
+    """
+
+    FIELDS = ("store_id", "store_level", "store_name", "staff_id", "permission", "store_type")
+
+    def __init__(self, source=None, claims=None, error=None, expired=False,
+                 token_error=False, malformed_token=False):
+        self.source = source
+        self.claims = claims or {}
+        self.error = error
+        self.expired = expired
+        self.token_error = token_error
+        self.malformed_token = malformed_token
+        self.store_id = _as_int(self.claims.get("store_id"))
+        self.store_level = self.claims.get("store_level")
+        self.store_name = self.claims.get("store_name")
+        self.staff_id = _as_int(self.claims.get("staff_id"))
+        self.permission = self.claims.get("permission")
+        self.store_type = self.claims.get("store_type")
+
+    @property
+    def has_store(self) -> bool:
+        return bool(self.store_id and self.store_level)
+
+    @property
+    def is_admin(self) -> bool:
+        # 舊版 X-Store-* 標頭可任意偽造，只有已驗證的 token 能取得管理員身分
+        if self.source != "token":
+            return False
+        return self.store_level in ("總店", "admin") or self.permission == "admin"
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def apply_to_request(self):
+        """沿用既有路由讀取 request.store_id 等屬性的方式。"""
+        for field in self.FIELDS:
+            setattr(request, field, getattr(self, field))
+        if self.source:
+            g.user = self.claims
+
+
+def _bearer_token():
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return None, False
+    parts = auth_header.split(' ')
+    if parts[0] != 'Bearer' or len(parts) < 2:
+        return None, True
+    return parts[1], True
+
+
+def get_auth_context() -> AuthContext:
+    """取得（必要時建立）本次請求的 AuthContext。"""
+    ctx = g.get("_auth_context")
+    if ctx is not None:
+        return ctx
+
+    token, has_header = _bearer_token()
+    if token:
+        try:
+            ctx = AuthContext("token", verify_token(token))
+        except jwt.ExpiredSignatureError as e:
+            ctx = AuthContext(error=str(e), expired=True)
+        except Exception as e:
+            ctx = AuthContext(error=str(e), token_error=True)
+    else:
+        # 沒有 Bearer token 時使用舊的 X-Store-* 標頭
+        headers = {
+            "store_id": request.headers.get('X-Store-ID'),
+            "store_level": request.headers.get('X-Store-Level'),
+            "store_name": request.headers.get('X-Store-Name'),
+            "permission": request.headers.get('X-Permission'),
+            "staff_id": request.headers.get('X-Staff-ID'),
+            "store_type": request.headers.get('X-Store-Type'),
+        }
+        ctx = AuthContext("headers", headers, malformed_token=has_header)
+
+    g._auth_context = ctx
+    return ctx
+
+
 def auth_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = None
-        
-        # 從Authorization標頭中獲取token
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-        
-        if not token:
-            # 嘗試從舊的標頭取得store_id
-            store_id = _as_int(request.headers.get('X-Store-ID'))
-            store_level = request.headers.get('X-Store-Level')
-            store_name = request.headers.get('X-Store-Name')
-            permission = request.headers.get('X-Permission')
-            staff_id = _as_int(request.headers.get('X-Staff-ID'))
-            store_type = request.headers.get('X-Store-Type')
-
-            if not store_id or not store_level:
-                return jsonify({"error": "認證失敗，請重新登入"}), 401
-
-            # 設置到request以便後續使用
-            request.store_id = store_id
-            request.store_level = store_level
-            request.store_name = store_name
-            request.permission = permission
-            request.staff_id = staff_id
-            request.store_type = store_type
-        else:
-            try:
-                # 驗證JWT token
-                payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-
-                # 可以從payload中獲取store_id和store_level
-                store_id = _as_int(payload.get('store_id'))
-                store_level = payload.get('store_level')
-                store_name = payload.get('store_name')
-                permission = payload.get('permission')
-                staff_id = _as_int(payload.get('staff_id'))
-                store_type = payload.get('store_type')
-
-                if not store_id or not store_level:
-                    return jsonify({"error": "無效的認證信息"}), 401
-
-                # 將store信息添加到request對象以供後續使用
-                request.store_id = store_id
-                request.store_level = store_level
-                request.store_name = store_name
-                request.permission = permission
-                request.staff_id = staff_id
-                request.store_type = store_type
-
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "認證已過期，請重新登入"}), 401
-            except (jwt.InvalidTokenError, Exception) as e:
-                return jsonify({"error": f"無效的認證: {str(e)}"}), 401
-        
+        ctx = get_auth_context()
+        if ctx.expired:
+            return jsonify({"error": "認證已過期，請重新登入"}), 401
+        if ctx.error:
+            return jsonify({"error": f"無效的認證: {ctx.error}"}), 401
+        if not ctx.has_store:
+            if ctx.source == "token":
+                return jsonify({"error": "無效的認證信息"}), 401
+            return jsonify({"error": "認證失敗，請重新登入"}), 401
+
+        # 將store信息添加到request對象以供後續使用
+        ctx.apply_to_request()
         return f(*args, **kwargs)
     return decorated_function
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # 優先使用 JWT token 內的資訊進行驗證
-        user = get_user_from_token(request)
-        if user:
-            store_id = user.get('store_id')
-            store_level = user.get('store_level')
-            permission = user.get('permission')
-            print(f"[DEBUG] admin_required token_user={user}")
-        else:
-            # 回退到標頭資訊（舊版客戶端）
-            store_id = request.headers.get('X-Store-ID')
-            store_level = request.headers.get('X-Store-Level')
-            permission = request.headers.get('X-Permission')
-            print(f"[DEBUG] admin_required header store_id={store_id}, store_level={store_level}, permission={permission}")
-
-        if not store_id or not store_level:
+        # 管理員權限只認已驗證的 JWT；舊版標頭僅供一般讀取使用
+        ctx = get_auth_context()
+        if ctx.error or ctx.source != "token" or not ctx.has_store:
             return jsonify({"error": "認證失敗，請重新登入"}), 401
 
         # 只有總店或具有 admin 權限的使用者可通過
-        if store_level not in ["總店", "admin"] and permission != "admin":
+        if not ctx.is_admin:
             return jsonify({"error": "需要管理員權限"}), 403
 
         # 將驗證後資訊附加到 request 方便後續使用
-        request.store_id = store_id
-        request.store_level = store_level
-        request.permission = permission
-
+        ctx.apply_to_request()
         return f(*args, **kwargs)
     return decorated_function
 
@@ -112,79 +190,36 @@ def admin_required(f):
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = None
-        # 從 Authorization header 獲取 token
-        if 'Authorization' in request.headers:
-            # 格式應為 'Bearer <token>'
-            try:
-                token = request.headers['Authorization'].split(" ")[1]
-            except IndexError:
-                return jsonify({"error": "無效的 Token 格式"}), 401
-
-        if not token:
-            return jsonify({"error": "缺少授權 Token"}), 401
-
-        try:
-            # 解碼 JWT，獲取 payload
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-            # 將使用者資訊存入 Flask 的 g 物件，g 在單次請求中是全域的
-            g.user = payload
-        except jwt.ExpiredSignatureError:
+        ctx = get_auth_context()
+        if ctx.expired:
             return jsonify({"error": "Token 已過期"}), 401
-        except jwt.InvalidTokenError:
+        if ctx.malformed_token:
+            return jsonify({"error": "無效的 Token 格式"}), 401
+        if ctx.token_error:
             return jsonify({"error": "無效的 Token"}), 401
-        
+        if ctx.source != "token":
+            return jsonify({"error": "缺少授權 Token"}), 401
+
+        # 將使用者資訊存入 Flask 的 g 物件，g 在單次請求中是全域的
+        ctx.apply_to_request()
         return f(*args, **kwargs)
     return decorated_function
 
 def get_user_from_token(request):
     """
-    從 request 中的 JWT token 提取用戶信息
+    從本次請求的 AuthContext 提取用戶信息
     返回包含 store_id, store_level, store_name, staff_id 等信息的字典
     """
-    token = None
-    user_info = {}
-    
-    # 從Authorization標頭中獲取token
-    auth_header = request.headers.get('Authorization')
-    if auth_header and auth_header.startswith('Bearer '):
-        token = auth_header.split(' ')[1]
-    
-    if not token:
-        return {
-            'store_id': _as_int(getattr(request, 'store_id', None)),
-            'store_level': getattr(request, 'store_level', None),
-            'store_name': getattr(request, 'store_name', None),
-            'staff_id': _as_int(getattr(request, 'staff_id', None)),
-            'permission': getattr(request, 'permission', None),
-            'store_type': getattr(request, 'store_type', None),
-        }
-    
-    try:
-        # 驗證JWT token
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-        
-        # 從payload中獲取用戶信息
-        user_info = {
-            'store_id': _as_int(payload.get('store_id')),
-            'store_level': payload.get('store_level'),
-            'store_name': payload.get('store_name'),
-            'staff_id': _as_int(payload.get('staff_id')),
-            'permission': payload.get('permission'),
-            'store_type': payload.get('store_type'),
-        }
-    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, Exception):
-        # 如果token無效或過期，回退到由 auth_required 設置的請求屬性
-        user_info = {}
-
-    if not user_info:
-        user_info = {
-            'store_id': _as_int(getattr(request, 'store_id', None)),
-            'store_level': getattr(request, 'store_level', None),
-            'store_name': getattr(request, 'store_name', None),
-            'staff_id': _as_int(getattr(request, 'staff_id', None)),
-            'permission': getattr(request, 'permission', None),
-            'store_type': getattr(request, 'store_type', None),
-        }
-
-    return user_info
+    ctx = get_auth_context()
+    if ctx.source == "token":
+        return ctx.as_dict()
+
+    # 沒有有效 token 時，回退到由 auth_required 設置的請求屬性
+    return {
+        'store_id': _as_int(getattr(request, 'store_id', None)),
+        'store_level': getattr(request, 'store_level', None),
+        'store_name': getattr(request, 'store_name', None),
+        'staff_id': _as_int(getattr(request, 'staff_id', None)),
+        'permission': getattr(request, 'permission', None),
+        'store_type': getattr(request, 'store_type', None),
+    }
@@ -1,5 +1,6 @@
 import pymysql
 from app.config import DB_CONFIG
+from app.models import reference_data_model
 from pymysql.cursors import DictCursor
 
 
@@ -18,6 +19,7 @@ def create_category(name: str, target_type: str):
             )
             category_id = conn.insert_id()
         conn.commit()
+        reference_data_model.invalidate("category")
         return category_id
     except Exception as e:
         conn.rollback()
@@ -28,19 +30,7 @@ def create_category(name: str, target_type: str):
 
 def get_categories(target_type: str | None = None):
     """Fetch categories, optionally filtered by target_type"""
-    conn = connect_to_db()
-    try:
-        with conn.cursor() as cursor:
-            if target_type:
-                cursor.execute(
-                    "SELECT * FROM category WHERE target_type=%s ORDER BY (name='未歸類'), name",
-                    (target_type,),
-                )
-            else:
-                cursor.execute("SELECT * FROM category ORDER BY (name='未歸類'), name")
-            return cursor.fetchall()
-    finally:
-        conn.close()
+    return reference_data_model.categories(target_type)
 
 
 def delete_category(category_id: int):
@@ -92,6 +82,7 @@ def delete_category(category_id: int):
 
             cursor.execute("DELETE FROM category WHERE category_id=%s", (category_id,))
         conn.commit()
+        reference_data_model.invalidate("category")
     except Exception as e:
         conn.rollback()
         raise e
@@ -0,0 +1,99 @@
+# server/app/models/data_version_model.py
+import time
+
+import pymysql
+from app.config import DB_CONFIG
+from pymysql.cursors import DictCursor
+
+# 由 08_data_version.sql 的觸發器維護版本的資料表。
+# member / master_stock / inventory 寫入頻繁，單一版本列會讓所有交易排隊，因此不追蹤
+VERSIONED_TABLES = (
+    "store", "store_account", "staff", "category",
+    "product", "product_category", "product_price_tier",
+    "therapy", "therapy_category", "therapy_price_tier",
+    "product_bundles", "product_bundle_items", "product_bundle_category", "product_bundle_price_tier",
+    "therapy_bundles", "therapy_bundle_items", "therapy_bundle_category", "therapy_bundle_price_tier",
+    "master_product", "product_variant",
+)
+
+
+def connect_to_db():
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+# 檢查失敗時不能記住 False：ETag / 304 與參考資料、價格的版本核對都會在此 worker 停用到重啟
+_AVAILABLE_RECHECK_SECONDS = 60
+_available_state = {"available": False, "checked_at": 0.0}
+
+
+def data_version_available() -> bool:
+    """Return True once the 08_data_version migration has been applied."""
+    if _available_state["available"]:
+        return True
+    now = time.monotonic()
+    if _available_state["checked_at"] and now - _available_state["checked_at"] < _AVAILABLE_RECHECK_SECONDS:
+        return False
+    _available_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'data_version'
+                LIMIT 1
+                """
+            )
+            _available_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查 data_version 資料表失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _available_state["available"]
+
+
+def get_table_versions(tables) -> dict[str, int] | None:
+    """
+    取得指定資料表目前的版本號。
+    尚未套用遷移時回傳 None（呼叫端應略過條件式請求處理）。
+    未追蹤或尚無紀錄的資料表版本為 0。
+    """
+    tables = sorted(set(tables))
+    if not tables or not data_version_available():
+        return None
+    unknown = [table for table in tables if table not in VERSIONED_TABLES]
+    if unknown:
+        raise ValueError(f"資料表未納入版本追蹤: {', '.join(unknown)}")
+
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            placeholders = ", ".join(["%s"] * len(tables))
+            cursor.execute(
+                f"SELECT table_name, version FROM data_version WHERE table_name IN ({placeholders})",
+                tables,
+            )
+            versions = {table: 0 for table in tables}
+            for row in cursor.fetchall():
+                versions[row["table_name"]] = int(row["version"])
+            return versions
+    finally:
+        conn.close()
+
+
+def bump_table_versions(cursor, *tables):
+    """
+    在目前交易中手動遞增版本（供繞過觸發器的批次作業使用，例如 LOAD DATA 或 TRUNCATE）。
+    """
+    for table in tables:
+        cursor.execute(
+            """
+            INSERT INTO data_version (table_name, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """,
+            (table,),
+        )
@@ -1,6 +1,8 @@
 import pymysql
 import json
 from app.config import DB_CONFIG
+from app.models.replica import connect_for_read
+from app.models.member_overview_model import member_overview_changed
 
 def get_all_health_checks():
     conn = pymysql.connect(**DB_CONFIG)
@@ -268,6 +270,7 @@ def create_health_check(data):
             ))
             
             conn.commit()
+            member_overview_changed(member_id)
             
             # 獲取新插入記錄的ID
             check_id = cursor.lastrowid
@@ -369,6 +372,7 @@ def update_health_check(check_id, data):
                 cursor.execute(sql, health_check_values)
             
             conn.commit()
+            member_overview_changed(member_id)
             return True
     except Exception as e:
         conn.rollback()
@@ -382,7 +386,7 @@ def delete_health_check(check_id):
         with conn.cursor() as cursor:
             # 首先獲取關聯的 IDs
             cursor.execute("""
-            SELECT usual_sympton_and_family_history_id, micro_surgery
+            SELECT member_id, usual_sympton_and_family_history_id, micro_surgery
             FROM health_check
             WHERE health_check_id = %s
             """, (check_id,))
@@ -391,7 +395,7 @@ def delete_health_check(check_id):
             if not related_ids:
                 return False
                 
-            usual_sympton_id, micro_surgery_id = related_ids
+            member_id, usual_sympton_id, micro_surgery_id = related_ids
             
             # 刪除健康檢查記錄
             cursor.execute("DELETE FROM health_check WHERE health_check_id = %s", (check_id,))
@@ -408,6 +412,7 @@ def delete_health_check(check_id):
                 cursor.execute("DELETE FROM micro_surgery WHERE micro_surgery_id = %s", (micro_surgery_id,))
             
             conn.commit()
+            member_overview_changed(member_id)
             return True
     except Exception as e:
         conn.rollback()
@@ -416,7 +421,8 @@ def delete_health_check(check_id):
         conn.close()
 
 def get_all_health_checks_for_export():
-    conn = pymysql.connect(**DB_CONFIG)
+    # 匯出可容忍複本延遲；結果維持 tuple 列（匯出依欄位順序寫入）
+    conn = connect_for_read(cursorclass=pymysql.cursors.Cursor)
     try:
         with conn.cursor() as cursor:
             sql = """
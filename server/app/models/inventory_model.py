@@ -2,6 +2,8 @@ import pymysql
 from pymysql import MySQLError
 from functools import lru_cache
 from app.config import DB_CONFIG
+from app.models import reference_data_model
+from app.models.reorder_model import threshold_sql
 from datetime import datetime
 
 
@@ -54,7 +56,8 @@ def _normalize_date_for_sort(value):
 def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
     rows = []
     if store_id:
-        query = """
+        reorder_join, threshold, avg_demand, order_up_to = threshold_sql("mp.master_product_id", "%s")
+        query = f"""
             SELECT
                 (mp.master_product_id * 1000000 + %s) AS Inventory_ID,
                 mp.master_product_id AS Product_ID,
@@ -67,7 +70,10 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
                 0 AS StockLoan,
                 %s AS Store_ID,
                 COALESCE(st.store_name, '未指定門市') AS StoreName,
-                5 AS StockThreshold,
+                {threshold} AS StockThreshold,
+                {avg_demand} AS AvgDailyDemand,
+                GREATEST({order_up_to} - COALESCE(ms.quantity_on_hand, 0), 0) AS SuggestedReorderQty,
+                COALESCE(ms.quantity_on_hand, 0) / NULLIF({avg_demand}, 0) AS DaysOfCover,
                 COALESCE(tx.last_inbound_time, ms.updated_at) AS StockInTime,
                 tx.last_outbound_time AS LastSoldTime,
                 COALESCE(tx.total_outbound, 0) AS SoldQuantity,
@@ -75,7 +81,7 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
             FROM master_product mp
             LEFT JOIN master_stock ms
                    ON ms.master_product_id = mp.master_product_id
-                  AND ms.store_id = %s
+                  AND ms.store_id = %s{reorder_join}
             LEFT JOIN (
                 SELECT master_product_id,
                        SUM(CASE WHEN txn_type = 'INBOUND' THEN quantity ELSE 0 END) AS total_inbound,
@@ -89,7 +95,10 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
             LEFT JOIN store st ON st.store_id = %s
             WHERE mp.status = 'ACTIVE'
         """
-        params = [store_id, store_id, store_id, store_id, store_id]
+        params = [store_id, store_id, store_id]
+        if reorder_join:
+            params.append(store_id)
+        params.extend([store_id, store_id])
         if keyword:
             query += " AND (mp.name LIKE %s OR mp.master_product_code LIKE %s)"
             like = f"%{keyword}%"
@@ -98,7 +107,10 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
         cursor.execute(query, params)
         rows = cursor.fetchall()
     else:
-        query = """
+        reorder_join, threshold, avg_demand, order_up_to = threshold_sql(
+            "mp.master_product_id", "COALESCE(ms.store_id, tx.store_id)"
+        )
+        query = f"""
             SELECT
                 (mp.master_product_id * 1000000 + COALESCE(ms.store_id, 0)) AS Inventory_ID,
                 mp.master_product_id AS Product_ID,
@@ -111,7 +123,10 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
                 0 AS StockLoan,
                 COALESCE(ms.store_id, tx.store_id, 0) AS Store_ID,
                 COALESCE(st.store_name, '未指定門市') AS StoreName,
-                5 AS StockThreshold,
+                {threshold} AS StockThreshold,
+                {avg_demand} AS AvgDailyDemand,
+                GREATEST({order_up_to} - COALESCE(ms.quantity_on_hand, 0), 0) AS SuggestedReorderQty,
+                COALESCE(ms.quantity_on_hand, 0) / NULLIF({avg_demand}, 0) AS DaysOfCover,
                 COALESCE(tx.last_inbound_time, ms.updated_at) AS StockInTime,
                 tx.last_outbound_time AS LastSoldTime,
                 COALESCE(tx.total_outbound, 0) AS SoldQuantity,
@@ -130,7 +145,7 @@ def _fetch_master_inventory_rows(cursor, store_id=None, keyword=None):
                 GROUP BY master_product_id, store_id
             ) tx ON tx.master_product_id = mp.master_product_id
                AND (tx.store_id = ms.store_id OR ms.store_id IS NULL)
-            LEFT JOIN store st ON st.store_id = COALESCE(ms.store_id, tx.store_id)
+            LEFT JOIN store st ON st.store_id = COALESCE(ms.store_id, tx.store_id){reorder_join}
             WHERE mp.status = 'ACTIVE'
         """
         params = []
@@ -352,7 +367,12 @@ def get_low_stock_inventory(store_id=None):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
-            query = """
+            # 手動設定的 stock_threshold 優先，其次為依出貨速度計算的動態安全庫存
+            reorder_join, dynamic_threshold, avg_demand, order_up_to = threshold_sql("pv.master_product_id", "i.store_id")
+            if reorder_join:
+                reorder_join = " LEFT JOIN product_variant pv ON pv.variant_id = i.product_id" + reorder_join
+            threshold = f"MAX(COALESCE(i.stock_threshold, {dynamic_threshold}))"
+            query = f"""
                 SELECT
                     MAX(i.inventory_id) AS Inventory_ID,
                     p.product_id AS Product_ID,
@@ -364,7 +384,9 @@ def get_low_stock_inventory(store_id=None):
                     SUM(IFNULL(i.stock_loan, 0)) AS StockLoan,
                     MAX(i.store_id) AS Store_ID,
                     st.store_name AS StoreName,
-                    MAX(IFNULL(i.stock_threshold, 5)) AS StockThreshold,
+                    {threshold} AS StockThreshold,
+                    MAX({avg_demand}) AS AvgDailyDemand,
+                    GREATEST(MAX({order_up_to}) - SUM(i.quantity), 0) AS SuggestedReorderQty,
                     COALESCE(MAX(sales.total_sold), 0) AS SoldQuantity,
                     MAX(i.date) AS StockInTime
                 FROM inventory i
@@ -378,14 +400,17 @@ def get_low_stock_inventory(store_id=None):
                     SELECT therapy_id AS item_id, store_id, SUM(amount) AS total_sold
                     FROM therapy_sell
                     GROUP BY therapy_id, store_id
-                ) sales ON sales.item_id = i.product_id AND sales.store_id = i.store_id
+                ) sales ON sales.item_id = i.product_id AND sales.store_id = i.store_id{reorder_join}
             """
             params = []
             if store_id:
                 query += " WHERE i.store_id = %s"
                 params.append(store_id)
 
-            query += " GROUP BY p.product_id, p.name, p.code, st.store_name HAVING SUM(i.quantity) <= MAX(IFNULL(i.stock_threshold, 5)) ORDER BY (SUM(i.quantity) / MAX(IFNULL(i.stock_threshold, 5))) ASC, p.name"
+            query += (
+                f" GROUP BY p.product_id, p.name, p.code, st.store_name HAVING SUM(i.quantity) <= {threshold}"
+                f" ORDER BY (SUM(i.quantity) / {threshold}) ASC, p.name"
+            )
 
             cursor.execute(query, params)
             results = cursor.fetchall()
@@ -693,11 +718,12 @@ def get_inventory_history(store_id=None, start_date=None, end_date=None,
             if store_id:
                 txn_conditions.append("stx.store_id = %s")
                 txn_params.append(store_id)
+            # 直接比較 created_at（不包 DATE()），才能使用索引與分割區修剪
             if start_date:
-                txn_conditions.append("DATE(stx.created_at) >= %s")
+                txn_conditions.append("stx.created_at >= %s")
                 txn_params.append(start_date)
             if end_date:
-                txn_conditions.append("DATE(stx.created_at) <= %s")
+                txn_conditions.append("stx.created_at < DATE_ADD(%s, INTERVAL 1 DAY)")
                 txn_params.append(end_date)
             if derived_master_id:
                 txn_conditions.append("stx.master_product_id = %s")
@@ -907,24 +933,14 @@ def get_product_list():
 
 def get_store_list():
     """獲取所有店鋪列表（用於庫存管理）"""
-    conn = connect_to_db()
     try:
-        with conn.cursor() as cursor:
-            query = """
-                SELECT 
-                    store_id AS Store_ID, 
-                    store_name AS StoreName
-                FROM store
-                ORDER BY store_name
-            """
-            cursor.execute(query)
-            result = cursor.fetchall()
-            return result
+        return [
+            {"Store_ID": row["store_id"], "StoreName": row["store_name"]}
+            for row in reference_data_model.stores_by_name()
+        ]
     except Exception as e:
         print(f"獲取店鋪列表錯誤: {e}")
         return []
-    finally:
-        conn.close()
 
 def export_inventory_data(store_id=None):
     """匯出庫存資料，可依店鋪篩選"""
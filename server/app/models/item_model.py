@@ -1,5 +1,6 @@
 import pymysql
 from app.config import DB_CONFIG
+from app.models import pricing_model
 from pymysql.cursors import DictCursor
 
 TABLES = {
@@ -27,6 +28,8 @@ def publish_item(item_type: str, item_id: int):
                 (item_id,),
             )
         conn.commit()
+        # 上架狀態是銷售前檢查的依據，改完立即讓價格矩陣重新載入
+        pricing_model.invalidate()
     finally:
         conn.close()
 
@@ -44,5 +47,6 @@ def unpublish_item(item_type: str, item_id: int, reason: str | None = None):
                 (reason, item_id),
             )
         conn.commit()
+        pricing_model.invalidate()
     finally:
         conn.close()
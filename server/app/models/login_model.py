@@ -1,6 +1,7 @@
 # server\app\models\login_model.py
 import pymysql
 from app.config import DB_CONFIG
+from app.models import reference_data_model
 
 
 def connect_to_db():
@@ -88,18 +89,4 @@ def get_store_info(store_id):
 
 def get_all_stores():
     """獲取所有分店與其員工帳號資訊"""
-    conn = connect_to_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT s.store_id, s.store_name, s.store_location, s.store_type,
-                       st.staff_id, st.account, st.permission
-                FROM store AS s
-                LEFT JOIN staff AS st ON st.store_id = s.store_id
-                ORDER BY s.store_id ASC
-                """
-            )
-            return cursor.fetchall()
-    finally:
-        conn.close()
+    return reference_data_model.stores_with_staff()
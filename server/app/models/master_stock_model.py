@@ -1,13 +1,18 @@
 """Master stock management helpers."""
 from __future__ import annotations
 
+import secrets
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Iterable, Callable, TypeVar
+from typing import Callable, TypeVar
 
 import pymysql
 from pymysql.cursors import DictCursor
 
 from app.config import DB_CONFIG
+from app.models.reorder_model import TRANSFER_REFERENCE_PREFIX, threshold_sql
+from app.models.replica import connect_for_read
+from app.models.row_stream import stream_rows
 
 VALID_STORE_TYPES = {"DIRECT", "FRANCHISE"}
 PRICE_TABLE_CANDIDATES: tuple[str, ...] = ("store_type_price", "stock_type_price")
@@ -34,17 +39,6 @@ def _normalize_store_type(store_type: str | None) -> str:
     return upper if upper in VALID_STORE_TYPES else "DIRECT"
 
 
-def _convert_decimal_fields(rows: Iterable[dict], *fields: str) -> list[dict]:
-    converted: list[dict] = []
-    for row in rows:
-        for field in fields:
-            value = row.get(field)
-            if isinstance(value, Decimal):
-                row[field] = float(value)
-        converted.append(row)
-    return converted
-
-
 def _run_with_price_table(operation: Callable[[str], T]) -> T:
     """Execute DB operations that depend on the store-type price table name."""
     last_missing_table_error: pymysql.err.ProgrammingError | None = None
@@ -98,7 +92,7 @@ def list_master_products_for_inbound(
                 query += " ORDER BY mp.name"
                 cursor.execute(query, params)
                 rows = cursor.fetchall()
-                return _convert_decimal_fields(rows, "cost_price")
+                return list(rows)
 
             return _run_with_price_table(_execute)
     finally:
@@ -137,7 +131,7 @@ def list_master_costs(
                 query += " GROUP BY mp.master_product_id ORDER BY mp.name"
                 cursor.execute(query, params)
                 rows = cursor.fetchall()
-                return _convert_decimal_fields(rows, "direct_cost_price", "franchise_cost_price")
+                return list(rows)
 
             return _run_with_price_table(_execute)
     finally:
@@ -173,7 +167,7 @@ def list_variants_for_outbound(store_id: int | str | None, keyword: str | None =
             query += " ORDER BY mp.name, pv.variant_code"
             cursor.execute(query, params)
             rows = cursor.fetchall()
-            return _convert_decimal_fields(rows, "sale_price")
+            return list(rows)
     finally:
         conn.close()
 
@@ -182,10 +176,11 @@ def list_master_stock_summary(store_id: int | str | None, keyword: str | None =
     store_id_value = _normalize_store_id(store_id)
     if store_id_value is None:
         raise ValueError("store_id is required when querying stock")
+    reorder_join, threshold, avg_demand, order_up_to = threshold_sql("mp.master_product_id", "%s")
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
-            query = """
+            query = f"""
                 SELECT mp.master_product_id,
                        mp.master_product_code,
                        mp.name,
@@ -193,14 +188,20 @@ def list_master_stock_summary(store_id: int | str | None, keyword: str | None =
                        COALESCE(ms.quantity_on_hand, 0) AS quantity_on_hand,
                        ms.updated_at,
                        s.store_id,
-                       s.store_name
+                       s.store_name,
+                       {threshold} AS reorder_point,
+                       {avg_demand} AS avg_daily_demand,
+                       GREATEST({order_up_to} - COALESCE(ms.quantity_on_hand, 0), 0) AS suggested_qty,
+                       COALESCE(ms.quantity_on_hand, 0) / NULLIF({avg_demand}, 0) AS days_of_cover
                 FROM master_product mp
                 LEFT JOIN master_stock ms
                        ON ms.master_product_id = mp.master_product_id
                       AND ms.store_id = %s
-                LEFT JOIN store s ON s.store_id = %s
+                LEFT JOIN store s ON s.store_id = %s{reorder_join}
             """
             params: list = [store_id_value, store_id_value]
+            if reorder_join:
+                params.append(store_id_value)
             if keyword:
                 like = f"%{keyword}%"
                 query += " WHERE (mp.name LIKE %s OR mp.master_product_code LIKE %s)"
@@ -230,7 +231,7 @@ def list_variants_for_master(master_product_id: int) -> list[dict]:
                 (master_product_id,),
             )
             rows = cursor.fetchall()
-            return _convert_decimal_fields(rows, "sale_price")
+            return list(rows)
     finally:
         conn.close()
 
@@ -407,3 +408,373 @@ def ship_variant_stock(
         raise
     finally:
         conn.close()
+
+
+# InnoDB deadlock victim; the whole transfer transaction can be replayed
+ER_LOCK_DEADLOCK = 1213
+TRANSFER_DEADLOCK_RETRIES = 2
+
+
+def _new_transfer_no() -> str:
+    return f"{TRANSFER_REFERENCE_PREFIX}{datetime.now():%Y%m%d%H%M%S}-{secrets.token_hex(3).upper()}"
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def normalize_transfer_lines(lines) -> list[dict]:
+    """Validate transfer lines; each needs from/to store, a variant or master product and a positive quantity."""
+    if not isinstance(lines, list) or not lines:
+        raise ValueError("調撥明細不可為空")
+    normalized = []
+    for index, line in enumerate(lines, start=1):
+        if not isinstance(line, dict):
+            raise ValueError(f"第 {index} 筆調撥明細格式錯誤")
+        from_store_id = _to_int(line.get("from_store_id"))
+        to_store_id = _to_int(line.get("to_store_id"))
+        variant_id = _to_int(line.get("variant_id"))
+        master_product_id = _to_int(line.get("master_product_id"))
+        quantity = _to_int(line.get("quantity"))
+        if not from_store_id or not to_store_id:
+            raise ValueError(f"第 {index} 筆調撥明細缺少 from_store_id 或 to_store_id")
+        if from_store_id == to_store_id:
+            raise ValueError(f"第 {index} 筆調撥明細的調出與調入分店相同")
+        if not variant_id and not master_product_id:
+            raise ValueError(f"第 {index} 筆調撥明細需提供 variant_id 或 master_product_id")
+        if quantity is None or quantity <= 0:
+            raise ValueError(f"第 {index} 筆調撥數量必須大於 0")
+        normalized.append(
+            {
+                "from_store_id": from_store_id,
+                "to_store_id": to_store_id,
+                "variant_id": variant_id or None,
+                "master_product_id": master_product_id or None,
+                "quantity": quantity,
+            }
+        )
+    return normalized
+
+
+def transfer_deltas(lines: list[dict]) -> list[tuple[int, int, int]]:
+    """
+    Net quantity change per (master_product_id, store_id), sorted by that key.
+    Every transfer creates, locks and updates master_stock rows in this order,
+    so two transfers touching the same existing rows wait instead of deadlocking.
+    """
+    deltas: dict[tuple[int, int], int] = {}
+    for line in lines:
+        source = (line["master_product_id"], line["from_store_id"])
+        target = (line["master_product_id"], line["to_store_id"])
+        deltas[source] = deltas.get(source, 0) - line["quantity"]
+        deltas[target] = deltas.get(target, 0) + line["quantity"]
+    return [(master_id, store_id, delta) for (master_id, store_id), delta in sorted(deltas.items())]
+
+
+def _lock_transfer_rows(cursor, keys: list[tuple[int, int]]) -> dict[tuple[int, int], int]:
+    """
+    Lock the master_stock rows for ``keys`` (sorted) and return their quantities.
+    Missing destination rows are inserted as zero first, in the same key order:
+    locking a key that does not exist takes a gap lock, and two transfers
+    holding gap locks on the same gap deadlock as soon as both insert into it.
+    """
+    key_sql = ", ".join(["(%s, %s)"] * len(keys))
+    key_params = [value for key in keys for value in key]
+    cursor.execute(
+        f"SELECT master_product_id, store_id FROM master_stock WHERE (master_product_id, store_id) IN ({key_sql})",
+        key_params,
+    )
+    existing = {(row["master_product_id"], row["store_id"]) for row in cursor.fetchall()}
+    missing = [key for key in keys if key not in existing]
+    if missing:
+        cursor.executemany(
+            "INSERT IGNORE INTO master_stock (master_product_id, store_id, quantity_on_hand) VALUES (%s, %s, 0)",
+            missing,
+        )
+    # 依主鍵順序一次鎖定所有相關列，所有調撥使用相同順序
+    cursor.execute(
+        f"""
+        SELECT master_product_id, store_id, quantity_on_hand
+        FROM master_stock
+        WHERE (master_product_id, store_id) IN ({key_sql})
+        ORDER BY master_product_id, store_id
+        FOR UPDATE
+        """,
+        key_params,
+    )
+    return {
+        (row["master_product_id"], row["store_id"]): int(row["quantity_on_hand"] or 0)
+        for row in cursor.fetchall()
+    }
+
+
+def _apply_transfer(cursor, lines: list[dict], staff_id: int | None, note: str | None) -> dict:
+    variant_ids = sorted({line["variant_id"] for line in lines if line["variant_id"]})
+    if variant_ids:
+        cursor.execute(
+            f"SELECT variant_id, master_product_id FROM product_variant WHERE variant_id IN ({_placeholders(variant_ids)})",
+            variant_ids,
+        )
+        variant_masters = {row["variant_id"]: row["master_product_id"] for row in cursor.fetchall()}
+        for line in lines:
+            if not line["variant_id"]:
+                continue
+            master_product_id = variant_masters.get(line["variant_id"])
+            if master_product_id is None:
+                raise ValueError(f"找不到指定的尾碼商品: {line['variant_id']}")
+            if line["master_product_id"] and line["master_product_id"] != master_product_id:
+                raise ValueError(f"尾碼商品 {line['variant_id']} 不屬於主商品 {line['master_product_id']}")
+            line["master_product_id"] = master_product_id
+
+    master_ids = sorted({line["master_product_id"] for line in lines})
+    cursor.execute(
+        f"SELECT master_product_id FROM master_product WHERE master_product_id IN ({_placeholders(master_ids)})",
+        master_ids,
+    )
+    missing_masters = set(master_ids) - {row["master_product_id"] for row in cursor.fetchall()}
+    if missing_masters:
+        raise ValueError(f"找不到指定的主商品: {', '.join(map(str, sorted(missing_masters)))}")
+
+    store_ids = sorted({line["from_store_id"] for line in lines} | {line["to_store_id"] for line in lines})
+    cursor.execute(
+        f"SELECT store_id FROM store WHERE store_id IN ({_placeholders(store_ids)})",
+        store_ids,
+    )
+    missing_stores = set(store_ids) - {row["store_id"] for row in cursor.fetchall()}
+    if missing_stores:
+        raise ValueError(f"找不到指定的分店: {', '.join(map(str, sorted(missing_stores)))}")
+
+    deltas = transfer_deltas(lines)
+    on_hand = _lock_transfer_rows(cursor, [(master_id, store_id) for master_id, store_id, _ in deltas])
+    for master_id, store_id, delta in deltas:
+        current_qty = on_hand.get((master_id, store_id), 0)
+        if current_qty + delta < 0:
+            raise ValueError(
+                f"分店 {store_id} 的主商品 {master_id} 庫存不足，目前僅剩 {current_qty}，需調出 {-delta}"
+            )
+
+    cursor.executemany(
+        """
+        INSERT INTO master_stock (master_product_id, store_id, quantity_on_hand)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE quantity_on_hand = quantity_on_hand + VALUES(quantity_on_hand), updated_at = NOW()
+        """,
+        deltas,
+    )
+
+    transfer_no = _new_transfer_no()
+    transactions = []
+    for line in lines:
+        transactions.append(
+            (line["master_product_id"], line["variant_id"], line["from_store_id"], staff_id,
+             "OUTBOUND", -line["quantity"], transfer_no, note)
+        )
+        transactions.append(
+            (line["master_product_id"], line["variant_id"], line["to_store_id"], staff_id,
+             "INBOUND", line["quantity"], transfer_no, note)
+        )
+    cursor.executemany(
+        """
+        INSERT INTO stock_transaction (master_product_id, variant_id, store_id, staff_id, txn_type, quantity, reference_no, note)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        transactions,
+    )
+    return {
+        "transfer_no": transfer_no,
+        "lines": len(lines),
+        "stock": [
+            {
+                "master_product_id": master_id,
+                "store_id": store_id,
+                "quantity_on_hand": on_hand.get((master_id, store_id), 0) + delta,
+            }
+            for master_id, store_id, delta in deltas
+        ],
+    }
+
+
+def transfer_master_stock(
+    lines,
+    staff_id: int | None,
+    note: str | None = None,
+) -> dict:
+    """
+    Move stock between stores for many lines in one transaction.
+    Each line writes an OUTBOUND row at the source and an INBOUND row at the
+    destination, both tagged with the returned transfer_no. A transaction
+    chosen as a deadlock victim (e.g. two transfers creating the same missing
+    row) is retried up to TRANSFER_DEADLOCK_RETRIES times.
+    """
+    lines = normalize_transfer_lines(lines)
+    attempt = 0
+    while True:
+        conn = connect_to_db()
+        try:
+            with conn.cursor() as cursor:
+                result = _apply_transfer(cursor, lines, staff_id, note)
+            conn.commit()
+            return result
+        except pymysql.err.OperationalError as e:
+            conn.rollback()
+            if e.args and e.args[0] == ER_LOCK_DEADLOCK and attempt < TRANSFER_DEADLOCK_RETRIES:
+                attempt += 1
+                continue
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+VALUATION_GROUPS: dict[str, tuple[str, ...]] = {
+    "detail": ("master_product_id", "master_product_code", "master_name", "category_name", "store_id", "store_name", "store_type"),
+    "product": ("master_product_id", "master_product_code", "master_name", "category_name"),
+    "store": ("store_id", "store_name", "store_type"),
+    "category": ("category_name",),
+}
+
+
+def _probe_price_table(cursor) -> str:
+    def _probe(table_name: str) -> str:
+        cursor.execute(f"SELECT 1 FROM {table_name} LIMIT 1")
+        cursor.fetchall()
+        return table_name
+
+    return _run_with_price_table(_probe)
+
+
+def _valuation_detail_sql(price_table: str, as_of: date | None, store_id: int | None) -> tuple[str, list]:
+    """
+    One row per master product and store: quantity on hand at the end of ``as_of``
+    (current quantity minus later stock transactions) times the store type's cost price.
+    Products are assigned to the alphabetically first category of their variants.
+    """
+    params: list = []
+    later_join = ""
+    quantity = "ms.quantity_on_hand"
+    if as_of is not None:
+        later_join = """
+            LEFT JOIN (
+                SELECT master_product_id, store_id, SUM(quantity) AS later_quantity
+                FROM stock_transaction
+                WHERE created_at >= %s
+                GROUP BY master_product_id, store_id
+            ) later ON later.master_product_id = ms.master_product_id AND later.store_id = ms.store_id
+        """
+        params.append(as_of + timedelta(days=1))
+        quantity = "(ms.quantity_on_hand - COALESCE(later.later_quantity, 0))"
+
+    query = f"""
+        SELECT mp.master_product_id,
+               mp.master_product_code,
+               mp.name AS master_name,
+               COALESCE(cat.category_name, '未歸類') AS category_name,
+               s.store_id,
+               s.store_name,
+               s.store_type,
+               {quantity} AS quantity,
+               stp.cost_price,
+               {quantity} * stp.cost_price AS stock_value
+        FROM master_stock ms
+        JOIN master_product mp ON mp.master_product_id = ms.master_product_id
+        JOIN store s ON s.store_id = ms.store_id
+        LEFT JOIN {price_table} stp
+               ON stp.master_product_id = ms.master_product_id
+              AND stp.store_type = s.store_type
+        LEFT JOIN (
+            SELECT pv.master_product_id, MIN(c.name) AS category_name
+            FROM product_variant pv
+            JOIN product_category pc ON pc.product_id = pv.variant_id
+            JOIN category c ON c.category_id = pc.category_id
+            GROUP BY pv.master_product_id
+        ) cat ON cat.master_product_id = mp.master_product_id
+        {later_join}
+        WHERE {quantity} <> 0
+    """
+    if store_id is not None:
+        query += " AND ms.store_id = %s"
+        params.append(store_id)
+    return query, params
+
+
+def parse_valuation_date(value: str | None) -> date | None:
+    """Return None for today (current stock) or the parsed past date."""
+    if not value:
+        return None
+    try:
+        as_of = datetime.strptime(value.strip().replace("/", "-"), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("as_of 日期格式錯誤，應為 YYYY-MM-DD")
+    today = date.today()
+    if as_of > today:
+        raise ValueError("as_of 不可晚於今天")
+    return None if as_of == today else as_of
+
+
+def get_inventory_valuation(
+    as_of: date | None = None,
+    store_id: int | str | None = None,
+    group_by: str = "detail",
+) -> dict:
+    """Aggregate stock value by master product, store or category in one SQL pass, with grand totals."""
+    if group_by not in VALUATION_GROUPS:
+        raise ValueError(f"不支援的 group_by: {group_by}")
+    dimensions = ", ".join(VALUATION_GROUPS[group_by])
+    store_id_value = _normalize_store_id(store_id)
+    conn = connect_for_read()
+    try:
+        with conn.cursor() as cursor:
+            price_table = _probe_price_table(cursor)
+            detail_sql, params = _valuation_detail_sql(price_table, as_of, store_id_value)
+            cursor.execute(
+                f"""
+                SELECT {dimensions},
+                       SUM(v.quantity) AS quantity,
+                       SUM(COALESCE(v.stock_value, 0)) AS stock_value,
+                       SUM(v.cost_price IS NULL) AS missing_cost_count
+                FROM ({detail_sql}) v
+                GROUP BY {dimensions}
+                ORDER BY {dimensions}
+                """,
+                params,
+            )
+            rows = list(cursor.fetchall())
+    finally:
+        conn.close()
+    # Every detail row lands in exactly one group, so the grand totals are the sum of the groups
+    totals = {
+        field: sum((row[field] or 0 for row in rows), 0)
+        for field in ("quantity", "stock_value", "missing_cost_count")
+    }
+    return {
+        "as_of": (as_of or date.today()).isoformat(),
+        "group_by": group_by,
+        "store_id": store_id_value,
+        # store_type_price keeps only the current cost, so past dates are valued at today's cost
+        "cost_basis": "current",
+        "rows": rows,
+        "totals": totals,
+    }
+
+
+def iter_inventory_valuation(as_of: date | None = None, store_id: int | str | None = None):
+    """Stream the per-product, per-store valuation rows for NDJSON export."""
+    store_id_value = _normalize_store_id(store_id)
+    conn = connect_for_read()
+    try:
+        with conn.cursor() as cursor:
+            price_table = _probe_price_table(cursor)
+    finally:
+        conn.close()
+    detail_sql, params = _valuation_detail_sql(price_table, as_of, store_id_value)
+    detail_sql += " ORDER BY s.store_name, mp.name"
+    return stream_rows(detail_sql, params, read_replica=True)
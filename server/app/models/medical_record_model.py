@@ -9,57 +9,43 @@ def connect_to_db():
     """建立資料庫連線，並始終使用 DictCursor 以確保回傳結果為字典格式"""
     return pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
 
+
+def _overview_changed(member_id):
+    # 總覽模組引用本模組的查詢字串，於此延遲匯入以免循環
+    from app.models.member_overview_model import member_overview_changed
+
+    member_overview_changed(member_id)
+
+def _decode_json_list(value):
+    """JSON 欄位在 pymysql 中以字串回傳；已是 list 時直接使用。"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    decoded = json.loads(value)
+    if isinstance(decoded, list):
+        return decoded
+    return [decoded]
+
+
 def format_record(record):
     """
-    將從資料庫取出的單筆字典 record，格式化為前端需要的【元組 (tuple/array)】結構
+    將從資料庫取出的單筆字典 record，格式化為前端需要的【元組 (tuple/array)】結構。
+    病史項目已在 MEDICAL_RECORD_LIST_QUERY 中合併為單一 JSON 陣列 (history_items)，
+    每筆只需解析一次。
     """
     if not record:
         return None
-        
-    all_history = []
-    try:
-        # --- 讀取並合併所有相關病史 ---
-
-        # 1. 處理平時症狀 (這部分邏輯是正確的)
-        symptom_data = {
-            "HPA": json.loads(record.get('HPA_selection') or '[]'),
-            "meridian": json.loads(record.get('meridian_selection') or '[]'),
-            "neckAndShoulder": json.loads(record.get('neck_and_shoulder_selection') or '[]'),
-            "anus": json.loads(record.get('anus_selection') or '[]'),
-            "symptomOthers": record.get('symptom_others') or ''
-        }
-        all_history.extend(symptom_data.get('HPA', []))
-        all_history.extend(symptom_data.get('meridian', []))
-        all_history.extend(symptom_data.get('neckAndShoulder', []))
-        all_history.extend(symptom_data.get('anus', []))
-        if symptom_data.get('symptomOthers'):
-            all_history.append(symptom_data['symptomOthers'])
-
-        # 2. 處理家族病史 (這部分邏輯是正確的)
-        family_history_data = {
-            "familyHistory": json.loads(record.get('family_history_selection') or '[]')
-        }
-        all_history.extend(family_history_data.get('familyHistory', []))
-
-        # *** 核心修正：使用正確的邏輯處理健康狀態 ***
-        # 3. 直接解析健康狀態的選項列表 (它本身就是一個 JSON 陣列)
-        health_selections_json = record.get('health_status_selection') or '[]'
-        health_selections = json.loads(health_selections_json)
-        all_history.extend(health_selections)
-
-        # 4. 直接獲取 "其他" 健康狀態的文字並加入
-        #    (來自 BASE_MEDICAL_RECORD_QUERY 中的 health_status_others 別名)
-        health_others = record.get('health_status_others')
-        if health_others:
-            all_history.append(health_others)
 
+    try:
+        all_history = _decode_json_list(record.get('history_items'))
     except (json.JSONDecodeError, TypeError) as e:
         print(f"Error parsing history JSON for record: {record.get('medical_record_id')}, error: {e}")
-        pass
+        all_history = []
 
     # 最後，將所有蒐集到的項目合併成一個字串
-    # 使用 filter(None, ...) 過濾掉空字串或 None
-    medical_history_str = ", ".join(filter(None, all_history))
+    # 過濾掉空字串或 None
+    medical_history_str = ", ".join(str(item) for item in all_history if item)
 
     cosmetic_surgery_status = 'Yes' if record.get('micro_surgery') is not None else 'No'
 
@@ -140,9 +126,57 @@ def format_record_for_edit(record: dict):
         
     return record
 
-# --- 這是本次修正的核心：使用 ANY_VALUE() 解決 only_full_group_by 的問題 ---
-BASE_MEDICAL_RECORD_QUERY = """
-    SELECT 
+# 會員最新一筆有血壓的淨化紀錄；以子查詢逐筆取得，避免 JOIN ipn_pure 造成
+# medical_record × ipn_pure 的列數膨脹（以及隨之而來的彙總 MAX()）。
+LATEST_PURE_BLOOD_PRESSURE = """
+        (
+            SELECT ip.blood_preasure
+            FROM ipn_pure ip
+            WHERE ip.member_id = mr.member_id
+              AND ip.blood_preasure IS NOT NULL AND ip.blood_preasure <> ''
+            ORDER BY ip.date DESC, ip.ipn_pure_id DESC
+            LIMIT 1
+        ) AS blood_preasure"""
+
+# 其餘 JOIN 皆為一對一（外鍵指向主鍵），每筆紀錄只會有一列。
+MEDICAL_RECORD_FROM = """
+    FROM medical_record mr
+    LEFT JOIN member m ON mr.member_id = m.member_id
+    LEFT JOIN usual_sympton_and_family_history us ON mr.usual_sympton_and_family_history_id = us.usual_sympton_and_family_history_id
+    LEFT JOIN micro_surgery ms ON mr.micro_surgery = ms.micro_surgery_id
+    LEFT JOIN health_status hs ON mr.health_status_id = hs.health_status_id
+    LEFT JOIN store st ON mr.store_id = st.store_id
+"""
+
+# 列表用：所有病史選項在資料庫端合併為單一 JSON 陣列 history_items
+MEDICAL_RECORD_LIST_QUERY = f"""
+    SELECT
+        mr.medical_record_id,
+        mr.member_id,
+        mr.height,
+        mr.weight,
+        mr.micro_surgery,
+        mr.store_id,
+        m.name,
+        m.member_code,
+        st.store_name,
+        JSON_MERGE_PRESERVE(
+            COALESCE(us.HPA_selection, JSON_ARRAY()),
+            COALESCE(us.meridian_selection, JSON_ARRAY()),
+            COALESCE(us.neck_and_shoulder_selection, JSON_ARRAY()),
+            COALESCE(us.anus_selection, JSON_ARRAY()),
+            IF(COALESCE(us.others, '') <> '', JSON_ARRAY(us.others), JSON_ARRAY()),
+            COALESCE(us.family_history_selection, JSON_ARRAY()),
+            COALESCE(hs.health_status_selection, JSON_ARRAY()),
+            IF(COALESCE(hs.others, '') <> '', JSON_ARRAY(hs.others), JSON_ARRAY())
+        ) AS history_items,
+        ms.micro_surgery_description,
+{LATEST_PURE_BLOOD_PRESSURE}
+    {MEDICAL_RECORD_FROM}"""
+
+# 明細 / 編輯用：保留各別選項欄位，由 format_record_for_edit 解析
+MEDICAL_RECORD_DETAIL_QUERY = f"""
+    SELECT
         mr.medical_record_id,
         mr.member_id,
         mr.usual_sympton_and_family_history_id,
@@ -152,28 +186,21 @@ BASE_MEDICAL_RECORD_QUERY = """
         mr.remark,
         mr.health_status_id,
         mr.store_id,
-        MAX(m.name) as name,
-        MAX(m.member_code) as member_code,
-        MAX(st.store_name) as store_name,
-        MAX(us.HPA_selection) as HPA_selection,
-        MAX(us.meridian_selection) as meridian_selection, 
-        MAX(us.neck_and_shoulder_selection) as neck_and_shoulder_selection,
-        MAX(us.anus_selection) as anus_selection, 
-        MAX(us.family_history_selection) as family_history_selection, 
-        MAX(us.others) as symptom_others,
-        MAX(hs.health_status_selection) as health_status_selection, 
-        MAX(hs.others) as health_status_others,
-        MAX(ms.micro_surgery_description) as micro_surgery_description,
-        MAX(ip.blood_preasure) as blood_preasure,
+        m.name,
+        m.member_code,
+        st.store_name,
+        us.HPA_selection,
+        us.meridian_selection,
+        us.neck_and_shoulder_selection,
+        us.anus_selection,
+        us.family_history_selection,
+        us.others as symptom_others,
+        hs.health_status_selection,
+        hs.others as health_status_others,
+        ms.micro_surgery_description,
+{LATEST_PURE_BLOOD_PRESSURE},
         CASE WHEN mr.micro_surgery IS NOT NULL THEN 'Yes' ELSE 'No' END as cosmetic_surgery
-    FROM medical_record mr
-    LEFT JOIN member m ON mr.member_id = m.member_id
-    LEFT JOIN usual_sympton_and_family_history us ON mr.usual_sympton_and_family_history_id = us.usual_sympton_and_family_history_id
-    LEFT JOIN micro_surgery ms ON mr.micro_surgery = ms.micro_surgery_id
-    LEFT JOIN health_status hs ON mr.health_status_id = hs.health_status_id
-    LEFT JOIN ipn_pure ip ON mr.member_id = ip.member_id
-    LEFT JOIN store st ON mr.store_id = st.store_id
-"""
+    {MEDICAL_RECORD_FROM}"""
 
 def get_all_medical_records(store_level: str, store_id: int):
     """根據使用者權限獲取健康理療記錄"""
@@ -187,9 +214,8 @@ def get_all_medical_records(store_level: str, store_id: int):
                 params.append(store_id)
             
             sql = f"""
-                {BASE_MEDICAL_RECORD_QUERY}
+                {MEDICAL_RECORD_LIST_QUERY}
                 {where_clause}
-                GROUP BY mr.medical_record_id
                 ORDER BY
                     (COALESCE(NULLIF(store_name, ''), CAST(mr.store_id AS CHAR)) = ''),
                     COALESCE(NULLIF(store_name, ''), CAST(mr.store_id AS CHAR)),
@@ -222,9 +248,8 @@ def search_medical_records(keyword: str, store_level: str, store_id: int):
             where_clause = "WHERE " + " AND ".join(where_conditions)
 
             sql = f"""
-                {BASE_MEDICAL_RECORD_QUERY}
+                {MEDICAL_RECORD_LIST_QUERY}
                 {where_clause}
-                GROUP BY mr.medical_record_id
                 ORDER BY
                     (COALESCE(NULLIF(store_name, ''), CAST(mr.store_id AS CHAR)) = ''),
                     COALESCE(NULLIF(store_name, ''), CAST(mr.store_id AS CHAR)),
@@ -246,9 +271,8 @@ def get_medical_record_by_id(record_id: int):
     try:
         with conn.cursor() as cursor:
             sql = f"""
-                {BASE_MEDICAL_RECORD_QUERY}
+                {MEDICAL_RECORD_DETAIL_QUERY}
                 WHERE mr.medical_record_id = %s
-                GROUP BY mr.medical_record_id
             """
             cursor.execute(sql, (record_id,))
             record = cursor.fetchone()
@@ -315,6 +339,7 @@ def create_medical_record(data: dict, store_id: int):
             ))
             record_id = cursor.lastrowid
         conn.commit()
+        _overview_changed(member_id)
         return record_id
     except Exception as e:
         conn.rollback()
@@ -413,6 +438,7 @@ def update_medical_record(record_id, data):
                 cursor.execute("DELETE FROM micro_surgery WHERE micro_surgery_id = %s", (micro_surgery_id,))
 
         conn.commit()
+        _overview_changed(member_id)
         return True
     except Exception as e:
         conn.rollback()
@@ -447,6 +473,7 @@ def delete_medical_record(record_id):
                 cursor.execute("DELETE FROM micro_surgery WHERE micro_surgery_id = %s", (micro_surgery_id,))
             
         conn.commit()
+        _overview_changed(member_id)
         return True
     except Exception as e:
         conn.rollback()
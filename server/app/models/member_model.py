@@ -50,6 +50,17 @@ def _normalize_identity_type(cursor, identity_type_value: str) -> str:
     if not _check_identity_type_table(cursor):
         return identity_type_value or "會員"
 
+    from app.models import reference_data_model
+
+    try:
+        cached_code = reference_data_model.resolve_identity_type(identity_type_value)
+    except Exception as e:
+        print(f"讀取會員身份別快取失敗: {e}")
+        cached_code = None
+    if cached_code is not None:
+        return cached_code
+
+    # 快取中沒有（例如剛新增的身份別）時直接查詢
     query = [
         "SELECT identity_type_code",
         "FROM member_identity_type",
@@ -211,6 +222,13 @@ def search_members(keyword: str, store_level: str, store_id: int):
     finally:
         conn.close()
 
+def _bump_overview(member_id):
+    # member_overview_model 匯入本模組，延遲匯入避免循環
+    from app.models.member_overview_model import member_overview_changed
+
+    member_overview_changed(member_id)
+
+
 # 注意：刪除和更新操作也應該在路由層加上權限判斷，
 # 確保分店A的使用者不能刪除或更新分店B的會員。
 # 目前 model 層暫不修改，但在路由層必須處理。
@@ -246,6 +264,7 @@ def delete_member_and_related_data(member_id: int):
                 raise ValueError(f"會員 ID {member_id} 不存在，無法刪除。")
 
         conn.commit()
+        _bump_overview(member_id)
         return {"success": True, "message": f"會員 {member_id} 及其所有相關紀錄已成功刪除。"}
         
     except Exception as e:
@@ -281,6 +300,7 @@ def update_member(member_id, data):
                 data.get("note"), member_id
             ))
         conn.commit()
+        _bump_overview(member_id)
     finally:
         conn.close()
 
@@ -0,0 +1,475 @@
+# server/app/models/member_overview_model.py
+"""
+會員 360 總覽：在同一條連線上，以「每個區塊一個查詢」的方式
+取得會員頁面需要的所有資料，並依會員快取結果。
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import DB_CONFIG, MEMBER_OVERVIEW_CACHE_TTL, MEMBER_OVERVIEW_CACHE_SIZE, MEMBER_OVERVIEW_WORKERS
+from app.metrics import record_cache
+from app.models.member_model import _get_identity_type_query_parts
+from app.models.medical_record_model import MEDICAL_RECORD_LIST_QUERY, format_record
+from app.models.stress_test_model import format_stress_test_record
+
+
+def connect_to_db():
+    """建立資料庫連線"""
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+def _iso_dates(rows, *fields):
+    for row in rows:
+        for field in fields:
+            value = row.get(field)
+            if isinstance(value, (datetime, date)):
+                row[field] = value.strftime('%Y-%m-%d')
+    return rows
+
+
+def _store_filter(alias: str, scope_store_id):
+    if scope_store_id is None:
+        return "", ()
+    return f" AND {alias}.store_id = %s", (scope_store_id,)
+
+
+_HEALTH_CHECK_RECHECK_SECONDS = 60
+_health_check_state = {"available": False, "checked_at": 0.0}
+
+
+def _health_check_table_available() -> bool:
+    """舊版健康檢查表 health_check 不一定存在，存在時才提供該區塊；查詢失敗時稍後重試。"""
+    if _health_check_state["available"]:
+        return True
+    now = time.monotonic()
+    if _health_check_state["checked_at"] and now - _health_check_state["checked_at"] < _HEALTH_CHECK_RECHECK_SECONDS:
+        return False
+    _health_check_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'health_check'
+                LIMIT 1
+                """
+            )
+            _health_check_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查 health_check 資料表失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _health_check_state["available"]
+
+
+# --- 各區塊查詢：皆接收 (cursor, member_id, scope_store_id)，只執行一個 SQL ---
+
+def _load_member(cursor, member_id, scope_store_id):
+    identity_column, join_identity_table = _get_identity_type_query_parts(cursor)
+    cursor.execute(
+        f"""
+        SELECT m.member_id, m.member_code, m.name, {identity_column} AS identity_type, m.birthday, m.address, m.phone, m.gender, m.blood_type,
+               m.line_id, m.inferrer_id, m.occupation, m.note, m.store_id, s.store_name
+        FROM member AS m
+        LEFT JOIN store AS s ON m.store_id = s.store_id{join_identity_table}
+        WHERE m.member_id = %s
+        """,
+        (member_id,),
+    )
+    return cursor.fetchone()
+
+
+def _load_remaining_sessions(cursor, member_id, scope_store_id):
+    # 與 get_remaining_sessions_bulk 相同的結果，但購買與使用合併為一個查詢
+    cursor.execute(
+        """
+        SELECT therapy_id, SUM(purchased) - SUM(used) AS remaining
+        FROM (
+            SELECT therapy_id, COALESCE(SUM(amount), 0) AS purchased, 0 AS used
+            FROM therapy_sell
+            WHERE member_id = %s
+            GROUP BY therapy_id
+            UNION ALL
+            SELECT therapy_id, 0 AS purchased, COALESCE(SUM(deduct_sessions), 0) AS used
+            FROM therapy_record
+            WHERE member_id = %s
+            GROUP BY therapy_id
+        ) AS sessions
+        WHERE therapy_id IS NOT NULL
+        GROUP BY therapy_id
+        """,
+        (member_id, member_id),
+    )
+    return {
+        int(row["therapy_id"]): int(float(row["remaining"] or 0))
+        for row in cursor.fetchall()
+    }
+
+
+def _load_stress_tests(cursor, member_id, scope_store_id):
+    store_clause, store_params = _store_filter("s", scope_store_id)
+    cursor.execute(
+        f"""
+        SELECT s.ipn_stress_id, s.member_id,
+               s.a_score, s.b_score, s.c_score, s.d_score, s.test_date,
+               (s.a_score + s.b_score + s.c_score + s.d_score) AS total_score,
+               s.store_id, st.store_name
+        FROM ipn_stress s
+        LEFT JOIN store st ON s.store_id = st.store_id
+        WHERE s.member_id = %s{store_clause}
+        ORDER BY s.test_date DESC, s.ipn_stress_id DESC
+        """,
+        (member_id, *store_params),
+    )
+    return [format_stress_test_record(row) for row in cursor.fetchall()]
+
+
+def _load_pure_records(cursor, member_id, scope_store_id):
+    store_clause, store_params = _store_filter("p", scope_store_id)
+    cursor.execute(
+        f"""
+        SELECT p.ipn_pure_id, p.member_id, p.staff_id, sf.name AS staff_name,
+               p.visceral_fat, p.body_fat_percentage, p.blood_preasure, p.basal_metabolic_rate,
+               p.date, p.body_age, p.height, p.weight, p.bmi, p.pure_item, p.note,
+               p.store_id, st.store_name
+        FROM ipn_pure p
+        LEFT JOIN staff sf ON p.staff_id = sf.staff_id
+        LEFT JOIN store st ON p.store_id = st.store_id
+        WHERE p.member_id = %s{store_clause}
+        ORDER BY p.date DESC, p.ipn_pure_id DESC
+        """,
+        (member_id, *store_params),
+    )
+    return _iso_dates(cursor.fetchall(), "date")
+
+
+def _load_medical_records(cursor, member_id, scope_store_id):
+    store_clause, store_params = _store_filter("mr", scope_store_id)
+    cursor.execute(
+        f"""
+        {MEDICAL_RECORD_LIST_QUERY}
+        WHERE mr.member_id = %s{store_clause}
+        ORDER BY mr.medical_record_id DESC
+        """,
+        (member_id, *store_params),
+    )
+    return [format_record(row) for row in cursor.fetchall()]
+
+
+def _load_health_checks(cursor, member_id, scope_store_id):
+    if not _health_check_table_available():
+        return []
+    cursor.execute(
+        """
+        SELECT
+            hc.health_check_id, hc.member_id, hc.height, hc.weight,
+            us.HPA_selection, us.meridian_selection, us.neck_and_shoulder_selection,
+            us.anus_selection, us.family_history_selection,
+            CASE WHEN hc.micro_surgery IS NOT NULL THEN 1 ELSE 0 END AS micro_surgery,
+            ms.micro_surgery_description
+        FROM health_check hc
+        LEFT JOIN usual_sympton_and_family_history us ON hc.usual_sympton_and_family_history_id = us.usual_sympton_and_family_history_id
+        LEFT JOIN micro_surgery ms ON hc.micro_surgery = ms.micro_surgery_id
+        WHERE hc.member_id = %s
+        ORDER BY hc.health_check_id DESC
+        """,
+        (member_id,),
+    )
+    return cursor.fetchall()
+
+
+def _load_purchases(cursor, member_id, scope_store_id):
+    product_store, product_params = _store_filter("ps", scope_store_id)
+    therapy_store, therapy_params = _store_filter("ts", scope_store_id)
+    cursor.execute(
+        f"""
+        SELECT * FROM (
+            SELECT 'product' AS item_type, ps.product_sell_id AS sell_id, ps.date,
+                   ps.product_id AS item_id, ps.product_name AS item_name,
+                   ps.quantity, ps.unit_price, ps.discount_amount AS discount, ps.final_price,
+                   ps.payment_method, ps.sale_category, ps.note,
+                   ps.store_id, st.store_name, ps.staff_id, sf.name AS staff_name
+            FROM product_sell ps
+            LEFT JOIN store st ON ps.store_id = st.store_id
+            LEFT JOIN staff sf ON ps.staff_id = sf.staff_id
+            WHERE ps.member_id = %s{product_store}
+            UNION ALL
+            SELECT 'therapy' AS item_type, ts.therapy_sell_id AS sell_id, ts.date,
+                   ts.therapy_id AS item_id, ts.therapy_name AS item_name,
+                   ts.amount AS quantity, NULL AS unit_price, ts.discount, ts.final_price,
+                   ts.payment_method, ts.sale_category, ts.note,
+                   ts.store_id, st.store_name, ts.staff_id, sf.name AS staff_name
+            FROM therapy_sell ts
+            LEFT JOIN store st ON ts.store_id = st.store_id
+            LEFT JOIN staff sf ON ts.staff_id = sf.staff_id
+            WHERE ts.member_id = %s{therapy_store}
+        ) AS purchases
+        ORDER BY date DESC, sell_id DESC
+        """,
+        (member_id, *product_params, member_id, *therapy_params),
+    )
+    rows = _iso_dates(cursor.fetchall(), "date")
+    for row in rows:
+        for field in ("unit_price", "discount", "final_price"):
+            if row.get(field) is not None:
+                row[field] = float(row[field])
+    return rows
+
+
+OVERVIEW_SECTIONS = OrderedDict(
+    [
+        ("remaining_sessions", _load_remaining_sessions),
+        ("stress_tests", _load_stress_tests),
+        ("pure_records", _load_pure_records),
+        ("medical_records", _load_medical_records),
+        ("health_checks", _load_health_checks),
+        ("purchases", _load_purchases),
+    ]
+)
+
+
+def parse_sections(raw: str | None) -> list[str]:
+    """解析 sections 查詢參數；未提供時回傳全部區塊。"""
+    if not raw:
+        return list(OVERVIEW_SECTIONS)
+    sections = []
+    for part in raw.split(","):
+        name = part.strip()
+        if not name:
+            continue
+        if name not in OVERVIEW_SECTIONS:
+            raise ValueError(f"不支援的區塊: {name}")
+        if name not in sections:
+            sections.append(name)
+    return sections
+
+
+# --- 依會員快取（以區塊為單位，寫入時失效） ---
+
+_cache_lock = threading.Lock()
+_overview_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+def _cache_get(key, sections):
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _overview_cache.get(key)
+        if not entry:
+            return {}
+        _overview_cache.move_to_end(key)
+        return {
+            name: value
+            for name, (stored_at, value) in entry.items()
+            if name in sections and now - stored_at < MEMBER_OVERVIEW_CACHE_TTL
+        }
+
+
+def _cache_put(key, values: dict):
+    if MEMBER_OVERVIEW_CACHE_TTL <= 0:
+        return
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _overview_cache.setdefault(key, {})
+        for name, value in values.items():
+            entry[name] = (now, value)
+        _overview_cache.move_to_end(key)
+        while len(_overview_cache) > MEMBER_OVERVIEW_CACHE_SIZE:
+            _overview_cache.popitem(last=False)
+
+
+def invalidate_member_overview(member_id=None):
+    """清除指定會員（或全部會員）的總覽快取。"""
+    with _cache_lock:
+        if member_id is None:
+            _overview_cache.clear()
+            return
+        try:
+            member_id = int(member_id)
+        except (TypeError, ValueError):
+            _overview_cache.clear()
+            return
+        for key in [key for key in _overview_cache if key[0] == member_id]:
+            _overview_cache.pop(key, None)
+
+
+# --- 跨 worker 失效：member_overview_version（12_member_overview_version.sql） ---
+# 快取鍵包含 (會員版本, 全域版本)，其他 worker 寫入後版本改變，舊項目自然不再命中。
+# 只快取「已套用遷移」；未套用時只依本程序內的失效。
+
+_VERSION_RECHECK_SECONDS = 60
+_version_table_state = {"available": False, "checked_at": 0.0}
+
+
+def _version_table_available() -> bool:
+    if _version_table_state["available"]:
+        return True
+    now = time.monotonic()
+    if _version_table_state["checked_at"] and now - _version_table_state["checked_at"] < _VERSION_RECHECK_SECONDS:
+        return False
+    _version_table_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'member_overview_version'
+                LIMIT 1
+                """
+            )
+            _version_table_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查 member_overview_version 資料表失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _version_table_state["available"]
+
+
+def _read_overview_version(cursor, member_id):
+    """回傳 (會員版本, 全域版本)；未套用遷移時為 None。"""
+    if not _version_table_available():
+        return None
+    cursor.execute(
+        "SELECT member_id, version FROM member_overview_version WHERE member_id IN (%s, 0)",
+        (member_id,),
+    )
+    versions = {int(row["member_id"]): int(row["version"]) for row in cursor.fetchall()}
+    return versions.get(member_id, 0), versions.get(0, 0)
+
+
+def bump_member_overview_versions(member_ids=None):
+    """
+    寫入成功後呼叫：清除本程序的快取並遞增版本，讓其他 worker 的快取一併失效。
+    member_ids 為 None 或含無法辨識的 ID 時遞增全域版本（全部會員）。
+    版本在原交易提交後以自動提交單獨更新，不延長銷售交易的鎖定時間。
+    """
+    ids = set()
+    for value in member_ids or [None]:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            ids.add(0)
+    if 0 in ids:
+        invalidate_member_overview()
+    else:
+        for member_id in ids:
+            invalidate_member_overview(member_id)
+
+    if not _version_table_available():
+        return
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                """
+                INSERT INTO member_overview_version (member_id, version) VALUES (%s, 1)
+                ON DUPLICATE KEY UPDATE version = version + 1
+                """,
+                [(member_id,) for member_id in sorted(ids)],
+            )
+        conn.commit()
+    except Exception as e:
+        print(f"更新會員總覽版本失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def member_overview_changed(*member_ids):
+    """
+    模型寫入提交後呼叫：只遞增實際受影響的會員版本。
+    沒有會員的紀錄（例如散客銷售）不影響任何總覽，直接略過。
+    """
+    ids = {member_id for member_id in member_ids if member_id not in (None, "")}
+    if ids:
+        bump_member_overview_versions(ids)
+
+
+def _run_sections(member_id, names, scope_store_id, conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_to_db()
+    try:
+        results = {}
+        with conn.cursor() as cursor:
+            for name in names:
+                results[name] = OVERVIEW_SECTIONS[name](cursor, member_id, scope_store_id)
+        return results
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def get_member_overview(member_id: int, sections=None, store_level: str | None = None, store_id=None):
+    """
+    取得會員總覽。
+
+    預設所有區塊共用一條連線依序執行；設定 MEMBER_OVERVIEW_WORKERS > 1 時，
+    未命中快取的區塊會分給數條連線並行查詢。
+    回傳 None 表示會員不存在；分店讀取他店會員時拋出 PermissionError。
+    """
+    member_id = int(member_id)
+    sections = list(OVERVIEW_SECTIONS) if sections is None else list(sections)
+    scope_store_id = store_id if store_level == "分店" else None
+    conn = connect_to_db()
+    try:
+        try:
+            with conn.cursor() as cursor:
+                cache_key = (member_id, scope_store_id, _read_overview_version(cursor, member_id))
+        except Exception as e:
+            # 無法確認版本時不使用快取，避免讀到其他 worker 已失效的資料
+            print(f"讀取會員總覽版本失敗，略過快取: {e}")
+            cache_key = None
+
+        cached = _cache_get(cache_key, set(sections) | {"member"}) if cache_key else {}
+        member = cached.get("member")
+        missing = [name for name in sections if name not in cached]
+        record_cache("member_overview", hits=len(sections) - len(missing), misses=len(missing))
+
+        fetched = {}
+        if member is None:
+            with conn.cursor() as cursor:
+                member = _load_member(cursor, member_id, scope_store_id)
+            if member is None:
+                return None
+            fetched["member"] = member
+        if scope_store_id is not None and member.get("store_id") != scope_store_id:
+            raise PermissionError("權限不足，無法查看非本店會員資料")
+
+        workers = min(MEMBER_OVERVIEW_WORKERS, len(missing))
+        if workers > 1:
+            groups = [missing[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_run_sections, member_id, group, scope_store_id, conn if index == 0 else None)
+                    for index, group in enumerate(groups)
+                ]
+                for future in futures:
+                    fetched.update(future.result())
+        elif missing:
+            fetched.update(_run_sections(member_id, missing, scope_store_id, conn))
+    finally:
+        conn.close()
+
+    if cache_key:
+        _cache_put(cache_key, fetched)
+    overview = {"member": member}
+    for name in sections:
+        overview[name] = fetched[name] if name in fetched else cached[name]
+    return overview
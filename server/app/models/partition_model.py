@@ -0,0 +1,134 @@
+# server/app/models/partition_model.py
+import re
+from datetime import date
+from functools import lru_cache
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import DB_CONFIG
+
+# 由 10_sales_partitioning.sql 按年分割的資料表 → 分割欄位
+PARTITIONED_TABLES = {
+    "product_sell": "date",
+    "therapy_sell": "date",
+    "therapy_record": "date",
+    "stock_transaction": "created_at",
+}
+# 依欄位型別決定分割上界的字面值格式
+DATETIME_COLUMNS = {"created_at"}
+
+_YEAR_PARTITION = re.compile(r"^p(\d{4})$")
+
+
+def connect_to_db():
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+@lru_cache(maxsize=1)
+def partitioning_available() -> bool:
+    """Return True once the 10_sales_partitioning migration has been applied."""
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'product_sell'
+                  AND PARTITION_NAME = 'p_future'
+                LIMIT 1
+                """
+            )
+            return cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查分割區失敗: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def list_partitions(table: str) -> list[dict]:
+    """列出資料表的分割區名稱、上界與估計筆數（TABLE_ROWS 為統計值，非精確筆數）。"""
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"資料表未分割: {table}")
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT PARTITION_NAME AS name,
+                       PARTITION_DESCRIPTION AS upper_bound,
+                       TABLE_ROWS AS estimated_rows
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = %s
+                  AND PARTITION_NAME IS NOT NULL
+                ORDER BY PARTITION_ORDINAL_POSITION
+                """,
+                (table,),
+            )
+            return list(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def plan_yearly_partitions(existing_years, through_year: int) -> list[int]:
+    """
+    回傳需要新增的年度（遞增）。新年度一律從 p_future 拆出，
+    因此只會補在目前最後一個年度之後，中間缺漏的年度不處理。
+    """
+    existing = set(existing_years)
+    if not existing:
+        raise ValueError("找不到年度分割區，請先套用 10_sales_partitioning.sql")
+    return list(range(max(existing) + 1, through_year + 1))
+
+
+def _upper_bound(column: str, year: int) -> str:
+    bound = f"{year + 1}-01-01"
+    return f"{bound} 00:00:00" if column in DATETIME_COLUMNS else bound
+
+
+def reorganize_statement(table: str, years) -> str:
+    """把 p_future 拆成指定年度 + 新的 p_future 的 ALTER TABLE。"""
+    column = PARTITIONED_TABLES[table]
+    parts = [
+        f"PARTITION p{year} VALUES LESS THAN ('{_upper_bound(column, year)}')"
+        for year in years
+    ]
+    parts.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    return (
+        f"ALTER TABLE `{table}` REORGANIZE PARTITION p_future INTO ("
+        + ", ".join(parts)
+        + ")"
+    )
+
+
+def ensure_future_partitions(years_ahead: int = 1, dry_run: bool = False) -> dict[str, list[int]]:
+    """
+    確保每張分割表都有到「今年 + years_ahead」的年度分割區，回傳 {資料表: 新增的年度}。
+    p_future 通常是空的，REORGANIZE 只需搬移極少資料；dry_run 時只回傳計畫。
+    """
+    if not partitioning_available():
+        raise RuntimeError("尚未套用 10_sales_partitioning.sql")
+    through_year = date.today().year + years_ahead
+    added = {}
+    for table in PARTITIONED_TABLES:
+        years = [
+            int(match.group(1))
+            for match in (_YEAR_PARTITION.match(p["name"]) for p in list_partitions(table))
+            if match
+        ]
+        missing = plan_yearly_partitions(years, through_year)
+        added[table] = missing
+        if not missing or dry_run:
+            continue
+        conn = connect_to_db()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(reorganize_statement(table, missing))
+            conn.commit()
+        finally:
+            conn.close()
+    return added
@@ -0,0 +1,441 @@
+# server/app/models/pricing_model.py
+"""
+報價引擎：產品、療程與組合的身份別售價矩陣。
+
+原本每個列表以 JSON_OBJECTAGG 即時組出 price_tiers，銷售寫入時又逐一查詢組合內每個品項的
+價格與狀態。這裡把下列資料整份載入記憶體：
+  * 價格矩陣：(品項種類, 品項 ID, 身份別) → 售價，另存各品項的名稱、狀態與基本售價；
+  * 攤平的組合內容：組合 → [(品項種類, 品項 ID, 每組數量)]。
+以 data_version 判斷是否過期：報價最多每 PRICING_CHECK_INTERVAL 秒檢查一次，
+銷售寫入每次呼叫 get_sale_matrix() 核對一次版本（一筆查詢），確保下架與改價立即生效；
+版本無法讀取時快照可能落後，上架狀態改在銷售交易內以 SQL 確認（is_published）。
+本程序內的價格寫入另以 invalidate() 立即丟棄快照。
+
+售價解析順序與前台 resolvePriceForIdentity 相同：指定身份別 → 一般售價 → 基本售價。
+"""
+import threading
+import time
+from decimal import Decimal
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import DB_CONFIG, PRICING_CHECK_INTERVAL
+from app.models.data_version_model import get_table_versions
+
+PRODUCT = "product"
+THERAPY = "therapy"
+PRODUCT_BUNDLE = "product_bundle"
+THERAPY_BUNDLE = "therapy_bundle"
+KINDS = (PRODUCT, THERAPY, PRODUCT_BUNDLE, THERAPY_BUNDLE)
+BUNDLE_KINDS = (PRODUCT_BUNDLE, THERAPY_BUNDLE)
+
+GENERAL_TIER = "一般售價"
+CENT = Decimal("0.01")
+
+PRICING_TABLES = (
+    "product", "product_price_tier",
+    "therapy", "therapy_price_tier",
+    "product_bundles", "product_bundle_items", "product_bundle_price_tier",
+    "therapy_bundles", "therapy_bundle_items", "therapy_bundle_price_tier",
+)
+
+# 品項種類 → (主表查詢, 身份別價格查詢)；主表查詢回傳 item_id, name, status, price
+_ITEM_SOURCES = {
+    PRODUCT: (
+        "SELECT product_id AS item_id, name, status, price FROM product",
+        "SELECT product_id AS item_id, identity_type, price FROM product_price_tier",
+    ),
+    THERAPY: (
+        "SELECT therapy_id AS item_id, name, status, price FROM therapy",
+        "SELECT therapy_id AS item_id, identity_type, price FROM therapy_price_tier",
+    ),
+    PRODUCT_BUNDLE: (
+        """
+        SELECT bundle_id AS item_id, name, status, COALESCE(selling_price, calculated_price) AS price
+        FROM product_bundles
+        """,
+        "SELECT bundle_id AS item_id, identity_type, price FROM product_bundle_price_tier",
+    ),
+    THERAPY_BUNDLE: (
+        """
+        SELECT bundle_id AS item_id, name, status, COALESCE(selling_price, calculated_price) AS price
+        FROM therapy_bundles
+        """,
+        "SELECT bundle_id AS item_id, identity_type, price FROM therapy_bundle_price_tier",
+    ),
+}
+
+
+def connect_to_db():
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+def _to_decimal(value) -> Decimal | None:
+    if value is None or value == "":
+        return None
+    return Decimal(str(value))
+
+
+class PriceMatrix:
+    """某一時間點的售價快照；載入後不再修改，可在多個執行緒間共用。"""
+
+    __slots__ = ("items", "prices", "bundles")
+
+    def __init__(self):
+        # (種類, ID) → {"name", "status", "price"}
+        self.items: dict[tuple, dict] = {}
+        # (種類, ID, 身份別) → Decimal
+        self.prices: dict[tuple, Decimal] = {}
+        # (組合種類, 組合 ID) → [(品項種類, 品項 ID, 每組數量)]，依建立順序
+        self.bundles: dict[tuple, list[tuple]] = {}
+
+    def item(self, kind: str, item_id) -> dict | None:
+        try:
+            return self.items.get((kind, int(item_id)))
+        except (TypeError, ValueError):
+            return None
+
+    def unit_price(self, kind: str, item_id, identity_type: str | None = None):
+        """回傳 (售價, 採用的身份別)；身份別為 None 表示基本售價，沒有任何售價時售價為 None。"""
+        item = self.item(kind, item_id)
+        if item is None:
+            return None, None
+        key = (kind, int(item_id))
+        for tier in (identity_type, GENERAL_TIER):
+            if tier and (*key, tier) in self.prices:
+                return self.prices[(*key, tier)], tier
+        return item["price"], None
+
+    def components(self, kind: str, bundle_id) -> list[tuple]:
+        try:
+            return list(self.bundles.get((kind, int(bundle_id)), ()))
+        except (TypeError, ValueError):
+            return []
+
+
+def load_matrix(cursor) -> PriceMatrix:
+    matrix = PriceMatrix()
+    for kind, (items_sql, tiers_sql) in _ITEM_SOURCES.items():
+        cursor.execute(items_sql)
+        for row in cursor.fetchall():
+            matrix.items[(kind, int(row["item_id"]))] = {
+                "name": row.get("name"),
+                "status": row.get("status"),
+                "price": _to_decimal(row.get("price")),
+            }
+        cursor.execute(tiers_sql)
+        for row in cursor.fetchall():
+            price = _to_decimal(row.get("price"))
+            if price is not None:
+                matrix.prices[(kind, int(row["item_id"]), row["identity_type"])] = price
+
+    cursor.execute(
+        """
+        SELECT bundle_id, item_id, item_type, quantity
+        FROM product_bundle_items
+        ORDER BY bundle_id, bundle_item_id
+        """
+    )
+    for row in cursor.fetchall():
+        item_kind = THERAPY if row.get("item_type") == "Therapy" else PRODUCT
+        matrix.bundles.setdefault((PRODUCT_BUNDLE, int(row["bundle_id"])), []).append(
+            (item_kind, int(row["item_id"]), int(row.get("quantity") or 0))
+        )
+    # 療程組合的內容一律是療程（建立時不寫入 item_type）
+    cursor.execute(
+        """
+        SELECT bundle_id, item_id, quantity
+        FROM therapy_bundle_items
+        ORDER BY bundle_id, bundle_item_id
+        """
+    )
+    for row in cursor.fetchall():
+        matrix.bundles.setdefault((THERAPY_BUNDLE, int(row["bundle_id"])), []).append(
+            (THERAPY, int(row["item_id"]), int(row.get("quantity") or 0))
+        )
+    return matrix
+
+
+def _load() -> PriceMatrix:
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            return load_matrix(cursor)
+    finally:
+        conn.close()
+
+
+_lock = threading.Lock()
+_matrix: PriceMatrix | None = None
+_loaded_versions: dict[str, int] | None = None
+_loaded_at: float | None = None
+_checked_at: float | None = None
+
+
+def _read_versions():
+    try:
+        return get_table_versions(PRICING_TABLES)
+    except Exception as e:
+        print(f"讀取價格版本失敗，改以時間間隔重新載入: {e}")
+        return None
+
+
+def _get_matrix(verify: bool):
+    """回傳 (矩陣, 是否確認為最新)；沿用舊快照且版本無法核對時為 False。"""
+    global _matrix, _loaded_versions, _loaded_at, _checked_at
+    now = time.monotonic()
+    with _lock:
+        matrix, loaded_versions, loaded_at, checked_at = _matrix, _loaded_versions, _loaded_at, _checked_at
+
+    if matrix is not None:
+        if not verify and now - checked_at < PRICING_CHECK_INTERVAL:
+            return matrix, False
+        versions = _read_versions()
+        if versions is None or loaded_versions is None:
+            stale = now - loaded_at >= PRICING_CHECK_INTERVAL
+        else:
+            stale = versions != loaded_versions
+        if not stale:
+            with _lock:
+                if _matrix is matrix:
+                    _checked_at = max(_checked_at, now)
+            return matrix, versions is not None and loaded_versions is not None
+    else:
+        versions = _read_versions()
+
+    # 先讀版本再載入：載入期間的寫入會讓下一次檢查看到新版本
+    loaded = _load()
+    with _lock:
+        # 其他執行緒在這段期間換入了較新的快照時保留對方的結果
+        if _matrix is None or _loaded_at is None or _loaded_at <= now:
+            _matrix, _loaded_versions = loaded, versions
+            _loaded_at = _checked_at = now
+        # 剛載入（或換入了更晚開始載入的快照），內容即為最新
+        return _matrix, True
+
+
+def get_matrix(verify: bool = False) -> PriceMatrix:
+    """
+    取得目前的價格矩陣。verify=True 時不論間隔都核對一次版本；
+    版本無法取得時依 PRICING_CHECK_INTERVAL 重新載入。
+    讀取版本與載入都在鎖外進行，鎖只用於讀取與換入快照，其他請求不需等待資料庫。
+    """
+    return _get_matrix(verify)[0]
+
+
+def get_sale_matrix() -> tuple[PriceMatrix, bool]:
+    """
+    銷售寫入用：核對版本後回傳 (矩陣, 是否確認為最新)。
+    第二個值為 False 表示 data_version 無法使用、矩陣最多落後 PRICING_CHECK_INTERVAL 秒，
+    此時應以 is_published(cursor, ..., matrix=None) 在交易內查詢上架狀態。
+    """
+    return _get_matrix(True)
+
+
+# 品項種類 → (主表, 主鍵欄位)；供 is_published 在交易內查詢狀態
+_STATUS_SOURCES = {
+    PRODUCT: ("product", "product_id"),
+    THERAPY: ("therapy", "therapy_id"),
+    PRODUCT_BUNDLE: ("product_bundles", "bundle_id"),
+    THERAPY_BUNDLE: ("therapy_bundles", "bundle_id"),
+}
+
+
+def is_published(cursor, kind: str, item_id, matrix: PriceMatrix | None = None) -> bool:
+    """品項是否為上架狀態；matrix 為 None 時以 cursor 查詢資料庫（不經過快照）。"""
+    if matrix is not None:
+        row = matrix.item(kind, item_id)
+        return bool(row) and row.get("status") == "PUBLISHED"
+    table, column = _STATUS_SOURCES[kind]
+    cursor.execute(f"SELECT status FROM {table} WHERE {column} = %s", (item_id,))
+    row = cursor.fetchone()
+    return bool(row) and row.get("status") == "PUBLISHED"
+
+
+def invalidate():
+    """本程序內修改價格、上架狀態或組合內容後呼叫，下一次讀取重新載入。"""
+    global _matrix
+    with _lock:
+        _matrix = None
+
+
+def member_identity_type(member_id) -> str | None:
+    """會員的身份別（與價格表 identity_type 同一組值）；找不到會員時回傳 None。"""
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT identity_type FROM member WHERE member_id = %s", (member_id,))
+            row = cursor.fetchone()
+            return row.get("identity_type") if row else None
+    finally:
+        conn.close()
+
+
+# --- 組合攤提 ---
+
+def resolve_bundle_target(total_price: Decimal, final_price=None, unit_price=None, discount=None):
+    """
+    由組合內品項原價合計與前台送來的金額決定 (組合成交總額, 折扣總額)。
+    優先採用成交價（或單價），其次為折扣金額；原價合計為 0 時不計折扣。
+    只提供成交價且為 0 時視為整組免費，折扣等於原價合計。
+    """
+    provided_final_price = _to_decimal(final_price) or Decimal("0")
+    provided_unit_price = _to_decimal(unit_price) or Decimal("0")
+    provided_discount = _to_decimal(discount) or Decimal("0")
+    # 只帶成交價 0（例如報價時整組折抵完畢）表示免費，不能當成未提供
+    explicit_zero = (
+        final_price is not None and final_price != ""
+        and provided_final_price == 0 and provided_unit_price <= 0 and provided_discount <= 0
+    )
+
+    if provided_final_price <= 0 and provided_unit_price > 0:
+        provided_final_price = provided_unit_price
+
+    if total_price > 0:
+        if explicit_zero:
+            return Decimal("0"), total_price
+        if provided_final_price > 0:
+            return provided_final_price, total_price - provided_final_price
+        target_total = total_price - provided_discount
+        if target_total <= 0:
+            return total_price, Decimal("0")
+        return target_total, provided_discount
+    return (provided_final_price if provided_final_price > 0 else Decimal("0")), Decimal("0")
+
+
+def distribute_bundle_total(item_totals: list[Decimal], target_total: Decimal, discount_total: Decimal):
+    """
+    將組合的折扣依各品項原價比例攤到每一列，回傳 [(折扣, 成交價)]。
+    金額取到分，尾差由最後一列吸收；原價合計為 0 時平均分配成交總額。
+    """
+    if not item_totals:
+        return []
+    total_price = sum(item_totals, Decimal("0"))
+    if total_price <= 0:
+        per_item_total = target_total / len(item_totals)
+        return [(Decimal("0"), per_item_total) for _ in item_totals]
+
+    rows = []
+    running_discount = Decimal("0")
+    running_final = Decimal("0")
+    for index, item_total in enumerate(item_totals):
+        if index == len(item_totals) - 1:
+            discount_amount = (discount_total - running_discount).quantize(CENT)
+            final_price = (target_total - running_final).quantize(CENT)
+        else:
+            discount_amount = (discount_total * (item_total / total_price)).quantize(CENT)
+            final_price = (item_total - discount_amount).quantize(CENT)
+            running_discount += discount_amount
+            running_final += final_price
+        rows.append((discount_amount, final_price))
+    return rows
+
+
+def sale_components(matrix: PriceMatrix, bundle_kind: str, bundle_id) -> list[tuple]:
+    """銷售時實際寫成紀錄的組合品項：產品組合只拆出產品，療程組合拆出療程。"""
+    item_kind = PRODUCT if bundle_kind == PRODUCT_BUNDLE else THERAPY
+    return [component for component in matrix.components(bundle_kind, bundle_id) if component[0] == item_kind]
+
+
+# --- 購物車報價 ---
+
+def _parse_cart_entry(entry) -> tuple:
+    if not isinstance(entry, dict):
+        raise ValueError("購物車品項格式錯誤")
+    kind = entry.get("type")
+    if kind not in KINDS:
+        raise ValueError(f"未知的品項種類: {kind}")
+    try:
+        item_id = int(entry.get("id"))
+        quantity = int(entry.get("quantity", 1))
+    except (TypeError, ValueError):
+        raise ValueError("品項 ID 與數量必須是整數")
+    if quantity <= 0:
+        raise ValueError("數量必須大於 0")
+    try:
+        discount = _to_decimal(entry.get("discount")) or Decimal("0")
+    except ArithmeticError:
+        raise ValueError("折扣金額格式錯誤")
+    if discount < 0:
+        raise ValueError("折扣金額不可為負數")
+    return kind, item_id, quantity, discount
+
+
+def _quote_bundle_components(matrix: PriceMatrix, kind: str, bundle_id: int, quantity: int, line_total: Decimal):
+    components = []
+    item_totals = []
+    for item_kind, item_id, per_bundle_qty in sale_components(matrix, kind, bundle_id):
+        item = matrix.item(item_kind, item_id)
+        if item is None:
+            raise ValueError(f"組合{matrix.item(kind, bundle_id)['name']}之品項{item_id}不存在")
+        if kind == PRODUCT_BUNDLE and item["status"] != "PUBLISHED":
+            raise ValueError("品項已下架")
+        unit_price = item["price"] or Decimal("0")
+        component_qty = per_bundle_qty * quantity
+        item_totals.append(unit_price * component_qty)
+        components.append({
+            "type": item_kind,
+            "id": item_id,
+            "name": item["name"],
+            "quantity": component_qty,
+            "unit_price": unit_price,
+        })
+    target_total, discount_total = resolve_bundle_target(sum(item_totals, Decimal("0")), final_price=line_total)
+    for component, (discount_amount, final_price) in zip(
+        components, distribute_bundle_total(item_totals, target_total, discount_total)
+    ):
+        component["discount"] = discount_amount
+        component["final_price"] = final_price
+    return components
+
+
+def quote_cart(items: list, identity_type: str | None = None, matrix: PriceMatrix | None = None) -> dict:
+    """
+    一次計算整個購物車：每列採用該身份別售價，組合另外列出各品項攤提後的金額
+    （與寫入銷售紀錄時的拆分相同）。品項不存在、已下架或未設定售價時拋出 ValueError。
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("購物車沒有品項")
+    matrix = matrix or get_matrix()
+
+    lines = []
+    subtotal = Decimal("0")
+    discount_sum = Decimal("0")
+    for entry in items:
+        kind, item_id, quantity, discount = _parse_cart_entry(entry)
+        item = matrix.item(kind, item_id)
+        if item is None:
+            raise ValueError(f"品項 {kind}:{item_id} 不存在")
+        if item["status"] != "PUBLISHED":
+            raise ValueError(f"品項{item['name'] or item_id}已下架")
+        unit_price, tier = matrix.unit_price(kind, item_id, identity_type)
+        if unit_price is None:
+            raise ValueError(f"品項{item['name'] or item_id}未設定售價")
+
+        line_subtotal = (unit_price * quantity).quantize(CENT)
+        line_discount = min(discount, line_subtotal).quantize(CENT)
+        line = {
+            "type": kind,
+            "id": item_id,
+            "name": item["name"],
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "price_tier": tier,
+            "subtotal": line_subtotal,
+            "discount": line_discount,
+            "total": line_subtotal - line_discount,
+        }
+        if kind in BUNDLE_KINDS:
+            line["components"] = _quote_bundle_components(matrix, kind, item_id, quantity, line["total"])
+        lines.append(line)
+        subtotal += line_subtotal
+        discount_sum += line_discount
+
+    return {
+        "identity_type": identity_type,
+        "lines": lines,
+        "subtotal": subtotal,
+        "discount": discount_sum,
+        "total": subtotal - discount_sum,
+    }
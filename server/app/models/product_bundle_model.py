@@ -4,6 +4,8 @@ import pymysql
 import json
 from typing import Iterable
 from app.config import DB_CONFIG
+from app.models import pricing_model
+from app.models.single_flight import single_flight
 from pymysql.cursors import DictCursor
 
 
@@ -20,6 +22,7 @@ def _permission_is_allowed(allowed_permissions, user_permission):
     return user_permission == allowed_permissions
 
 
+@single_flight("product_bundles")
 def get_all_product_bundles(status: str | None = None, store_id: int | None = None, user_permission: str | None = None):
     """
     獲取所有產品組合列表。
@@ -212,6 +215,7 @@ def create_product_bundle(data: dict):
 
             _sync_product_bundle_price_tiers(cursor, bundle_id, data.get("price_tiers"))
             conn.commit()
+        pricing_model.invalidate()
         return bundle_id
     except Exception as e:
         conn.rollback()
@@ -322,6 +326,8 @@ def update_product_bundle(bundle_id: int, data: dict):
 
             _sync_product_bundle_price_tiers(cursor, bundle_id, data.get("price_tiers"))
             conn.commit()
+        # 組合內容或售價已改，銷售端下次取矩陣時才會看到新的組合
+        pricing_model.invalidate()
         return True
     except Exception as e:
         conn.rollback()
@@ -359,6 +365,7 @@ def delete_product_bundle(bundle_id: int):
         with conn.cursor() as cursor:
             cursor.execute("DELETE FROM product_bundles WHERE bundle_id = %s", (bundle_id,))
         conn.commit()
+        pricing_model.invalidate()
         return True
     except Exception as e:
         conn.rollback()
@@ -3,6 +3,8 @@ import json
 from typing import Iterable
 from app.config import DB_CONFIG
 from pymysql.cursors import DictCursor
+from app.models import pricing_model
+from app.models.member_overview_model import bump_member_overview_versions
 
 
 def connect_to_db():
@@ -58,6 +60,7 @@ def create_product(data: dict):
                     (product_id, cid),
                 )
         conn.commit()
+        pricing_model.invalidate()
         return product_id
     except Exception as e:
         conn.rollback()
@@ -66,6 +69,22 @@ def create_product(data: dict):
         conn.close()
 
 
+# 批次查詢時每個 SQL 最多帶入的前綴 / 編號數量
+CODE_LOOKUP_CHUNK_SIZE = 500
+
+
+def _like_prefix(prefix: str) -> str:
+    """轉義 LIKE 萬用字元，搭配 ESCAPE '!' 使用（產品編號可能含有底線）。"""
+    escaped = prefix.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"{escaped}%"
+
+
+def _chunks(values: list, size: int | None = None):
+    size = size or CODE_LOOKUP_CHUNK_SIZE
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
 def find_products_with_prefix(code_prefix: str) -> list[dict]:
     """列出與指定產品編號前綴相符的產品。"""
     if not code_prefix:
@@ -74,15 +93,69 @@ def find_products_with_prefix(code_prefix: str) -> list[dict]:
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            # 以 LIKE 'prefix%' 進行索引範圍查詢，可使用 product.code 的唯一索引
             cursor.execute(
-                "SELECT product_id, name, code FROM product WHERE LEFT(code, %s) = %s",
-                (len(code_prefix), code_prefix),
+                "SELECT product_id, name, code FROM product WHERE code LIKE %s ESCAPE '!'",
+                (_like_prefix(code_prefix),),
             )
             return list(cursor.fetchall())
     finally:
         conn.close()
 
 
+def find_products_with_prefixes(code_prefixes: Iterable[str]) -> dict[str, list[dict]]:
+    """
+    一次查詢多個編號前綴，回傳 {前綴: [相符的產品...]}。
+    前綴比對與資料庫定序一致，不分大小寫。
+    """
+    prefixes = list(dict.fromkeys(p for p in code_prefixes if p))
+    matches: dict[str, list[dict]] = {prefix: [] for prefix in prefixes}
+    if not prefixes:
+        return matches
+
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            for chunk in _chunks(prefixes):
+                # 依長度分組，回填結果時以 code 的前 N 碼查表，不需逐一比對每個前綴
+                by_length: dict[int, dict[str, list[str]]] = {}
+                for prefix in chunk:
+                    by_length.setdefault(len(prefix), {}).setdefault(prefix.casefold(), []).append(prefix)
+
+                conditions = " OR ".join(["code LIKE %s ESCAPE '!'"] * len(chunk))
+                cursor.execute(
+                    f"SELECT product_id, name, code FROM product WHERE {conditions}",
+                    [_like_prefix(prefix) for prefix in chunk],
+                )
+                for row in cursor.fetchall():
+                    code = (row.get("code") or "").casefold()
+                    for length, keys in by_length.items():
+                        for prefix in keys.get(code[:length], ()):
+                            matches[prefix].append(row)
+        return matches
+    finally:
+        conn.close()
+
+
+def find_existing_product_codes(codes: Iterable[str]) -> set[str]:
+    """回傳已存在於 product 的編號（依資料庫中的寫法）。"""
+    values = list(dict.fromkeys(c for c in codes if c))
+    existing: set[str] = set()
+    if not values:
+        return existing
+
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            for chunk in _chunks(values):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT code FROM product WHERE code IN ({placeholders})", chunk)
+                existing.update(row["code"] for row in cursor.fetchall())
+        return existing
+    finally:
+        conn.close()
+
+
 def update_product(product_id: int, data: dict):
     """更新產品資料"""
     conn = connect_to_db()
@@ -142,6 +215,8 @@ def update_product(product_id: int, data: dict):
 
             _sync_product_price_tiers(cursor, product_id, data.get("price_tiers"))
         conn.commit()
+        # 售價與身份別價格可能已變動，本程序的價格矩陣下次取用時重新載入
+        pricing_model.invalidate()
     except Exception as e:
         conn.rollback()
         raise e
@@ -293,6 +368,9 @@ def delete_product(product_id: int):
             )
             cursor.execute("DELETE FROM product WHERE product_id=%s", (product_id,))
         conn.commit()
+        pricing_model.invalidate()
+        # 銷售紀錄的產品欄位已改寫；刪除產品很少見，直接遞增全域版本
+        bump_member_overview_versions()
     except Exception as e:
         conn.rollback()
         raise e
@@ -5,6 +5,11 @@ from decimal import Decimal
 from uuid import uuid4
 from functools import lru_cache
 from app.config import DB_CONFIG
+from app.models.sales_report_model import refresh_sales_rollup, sales_bucket
+from app.models.row_stream import stream_rows
+from app.models.replica import connect_for_read
+from app.models import pricing_model
+from app.models.member_overview_model import member_overview_changed
 
 def connect_to_db():
     """連接到數據庫"""
@@ -163,45 +168,63 @@ def _build_master_stock_join_clause(store_id):
     """
     return join_clause, params
 
-def get_all_product_sells(store_id=None):
-    """獲取產品銷售紀錄，可選用 store_id 過濾"""
+def _product_sells_list_query(store_id=None, since=None):
+    query = """
+        SELECT
+            ps.product_sell_id, ps.member_id, m.member_code AS member_code,
+            m.name as member_name, ps.store_id,
+            st.store_name as store_name, ps.product_id,
+            COALESCE(p.name, ps.product_name) as product_name,
+            ps.quantity, ps.unit_price, ps.discount_amount, ps.final_price,
+            ps.payment_method, sf.name as staff_name, ps.sale_category, ps.date, ps.note,
+            ps.order_reference
+        FROM product_sell ps
+        LEFT JOIN member m ON ps.member_id = m.member_id
+        LEFT JOIN store st ON ps.store_id = st.store_id
+        LEFT JOIN product p ON ps.product_id = p.product_id
+        LEFT JOIN staff sf ON ps.staff_id = sf.staff_id
+    """
+    conditions = []
+    params = []
+    if store_id is not None:
+        conditions.append("ps.store_id = %s")
+        params.append(store_id)
+    if since:
+        # 日期下限讓 MySQL 只讀取相關的年度分割區
+        conditions.append("ps.date >= %s")
+        params.append(since)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += (
+        " ORDER BY"
+        " (COALESCE(NULLIF(st.store_name, ''), CAST(ps.store_id AS CHAR)) = ''),"
+        " COALESCE(NULLIF(st.store_name, ''), CAST(ps.store_id AS CHAR)),"
+        " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
+        " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
+        " COALESCE(NULLIF(m.member_code, ''), ''),"
+        " ps.date DESC,"
+        " ps.product_sell_id DESC"
+    )
+    return query, tuple(params)
+
+
+def get_all_product_sells(store_id=None, since=None):
+    """獲取產品銷售紀錄，可選用 store_id 過濾；since (YYYY-MM-DD) 限制起始日期"""
+    query, params = _product_sells_list_query(store_id, since)
     conn = connect_to_db()
     with conn.cursor() as cursor:
-        query = """
-            SELECT
-                ps.product_sell_id, ps.member_id, m.member_code AS member_code,
-                m.name as member_name, ps.store_id,
-                st.store_name as store_name, ps.product_id,
-                COALESCE(p.name, ps.product_name) as product_name,
-                ps.quantity, ps.unit_price, ps.discount_amount, ps.final_price,
-                ps.payment_method, sf.name as staff_name, ps.sale_category, ps.date, ps.note,
-                ps.order_reference
-            FROM product_sell ps
-            LEFT JOIN member m ON ps.member_id = m.member_id
-            LEFT JOIN store st ON ps.store_id = st.store_id
-            LEFT JOIN product p ON ps.product_id = p.product_id
-            LEFT JOIN staff sf ON ps.staff_id = sf.staff_id
-        """
-        params = []
-        if store_id is not None:
-            query += " WHERE ps.store_id = %s"
-            params.append(store_id)
-        
-        query += (
-            " ORDER BY"
-            " (COALESCE(NULLIF(st.store_name, ''), CAST(ps.store_id AS CHAR)) = ''),"
-            " COALESCE(NULLIF(st.store_name, ''), CAST(ps.store_id AS CHAR)),"
-            " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
-            " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
-            " COALESCE(NULLIF(m.member_code, ''), ''),"
-            " ps.date DESC,"
-            " ps.product_sell_id DESC"
-        )
-        cursor.execute(query, tuple(params))
+        cursor.execute(query, params)
         result = cursor.fetchall()
     conn.close()
     return result
 
+
+def iter_all_product_sells(store_id=None, since=None):
+    """與 get_all_product_sells 相同的結果，以伺服器端游標逐筆產生（NDJSON 串流用）"""
+    query, params = _product_sells_list_query(store_id, since)
+    return stream_rows(query, params)
+
 def get_product_sell_by_id(sell_id: int):
     """根據ID獲取產品銷售紀錄"""
     conn = connect_to_db()
@@ -256,6 +279,10 @@ def insert_product_sell(data: dict):
 
     conn = connect_to_db()
     try:
+        # 組合內容、名稱與價格取自報價引擎的價格矩陣，不再逐項查詢；
+        # data_version 無法使用時矩陣可能落後，上架狀態改在交易內查詢
+        matrix, verified = pricing_model.get_sale_matrix()
+        status_matrix = matrix if verified else None
         with conn.cursor() as cursor:
             insert_query = """
                 INSERT INTO product_sell (
@@ -272,16 +299,13 @@ def insert_product_sell(data: dict):
                 bundle_id = data.get('bundle_id')
                 bundle_qty = int(data.get('quantity', 1))
                 bundle_order_reference = data.get('order_reference') or f"bundle-{bundle_id}-{uuid4()}"
-                cursor.execute(
-                    "SELECT item_id, quantity FROM product_bundle_items WHERE bundle_id = %s AND item_type = 'Product'",
-                    (bundle_id,),
-                )
-                bundle_items = cursor.fetchall()
-                cursor.execute(
-                    "SELECT name FROM product_bundles WHERE bundle_id = %s",
-                    (bundle_id,),
-                )
-                bundle_row = cursor.fetchone() or {}
+                bundle_items = [
+                    {"item_id": item_id, "quantity": quantity}
+                    for _, item_id, quantity in pricing_model.sale_components(
+                        matrix, pricing_model.PRODUCT_BUNDLE, bundle_id
+                    )
+                ]
+                bundle_row = matrix.item(pricing_model.PRODUCT_BUNDLE, bundle_id) or {}
                 bundle_name = bundle_row.get('name') or data.get('product_name')
                 bundle_components = []
                 if not bundle_items:
@@ -302,17 +326,21 @@ def insert_product_sell(data: dict):
                         "order_reference": bundle_order_reference,
                     }
                     cursor.execute(insert_query, bundle_data)
+                    sell_id = conn.insert_id()
+                    refresh_sales_rollup(cursor, "product", [sales_bucket(data.get('store_id'), data.get('date'))])
                     conn.commit()
-                    return conn.insert_id()
+                    member_overview_changed(data.get('member_id'))
+                    return sell_id
 
                 item_totals = []
                 total_price = Decimal('0')
                 for item in bundle_items:
-                    cursor.execute("SELECT name, price, status FROM product WHERE product_id = %s", (item['item_id'],))
-                    price_row = cursor.fetchone()
-                    if not price_row or price_row.get('status') != 'PUBLISHED':
+                    price_row = matrix.item(pricing_model.PRODUCT, item['item_id'])
+                    if not price_row or not pricing_model.is_published(
+                        cursor, pricing_model.PRODUCT, item['item_id'], status_matrix
+                    ):
                         raise ValueError("品項已下架")
-                    unit_price = Decimal(str(price_row['price'])) if price_row.get('price') is not None else Decimal('0')
+                    unit_price = price_row['price'] if price_row.get('price') is not None else Decimal('0')
                     product_name = price_row.get('name')
                     per_bundle_qty = int(item.get('quantity', 0))
                     quantity = per_bundle_qty * bundle_qty
@@ -320,26 +348,12 @@ def insert_product_sell(data: dict):
                     item_totals.append((item, unit_price, product_name, quantity, per_bundle_qty, item_total))
                     total_price += item_total
                     bundle_components.append(f"{product_name} x{per_bundle_qty}")
-                provided_final_price = Decimal(str(data.get('final_price') or 0))
-                provided_unit_price = Decimal(str(data.get('unit_price') or 0))
-                provided_discount = Decimal(str(data.get('discount_amount') or 0))
-
-                if provided_final_price <= 0 and provided_unit_price > 0:
-                    provided_final_price = provided_unit_price
-
-                if total_price > 0:
-                    if provided_final_price > 0:
-                        target_total = provided_final_price
-                        discount_total = total_price - target_total
-                    else:
-                        discount_total = provided_discount
-                        target_total = total_price - discount_total
-                        if target_total <= 0:
-                            target_total = total_price
-                            discount_total = Decimal('0')
-                else:
-                    target_total = provided_final_price if provided_final_price > 0 else Decimal('0')
-                    discount_total = Decimal('0')
+                target_total, discount_total = pricing_model.resolve_bundle_target(
+                    total_price,
+                    final_price=data.get('final_price'),
+                    unit_price=data.get('unit_price'),
+                    discount=data.get('discount_amount'),
+                )
 
                 bundle_note_parts = []
                 base_note = (data.get('note') or '').strip()
@@ -364,35 +378,13 @@ def insert_product_sell(data: dict):
                     ).strip()
                 )
 
-                distributed_rows = []
-                if total_price > 0 and item_totals:
-                    running_discount = Decimal('0')
-                    running_final = Decimal('0')
-                    for index, item_data in enumerate(item_totals):
-                        item_total = item_data[5]
-                        if index == len(item_totals) - 1:
-                            discount_amount = (discount_total - running_discount).quantize(Decimal('0.01'))
-                            final_price = (target_total - running_final).quantize(Decimal('0.01'))
-                        else:
-                            ratio = (item_total / total_price) if total_price > 0 else Decimal('0')
-                            discount_amount = (discount_total * ratio).quantize(Decimal('0.01'))
-                            final_price = (item_total - discount_amount).quantize(Decimal('0.01'))
-                            running_discount += discount_amount
-                            running_final += final_price
-                        distributed_rows.append((discount_amount, final_price))
-                    if len(distributed_rows) == len(item_totals):
-                        discount_total = sum(row[0] for row in distributed_rows)
-                elif item_totals:
-                    per_item_total = (target_total / len(item_totals)) if item_totals else Decimal('0')
-                    for _ in item_totals:
-                        distributed_rows.append((Decimal('0'), per_item_total))
-
-                for index, (item, unit_price, product_name, quantity, per_bundle_qty, item_total) in enumerate(item_totals):
-                    if distributed_rows and index < len(distributed_rows):
-                        discount_amount, final_price = distributed_rows[index]
-                    else:
-                        discount_amount = (item_total / total_price * discount_total) if total_price > 0 else Decimal('0')
-                        final_price = item_total - discount_amount
+                distributed_rows = pricing_model.distribute_bundle_total(
+                    [item_data[5] for item_data in item_totals], target_total, discount_total
+                )
+
+                for (item, unit_price, product_name, quantity, per_bundle_qty, item_total), (discount_amount, final_price) in zip(
+                    item_totals, distributed_rows
+                ):
                     item_data = {
                         "member_id": data.get('member_id'),
                         "staff_id": data.get('staff_id'),
@@ -421,12 +413,16 @@ def insert_product_sell(data: dict):
                         item_data.get('note'),
                     )
 
+                sell_id = conn.insert_id()
+                refresh_sales_rollup(cursor, "product", [sales_bucket(data.get('store_id'), data.get('date'))])
                 conn.commit()
-                return conn.insert_id()
+                member_overview_changed(data.get('member_id'))
+                return sell_id
             else:
-                cursor.execute("SELECT name, status FROM product WHERE product_id = %s", (data['product_id'],))
-                name_row = cursor.fetchone()
-                if not name_row or name_row.get('status') != 'PUBLISHED':
+                name_row = matrix.item(pricing_model.PRODUCT, data['product_id'])
+                if not name_row or not pricing_model.is_published(
+                    cursor, pricing_model.PRODUCT, data['product_id'], status_matrix
+                ):
                     raise ValueError("品項已下架")
                 data['product_name'] = name_row.get('name')
                 data['order_reference'] = data.get('order_reference')
@@ -442,8 +438,11 @@ def insert_product_sell(data: dict):
                     data.get('order_reference'),
                     data.get('note'),
                 )
+                sell_id = conn.insert_id()
+                refresh_sales_rollup(cursor, "product", [sales_bucket(data.get('store_id'), data.get('date'))])
                 conn.commit()
-                return conn.insert_id()
+                member_overview_changed(data.get('member_id'))
+                return sell_id
     except Exception as e:
         conn.rollback()
         raise e
@@ -627,7 +626,7 @@ def update_product_sell(sell_id: int, data: dict):
         with conn.cursor() as cursor:
             # 1. 獲取原始銷售記錄的 product_id, quantity, store_id, staff_id
             cursor.execute(
-                "SELECT product_id, quantity, store_id, staff_id, order_reference FROM product_sell WHERE product_sell_id = %s",
+                "SELECT product_id, quantity, store_id, staff_id, order_reference, date, member_id FROM product_sell WHERE product_sell_id = %s",
                 (sell_id,)
             )
             original_sell = cursor.fetchone()
@@ -711,8 +710,14 @@ def update_product_sell(sell_id: int, data: dict):
                     data.get('note'),
                 )
                 inventory_adjusted = True
-            
+
+            refresh_sales_rollup(cursor, "product", [
+                sales_bucket(original_store_id, original_sell.get('date')),
+                sales_bucket(new_store_id, data.get('date', original_sell.get('date'))),
+            ])
             conn.commit()
+            # 紀錄可能改掛到其他會員，新舊會員都要失效
+            member_overview_changed(original_sell.get('member_id'), data.get('member_id', original_sell.get('member_id')))
             print(f"銷售記錄 {sell_id} 更新成功。庫存是否調整: {inventory_adjusted}")
             return True
     except Exception as e:
@@ -730,7 +735,7 @@ def delete_product_sell(sell_id: int):
         with conn.cursor() as cursor:
             # 1. 獲取要刪除的記錄的 product_id, quantity, store_id 以便還原庫存
             cursor.execute(
-                "SELECT product_id, quantity, store_id, staff_id, order_reference FROM product_sell WHERE product_sell_id = %s",
+                "SELECT product_id, quantity, store_id, staff_id, order_reference, date, member_id FROM product_sell WHERE product_sell_id = %s",
                 (sell_id,)
             )
             sell_to_delete = cursor.fetchone()
@@ -764,8 +769,10 @@ def delete_product_sell(sell_id: int):
                 None,
             )
             print(f"庫存調整：產品 {product_id_to_restore} 在店家 {store_id_to_restore} 加回數量 {quantity_to_restore} (因銷售記錄 {sell_id} 刪除)")
-            
+
+            refresh_sales_rollup(cursor, "product", [sales_bucket(store_id_to_restore, sell_to_delete.get('date'))])
             conn.commit()
+            member_overview_changed(sell_to_delete.get('member_id'))
             print(f"銷售記錄 {sell_id} 刪除成功。")
             return True
     except Exception as e:
@@ -1022,9 +1029,9 @@ def search_products_with_inventory(keyword, store_id=None, status: str | None =
     return filtered
 
 def export_product_sells(store_id=None):
-    """匯出產品銷售記錄，可選用 store_id 過濾"""
+    """匯出產品銷售記錄，可選用 store_id 過濾；讀取唯讀複本"""
     # 此函數的 SQL 邏輯與 get_all_product_sells 相似
-    conn = connect_to_db()
+    conn = connect_for_read()
     with conn.cursor() as cursor:
         query = """
             SELECT
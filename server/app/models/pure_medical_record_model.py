@@ -1,6 +1,8 @@
 # server/app/models/pure_medical_record_model.py
 import pymysql
 from app.config import DB_CONFIG
+from app.models.replica import connect_for_read
+from app.models.member_overview_model import member_overview_changed
 from datetime import datetime
 import traceback
 
@@ -96,6 +98,7 @@ def add_pure_record(data: dict, store_id: int):
             )
             cursor.execute(sql, params)
             conn.commit()
+            member_overview_changed(data.get('member_id'))
             return cursor.lastrowid
     except Exception as e:
         conn.rollback()
@@ -134,6 +137,8 @@ def update_pure_record(pure_id, data):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            cursor.execute("SELECT member_id FROM ipn_pure WHERE ipn_pure_id = %s", (pure_id,))
+            existing = cursor.fetchone()
             sql = """
                 UPDATE ipn_pure 
                 SET member_id = %s, staff_id = %s, visceral_fat = %s, body_fat_percentage = %s,
@@ -151,6 +156,7 @@ def update_pure_record(pure_id, data):
             )
             cursor.execute(sql, params)
             conn.commit()
+            member_overview_changed(existing.get('member_id') if existing else None, data.get('member_id'))
             return True
     except Exception as e:
         conn.rollback()
@@ -163,8 +169,12 @@ def delete_pure_record(pure_id):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            cursor.execute("SELECT member_id FROM ipn_pure WHERE ipn_pure_id = %s", (pure_id,))
+            existing = cursor.fetchone()
             cursor.execute("DELETE FROM ipn_pure WHERE ipn_pure_id = %s", (pure_id,))
             conn.commit()
+            if existing:
+                member_overview_changed(existing.get('member_id'))
             return cursor.rowcount > 0 # 返回影響的行數，更精確判斷是否刪除成功
     except Exception as e:
         conn.rollback()
@@ -222,8 +232,8 @@ def get_pure_records_by_member_id(member_id: int, store_level: str, store_id: in
         conn.close()
 
 def export_pure_records(store_level: str, store_id: int):
-    """根據權限導出淨化健康紀錄以供Excel下載"""
-    conn = connect_to_db()
+    """根據權限導出淨化健康紀錄以供Excel下載；讀取唯讀複本"""
+    conn = connect_for_read()
     try:
         with conn.cursor() as cursor:
             
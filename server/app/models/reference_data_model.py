@@ -0,0 +1,213 @@
+# server/app/models/reference_data_model.py
+"""
+參考資料（分店、分店帳號、員工、分類、會員身份別）的行程內快取。
+
+這些資料表很小且很少變動，卻幾乎每個畫面都要讀。各資料集整份載入記憶體，
+以 data_version（08_data_version.sql 的觸發器維護）判斷是否過期：
+  * 最多每 REFERENCE_DATA_CHECK_INTERVAL 秒以一筆查詢取得所有相關資料表的版本；
+  * 本 worker 的寫入呼叫 invalidate(資料表...) 立即失效；
+  * 未納入版本追蹤的資料表（member_identity_type）或尚未套用遷移時，依同一間隔重新載入。
+讀取版本與載入都在鎖外進行，鎖只保護快取本身；呼叫端取得的是列的副本，可以自由修改。
+"""
+import threading
+import time
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import DB_CONFIG, REFERENCE_DATA_CHECK_INTERVAL
+from app.models.data_version_model import get_table_versions
+
+
+def connect_to_db():
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+def _load_identity_types(cursor):
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'member_identity_type'
+        LIMIT 1
+        """
+    )
+    if cursor.fetchone() is None:
+        return []
+    cursor.execute("SELECT * FROM member_identity_type")
+    return cursor.fetchall()
+
+
+# 資料集 → (依賴的已追蹤資料表, SQL 或載入函式)；排序在 SQL 中決定，與原本各查詢的定序一致
+DATASETS = {
+    "stores": (
+        ("store",),
+        "SELECT store_id, store_name, store_location, store_type FROM store ORDER BY store_name",
+    ),
+    "store_accounts": (
+        ("store", "store_account"),
+        """
+        SELECT s.store_id, s.store_name, s.store_location, s.store_type,
+               sa.account, sa.permission
+        FROM store AS s
+        LEFT JOIN store_account AS sa ON sa.store_id = s.store_id
+        ORDER BY s.store_id ASC
+        """,
+    ),
+    "staff": (
+        ("staff",),
+        "SELECT staff_id, name, store_id, account, permission FROM staff ORDER BY name",
+    ),
+    "categories": (
+        ("category",),
+        "SELECT * FROM category ORDER BY (name='未歸類'), name",
+    ),
+    "identity_types": ((), _load_identity_types),
+}
+
+_lock = threading.Lock()
+# 資料集 → (載入時的版本, 載入時間, 列)
+_cache: dict[str, tuple] = {}
+_versions: dict[str, int] | None = None
+_versions_checked_at: float | None = None
+# invalidate() 時遞增；鎖外載入期間若有本 worker 的寫入，載入結果不寫回快取
+_generation = 0
+
+
+def _tracked_tables() -> list[str]:
+    return sorted({table for tables, _ in DATASETS.values() for table in tables})
+
+
+def _read_versions():
+    try:
+        return get_table_versions(_tracked_tables())
+    except Exception as e:
+        print(f"讀取參考資料版本失敗，改以時間間隔重新載入: {e}")
+        return None
+
+
+def _dataset_versions(name: str):
+    tables = DATASETS[name][0]
+    if not tables or _versions is None:
+        return None
+    return tuple(_versions.get(table, 0) for table in tables)
+
+
+def _load(name: str):
+    source = DATASETS[name][1]
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            if callable(source):
+                return list(source(cursor))
+            cursor.execute(source)
+            return list(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def get(name: str) -> list[dict]:
+    """取得資料集的所有列（副本）。"""
+    global _versions, _versions_checked_at
+    if name not in DATASETS:
+        raise ValueError(f"未知的參考資料: {name}")
+    now = time.monotonic()
+    with _lock:
+        generation = _generation
+        check_versions = _versions_checked_at is None or now - _versions_checked_at >= REFERENCE_DATA_CHECK_INTERVAL
+    if check_versions:
+        versions = _read_versions()
+        with _lock:
+            if _generation == generation:
+                _versions, _versions_checked_at = versions, now
+
+    with _lock:
+        generation = _generation
+        versions = _dataset_versions(name)
+        entry = _cache.get(name)
+    if entry is not None:
+        loaded_versions, loaded_at, rows = entry
+        if versions is not None:
+            fresh = loaded_versions == versions
+        else:
+            fresh = now - loaded_at < REFERENCE_DATA_CHECK_INTERVAL
+        if fresh:
+            return [dict(row) for row in rows]
+
+    # 版本在載入前取得：載入期間的寫入只會讓下一次檢查多重新載入一次
+    rows = _load(name)
+    with _lock:
+        if _generation == generation:
+            _cache[name] = (versions, now, rows)
+    return [dict(row) for row in rows]
+
+
+def invalidate(*tables):
+    """本 worker 寫入參考資料表後呼叫；未指定資料表時清除全部。"""
+    global _versions_checked_at, _generation
+    with _lock:
+        _generation += 1
+        for name, (dependencies, _) in DATASETS.items():
+            if not tables or set(dependencies) & set(tables):
+                _cache.pop(name, None)
+        # 下一次讀取時重新取得版本，寫入後的新版本才會被記錄
+        _versions_checked_at = None
+
+
+# --- 衍生檢視 ---
+
+def stores_by_id() -> list[dict]:
+    return sorted(get("stores"), key=lambda row: row["store_id"])
+
+
+def stores_by_name() -> list[dict]:
+    return get("stores")
+
+
+def staff_by_name() -> list[dict]:
+    return get("staff")
+
+
+def store_ids_with_staff() -> list:
+    return sorted({row["store_id"] for row in get("staff") if row["store_id"] is not None})
+
+
+def staff_permissions() -> list[str]:
+    return list(dict.fromkeys(row["permission"] for row in get("staff") if row["permission"]))
+
+
+def stores_with_staff() -> list[dict]:
+    """每間分店與其員工帳號（無員工的分店也有一列），依 store_id、staff_id 排序。"""
+    staff_by_store: dict = {}
+    for row in sorted(get("staff"), key=lambda row: row["staff_id"]):
+        staff_by_store.setdefault(row["store_id"], []).append(row)
+    rows = []
+    for store in stores_by_id():
+        members = staff_by_store.get(store["store_id"]) or [
+            {"staff_id": None, "account": None, "permission": None}
+        ]
+        for staff in members:
+            rows.append({
+                "store_id": store["store_id"],
+                "store_name": store["store_name"],
+                "store_location": store["store_location"],
+                "store_type": store["store_type"],
+                "staff_id": staff["staff_id"],
+                "account": staff["account"],
+                "permission": staff["permission"],
+            })
+    return rows
+
+
+def categories(target_type: str | None = None) -> list[dict]:
+    rows = get("categories")
+    if target_type:
+        rows = [row for row in rows if row.get("target_type") == target_type]
+    return rows
+
+
+def resolve_identity_type(value: str) -> str | None:
+    """以代碼、名稱或顯示名稱找出會員身份別代碼；快取中沒有時回傳 None。"""
+    for row in get("identity_types"):
+        if value in (row.get("identity_type_code"), row.get("identity_type_name"), row.get("display_name")):
+            return row.get("identity_type_code")
+    return None
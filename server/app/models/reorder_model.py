@@ -0,0 +1,281 @@
+# server/app/models/reorder_model.py
+"""
+依出貨速度計算補貨建議。
+
+stock_transaction 的 OUTBOUND 紀錄（數量為負值）先彙總到 reorder_daily_outbound（每日 × 商品 × 分店），
+銷售刪除 / 修改時以原單號寫回的 INBOUND 視為退貨，從退貨當日的需求扣除。
+每次刷新重算上次刷新當日與最近 REORDER_LOOKBACK_MINUTES 分鐘所涵蓋日期的彙總，
+晚提交、編號較小的異動與退貨都會在下一次刷新計入，不依賴 txn_id 的處理進度。計算時把視窗內的每日出貨載入為
+(商品分店組數 × 天數) 的矩陣，一次算出所有組合的日均量、標準差、動態安全庫存與補貨目標，
+整批取代 reorder_suggestion。低庫存與 master 庫存總覽讀取該表，不在請求中計算。
+"""
+import math
+import time
+from datetime import date, datetime, timedelta
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import (
+    DB_CONFIG,
+    REORDER_LEAD_TIME_DAYS,
+    REORDER_LOOKBACK_MINUTES,
+    REORDER_REVIEW_DAYS,
+    REORDER_SERVICE_Z,
+    REORDER_WINDOW_DAYS,
+)
+
+# 尚未有補貨建議的商品沿用原本的固定安全庫存
+DEFAULT_STOCK_THRESHOLD = 5
+# 分店調撥的異動單號前綴（master_stock_model.transfer_master_stock），與實際出貨區分
+TRANSFER_REFERENCE_PREFIX = "TRF-"
+
+
+def connect_to_db():
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+# 已套用遷移後不再查詢；查詢失敗或尚未套用時，最多每 60 秒重新確認一次
+_AVAILABLE_RECHECK_SECONDS = 60
+_available_state = {"available": False, "checked_at": 0.0}
+
+
+def reorder_available() -> bool:
+    """Return True once the 11_reorder_suggestions migration has been applied."""
+    if _available_state["available"]:
+        return True
+    now = time.monotonic()
+    if _available_state["checked_at"] and now - _available_state["checked_at"] < _AVAILABLE_RECHECK_SECONDS:
+        return False
+    _available_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'reorder_suggestion'
+                LIMIT 1
+                """
+            )
+            _available_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查補貨建議資料表失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _available_state["available"]
+
+
+def build_demand_matrix(rows, window_start: date, window_days: int):
+    """
+    將 (master_product_id, store_id, sale_date, quantity) 列轉為每日出貨矩陣。
+    回傳 (keys, matrix)；keys[i] 為 (master_product_id, store_id)，matrix[i, d] 為 window_start + d 天的出貨量，
+    沒有出貨的日子為 0。
+    """
+    # numpy 只在刷新時載入，庫存路由啟動時不需要
+    import numpy as np
+
+    index: dict[tuple, int] = {}
+    row_idx, day_idx, quantities = [], [], []
+    for row in rows:
+        day = (row["sale_date"] - window_start).days
+        if not 0 <= day < window_days:
+            continue
+        key = (int(row["master_product_id"]), int(row["store_id"]))
+        row_idx.append(index.setdefault(key, len(index)))
+        day_idx.append(day)
+        quantities.append(float(row["quantity"] or 0))
+
+    matrix = np.zeros((len(index), window_days), dtype=np.float64)
+    if quantities:
+        np.add.at(matrix, (np.asarray(row_idx), np.asarray(day_idx)), np.asarray(quantities))
+    return list(index), matrix
+
+
+def compute_suggestions(
+    matrix,
+    on_hand,
+    lead_days: int = REORDER_LEAD_TIME_DAYS,
+    review_days: int = REORDER_REVIEW_DAYS,
+    z: float = REORDER_SERVICE_Z,
+) -> dict:
+    """
+    對每日出貨矩陣的每一列計算：
+      avg / std          日均出貨量與其標準差（沒有出貨的日子計為 0）
+      reorder_point      前置天數內的平均需求 + z × std × √前置天數（無條件進位）
+      order_up_to        (前置 + 檢視週期) 天的平均需求 + 對應安全量
+      suggested_qty      補到 order_up_to 所需數量
+      days_of_cover      目前庫存可銷天數；沒有出貨時為 NaN
+    """
+    import numpy as np
+
+    matrix = np.asarray(matrix, dtype=np.float64)
+    on_hand = np.asarray(on_hand, dtype=np.float64)
+    avg = matrix.mean(axis=1) if matrix.shape[1] else np.zeros(matrix.shape[0])
+    std = matrix.std(axis=1) if matrix.shape[1] else np.zeros(matrix.shape[0])
+    horizon = lead_days + review_days
+    reorder_point = np.ceil(avg * lead_days + z * std * math.sqrt(lead_days))
+    order_up_to = np.ceil(avg * horizon + z * std * math.sqrt(horizon))
+    suggested = np.maximum(order_up_to - on_hand, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(avg > 0, on_hand / avg, np.nan)
+    return {
+        "avg": avg,
+        "std": std,
+        "reorder_point": reorder_point.astype(np.int64),
+        "order_up_to": order_up_to.astype(np.int64),
+        "suggested_qty": suggested.astype(np.int64),
+        "days_of_cover": days_of_cover,
+    }
+
+
+def recompute_since(window_start: date, last_refreshed_at: datetime | None, now: datetime, full: bool) -> date:
+    """需要重算的第一天：回溯範圍的起日與上次刷新當日取較早者，不早於視窗起日。"""
+    if full or last_refreshed_at is None:
+        return window_start
+    since = min((now - timedelta(minutes=REORDER_LOOKBACK_MINUTES)).date(), last_refreshed_at.date())
+    return max(since, window_start)
+
+
+def _rebuild_outbound(cursor, since: date, window_start: date):
+    """重算 since 之後每日的出貨淨量（分店調撥不算需求，銷售退回的 INBOUND 扣除）。"""
+    cursor.execute("DELETE FROM reorder_daily_outbound WHERE sale_date >= %s OR sale_date < %s", (since, window_start))
+    transfer_pattern = f"{TRANSFER_REFERENCE_PREFIX}%"
+    cursor.execute(
+        """
+        INSERT INTO reorder_daily_outbound (master_product_id, store_id, sale_date, quantity)
+        SELECT master_product_id, store_id, sale_date, SUM(quantity)
+        FROM (
+            SELECT st.master_product_id, st.store_id, DATE(st.created_at) AS sale_date, -st.quantity AS quantity
+            FROM stock_transaction st
+            WHERE st.created_at >= %s
+              AND st.txn_type = 'OUTBOUND'
+              AND st.store_id IS NOT NULL
+              AND (st.reference_no IS NULL OR st.reference_no NOT LIKE %s)
+            UNION ALL
+            SELECT r.master_product_id, r.store_id, DATE(r.created_at), -r.quantity
+            FROM stock_transaction r
+            WHERE r.created_at >= %s
+              AND r.txn_type = 'INBOUND'
+              AND r.store_id IS NOT NULL
+              AND r.reference_no IS NOT NULL
+              AND r.reference_no NOT LIKE %s
+              AND EXISTS (
+                  SELECT 1
+                  FROM stock_transaction o
+                  WHERE o.reference_no = r.reference_no
+                    AND o.master_product_id = r.master_product_id
+                    AND o.store_id = r.store_id
+                    AND o.txn_type = 'OUTBOUND'
+              )
+        ) AS demand
+        GROUP BY master_product_id, store_id, sale_date
+        HAVING SUM(quantity) > 0
+        """,
+        (since, transfer_pattern, since, transfer_pattern),
+    )
+
+
+def refresh_reorder_suggestions(full: bool = False, today: date | None = None) -> dict:
+    """
+    刷新補貨建議：重算上次刷新以來（至少回溯 REORDER_LOOKBACK_MINUTES 分鐘）的每日彙總；
+    full=True 時由 stock_transaction 重建整個視窗（刪除異動紀錄或調整 REORDER_WINDOW_DAYS 後使用）。
+    """
+    today = today or date.today()
+    window_start = today - timedelta(days=REORDER_WINDOW_DAYS - 1)
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            # 鎖住狀態列：同時執行的刷新依序進行，不會重複累加
+            # 時間一律取資料庫的 NOW()，與 stock_transaction.created_at 使用相同時區
+            cursor.execute(
+                "SELECT last_txn_id, refreshed_at, NOW() AS db_now FROM reorder_refresh_state WHERE id = 1 FOR UPDATE"
+            )
+            state = cursor.fetchone()
+            if state is None:
+                raise RuntimeError("reorder_refresh_state 尚未初始化，請先套用 11_reorder_suggestions.sql")
+            since = recompute_since(window_start, state.get("refreshed_at"), state["db_now"], full)
+            # 只供查看進度；重算範圍依日期決定
+            cursor.execute("SELECT MAX(txn_id) AS max_id FROM stock_transaction")
+            row = cursor.fetchone()
+            upper = row["max_id"] if row and row["max_id"] is not None else int(state["last_txn_id"])
+            _rebuild_outbound(cursor, since, window_start)
+
+            cursor.execute(
+                """
+                SELECT master_product_id, store_id, sale_date, quantity
+                FROM reorder_daily_outbound
+                WHERE sale_date >= %s
+                """,
+                (window_start,),
+            )
+            keys, matrix = build_demand_matrix(cursor.fetchall(), window_start, REORDER_WINDOW_DAYS)
+
+            cursor.execute("SELECT master_product_id, store_id, quantity_on_hand FROM master_stock")
+            stock = {
+                (int(row["master_product_id"]), int(row["store_id"])): int(row["quantity_on_hand"] or 0)
+                for row in cursor.fetchall()
+                if row.get("store_id") is not None
+            }
+            on_hand = [stock.get(key, 0) for key in keys]
+            result = compute_suggestions(matrix, on_hand)
+
+            cursor.execute("DELETE FROM reorder_suggestion")
+            if keys:
+                cursor.executemany(
+                    """
+                    INSERT INTO reorder_suggestion (
+                        master_product_id, store_id, window_days, avg_daily_demand, demand_stddev,
+                        reorder_point, order_up_to, quantity_on_hand, days_of_cover, suggested_qty, computed_at
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                    """,
+                    [
+                        (
+                            master_product_id,
+                            store_id,
+                            REORDER_WINDOW_DAYS,
+                            round(float(result["avg"][i]), 4),
+                            round(float(result["std"][i]), 4),
+                            int(result["reorder_point"][i]),
+                            int(result["order_up_to"][i]),
+                            on_hand[i],
+                            None if math.isnan(result["days_of_cover"][i]) else round(float(result["days_of_cover"][i]), 2),
+                            int(result["suggested_qty"][i]),
+                        )
+                        for i, (master_product_id, store_id) in enumerate(keys)
+                    ],
+                )
+            cursor.execute(
+                "UPDATE reorder_refresh_state SET last_txn_id = %s, refreshed_at = %s WHERE id = 1",
+                (upper, state["db_now"]),
+            )
+        conn.commit()
+        return {
+            "last_txn_id": upper,
+            "suggestions": len(keys),
+            "window_start": window_start.isoformat(),
+            "recomputed_since": since.isoformat(),
+        }
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def threshold_sql(master_column: str, store_column: str) -> tuple[str, str, str, str]:
+    """
+    讀取補貨建議用的 SQL 片段：(LEFT JOIN 子句, 安全庫存運算式, 日均出貨運算式, 補貨目標運算式)。
+    尚未套用遷移時 JOIN 為空字串，安全庫存為原本的固定值。
+    """
+    if not reorder_available():
+        return "", str(DEFAULT_STOCK_THRESHOLD), "NULL", "NULL"
+    join = (
+        " LEFT JOIN reorder_suggestion rs"
+        f" ON rs.master_product_id = {master_column} AND rs.store_id = {store_column}"
+    )
+    return join, f"COALESCE(rs.reorder_point, {DEFAULT_STOCK_THRESHOLD})", "rs.avg_daily_demand", "rs.order_up_to"
@@ -0,0 +1,121 @@
+# server/app/models/replica.py
+"""
+讀寫分離：匯出與報表這類可容忍短暫延遲的讀取以 connect_for_read() 連線，
+設定了唯讀複本（REPLICA_DB_CONFIG）且複本延遲在 REPLICA_MAX_LAG_SECONDS 以內時讀複本，
+否則讀主庫。寫入與「寫入後立即讀取」的流程（列表、搜尋、歷史明細，前端新增後會立刻重新載入）
+一律使用各 model 的 connect_to_db()（主庫）；
+同一段程式需要強制讀主庫時以 `with primary_reads():` 包住呼叫。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import (
+    DB_CONFIG,
+    REPLICA_CHECK_INTERVAL,
+    REPLICA_CONNECT_TIMEOUT,
+    REPLICA_DB_CONFIG,
+    REPLICA_MAX_LAG_SECONDS,
+)
+
+_force_primary: ContextVar[bool] = ContextVar("force_primary_reads", default=False)
+
+_state_lock = threading.Lock()
+# healthy: 最近一次檢查結果；checked_at: 檢查時間（time.monotonic）；lag: 複寫延遲秒數
+_state = {"healthy": False, "checked_at": None, "lag": None, "reason": "未檢查"}
+
+
+@contextmanager
+def primary_reads():
+    """區塊內的 connect_for_read() 一律連主庫（例如剛寫入後要讀回的資料）。"""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def _replica_lag(conn) -> float | None:
+    """回傳複寫延遲秒數；複寫未執行時回傳 None。MySQL 8.0.22+ 為 REPLICA，舊版為 SLAVE。"""
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            row = cursor.fetchone()
+            key = "Seconds_Behind_Source"
+        except pymysql.err.ProgrammingError:
+            cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            key = "Seconds_Behind_Master"
+    if not row or row.get(key) is None:
+        return None
+    return float(row[key])
+
+
+def _set_state(healthy: bool, lag=None, reason: str = ""):
+    with _state_lock:
+        changed = _state["checked_at"] is None or _state["healthy"] != healthy
+        _state.update(healthy=healthy, checked_at=time.monotonic(), lag=lag, reason=reason)
+    if changed:
+        print(f"唯讀複本{'恢復使用' if healthy else '暫停使用，改讀主庫'}: {reason}")
+
+
+def _check_replica() -> bool:
+    try:
+        conn = pymysql.connect(
+            **REPLICA_DB_CONFIG, cursorclass=DictCursor, connect_timeout=REPLICA_CONNECT_TIMEOUT
+        )
+    except Exception as e:
+        _set_state(False, reason=f"無法連線: {e}")
+        return False
+    try:
+        lag = _replica_lag(conn)
+    except Exception as e:
+        _set_state(False, reason=f"無法讀取複寫狀態: {e}")
+        return False
+    finally:
+        conn.close()
+    if lag is None:
+        _set_state(False, reason="複寫未執行")
+        return False
+    if lag > REPLICA_MAX_LAG_SECONDS:
+        _set_state(False, lag, f"延遲 {lag:.0f} 秒，超過 {REPLICA_MAX_LAG_SECONDS:.0f} 秒")
+        return False
+    _set_state(True, lag, f"延遲 {lag:.0f} 秒")
+    return True
+
+
+def replica_usable() -> bool:
+    """依快取的檢查結果判斷是否讀複本；超過 REPLICA_CHECK_INTERVAL 才重新檢查。"""
+    if REPLICA_DB_CONFIG is None:
+        return False
+    with _state_lock:
+        checked_at = _state["checked_at"]
+        healthy = _state["healthy"]
+    if checked_at is not None and time.monotonic() - checked_at < REPLICA_CHECK_INTERVAL:
+        return healthy
+    return _check_replica()
+
+
+def replica_status() -> dict:
+    """目前的複本狀態（供管理介面或除錯使用）。"""
+    with _state_lock:
+        state = dict(_state)
+    state["configured"] = REPLICA_DB_CONFIG is not None
+    state.pop("checked_at")
+    return state
+
+
+def connect_for_read(cursorclass=DictCursor):
+    """可容忍延遲的讀取用連線：複本可用時連複本，連線失敗或不可用時改連主庫。"""
+    if not _force_primary.get() and replica_usable():
+        try:
+            return pymysql.connect(
+                **REPLICA_DB_CONFIG, cursorclass=cursorclass, connect_timeout=REPLICA_CONNECT_TIMEOUT
+            )
+        except Exception as e:
+            _set_state(False, reason=f"無法連線: {e}")
+    return pymysql.connect(**DB_CONFIG, cursorclass=cursorclass)
@@ -0,0 +1,31 @@
+# server/app/models/row_stream.py
+import pymysql
+from app.config import DB_CONFIG, STREAM_FETCH_SIZE
+
+
+def stream_rows(sql: str, params=(), transform=None, batch_size: int | None = None, read_replica: bool = False):
+    """
+    以不緩衝的伺服器端游標（SSDictCursor）逐批讀取查詢結果並逐筆 yield。
+    結果不會整批載入記憶體；transform 可對每一列做輕量轉換。
+    連線在迭代結束、發生例外或產生器被關閉（例如用戶端中斷）時釋放。
+    read_replica=True 時經由 replica.connect_for_read() 連線（可容忍延遲的匯出）。
+    """
+    batch_size = batch_size or STREAM_FETCH_SIZE
+    if read_replica:
+        from app.models.replica import connect_for_read
+
+        conn = connect_for_read(cursorclass=pymysql.cursors.SSDictCursor)
+    else:
+        conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.SSDictCursor)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield transform(row) if transform else row
+    finally:
+        # 直接關閉連線，不必先讀完剩餘的結果列
+        conn.close()
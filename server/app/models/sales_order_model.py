@@ -1,6 +1,7 @@
 # app/models/sales_order_model.py
 import pymysql
 from app.config import DB_CONFIG
+from app.models.sales_report_model import refresh_sales_rollup, sales_bucket
 from datetime import datetime
 import traceback
 
@@ -137,7 +138,11 @@ def create_sales_order(order_data: dict):
                     "note": note
                 }
                 cursor.execute(item_query, item_for_sql)
-        
+
+            refresh_sales_rollup(cursor, "sales_order", [
+                sales_bucket(order_main_data_for_sql["store_id"], order_main_data_for_sql["order_date"]),
+            ])
+
         conn.commit()
         return {"success": True, "order_id": order_id, "message": "銷售單新增成功"}
     except KeyError as ke: # 捕獲因為鍵名不匹配導致的錯誤
@@ -168,6 +173,11 @@ def update_sales_order(order_id: int, order_data: dict):
         conn = connect_to_db()
         conn.begin()
         with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT store_id, order_date FROM sales_orders WHERE order_id = %s",
+                (order_id,),
+            )
+            original_order = cursor.fetchone() or {}
             update_query = """
                 UPDATE sales_orders
                 SET
@@ -231,6 +241,11 @@ def update_sales_order(order_id: int, order_data: dict):
                 }
                 cursor.execute(item_query, item_for_sql)
 
+            refresh_sales_rollup(cursor, "sales_order", [
+                sales_bucket(original_order.get("store_id"), original_order.get("order_date")),
+                sales_bucket(order_main_data["store_id"], order_main_data["order_date"]),
+            ])
+
         conn.commit()
         return {"success": True, "order_id": order_id, "message": "銷售單更新成功"}
     except ValueError as ve:
@@ -337,9 +352,17 @@ def delete_sales_orders_by_ids(order_ids: list[int]):
         conn.begin()
         with conn.cursor() as cursor:
             placeholders = ', '.join(['%s'] * len(order_ids))
+            cursor.execute(
+                f"SELECT DISTINCT store_id, order_date FROM sales_orders WHERE order_id IN ({placeholders})",
+                tuple(order_ids),
+            )
+            affected_buckets = [
+                sales_bucket(row.get("store_id"), row.get("order_date")) for row in cursor.fetchall()
+            ]
             # 由於 sales_order_items 表設定了 ON DELETE CASCADE，相關的項目會被自動刪除
             query = f"DELETE FROM sales_orders WHERE order_id IN ({placeholders})"
             deleted_count = cursor.execute(query, tuple(order_ids))
+            refresh_sales_rollup(cursor, "sales_order", affected_buckets)
         conn.commit()
         return {"success": True, "message": f"成功刪除 {deleted_count} 筆銷售單。"}
     except Exception as e:
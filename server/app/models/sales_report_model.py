@@ -0,0 +1,453 @@
+# server/app/models/sales_report_model.py
+import time
+
+import pymysql
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.config import DB_CONFIG
+from app.models.replica import connect_for_read
+from pymysql.cursors import DictCursor
+
+
+ROLLUP_SOURCES = ("product", "therapy", "sales_order")
+
+# 各來源表彙總成 sales_daily_rollup 的 SELECT；{where} 由呼叫端補上日期 / 店家條件
+_ROLLUP_SELECTS = {
+    "product": {
+        "date_column": "ps.date",
+        "store_column": "ps.store_id",
+        "query": """
+            SELECT
+                ps.date, 'product', ps.store_id, COALESCE(ps.staff_id, 0),
+                COALESCE(ps.sale_category, ''), COALESCE(ps.payment_method, ''),
+                COUNT(*), COALESCE(SUM(ps.quantity), 0),
+                COALESCE(SUM(ps.unit_price * ps.quantity), 0),
+                COALESCE(SUM(ps.discount_amount), 0),
+                COALESCE(SUM(ps.final_price), 0)
+            FROM product_sell ps
+            WHERE ps.date IS NOT NULL {where}
+            GROUP BY ps.date, ps.store_id, COALESCE(ps.staff_id, 0),
+                     COALESCE(ps.sale_category, ''), COALESCE(ps.payment_method, '')
+        """,
+    },
+    "therapy": {
+        "date_column": "ts.date",
+        "store_column": "COALESCE(ts.store_id, 0)",
+        "query": """
+            SELECT
+                ts.date, 'therapy', COALESCE(ts.store_id, 0), COALESCE(ts.staff_id, 0),
+                COALESCE(ts.sale_category, ''), COALESCE(ts.payment_method, ''),
+                COUNT(*), COALESCE(SUM(ts.amount), 0),
+                COALESCE(SUM(ts.final_price + COALESCE(ts.discount, 0)), 0),
+                COALESCE(SUM(ts.discount), 0),
+                COALESCE(SUM(ts.final_price), 0)
+            FROM therapy_sell ts
+            WHERE ts.date IS NOT NULL {where}
+            GROUP BY ts.date, COALESCE(ts.store_id, 0), COALESCE(ts.staff_id, 0),
+                     COALESCE(ts.sale_category, ''), COALESCE(ts.payment_method, '')
+        """,
+    },
+    "sales_order": {
+        "date_column": "so.order_date",
+        "store_column": "so.store_id",
+        "query": """
+            SELECT
+                so.order_date, 'sales_order', so.store_id, COALESCE(so.staff_id, 0),
+                COALESCE(so.sale_category, ''), '',
+                COUNT(*), COALESCE(SUM(items.quantity), 0),
+                COALESCE(SUM(so.subtotal), 0),
+                COALESCE(SUM(so.total_discount), 0),
+                COALESCE(SUM(so.grand_total), 0)
+            FROM sales_orders so
+            LEFT JOIN (
+                SELECT order_id, SUM(quantity) AS quantity
+                FROM sales_order_items
+                GROUP BY order_id
+            ) items ON items.order_id = so.order_id
+            WHERE so.order_date IS NOT NULL {where}
+            GROUP BY so.order_date, so.store_id, COALESCE(so.staff_id, 0), COALESCE(so.sale_category, '')
+        """,
+    },
+}
+
+_ROLLUP_INSERT_PREFIX = """
+    INSERT INTO sales_daily_rollup (
+        sale_date, source, store_id, staff_id, category, payment_method,
+        txn_count, quantity, gross_amount, discount_amount, net_amount
+    )
+"""
+
+# group_by 參數可用的維度：(SELECT 欄位, GROUP BY 欄位, 回傳的鍵)
+GROUP_DIMENSIONS = {
+    "date": (["r.sale_date AS sale_date"], ["r.sale_date"], ["sale_date"]),
+    "week": (
+        ["DATE_SUB(r.sale_date, INTERVAL WEEKDAY(r.sale_date) DAY) AS week_start"],
+        ["week_start"],
+        ["week_start"],
+    ),
+    "month": (["DATE_FORMAT(r.sale_date, '%%Y-%%m') AS month"], ["month"], ["month"]),
+    "store": (
+        ["r.store_id AS store_id", "MAX(st.store_name) AS store_name"],
+        ["r.store_id"],
+        ["store_id"],
+    ),
+    "staff": (
+        ["r.staff_id AS staff_id", "MAX(sf.name) AS staff_name"],
+        ["r.staff_id"],
+        ["staff_id"],
+    ),
+    "category": (["r.category AS category"], ["r.category"], ["category"]),
+    "payment_method": (["r.payment_method AS payment_method"], ["r.payment_method"], ["payment_method"]),
+    "source": (["r.source AS source"], ["r.source"], ["source"]),
+}
+TIME_DIMENSIONS = {"date", "week", "month"}
+METRIC_FIELDS = ("txn_count", "quantity", "gross_amount", "discount_amount", "net_amount")
+
+
+def connect_to_db():
+    """建立資料庫連線"""
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+# 只快取「已套用遷移」；查無資料表或查詢失敗時隔一段時間重新檢查，
+# 避免一次暫時性的連線錯誤讓彙總讀寫停用到程序重啟
+_ROLLUP_RECHECK_SECONDS = 60
+_rollup_state = {"available": False, "checked_at": 0.0}
+
+
+def _rollup_table_available() -> bool:
+    """Return True once the 06_sales_daily_rollup migration has been applied."""
+    if _rollup_state["available"]:
+        return True
+    now = time.monotonic()
+    if _rollup_state["checked_at"] and now - _rollup_state["checked_at"] < _ROLLUP_RECHECK_SECONDS:
+        return False
+    _rollup_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'sales_daily_rollup'
+                LIMIT 1
+                """
+            )
+            _rollup_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查銷售彙總資料表失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _rollup_state["available"]
+
+
+def _normalize_bucket_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip().replace("/", "-")
+    return text[:10] or None
+
+
+def _normalize_bucket_store(value):
+    if value is None or value == "":
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def sales_bucket(store_id, sale_date):
+    """Build a (store_id, date) rollup bucket key from raw write-path values."""
+    return (_normalize_bucket_store(store_id), _normalize_bucket_date(sale_date))
+
+
+def refresh_sales_rollup(cursor, source: str, buckets):
+    """
+    重新計算指定來源在特定 (store_id, 日期) 的每日彙總。
+
+    由銷售寫入函式在同一個交易中呼叫，只重算受影響的少數分組，
+    因此無論新增、修改或刪除，彙總表都與原始資料保持一致。
+    """
+    if source not in _ROLLUP_SELECTS:
+        raise ValueError(f"未知的彙總來源: {source}")
+    if not _rollup_table_available():
+        return
+
+    spec = _ROLLUP_SELECTS[source]
+    unique_buckets = {
+        (store_id, sale_date)
+        for store_id, sale_date in buckets
+        if sale_date is not None
+    }
+    for store_id, sale_date in sorted(unique_buckets):
+        cursor.execute(
+            "DELETE FROM sales_daily_rollup WHERE source = %s AND store_id = %s AND sale_date = %s",
+            (source, store_id, sale_date),
+        )
+        where = f" AND {spec['store_column']} = %s AND {spec['date_column']} = %s"
+        cursor.execute(
+            _ROLLUP_INSERT_PREFIX + spec["query"].format(where=where),
+            (store_id, sale_date),
+        )
+
+
+def get_member_sales_buckets(member_id: int) -> dict:
+    """取得會員所有銷售所屬的 (store_id, 日期) 分組，供刪除會員後重算彙總。"""
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT store_id, date FROM product_sell WHERE member_id = %s",
+                (member_id,),
+            )
+            product = [sales_bucket(r.get("store_id"), r.get("date")) for r in cursor.fetchall()]
+            cursor.execute(
+                "SELECT DISTINCT store_id, date FROM therapy_sell WHERE member_id = %s",
+                (member_id,),
+            )
+            therapy = [sales_bucket(r.get("store_id"), r.get("date")) for r in cursor.fetchall()]
+            return {"product": product, "therapy": therapy}
+    finally:
+        conn.close()
+
+
+def refresh_sales_rollup_buckets(buckets_by_source: dict):
+    """在獨立交易中重算多個來源的分組（用於非銷售模組造成的資料刪除）。"""
+    if not any(buckets_by_source.values()):
+        return
+    conn = connect_to_db()
+    try:
+        conn.begin()
+        with conn.cursor() as cursor:
+            for source, buckets in buckets_by_source.items():
+                refresh_sales_rollup(cursor, source, buckets)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+
+def rebuild_sales_rollup(start_date: str | None = None, end_date: str | None = None, sources=None):
+    """依日期區間（預設為全部歷史）重建每日彙總，供補資料或修正使用。"""
+    selected = [s for s in (sources or ROLLUP_SOURCES) if s in _ROLLUP_SELECTS]
+    conn = connect_to_db()
+    try:
+        conn.begin()
+        rebuilt = {}
+        with conn.cursor() as cursor:
+            for source in selected:
+                spec = _ROLLUP_SELECTS[source]
+                delete_sql = "DELETE FROM sales_daily_rollup WHERE source = %s"
+                delete_params: list = [source]
+                where = ""
+                params: list = []
+                if start_date:
+                    delete_sql += " AND sale_date >= %s"
+                    delete_params.append(start_date)
+                    where += f" AND {spec['date_column']} >= %s"
+                    params.append(start_date)
+                if end_date:
+                    delete_sql += " AND sale_date <= %s"
+                    delete_params.append(end_date)
+                    where += f" AND {spec['date_column']} <= %s"
+                    params.append(end_date)
+                cursor.execute(delete_sql, tuple(delete_params))
+                rebuilt[source] = cursor.execute(
+                    _ROLLUP_INSERT_PREFIX + spec["query"].format(where=where),
+                    tuple(params),
+                )
+        conn.commit()
+        return rebuilt
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+
+def parse_group_by(raw: str | None) -> list[str]:
+    """Validate a comma separated group_by parameter against GROUP_DIMENSIONS."""
+    if not raw:
+        return []
+    dimensions = []
+    for part in raw.split(","):
+        name = part.strip().lower()
+        if not name:
+            continue
+        if name not in GROUP_DIMENSIONS:
+            raise ValueError(f"不支援的 group_by 維度: {name}")
+        if name not in dimensions:
+            dimensions.append(name)
+    if len(TIME_DIMENSIONS.intersection(dimensions)) > 1:
+        raise ValueError("date / week / month 僅能擇一")
+    return dimensions
+
+
+def comparison_range(start: date, end: date, mode: str | None):
+    """
+    計算比較期間：
+    - previous：緊接在前、天數相同的期間
+    - previous_year：去年同期
+    """
+    if not mode:
+        return None
+    if mode == "previous":
+        length = (end - start).days + 1
+        prev_end = start - timedelta(days=1)
+        return prev_end - timedelta(days=length - 1), prev_end
+    if mode == "previous_year":
+        def _shift(d: date) -> date:
+            try:
+                return d.replace(year=d.year - 1)
+            except ValueError:
+                # 2/29 → 2/28
+                return d.replace(year=d.year - 1, day=28)
+        return _shift(start), _shift(end)
+    raise ValueError("compare 僅支援 previous 或 previous_year")
+
+
+def _to_number(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _format_report_row(row: dict) -> dict:
+    for key in ("sale_date", "week_start"):
+        if isinstance(row.get(key), (date, datetime)):
+            row[key] = row[key].isoformat()
+    for field in METRIC_FIELDS:
+        row[field] = _to_number(row.get(field)) or 0
+    return row
+
+
+def _query_rollup(cursor, start: date, end: date, dimensions, store_id=None, sources=None):
+    select_parts: list[str] = []
+    group_parts: list[str] = []
+    for name in dimensions:
+        selects, groups, _ = GROUP_DIMENSIONS[name]
+        select_parts.extend(selects)
+        group_parts.extend(groups)
+
+    metrics = [
+        "COALESCE(SUM(r.txn_count), 0) AS txn_count",
+        "COALESCE(SUM(r.quantity), 0) AS quantity",
+        "COALESCE(SUM(r.gross_amount), 0) AS gross_amount",
+        "COALESCE(SUM(r.discount_amount), 0) AS discount_amount",
+        "COALESCE(SUM(r.net_amount), 0) AS net_amount",
+    ]
+    query = f"SELECT {', '.join(select_parts + metrics)} FROM sales_daily_rollup r"
+    if "store" in dimensions:
+        query += " LEFT JOIN store st ON st.store_id = r.store_id"
+    if "staff" in dimensions:
+        query += " LEFT JOIN staff sf ON sf.staff_id = r.staff_id"
+
+    conditions = ["r.sale_date >= %s", "r.sale_date <= %s"]
+    params: list = [start.isoformat(), end.isoformat()]
+    if store_id is not None:
+        conditions.append("r.store_id = %s")
+        params.append(store_id)
+    if sources:
+        conditions.append(f"r.source IN ({', '.join(['%s'] * len(sources))})")
+        params.extend(sources)
+    query += " WHERE " + " AND ".join(conditions)
+    if group_parts:
+        query += " GROUP BY " + ", ".join(group_parts)
+        query += " ORDER BY " + ", ".join(group_parts)
+
+    cursor.execute(query, tuple(params))
+    rows = cursor.fetchall()
+    if not group_parts and rows and all(rows[0].get(field) in (None, 0) for field in METRIC_FIELDS):
+        rows = []
+    return [_format_report_row(row) for row in rows]
+
+
+def _sum_rows(rows) -> dict:
+    totals = {field: 0 for field in METRIC_FIELDS}
+    for row in rows:
+        for field in METRIC_FIELDS:
+            totals[field] += row.get(field) or 0
+    totals["gross_amount"] = round(totals["gross_amount"], 2)
+    totals["discount_amount"] = round(totals["discount_amount"], 2)
+    totals["net_amount"] = round(totals["net_amount"], 2)
+    return totals
+
+
+def _change(current, previous):
+    diff = round((current or 0) - (previous or 0), 2)
+    pct = round(diff / previous * 100, 2) if previous else None
+    return {"diff": diff, "pct": pct}
+
+
+def get_sales_report(
+    start: date,
+    end: date,
+    group_by=None,
+    store_id: int | None = None,
+    sources=None,
+    compare: str | None = None,
+):
+    """
+    從 sales_daily_rollup 產生銷售報表。
+
+    只讀取彙總表（每日每維度一筆），不掃描原始銷售資料；
+    compare 指定時另外查詢比較期間並附上差異。報表可容忍複本延遲，經 connect_for_read() 讀取。
+    """
+    dimensions = list(group_by or [])
+    conn = connect_for_read()
+    try:
+        with conn.cursor() as cursor:
+            rows = _query_rollup(cursor, start, end, dimensions, store_id, sources)
+            report = {
+                "range": {"start": start.isoformat(), "end": end.isoformat()},
+                "group_by": dimensions,
+                "rows": rows,
+                "totals": _sum_rows(rows),
+            }
+
+            compare_range = comparison_range(start, end, compare)
+            if compare_range:
+                prev_start, prev_end = compare_range
+                prev_rows = _query_rollup(cursor, prev_start, prev_end, dimensions, store_id, sources)
+                prev_totals = _sum_rows(prev_rows)
+                report["comparison"] = {
+                    "mode": compare,
+                    "range": {"start": prev_start.isoformat(), "end": prev_end.isoformat()},
+                    "rows": prev_rows,
+                    "totals": prev_totals,
+                    "change": {
+                        field: _change(report["totals"][field], prev_totals[field])
+                        for field in METRIC_FIELDS
+                    },
+                }
+
+                # 非時間維度可逐列對照上一期
+                key_fields = [
+                    key
+                    for name in dimensions
+                    if name not in TIME_DIMENSIONS
+                    for key in GROUP_DIMENSIONS[name][2]
+                ]
+                if key_fields and not TIME_DIMENSIONS.intersection(dimensions):
+                    previous_by_key = {
+                        tuple(row.get(k) for k in key_fields): row for row in prev_rows
+                    }
+                    for row in rows:
+                        previous = previous_by_key.get(tuple(row.get(k) for k in key_fields))
+                        previous_net = previous.get("net_amount") if previous else 0
+                        row["previous_net_amount"] = previous_net
+                        row["net_amount_change"] = _change(row.get("net_amount"), previous_net)
+            return report
+    finally:
+        conn.close()
@@ -0,0 +1,101 @@
+# server/app/models/single_flight.py
+"""
+合併同時進行的相同讀取（single-flight）。
+
+以 @single_flight("名稱") 標記的 model 函式，參數正規化後相同的呼叫若有一筆正在執行，
+後到的呼叫會等待它完成並取得結果的副本，而不是再查一次資料庫。
+只合併「同時」進行的呼叫，不快取已完成的結果，也不跨 worker 共用結果。
+庫存數量等會被銷售立即改變的讀取不使用此機制：等待者可能拿到寫入提交前開始的查詢結果。
+"""
+import copy
+import inspect
+import threading
+from functools import wraps
+
+from app.config import SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_WAIT_SECONDS
+from app.metrics import record_cache
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+_calls_lock = threading.Lock()
+_calls: dict[tuple, _Call] = {}
+
+
+def _normalize(value):
+    """'1' 與 1、None 與 '' 在查詢條件中等價，視為同一個鍵。"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    return repr(value)
+
+
+def make_key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> tuple:
+    """以參數名稱綁定後正規化：f(1) 與 f(store_id="1") 得到相同的鍵。"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return (name, tuple((key, _normalize(value)) for key, value in bound.arguments.items()))
+
+
+def single_flight(name: str):
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not SINGLE_FLIGHT_ENABLED:
+                return func(*args, **kwargs)
+            key = make_key(name, signature, args, kwargs)
+            with _calls_lock:
+                call = _calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _calls[key] = _Call()
+                else:
+                    call.waiters += 1
+
+            if not leader:
+                if not call.done.wait(SINGLE_FLIGHT_WAIT_SECONDS):
+                    record_cache("single_flight", misses=1)
+                    return func(*args, **kwargs)
+                if call.error is not None:
+                    raise call.error
+                record_cache("single_flight", hits=1)
+                # 每個等待者取得獨立副本，路由可以自由修改回傳的資料
+                return copy.deepcopy(call.result)
+
+            record_cache("single_flight", misses=1)
+            try:
+                call.result = func(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with _calls_lock:
+                    _calls.pop(key, None)
+                    shared = call.waiters > 0
+                call.done.set()
+            # 有人共用時，執行者也拿副本，避免修改到等待者正在複製的結果
+            return copy.deepcopy(call.result) if shared else call.result
+
+        wrapper.uncoalesced = func
+        return wrapper
+
+    return decorator
@@ -1,8 +1,8 @@
 # /app/models/staff_model.py
 import pymysql
 import os
-import numpy as np
 from app.config import DB_CONFIG
+from app.models import reference_data_model
 from datetime import datetime, date
 
 
@@ -68,16 +68,8 @@ def get_all_staff(store_level=None, store_id=None):
             connection.close()
 
 def get_all_staff_for_dropdown():
-    """獲取所有員工的 ID 和姓名，用於下拉選單。"""
-    conn = connect_to_db()
-    try:
-        with conn.cursor() as cursor:
-            # 使用正確的欄位名稱 name
-            sql = "SELECT staff_id, name FROM staff ORDER BY name"
-            cursor.execute(sql)
-            return cursor.fetchall()
-    finally:
-        conn.close()
+    """獲取所有員工的 ID 和姓名，用於下拉選單（取自參考資料快取）。"""
+    return [{"staff_id": row["staff_id"], "name": row["name"]} for row in reference_data_model.staff_by_name()]
 
 def search_staff(keyword, store_level=None, store_id=None):
     """搜尋員工，可依店鋪或權限篩選"""
@@ -396,6 +388,7 @@ def create_staff(data):
             staff_id = connection.insert_id()
 
             connection.commit()
+            reference_data_model.invalidate("staff")
     except Exception as e:
         if connection:
             connection.rollback()
@@ -668,6 +661,7 @@ def update_staff(staff_id, data):
             )
 
             connection.commit()
+            reference_data_model.invalidate("staff")
             success = True
     except Exception as e:
         if connection:
@@ -723,6 +717,7 @@ def delete_staff(staff_id):
                     )
             
             connection.commit()
+            reference_data_model.invalidate("staff", "store_account")
             success = True
     except Exception as e:
         if connection:
@@ -735,66 +730,34 @@ def delete_staff(staff_id):
     return success
 
 def get_store_list():
-    """獲取所有分店列表"""
-    connection = connect_to_db()
-    store_list = []
-    
+    """獲取有員工的分店 ID 列表"""
     try:
-        with connection.cursor() as cursor:
-            query = """
-            SELECT DISTINCT store_id FROM staff
-            WHERE store_id IS NOT NULL
-            """
-            cursor.execute(query)
-            stores = cursor.fetchall()
-            store_list = [store["store_id"] for store in stores]
+        return reference_data_model.store_ids_with_staff()
     except Exception as e:
         print(f"獲取分店列表錯誤: {e}")
-    finally:
-        if connection:
-            connection.close()
-    
-    return store_list
+        return []
 
 def get_permission_list():
     """獲取所有權限等級列表"""
-    connection = connect_to_db()
-    permission_list = []
-    
     try:
-        with connection.cursor() as cursor:
-            query = """
-            SELECT DISTINCT permission FROM staff
-            WHERE permission IS NOT NULL AND permission != ''
-            """
-            cursor.execute(query)
-            permissions = cursor.fetchall()
-            permission_list = [permission["permission"] for permission in permissions]
+        return reference_data_model.staff_permissions()
     except Exception as e:
         print(f"獲取權限列表錯誤: {e}")
-    finally:
-        if connection:
-            connection.close()
-    
-    return permission_list 
+        return []
 
 def get_all_stores():
     """
     從 store 資料表中獲取所有分店的 ID 和名稱。
     這是為下拉式選單提供資料的【正確】方法。
     """
-    conn = connect_to_db()
     try:
-        with conn.cursor() as cursor:
-            query = "SELECT store_id, store_name FROM store ORDER BY store_id ASC"
-            cursor.execute(query)
-            return cursor.fetchall()
+        return [
+            {"store_id": row["store_id"], "store_name": row["store_name"]}
+            for row in reference_data_model.stores_by_id()
+        ]
     except Exception as e:
         print(f"Error fetching all stores: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def get_all_staff_with_accounts():
     """獲取所有員工及其帳號資訊，用於總部管理頁面"""
@@ -861,6 +824,7 @@ def update_staff_account(staff_id, data):
             
             cursor.execute(query, params)
             conn.commit()
+            reference_data_model.invalidate("staff")
 
             # 檢查是否有任何一行被更新
             if cursor.rowcount > 0:
@@ -880,20 +844,9 @@ def update_staff_account(staff_id, data):
 def get_all_stores_for_dropdown():
     """
     [新功能專用] 從 store 資料表中獲取所有分店的 ID 和名稱。
-    這個函式最單純，只做一件事，確保下拉選單有資料。
+    與 get_all_stores 相同，皆取自參考資料快取。
     """
-    conn = connect_to_db()
-    try:
-        with conn.cursor() as cursor:
-            query = "SELECT store_id, store_name FROM store ORDER BY store_id ASC"
-            cursor.execute(query)
-            return cursor.fetchall()
-    except Exception as e:
-        print(f"Error in get_all_stores_for_dropdown: {e}")
-        return [] # 如果出錯，返回空列表
-    finally:
-        if conn:
-            conn.close()
+    return get_all_stores()
 
 def get_staff_by_store_for_dropdown(store_id):
     """
@@ -1,6 +1,7 @@
 import pymysql
 import bcrypt
 from app.config import DB_CONFIG
+from app.models import reference_data_model
 from pymysql.cursors import DictCursor
 
 VALID_STORE_TYPES = {"DIRECT", "FRANCHISE"}
@@ -48,6 +49,7 @@ def create_store(store_data: dict):
                 ),
             )
         conn.commit()
+        reference_data_model.invalidate("store", "store_account")
         return store_id
     except Exception as e:
         conn.rollback()
@@ -57,20 +59,7 @@ def create_store(store_data: dict):
 
 def get_all_stores():
     """
-    獲取所有分店的列表。
+    獲取所有分店的列表（取自參考資料快取）。
     注意：出於安全考量，我們不回傳 password 欄位。
     """
-    conn = connect_to_db()
-    try:
-        with conn.cursor() as cursor:
-            query = """
-                SELECT s.store_id, s.store_name, s.store_location, s.store_type,
-                       sa.account, sa.permission
-                FROM store AS s
-                LEFT JOIN store_account AS sa ON sa.store_id = s.store_id
-                ORDER BY s.store_id ASC
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
-    finally:
-        conn.close()
\ No newline at end of file
+    return reference_data_model.get("store_accounts")
\ No newline at end of file
@@ -0,0 +1,375 @@
+# server/app/models/stress_analytics_model.py
+"""
+壓力測試統計分析。
+
+ipn_stress_answer 會被載入為 (測驗數 × 題數) 的 int8 答案矩陣
+（0 = 未作答、1 = 甲、2 = 乙），再以兩個 (題數 × 4) 權重矩陣
+一次算出所有測驗的 a/b/c/d 分數。分布、趨勢與分店統計都以這個結果為準，
+題目對照表調整後不必先執行重算；沒有作答紀錄的舊測驗才沿用儲存的分數。
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pymysql
+from pymysql.cursors import DictCursor
+
+from app.config import DB_CONFIG
+from app.models.member_overview_model import bump_member_overview_versions
+from app.models.stress_test_model import (
+    STRESS_QUESTION_MAPPING,
+    _stress_answer_storage_migrated,
+)
+
+SCORE_KEYS = ("a", "b", "c", "d")
+QUESTION_NOS = tuple(sorted(STRESS_QUESTION_MAPPING))
+ANSWER_NONE, ANSWER_JIA, ANSWER_YI = 0, 1, 2
+_ANSWER_CODES = {"甲": ANSWER_JIA, "A": ANSWER_JIA, "乙": ANSWER_YI, "B": ANSWER_YI}
+TREND_INTERVALS = {"month": "%Y-%m", "week": "%x-W%v", "day": "%Y-%m-%d"}
+
+
+def connect_to_db():
+    """建立資料庫連線"""
+    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+
+
+def _build_weight_matrices(mapping=STRESS_QUESTION_MAPPING):
+    questions = tuple(sorted(mapping))
+    jia = np.zeros((len(questions), len(SCORE_KEYS)), dtype=np.int16)
+    yi = np.zeros_like(jia)
+    for row, question in enumerate(questions):
+        jia_key, yi_key = mapping[question]
+        jia[row, SCORE_KEYS.index(jia_key)] = 1
+        yi[row, SCORE_KEYS.index(yi_key)] = 1
+    return jia, yi
+
+
+_JIA_WEIGHTS, _YI_WEIGHTS = _build_weight_matrices()
+_QUESTION_INDEX = {question: i for i, question in enumerate(QUESTION_NOS)}
+# 每個向度可能的最高分（= 該向度出現在對照表中的次數）
+MAX_SCORE = int(np.maximum(_JIA_WEIGHTS, _YI_WEIGHTS).sum(axis=0).max())
+
+
+def build_answer_matrix(rows):
+    """
+    將 (ipn_stress_id, question_no, answer) 列轉為答案矩陣。
+    回傳 (stress_ids, matrix)；stress_ids 已排序，matrix 第 i 列對應 stress_ids[i]。
+    """
+    stress_ids, question_idx, codes = [], [], []
+    for row in rows:
+        question = str(row["question_no"]).strip().zfill(2)
+        col = _QUESTION_INDEX.get(question)
+        code = _ANSWER_CODES.get(str(row["answer"]).strip())
+        if col is None or code is None:
+            continue
+        stress_ids.append(int(row["ipn_stress_id"]))
+        question_idx.append(col)
+        codes.append(code)
+
+    if not stress_ids:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(QUESTION_NOS)), dtype=np.int8)
+
+    unique_ids, row_idx = np.unique(np.asarray(stress_ids, dtype=np.int64), return_inverse=True)
+    matrix = np.zeros((len(unique_ids), len(QUESTION_NOS)), dtype=np.int8)
+    matrix[row_idx, np.asarray(question_idx)] = np.asarray(codes, dtype=np.int8)
+    return unique_ids, matrix
+
+
+def score_answer_matrix(matrix):
+    """以矩陣乘法一次計算所有測驗的 a/b/c/d 分數，回傳 (N × 4) 陣列。"""
+    matrix = np.asarray(matrix)
+    return (matrix == ANSWER_JIA).astype(np.int16) @ _JIA_WEIGHTS + (
+        matrix == ANSWER_YI
+    ).astype(np.int16) @ _YI_WEIGHTS
+
+
+def build_packed_answer_matrix(rows):
+    """
+    將 (ipn_stress_id, answers_packed) 列轉為答案矩陣：
+    所有字串接成一段 bytes 後 reshape 成 (N × 題數)，不需逐題處理。
+    """
+    rows = [row for row in rows if row.get("answers_packed")]
+    if not rows:
+        return build_answer_matrix([])
+    width = len(QUESTION_NOS)
+    ids = np.array([int(row["ipn_stress_id"]) for row in rows], dtype=np.int64)
+    packed = "".join(str(row["answers_packed"]).ljust(width, "-")[:width] for row in rows)
+    chars = np.frombuffer(packed.encode("ascii"), dtype=np.uint8).reshape(len(rows), width)
+    matrix = np.zeros(chars.shape, dtype=np.int8)
+    matrix[chars == ord("A")] = ANSWER_JIA
+    matrix[chars == ord("B")] = ANSWER_YI
+    order = np.argsort(ids, kind="stable")
+    return ids[order], matrix[order]
+
+
+def load_answer_matrix(cursor, stress_ids=None, store_id=None, start_date=None, end_date=None):
+    """
+    載入答案矩陣；可限定特定 ipn_stress_id，或與統計查詢相同的分店 / 日期範圍。
+    已套用 answers_packed 時只讀 ipn_stress 的單一欄位，否則讀 ipn_stress_answer。
+    """
+    conditions, params = _scope_conditions(store_id, start_date, end_date)
+    if stress_ids is not None:
+        stress_ids = list(stress_ids)
+        if not stress_ids:
+            return build_answer_matrix([])
+        conditions.append(f"s.ipn_stress_id IN ({', '.join(['%s'] * len(stress_ids))})")
+        params.extend(stress_ids)
+
+    if _stress_answer_storage_migrated():
+        conditions.append("s.answers_packed IS NOT NULL")
+        cursor.execute(
+            f"SELECT s.ipn_stress_id, s.answers_packed FROM ipn_stress s WHERE {' AND '.join(conditions)}",
+            tuple(params),
+        )
+        return build_packed_answer_matrix(cursor.fetchall())
+
+    query = "SELECT a.ipn_stress_id, a.question_no, a.answer FROM ipn_stress_answer a"
+    if conditions:
+        query += f" JOIN ipn_stress s ON s.ipn_stress_id = a.ipn_stress_id WHERE {' AND '.join(conditions)}"
+    cursor.execute(query, tuple(params))
+    return build_answer_matrix(cursor.fetchall())
+
+
+def _scope_conditions(store_id=None, start_date=None, end_date=None):
+    conditions, params = [], []
+    if store_id is not None:
+        conditions.append("s.store_id = %s")
+        params.append(store_id)
+    if start_date:
+        conditions.append("s.test_date >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("s.test_date <= %s")
+        params.append(end_date)
+    return conditions, params
+
+
+def _fetch_score_rows(cursor, select: str = "", store_id=None, start_date=None, end_date=None, extra_join=""):
+    """
+    讀取範圍內的測驗，並把 a~d 分數換成依答案矩陣與目前 STRESS_QUESTION_MAPPING 算出的分數；
+    沒有作答紀錄的舊測驗沿用儲存的分數。
+    """
+    conditions, params = _scope_conditions(store_id, start_date, end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor.execute(
+        f"""
+        SELECT s.ipn_stress_id{", " + select if select else ""}, s.a_score, s.b_score, s.c_score, s.d_score
+        FROM ipn_stress s
+        {extra_join}
+        {where}
+        """,
+        tuple(params),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return rows
+
+    answer_ids, matrix = load_answer_matrix(cursor, None, store_id, start_date, end_date)
+    if not len(answer_ids):
+        return rows
+    computed = score_answer_matrix(matrix)
+    row_ids = np.array([row["ipn_stress_id"] for row in rows], dtype=np.int64)
+    positions = np.minimum(np.searchsorted(answer_ids, row_ids), len(answer_ids) - 1)
+    for i in np.flatnonzero(answer_ids[positions] == row_ids):
+        scores = computed[positions[i]]
+        rows[i].update({f"{key}_score": int(scores[j]) for j, key in enumerate(SCORE_KEYS)})
+    return rows
+
+
+def _scores_array(rows):
+    if not rows:
+        return np.zeros((0, len(SCORE_KEYS)), dtype=np.float64)
+    return np.array(
+        [[row.get(f"{key}_score") or 0 for key in SCORE_KEYS] for row in rows],
+        dtype=np.float64,
+    )
+
+
+def _dominant_counts(scores):
+    """每筆測驗分數最高的向度（同分時取字母順序較前者）。"""
+    counts = np.bincount(scores.argmax(axis=1), minlength=len(SCORE_KEYS)) if len(scores) else np.zeros(
+        len(SCORE_KEYS), dtype=np.int64
+    )
+    return {key: int(counts[i]) for i, key in enumerate(SCORE_KEYS)}
+
+
+def _summary(scores):
+    if not len(scores):
+        return {key: {"mean": None, "median": None, "p25": None, "p75": None} for key in SCORE_KEYS}
+    means = scores.mean(axis=0)
+    p25, median, p75 = np.percentile(scores, [25, 50, 75], axis=0)
+    return {
+        key: {
+            "mean": round(float(means[i]), 2),
+            "median": float(median[i]),
+            "p25": float(p25[i]),
+            "p75": float(p75[i]),
+        }
+        for i, key in enumerate(SCORE_KEYS)
+    }
+
+
+def get_score_distribution(store_id=None, start_date=None, end_date=None):
+    """各向度的分數分布（0 ~ MAX_SCORE 的次數）、統計值與主要向度分布。"""
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            rows = _fetch_score_rows(cursor, "", store_id, start_date, end_date)
+    finally:
+        conn.close()
+
+    scores = _scores_array(rows)
+    clipped = np.clip(scores, 0, MAX_SCORE).astype(np.int64)
+    histogram = {
+        key: np.bincount(clipped[:, i], minlength=MAX_SCORE + 1).tolist()
+        for i, key in enumerate(SCORE_KEYS)
+    }
+    return {
+        "total_tests": int(len(scores)),
+        "max_score": MAX_SCORE,
+        "histogram": histogram,
+        "summary": _summary(scores),
+        "dominant": _dominant_counts(scores),
+    }
+
+
+def _group_means(keys, scores):
+    """依 keys 分組計算每組筆數與各向度平均，回傳 (group_keys, inverse, counts, means)。"""
+    if not len(keys):
+        return [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, len(SCORE_KEYS)))
+    group_keys, inverse = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(group_keys))
+    sums = np.zeros((len(group_keys), len(SCORE_KEYS)))
+    np.add.at(sums, inverse, scores)
+    return list(group_keys), inverse, counts, sums / counts[:, None]
+
+
+def get_score_trend(interval="month", store_id=None, start_date=None, end_date=None):
+    """依月 / 週 / 日彙總測驗筆數與各向度平均分數。"""
+    if interval not in TREND_INTERVALS:
+        raise ValueError("interval 僅支援 month、week 或 day")
+    fmt = TREND_INTERVALS[interval].replace("%", "%%")
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            rows = _fetch_score_rows(
+                cursor, f"DATE_FORMAT(s.test_date, '{fmt}') AS period", store_id, start_date, end_date
+            )
+    finally:
+        conn.close()
+
+    rows = [row for row in rows if row.get("period")]
+    periods, _, counts, means = _group_means([row["period"] for row in rows], _scores_array(rows))
+    return {
+        "interval": interval,
+        "points": [
+            {
+                "period": period,
+                "count": int(counts[i]),
+                **{f"{key}_mean": round(float(means[i, j]), 2) for j, key in enumerate(SCORE_KEYS)},
+            }
+            for i, period in enumerate(periods)
+        ],
+    }
+
+
+def get_store_breakdown(store_id=None, start_date=None, end_date=None):
+    """各分店的測驗筆數、各向度平均與主要向度分布。"""
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            rows = _fetch_score_rows(
+                cursor,
+                "s.store_id, st.store_name",
+                store_id,
+                start_date,
+                end_date,
+                extra_join="LEFT JOIN store st ON s.store_id = st.store_id",
+            )
+    finally:
+        conn.close()
+
+    scores = _scores_array(rows)
+    store_ids = [row["store_id"] for row in rows]
+    names = {row["store_id"]: row.get("store_name") for row in rows}
+    groups, inverse, counts, means = _group_means(store_ids, scores)
+    dominant = np.zeros((len(groups), len(SCORE_KEYS)), dtype=np.int64)
+    if len(scores):
+        np.add.at(dominant, (inverse, scores.argmax(axis=1)), 1)
+    result = []
+    for i, sid in enumerate(groups):
+        result.append(
+            {
+                "store_id": sid,
+                "store_name": names.get(sid),
+                "count": int(counts[i]),
+                **{f"{key}_mean": round(float(means[i, j]), 2) for j, key in enumerate(SCORE_KEYS)},
+                "dominant": {key: int(dominant[i, j]) for j, key in enumerate(SCORE_KEYS)},
+            }
+        )
+    return result
+
+
+def rescore_stress_tests(store_id=None, dry_run: bool = False, batch_size: int = 500):
+    """
+    依目前的 STRESS_QUESTION_MAPPING 重新計算所有（或指定分店）測驗分數。
+    只更新分數有變動的測驗；dry_run 時僅回報數量不寫入。
+    """
+    conn = connect_to_db()
+    try:
+        with conn.cursor() as cursor:
+            conditions, params = _scope_conditions(store_id)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            cursor.execute(
+                f"SELECT s.ipn_stress_id, s.a_score, s.b_score, s.c_score, s.d_score FROM ipn_stress s {where}",
+                tuple(params),
+            )
+            stored_rows = cursor.fetchall()
+            if not stored_rows:
+                return {"checked": 0, "updated": 0}
+
+            stored_ids = np.array([row["ipn_stress_id"] for row in stored_rows], dtype=np.int64)
+            stored_scores = _scores_array(stored_rows).astype(np.int64)
+            answer_ids, matrix = load_answer_matrix(
+                cursor, None if store_id is None else stored_ids.tolist()
+            )
+
+            # 只處理有作答紀錄的測驗，避免把舊資料的分數清成 0
+            has_answers = np.isin(stored_ids, answer_ids)
+            target_ids = stored_ids[has_answers]
+            current = stored_scores[has_answers]
+            new_scores = score_answer_matrix(matrix)[np.searchsorted(answer_ids, target_ids)]
+            changed = np.any(new_scores != current, axis=1)
+
+            updates = [
+                (*(int(v) for v in new_scores[i]), int(target_ids[i]))
+                for i in np.flatnonzero(changed)
+            ]
+            if not dry_run:
+                for offset in range(0, len(updates), batch_size):
+                    cursor.executemany(
+                        "UPDATE ipn_stress SET a_score=%s, b_score=%s, c_score=%s, d_score=%s WHERE ipn_stress_id=%s",
+                        updates[offset:offset + batch_size],
+                    )
+        if not dry_run:
+            conn.commit()
+            if updates:
+                # 批次重算可能橫跨大量會員，直接遞增全域版本
+                bump_member_overview_versions()
+        return {"checked": int(len(target_ids)), "updated": len(updates), "dry_run": dry_run}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def parse_analytics_date(value):
+    """解析 YYYY-MM-DD 查詢參數；空值回傳 None。"""
+    if not value:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"日期格式錯誤: {value}，應為 YYYY-MM-DD")
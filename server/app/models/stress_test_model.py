@@ -2,38 +2,57 @@
 import pymysql
 from app.config import DB_CONFIG
 import traceback
+import time
 from datetime import datetime, date
 
 def connect_to_db():
     """連接到數據庫"""
     return pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+
+
+def _overview_changed(*member_ids):
+    # member_overview_model 會匯入本模組的格式化函式，改在呼叫時才匯入
+    from app.models.member_overview_model import member_overview_changed
+
+    member_overview_changed(*member_ids)
+
+
+def _stress_member_id(cursor, stress_id):
+    cursor.execute("SELECT member_id FROM ipn_stress WHERE ipn_stress_id = %s", (stress_id,))
+    row = cursor.fetchone()
+    return row.get('member_id') if row else None
+
+# 每題選「甲」/「乙」時分別計入的向度 (a/b/c/d)
+STRESS_QUESTION_MAPPING = {
+    "01": ("a", "b"),
+    "02": ("c", "b"),
+    "03": ("c", "d"),
+    "04": ("c", "a"),
+    "05": ("b", "d"),
+    "06": ("d", "c"),
+    "07": ("a", "d"),
+    "08": ("c", "b"),
+    "09": ("c", "d"),
+    "10": ("d", "a"),
+    "11": ("b", "d"),
+    "12": ("c", "a"),
+    "13": ("b", "c"),
+    "14": ("b", "a"),
+    "15": ("b", "d"),
+    "16": ("c", "a"),
+    "17": ("b", "d"),
+    "18": ("d", "a"),
+    "19": ("a", "c"),
+    "20": ("b", "a"),
+}
+
+
 def calc_stress_scores(answers: dict) -> dict:
     """
     answers: {'01': '甲', '02': '乙', ...} or {'01': 'A', ...}
     回傳 {'a': x, 'b': y, 'c': z, 'd': w}
     """
-    mapping = {
-        "01": ("a", "b"),
-        "02": ("c", "b"),
-        "03": ("c", "d"),
-        "04": ("c", "a"),
-        "05": ("b", "d"),
-        "06": ("d", "c"),
-        "07": ("a", "d"),
-        "08": ("c", "b"),
-        "09": ("c", "d"),
-        "10": ("d", "a"),
-        "11": ("b", "d"),
-        "12": ("c", "a"),
-        "13": ("b", "c"),
-        "14": ("b", "a"),
-        "15": ("b", "d"),
-        "16": ("c", "a"),
-        "17": ("b", "d"),
-        "18": ("d", "a"),
-        "19": ("a", "c"),
-        "20": ("b", "a"),
-    }
+    mapping = STRESS_QUESTION_MAPPING
     scores = {"a": 0, "b": 0, "c": 0, "d": 0}
     for q, ans in answers.items():
         idx = q.zfill(2)
@@ -47,6 +66,107 @@ def calc_stress_scores(answers: dict) -> dict:
             scores[mapping[idx][1]] += 1
     return scores
 
+STRESS_QUESTION_NOS = tuple(sorted(STRESS_QUESTION_MAPPING))
+# answers_packed 中每題佔一個字元：A = 甲、B = 乙、- = 未作答
+PACKED_ANSWER_CODES = {"甲": "A", "A": "A", "乙": "B", "B": "B"}
+PACKED_BLANK = "-"
+
+
+def pack_stress_answers(answers: dict) -> str:
+    """將 {'01': '甲', ...} 轉為固定長度的答案字串（第 n 字元為第 n 題）。"""
+    normalized = {str(q).strip().zfill(2): ans for q, ans in (answers or {}).items()}
+    return "".join(
+        PACKED_ANSWER_CODES.get(str(normalized.get(q, "")).strip(), PACKED_BLANK)
+        for q in STRESS_QUESTION_NOS
+    )
+
+
+def unpack_stress_answers(packed: str) -> dict:
+    """pack_stress_answers 的反向操作，未作答的題目不列出。"""
+    return {
+        q: code
+        for q, code in zip(STRESS_QUESTION_NOS, packed or "")
+        if code != PACKED_BLANK
+    }
+
+
+# 套用遷移前或連線失敗時的 False 不能一直保留：寫入會略過 answers_packed，
+# 讀取卻優先使用它，因此隔 _PACKED_RECHECK_SECONDS 秒重新檢查
+_PACKED_RECHECK_SECONDS = 60
+_packed_state = {"available": False, "checked_at": 0.0}
+
+
+def _stress_answer_storage_migrated() -> bool:
+    """07_stress_answer_packed 是否已套用（answers_packed 欄位與答案唯一鍵）。"""
+    if _packed_state["available"]:
+        return True
+    now = time.monotonic()
+    if _packed_state["checked_at"] and now - _packed_state["checked_at"] < _PACKED_RECHECK_SECONDS:
+        return False
+    _packed_state["checked_at"] = now
+    conn = None
+    try:
+        conn = connect_to_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'ipn_stress'
+                  AND COLUMN_NAME = 'answers_packed'
+                LIMIT 1
+                """
+            )
+            _packed_state["available"] = cursor.fetchone() is not None
+    except Exception as e:
+        print(f"檢查 answers_packed 欄位失敗: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    return _packed_state["available"]
+
+
+def _write_stress_answers(cursor, stress_id, answers_dict, replace: bool = False):
+    """
+    以單一多列 INSERT 寫入作答；replace=True 時（更新）改為 upsert，
+    並只刪除這次沒有出現的題目。同時更新 answers_packed。
+    """
+    rows = [
+        (stress_id, str(qid).strip().zfill(2), ans)
+        for qid, ans in (answers_dict or {}).items()
+        if ans not in (None, "")
+    ]
+    migrated = _stress_answer_storage_migrated()
+
+    if replace:
+        if migrated and rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"DELETE FROM ipn_stress_answer WHERE ipn_stress_id = %s AND question_no NOT IN ({placeholders})",
+                (stress_id, *[row[1] for row in rows]),
+            )
+        else:
+            cursor.execute("DELETE FROM ipn_stress_answer WHERE ipn_stress_id=%s", (stress_id,))
+
+    if rows:
+        values = ", ".join(["(%s, %s, %s)"] * len(rows))
+        sql = f"INSERT INTO ipn_stress_answer (ipn_stress_id, question_no, answer) VALUES {values}"
+        if replace and migrated:
+            sql += " ON DUPLICATE KEY UPDATE answer = VALUES(answer)"
+        cursor.execute(sql, tuple(value for row in rows for value in row))
+
+    if migrated:
+        cursor.execute(
+            "UPDATE ipn_stress SET answers_packed = %s WHERE ipn_stress_id = %s",
+            (pack_stress_answers(answers_dict), stress_id),
+        )
+
+
+def _packed_select_column(alias: str = "s") -> str:
+    return f", {alias}.answers_packed" if _stress_answer_storage_migrated() else ""
+
+
 def format_stress_test_record(record: dict):
     """將資料庫查詢出的單筆字典，轉換為前端需要的格式"""
     if not record:
@@ -74,7 +194,8 @@ def format_stress_test_record(record: dict):
         'test_date': test_date_str,
         'total_score': record.get('total_score'),
         'store_id': record.get('store_id'),
-        'store_name': record.get('store_name')
+        'store_name': record.get('store_name'),
+        'answers_packed': record.get('answers_packed'),
     }
 
 def get_all_stress_tests(store_level: str, store_id: int, filters=None):
@@ -85,11 +206,11 @@ def get_all_stress_tests(store_level: str, store_id: int, filters=None):
 
     try:
         with conn.cursor() as cursor:
-            base_sql = """
+            base_sql = f"""
             SELECT s.ipn_stress_id, s.member_id, m.name, m.member_code, m.occupation,
                    s.a_score, s.b_score, s.c_score, s.d_score, s.test_date,
                    (s.a_score + s.b_score + s.c_score + s.d_score) AS total_score,
-                   s.store_id, st.store_name
+                   s.store_id, st.store_name{_packed_select_column()}
             FROM ipn_stress s
             LEFT JOIN member m ON s.member_id = m.member_id
             LEFT JOIN store st ON s.store_id = st.store_id
@@ -179,6 +300,7 @@ def add_stress_test(member_id, test_date, answers, store_id: int):
             )
             cursor.execute(sql, params)
         conn.commit()
+        _overview_changed(member_id)
         return {"success": True, "message": "壓力測試結果已成功新增"}
     except Exception as e:
         conn.rollback()
@@ -217,6 +339,7 @@ def update_stress_test(stress_id, scores):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            member_id = _stress_member_id(cursor, stress_id)
             cursor.execute(
                 """
                 UPDATE ipn_stress 
@@ -227,6 +350,7 @@ def update_stress_test(stress_id, scores):
                  scores.get('d_score', 0), stress_id)
             )
         conn.commit()
+        _overview_changed(member_id)
         return True
     except Exception as e:
         conn.rollback()
@@ -238,9 +362,11 @@ def delete_stress_test(stress_id):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            member_id = _stress_member_id(cursor, stress_id)
             cursor.execute("DELETE FROM ipn_stress_answer WHERE ipn_stress_id = %s", (stress_id,))
             cursor.execute("DELETE FROM ipn_stress WHERE ipn_stress_id = %s", (stress_id,))
         conn.commit()
+        _overview_changed(member_id)
         return True
     except Exception as e:
         conn.rollback()
@@ -266,7 +392,7 @@ def get_stress_tests_by_member_id(member_id: int, store_level: str, store_id: in
             SELECT s.ipn_stress_id, s.member_id, m.name, m.member_code, m.occupation,
                    s.a_score, s.b_score, s.c_score, s.d_score, s.test_date,
                    (s.a_score + s.b_score + s.c_score + s.d_score) AS total_score,
-                   s.store_id, st.store_name
+                   s.store_id, st.store_name{_packed_select_column()}
             FROM ipn_stress s
             LEFT JOIN member m ON s.member_id = m.member_id
             LEFT JOIN store st ON s.store_id = st.store_id
@@ -311,12 +437,11 @@ def add_stress_test_with_answers(member_id, test_date, answers_dict, store_id):
             ))
             stress_id = cursor.lastrowid
 
-            # 2. Insert answers
-            ans_sql = "INSERT INTO ipn_stress_answer (ipn_stress_id, question_no, answer) VALUES (%s, %s, %s)"
-            for qid, ans in answers_dict.items():
-                cursor.execute(ans_sql, (stress_id, qid, ans))
+            # 2. Insert answers（單一多列 INSERT）
+            _write_stress_answers(cursor, stress_id, answers_dict)
 
         conn.commit()
+        _overview_changed(member_id)
         return {"success": True, "id": stress_id}
     except Exception as e:
         conn.rollback()
@@ -335,10 +460,13 @@ def get_stress_test_by_id_with_answers(stress_id):
             if not main:
                 return None
 
-            cursor.execute("""
-                SELECT question_no, answer FROM ipn_stress_answer WHERE ipn_stress_id = %s
-            """, (stress_id,))
-            answers = {row['question_no']: row['answer'] for row in cursor.fetchall()}
+            if main.get('answers_packed'):
+                answers = unpack_stress_answers(main['answers_packed'])
+            else:
+                cursor.execute("""
+                    SELECT question_no, answer FROM ipn_stress_answer WHERE ipn_stress_id = %s
+                """, (stress_id,))
+                answers = {row['question_no']: row['answer'] for row in cursor.fetchall()}
 
             main['answers'] = answers
             return main
@@ -351,19 +479,18 @@ def update_stress_test_with_answers(stress_id, answers_dict):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            member_id = _stress_member_id(cursor, stress_id)
             cursor.execute("""
                 UPDATE ipn_stress
                 SET a_score=%s, b_score=%s, c_score=%s, d_score=%s
                 WHERE ipn_stress_id=%s
             """, (scores['a'], scores['b'], scores['c'], scores['d'], stress_id))
 
-            # Remove old answers, then add new
-            cursor.execute("DELETE FROM ipn_stress_answer WHERE ipn_stress_id=%s", (stress_id,))
-            ans_sql = "INSERT INTO ipn_stress_answer (ipn_stress_id, question_no, answer) VALUES (%s, %s, %s)"
-            for qid, ans in answers_dict.items():
-                cursor.execute(ans_sql, (stress_id, qid, ans))
+            # Upsert answers, removing questions no longer answered
+            _write_stress_answers(cursor, stress_id, answers_dict, replace=True)
 
         conn.commit()
+        _overview_changed(member_id)
         return True
     except Exception:
         conn.rollback()
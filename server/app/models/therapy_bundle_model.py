@@ -2,6 +2,8 @@ import pymysql
 import json
 from typing import Iterable
 from app.config import DB_CONFIG
+from app.models import pricing_model
+from app.models.single_flight import single_flight
 from pymysql.cursors import DictCursor
 
 
@@ -18,6 +20,7 @@ def _permission_is_allowed(allowed_permissions, user_permission):
     return user_permission == allowed_permissions
 
 
+@single_flight("therapy_bundles")
 def get_all_therapy_bundles(status: str | None = None, store_id: int | None = None, user_permission: str | None = None):
     """獲取所有療程組合列表"""
     print(f"[DEBUG] get_all_therapy_bundles called with status={status}, store_id={store_id}")
@@ -192,6 +195,7 @@ def create_therapy_bundle(data: dict):
             _sync_therapy_bundle_price_tiers(cursor, bundle_id, data.get("price_tiers"))
 
         conn.commit()
+        pricing_model.invalidate()
         return bundle_id
     except Exception as e:
         conn.rollback()
@@ -286,6 +290,8 @@ def update_therapy_bundle(bundle_id: int, data: dict):
             _sync_therapy_bundle_price_tiers(cursor, bundle_id, data.get("price_tiers"))
 
         conn.commit()
+        # 療程組合的價格層級剛被重寫，讓快取的價格矩陣失效
+        pricing_model.invalidate()
         return True
     except Exception as e:
         conn.rollback()
@@ -321,6 +327,7 @@ def delete_therapy_bundle(bundle_id: int):
         with conn.cursor() as cursor:
             cursor.execute("DELETE FROM therapy_bundles WHERE bundle_id = %s", (bundle_id,))
         conn.commit()
+        pricing_model.invalidate()
         return True
     except Exception as e:
         conn.rollback()
@@ -3,6 +3,10 @@ import json
 from datetime import date, datetime
 from typing import Iterable
 from app.config import DB_CONFIG
+from app.models.replica import connect_for_read
+from app.models.row_stream import stream_rows
+from app.models import pricing_model
+from app.models.member_overview_model import bump_member_overview_versions, member_overview_changed
 from app.utils import get_store_based_where_condition
 
 def connect_to_db():
@@ -35,8 +39,8 @@ def get_remaining_sessions(member_id, therapy_id):
     finally:
         conn.close()
 
-def get_all_therapy_records():
-    """獲取所有療程紀錄，並直接讀取已儲存的剩餘堂數快照"""
+def get_all_therapy_records(since=None):
+    """獲取所有療程紀錄，並直接讀取已儲存的剩餘堂數快照；since (YYYY-MM-DD) 限制起始日期"""
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
@@ -55,6 +59,7 @@ def get_all_therapy_records():
                 LEFT JOIN therapy t ON tr.therapy_id = t.therapy_id
                 LEFT JOIN staff s ON tr.staff_id = s.staff_id
                 LEFT JOIN store st ON tr.store_id = st.store_id
+                {where}
                 ORDER BY
                     (COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)) = ''),
                     COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)),
@@ -64,13 +69,16 @@ def get_all_therapy_records():
                     tr.date DESC,
                     tr.therapy_record_id DESC
             """
-            cursor.execute(sql)
+            if since:
+                cursor.execute(sql.format(where="WHERE tr.date >= %s"), (since,))
+            else:
+                cursor.execute(sql.format(where=""))
             return cursor.fetchall()
     finally:
         conn.close()
 
-def get_therapy_records_by_store(store_id):
-    """獲取特定店鋪的療程紀錄"""
+def get_therapy_records_by_store(store_id, since=None):
+    """獲取特定店鋪的療程紀錄；since (YYYY-MM-DD) 限制起始日期"""
     conn = connect_to_db()
     with conn.cursor() as cursor:
         query = """
@@ -94,7 +102,7 @@ def get_therapy_records_by_store(store_id):
             LEFT JOIN store s ON tr.store_id = s.store_id
             LEFT JOIN staff st ON tr.staff_id = st.staff_id
             LEFT JOIN therapy t ON tr.therapy_id = t.therapy_id
-            WHERE tr.store_id = %s
+            WHERE tr.store_id = %s{date_filter}
             ORDER BY
                 (COALESCE(NULLIF(s.store_name, ''), CAST(tr.store_id AS CHAR)) = ''),
                 COALESCE(NULLIF(s.store_name, ''), CAST(tr.store_id AS CHAR)),
@@ -104,7 +112,10 @@ def get_therapy_records_by_store(store_id):
                 tr.date DESC,
                 tr.therapy_record_id DESC
         """
-        cursor.execute(query, (store_id,))
+        if since:
+            cursor.execute(query.format(date_filter=" AND tr.date >= %s"), (store_id, since))
+        else:
+            cursor.execute(query.format(date_filter=""), (store_id,))
         result = cursor.fetchall()
         
         # 處理日期格式並計算剩餘次數
@@ -120,75 +131,83 @@ def get_therapy_records_by_store(store_id):
     conn.close()
     return result
 
+def _therapy_records_search_query(filters):
+    sql = """
+        SELECT
+            tr.therapy_record_id, tr.date, tr.note,
+            tr.member_id, m.member_code, m.name AS member_name,
+            tr.therapy_id, t.name AS package_name, t.content AS therapy_content,
+            tr.staff_id, s.name AS staff_name,
+            tr.store_id, st.store_name,
+            tr.deduct_sessions,
+            tr.remaining_sessions_at_time AS remaining_sessions
+        FROM therapy_record tr
+        LEFT JOIN member m ON tr.member_id = m.member_id
+        LEFT JOIN therapy t ON tr.therapy_id = t.therapy_id
+        LEFT JOIN staff s ON tr.staff_id = s.staff_id
+        LEFT JOIN store st ON tr.store_id = st.store_id
+        WHERE 1=1
+    """
+
+    sql_params = []
+
+    # 動態組合 WHERE 篩選條件
+    if filters.get('keyword'):
+        sql += " AND (m.name LIKE %s OR m.phone LIKE %s OR tr.member_id LIKE %s OR m.member_code LIKE %s)"
+        like_keyword = f"%{filters['keyword']}%"
+        sql_params.extend([like_keyword, like_keyword, like_keyword, like_keyword])
+
+    if filters.get('startDate'):
+        sql += " AND tr.date >= %s"
+        sql_params.append(filters['startDate'])
+
+    if filters.get('endDate'):
+        sql += " AND tr.date <= %s"
+        sql_params.append(filters['endDate'])
+
+    if filters.get('therapist'):
+        sql += " AND tr.staff_id = %s"
+        sql_params.append(filters['therapist'])
+
+    if filters.get('packageName'):
+        sql += " AND tr.therapy_id = %s"
+        sql_params.append(filters['packageName'])
+
+    # 權限過濾
+    where_clause, store_params = get_store_based_where_condition('tr')
+    sql += where_clause
+    sql_params.extend(store_params)
+
+    sql += (
+        " ORDER BY"
+        " (COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)) = ''),"
+        " COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)),"
+        " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
+        " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
+        " COALESCE(NULLIF(m.member_code, ''), ''),"
+        " tr.date DESC,"
+        " tr.therapy_record_id DESC"
+    )
+    return sql, sql_params
+
+
 def search_therapy_records(filters):
-    """根據多重條件搜尋療程紀錄，並逐筆計算剩餘堂數"""
+    """根據多重條件搜尋療程紀錄，剩餘堂數取自紀錄當時的快照欄位"""
+    sql, sql_params = _therapy_records_search_query(filters)
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
-            # SQL 查詢本身不變
-            sql = """
-                SELECT
-                    tr.therapy_record_id, tr.date, tr.note,
-                    tr.member_id, m.member_code, m.name AS member_name,
-                    tr.therapy_id, t.name AS package_name, t.content AS therapy_content,
-                    tr.staff_id, s.name AS staff_name,
-                    tr.store_id, st.store_name,
-                    tr.deduct_sessions,
-                    tr.remaining_sessions_at_time AS remaining_sessions
-                FROM therapy_record tr
-                LEFT JOIN member m ON tr.member_id = m.member_id
-                LEFT JOIN therapy t ON tr.therapy_id = t.therapy_id
-                LEFT JOIN staff s ON tr.staff_id = s.staff_id
-                LEFT JOIN store st ON tr.store_id = st.store_id
-                WHERE 1=1
-            """
-            
-            sql_params = []
-            
-            # 動態組合 WHERE 篩選條件 (邏輯不變)
-            if filters.get('keyword'):
-                sql += " AND (m.name LIKE %s OR m.phone LIKE %s OR tr.member_id LIKE %s OR m.member_code LIKE %s)"
-                like_keyword = f"%{filters['keyword']}%"
-                sql_params.extend([like_keyword, like_keyword, like_keyword, like_keyword])
-            
-            if filters.get('startDate'):
-                sql += " AND tr.date >= %s"
-                sql_params.append(filters['startDate'])
-
-            if filters.get('endDate'):
-                sql += " AND tr.date <= %s"
-                sql_params.append(filters['endDate'])
-
-            if filters.get('therapist'):
-                sql += " AND tr.staff_id = %s"
-                sql_params.append(filters['therapist'])
-
-            if filters.get('packageName'):
-                sql += " AND tr.therapy_id = %s"
-                sql_params.append(filters['packageName'])
-
-            # 權限過濾
-            where_clause, store_params = get_store_based_where_condition('tr') 
-            sql += where_clause
-            sql_params.extend(store_params)
-
-            sql += (
-                " ORDER BY"
-                " (COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)) = ''),"
-                " COALESCE(NULLIF(st.store_name, ''), CAST(tr.store_id AS CHAR)),"
-                " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
-                " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
-                " COALESCE(NULLIF(m.member_code, ''), ''),"
-                " tr.date DESC,"
-                " tr.therapy_record_id DESC"
-            )
-            
             cursor.execute(sql, sql_params)
-            # 因為已在 SQL 中處理，不再需要 for 迴圈計算
             return cursor.fetchall()
     finally:
         conn.close()
 
+
+def iter_therapy_records(filters):
+    """search_therapy_records 的串流版本（NDJSON 用）；權限條件在呼叫時即決定"""
+    sql, sql_params = _therapy_records_search_query(filters)
+    return stream_rows(sql, sql_params)
+
 def get_therapy_record_by_id(record_id):
     """獲取單一療程紀錄"""
     conn = connect_to_db()
@@ -261,6 +280,7 @@ def insert_therapy_record(data):
             record_id = conn.insert_id()
             
         conn.commit()
+        member_overview_changed(member_id)
         return {"success": True, "id": record_id}
     except Exception as e:
         conn.rollback()
@@ -277,7 +297,7 @@ def update_therapy_record(record_id, data):
             therapy_id = data.get("therapy_id")
             deduct_sessions = int(data.get("deduct_sessions", 1))
 
-            cursor.execute("SELECT deduct_sessions FROM therapy_record WHERE therapy_record_id = %s", (record_id,))
+            cursor.execute("SELECT deduct_sessions, member_id FROM therapy_record WHERE therapy_record_id = %s", (record_id,))
             existing = cursor.fetchone()
             current_deduct = int(existing.get("deduct_sessions", 0)) if existing else 0
 
@@ -312,6 +332,7 @@ def update_therapy_record(record_id, data):
             cursor.execute(query, values)
             
         conn.commit()
+        member_overview_changed(existing.get("member_id") if existing else None, member_id)
         return True
     except Exception as e:
         conn.rollback()
@@ -324,10 +345,14 @@ def delete_therapy_record(record_id):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            cursor.execute("SELECT member_id FROM therapy_record WHERE therapy_record_id = %s", (record_id,))
+            existing = cursor.fetchone()
             query = "DELETE FROM therapy_record WHERE therapy_record_id = %s"
             cursor.execute(query, (record_id,))
             
         conn.commit()
+        if existing:
+            member_overview_changed(existing.get("member_id"))
         return True
     except Exception as e:
         conn.rollback()
@@ -336,8 +361,8 @@ def delete_therapy_record(record_id):
         conn.close()
 
 def export_therapy_records(store_id=None):
-    """匯出療程紀錄（可選擇性根據商店ID過濾）"""
-    conn = connect_to_db()
+    """匯出療程紀錄（可選擇性根據商店ID過濾）；讀取唯讀複本"""
+    conn = connect_for_read()
     try:
         with conn.cursor() as cursor:
             if store_id:
@@ -630,6 +655,7 @@ def create_therapy(data: dict):
 
             _sync_therapy_price_tiers(cursor, therapy_id, data.get("price_tiers"))
         conn.commit()
+        pricing_model.invalidate()
         return therapy_id
     except Exception as e:
         conn.rollback()
@@ -669,6 +695,8 @@ def update_therapy(therapy_id: int, data: dict):
 
             _sync_therapy_price_tiers(cursor, therapy_id, data.get("price_tiers"))
         conn.commit()
+        # 療程售價或價格層級已改，丟棄本程序快取的價格矩陣
+        pricing_model.invalidate()
     except Exception as e:
         conn.rollback()
         raise e
@@ -727,6 +755,9 @@ def delete_therapy(therapy_id: int):
             )
             cursor.execute("DELETE FROM therapy WHERE therapy_id=%s", (therapy_id,))
         conn.commit()
+        pricing_model.invalidate()
+        # 療程名稱與 ID 已寫回銷售紀錄，買過的會員都受影響，以全域版本失效
+        bump_member_overview_versions()
     except Exception as e:
         conn.rollback()
         raise e
@@ -1,6 +1,12 @@
 # server\app\models\therapy_sell_model.py
 import pymysql
 from app.config import DB_CONFIG
+from app.models.sales_report_model import refresh_sales_rollup, sales_bucket
+from app.models.row_stream import stream_rows
+from app.models.single_flight import single_flight
+from app.models import reference_data_model
+from app.models import pricing_model
+from app.models.member_overview_model import member_overview_changed
 from datetime import datetime
 import traceback
 import logging
@@ -80,6 +86,7 @@ def connect_to_db():
     """連接到數據庫"""
     return pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
 
+@single_flight("therapy_packages")
 def get_all_therapy_packages(status: str | None = 'PUBLISHED', store_id: int | None = None):
     """獲取所有療程套餐"""
     conn = connect_to_db()
@@ -215,74 +222,71 @@ def search_therapy_packages(keyword, status: str | None = 'PUBLISHED', store_id:
     finally:
         conn.close()
 
-def get_all_therapy_sells(store_id=None):
-    """獲取所有療程銷售紀錄"""
-    print("--- store_id:", store_id, type(store_id))
+def _therapy_sells_list_query(store_id=None, since=None):
+    query = """
+        SELECT ts.therapy_sell_id as Order_ID,
+               m.member_id as Member_ID,
+               m.member_code as MemberCode,
+               m.name as MemberName,
+               ts.date as PurchaseDate,
+               COALESCE(t.name, ts.therapy_name) as PackageName,
+               t.code as TherapyCode,
+               ts.amount as Sessions,
+               ts.final_price as Price,
+               ts.payment_method as PaymentMethod,
+               s.name as StaffName,
+               ts.sale_category as SaleCategory,
+               t.price as UnitPrice,
+               ts.note as Note,
+               ts.staff_id as Staff_ID,
+               st.store_name as store_name,
+               ts.store_id as store_id,
+               ts.therapy_id as therapy_id,
+               ts.note
+        FROM therapy_sell ts
+        LEFT JOIN member m ON ts.member_id = m.member_id
+        LEFT JOIN staff s ON ts.staff_id = s.staff_id
+        LEFT JOIN store st ON ts.store_id = st.store_id
+        LEFT JOIN therapy t ON ts.therapy_id = t.therapy_id
+    """
+    conditions = []
+    params = []
+    if store_id:
+        conditions.append("ts.store_id = %s")
+        params.append(store_id)
+    if since:
+        conditions.append("ts.date >= %s")
+        params.append(since)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += (
+        " ORDER BY"
+        " (COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)) = ''),"
+        " COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)),"
+        " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
+        " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
+        " COALESCE(NULLIF(m.member_code, ''), ''),"
+        " ts.date DESC"
+    )
+    return query, tuple(params)
+
+
+def _with_order_group_key(record):
+    # PurchaseDate 保留 date 物件，由 JSON 編碼器輸出 YYYY-MM-DD
+    record['order_group_key'] = _extract_order_group_key(record.get('note') or record.get('Note'))
+    return record
+
+
+def get_all_therapy_sells(store_id=None, since=None):
+    """獲取所有療程銷售紀錄；since (YYYY-MM-DD) 限制起始日期"""
+    query, params = _therapy_sells_list_query(store_id, since)
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
-            # 這段 SQL 查詢是您檔案中原有的，我們保持不變
-            query = """
-                SELECT ts.therapy_sell_id as Order_ID,
-                       m.member_id as Member_ID,
-                       m.member_code as MemberCode,
-                       m.name as MemberName,
-                       ts.date as PurchaseDate,
-                       COALESCE(t.name, ts.therapy_name) as PackageName,
-                       t.code as TherapyCode,
-                       ts.amount as Sessions,
-                       ts.final_price as Price,
-                       ts.payment_method as PaymentMethod,
-                       s.name as StaffName,
-                       ts.sale_category as SaleCategory,
-                       t.price as UnitPrice,
-                       ts.note as Note,
-                       ts.staff_id as Staff_ID,
-                       st.store_name as store_name,
-                       ts.store_id as store_id,
-                       ts.therapy_id as therapy_id,
-                       ts.note
-                FROM therapy_sell ts
-                LEFT JOIN member m ON ts.member_id = m.member_id
-                LEFT JOIN staff s ON ts.staff_id = s.staff_id
-                LEFT JOIN store st ON ts.store_id = st.store_id
-                LEFT JOIN therapy t ON ts.therapy_id = t.therapy_id
-            """
-            
-            if store_id:
-                query += " WHERE ts.store_id = %s"
-                query += (
-                    " ORDER BY"
-                    " (COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)) = ''),"
-                    " COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)),"
-                    " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
-                    " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
-                    " COALESCE(NULLIF(m.member_code, ''), ''),"
-                    " ts.date DESC"
-                )
-                cursor.execute(query, (store_id,))
-            else:
-                query += (
-                    " ORDER BY"
-                    " (COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)) = ''),"
-                    " COALESCE(NULLIF(st.store_name, ''), CAST(ts.store_id AS CHAR)),"
-                    " (COALESCE(NULLIF(m.member_code, ''), '') = ''),"
-                    " CHAR_LENGTH(COALESCE(NULLIF(m.member_code, ''), '')),"
-                    " COALESCE(NULLIF(m.member_code, ''), ''),"
-                    " ts.date DESC"
-                )
-                cursor.execute(query)
-                
+            cursor.execute(query, params)
             result = cursor.fetchall()
-
             for record in result:
-                if record.get('PurchaseDate'):
-                    date_obj = record['PurchaseDate']
-                    if isinstance(date_obj, datetime):
-                        # 將日期格式化為西元年
-                        record['PurchaseDate'] = f"{date_obj.year}/{date_obj.month:02d}/{date_obj.day:02d}"
-                record['order_group_key'] = _extract_order_group_key(record.get('note') or record.get('Note'))
-
+                _with_order_group_key(record)
             return result
     except Exception as e:
         print(f"獲取療程銷售記錄錯誤: {e}")
@@ -290,6 +294,12 @@ def get_all_therapy_sells(store_id=None):
     finally:
         conn.close()
 
+
+def iter_all_therapy_sells(store_id=None, since=None):
+    """與 get_all_therapy_sells 相同的結果，以伺服器端游標逐筆產生（NDJSON 串流用）"""
+    query, params = _therapy_sells_list_query(store_id, since)
+    return stream_rows(query, params, transform=_with_order_group_key)
+
 def search_therapy_sells(keyword, store_id=None):
     """搜尋療程銷售紀錄"""
     conn = connect_to_db()
@@ -351,11 +361,7 @@ def search_therapy_sells(keyword, store_id=None):
                 
             result = cursor.fetchall()
 
-            # 轉換日期格式為西元年
             for record in result:
-                if record['PurchaseDate']:
-                    date_obj = record['PurchaseDate']
-                    record['PurchaseDate'] = f"{date_obj.year}/{date_obj.month:02d}/{date_obj.day:02d}"
                 record['order_group_key'] = _extract_order_group_key(record.get('note') or record.get('Note'))
 
             return result
@@ -372,10 +378,15 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
 
     conn = None
     created_ids = []
+    rollup_buckets = set()
     try: 
         if not isinstance(sales_data_list, list):
             return {"success": False, "error": f"內部錯誤：期望列表，但收到 {type(sales_data_list)}"}
         
+        # 整批銷售共用同一份價格矩陣，開始交易前只核對一次版本；
+        # 版本無法核對時矩陣可能過期，上架狀態改以交易內的 SQL 判斷
+        matrix, verified = pricing_model.get_sale_matrix()
+        status_matrix = matrix if verified else None
         conn = connect_to_db()
         conn.begin()
 
@@ -414,17 +425,15 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                 bundle_id = data_item.get("bundle_id")
                 if bundle_id:
                     bundle_qty = int(data_item.get("amount", 1))
-                    cursor.execute(
-                        "SELECT name FROM therapy_bundles WHERE bundle_id = %s",
-                        (bundle_id,)
-                    )
-                    bundle_row = cursor.fetchone()
+                    # 組合內容與療程價格取自報價引擎的價格矩陣，不再逐項查詢
+                    bundle_row = matrix.item(pricing_model.THERAPY_BUNDLE, bundle_id)
                     bundle_name = bundle_row.get("name") if bundle_row else None
-                    cursor.execute(
-                        "SELECT item_id, quantity FROM therapy_bundle_items WHERE bundle_id = %s",
-                        (bundle_id,)
-                    )
-                    bundle_items = cursor.fetchall()
+                    bundle_items = [
+                        {"item_id": item_id, "quantity": quantity}
+                        for _, item_id, quantity in pricing_model.sale_components(
+                            matrix, pricing_model.THERAPY_BUNDLE, bundle_id
+                        )
+                    ]
                     if not bundle_items:
                         empty_bundle_values = {
                             "therapy_id": None,
@@ -445,6 +454,7 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                         )
                         cursor.execute(insert_query, empty_bundle_values)
                         created_ids.append(cursor.lastrowid)
+                        rollup_buckets.add(sales_bucket(empty_bundle_values.get("store_id"), empty_bundle_values.get("date")))
                         logging.debug(
                             f"--- [MODEL] Empty bundle inserted. ID: {cursor.lastrowid}"
                         )
@@ -466,11 +476,7 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                             "sale_category": data_item.get("saleCategory"),
                             "note": _build_note(data_item.get("note"), order_group_key, bundle_id),
                         }
-                        cursor.execute(
-                            "SELECT name, price, status FROM therapy WHERE therapy_id = %s",
-                            (item_values["therapy_id"],),
-                        )
-                        price_row = cursor.fetchone()
+                        price_row = matrix.item(pricing_model.THERAPY, item_values["therapy_id"])
                         if not price_row:
                             bundle_label = bundle_name or str(bundle_id)
                             item_label = str(item_values.get("therapy_id"))
@@ -551,6 +557,7 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                         )
                         cursor.execute(insert_query, values_dict)
                         created_ids.append(cursor.lastrowid)
+                        rollup_buckets.add(sales_bucket(values_dict.get("store_id"), values_dict.get("date")))
                         logging.debug(
                             f"--- [MODEL] Bundle item inserted. ID: {cursor.lastrowid}"
                         )
@@ -570,9 +577,10 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                     "sale_category": data_item.get("saleCategory"),
                     "note": _build_note(data_item.get("note"), order_group_key)
                 }
-                cursor.execute("SELECT name, price, status FROM therapy WHERE therapy_id = %s", (values_dict["therapy_id"],))
-                price_row = cursor.fetchone()
-                if not price_row or price_row.get("status") != 'PUBLISHED':
+                price_row = matrix.item(pricing_model.THERAPY, values_dict["therapy_id"])
+                if not price_row or not pricing_model.is_published(
+                    cursor, pricing_model.THERAPY, values_dict["therapy_id"], status_matrix
+                ):
                     item_label = price_row.get("name") if price_row else None
                     if not item_label:
                         item_label = str(values_dict.get("therapy_id"))
@@ -593,6 +601,7 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                 logging.debug(f"--- [MODEL] Values for SQL for item {index + 1}: {values_dict}")
                 cursor.execute(insert_query, values_dict)
                 created_ids.append(cursor.lastrowid)
+                rollup_buckets.add(sales_bucket(values_dict.get("store_id"), values_dict.get("date")))
                 logging.debug(f"--- [MODEL] Item {index + 1} inserted. ID: {cursor.lastrowid}")
                 
                 # 庫存/療程次數更新邏輯 (如果啟用)
@@ -605,8 +614,11 @@ def insert_many_therapy_sells(sales_data_list: list[dict]):
                 #         int(therapy_id_val), int(member_id_val), int(store_id_val), 
                 #         -abs(int(amount_val)), cursor
                 #     )
-            
+
+            refresh_sales_rollup(cursor, "therapy", rollup_buckets)
+
         conn.commit()
+        member_overview_changed(*(item.get("memberId") for item in sales_data_list))
         logging.info(f"--- [MODEL] Transaction committed successfully for IDs: {created_ids} ---")
         return {"success": True, "message": f"共 {len(created_ids)} 筆療程銷售紀錄新增成功", "ids": created_ids}
 
@@ -716,7 +728,13 @@ def update_therapy_sell(sale_id, data):
                 sale_id,
             ))
 
+            refresh_sales_rollup(cursor, "therapy", [
+                sales_bucket(existing_record.get("store_id"), existing_record.get("date")),
+                sales_bucket(store_id, purchase_date),
+            ])
+
         conn.commit()
+        member_overview_changed(existing_record.get("member_id"), member_id)
         return {"success": True, "message": "療程銷售紀錄更新成功"}
     except Exception as e:
         if conn:
@@ -732,10 +750,21 @@ def delete_therapy_sell(sale_id):
     conn = connect_to_db()
     try:
         with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT store_id, date, member_id FROM therapy_sell WHERE therapy_sell_id = %s",
+                (sale_id,),
+            )
+            existing = cursor.fetchone()
             query = "DELETE FROM therapy_sell WHERE therapy_sell_id = %s"
             cursor.execute(query, (sale_id,))
-            
+            if existing:
+                refresh_sales_rollup(cursor, "therapy", [
+                    sales_bucket(existing.get("store_id"), existing.get("date")),
+                ])
+
         conn.commit()
+        if existing:
+            member_overview_changed(existing.get("member_id"))
         return {"success": True, "message": "療程銷售紀錄刪除成功"}
     except Exception as e:
         conn.rollback()
@@ -795,18 +824,14 @@ def get_all_staff(store_id=None):
 
 def get_all_stores():
     """獲取所有店鋪"""
-    conn = connect_to_db()
     try:
-        with conn.cursor() as cursor:
-            query = "SELECT store_id, store_name as name FROM store ORDER BY store_name"
-            cursor.execute(query)
-            result = cursor.fetchall()
-            return result
+        return [
+            {"store_id": row["store_id"], "name": row["store_name"]}
+            for row in reference_data_model.stores_by_name()
+        ]
     except Exception as e:
         print(f"獲取店鋪列表錯誤: {e}")
         return {"error": str(e)}
-    finally:
-        conn.close() 
 
 # vvvvvvvvvv 我們要新增的核心函式 vvvvvvvvvv
 def get_remaining_sessions(member_id, therapy_id):
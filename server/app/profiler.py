@@ -0,0 +1,270 @@
+# server/app/profiler.py
+"""
+管理員專用的單次請求剖析。
+
+請求帶有 `X-Profile: 1` 標頭或 `?__profile=1` 參數，且呼叫者為總店 / admin 時，
+以取樣方式（每 PROFILE_INTERVAL_MS 毫秒擷取一次請求執行緒的呼叫堆疊）剖析整個請求，
+同時透過 app.metrics 的查詢 listener 記錄每一筆 SQL 的耗時。
+
+結果存放於 PROFILE_DIR：
+  <id>.json             摘要：總耗時、SQL / 非 SQL 時間、依語句彙總的查詢明細
+  <id>.speedscope.json  取樣堆疊，可直接拖進 https://www.speedscope.app 檢視火焰圖
+回應會帶上 X-Profile-ID，可由 /api/admin/profiles 下載。
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, request
+
+from app.metrics import add_query_listener, install_db_instrumentation
+from app.middleware import get_auth_context
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+MAX_QUERY_LOG = 200
+
+_sessions: dict[int, "ProfileSession"] = {}
+_sessions_lock = threading.Lock()
+
+
+def _normalize_sql(query) -> str:
+    text = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+    return re.sub(r"\s+", " ", text).strip()[:500]
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.samples: list[tuple[float, tuple]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((time.perf_counter(), tuple(stack)))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    def __init__(self, interval: float):
+        self.profile_id = uuid.uuid4().hex
+        self.thread_ident = threading.get_ident()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.finished = None
+        self.queries: list[tuple[str, float]] = []
+        self.sampler = _Sampler(self.thread_ident, interval)
+
+    def start(self):
+        with _sessions_lock:
+            _sessions[self.thread_ident] = self
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        self.finished = time.perf_counter()
+        with _sessions_lock:
+            _sessions.pop(self.thread_ident, None)
+
+    def record_query(self, query, elapsed: float):
+        self.queries.append((_normalize_sql(query), elapsed))
+
+    def summary(self, meta: dict) -> dict:
+        total = self.finished - self.started
+        sql_total = sum(elapsed for _, elapsed in self.queries)
+        grouped: dict[str, list] = {}
+        for sql, elapsed in self.queries:
+            entry = grouped.setdefault(sql, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        breakdown = sorted(
+            (
+                {"sql": sql, "count": count, "total_ms": round(spent * 1000, 3), "max_ms": round(worst * 1000, 3)}
+                for sql, (count, spent, worst) in grouped.items()
+            ),
+            key=lambda item: item["total_ms"],
+            reverse=True,
+        )
+        return {
+            "profile_id": self.profile_id,
+            "created_at": self.started_at.isoformat(timespec="seconds"),
+            **meta,
+            "total_ms": round(total * 1000, 3),
+            "sql_ms": round(sql_total * 1000, 3),
+            "non_sql_ms": round(max(total - sql_total, 0) * 1000, 3),
+            "query_count": len(self.queries),
+            "samples": len(self.sampler.samples),
+            "queries_by_statement": breakdown,
+            "queries": [
+                {"sql": sql, "ms": round(elapsed * 1000, 3)} for sql, elapsed in self.queries[:MAX_QUERY_LOG]
+            ],
+        }
+
+    def speedscope(self, name: str) -> dict:
+        frames: list[dict] = []
+        frame_index: dict[tuple, int] = {}
+        samples, weights = [], []
+        previous = self.started
+        for taken_at, stack in self.sampler.samples:
+            indices = []
+            for frame in stack:
+                index = frame_index.get(frame)
+                if index is None:
+                    index = frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(index)
+            samples.append(indices)
+            weights.append(round((taken_at - previous) * 1000, 3))
+            previous = taken_at
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "ipn-erp-profiler",
+        }
+
+
+def _on_query(query, args, elapsed):
+    session = _sessions.get(threading.get_ident())
+    if session is not None:
+        session.record_query(query, elapsed)
+
+
+# --- 儲存 ---
+def _profile_path(directory: str, profile_id: str, suffix: str) -> str:
+    if not PROFILE_ID_PATTERN.match(profile_id or ""):
+        raise ValueError("無效的 profile id")
+    return os.path.join(directory, f"{profile_id}{suffix}")
+
+
+def save_profile(directory: str, session: ProfileSession, meta: dict, keep: int) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    summary = session.summary(meta)
+    name = f"{meta.get('method')} {meta.get('path')}"
+    with open(_profile_path(directory, session.profile_id, ".speedscope.json"), "w", encoding="utf-8") as fh:
+        json.dump(session.speedscope(name), fh)
+    with open(_profile_path(directory, session.profile_id, ".json"), "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, ensure_ascii=False)
+    _prune(directory, keep)
+    return summary
+
+
+def _prune(directory: str, keep: int):
+    summaries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json") and not entry.name.endswith(".speedscope.json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in summaries[keep:]:
+        profile_id = entry.name[: -len(".json")]
+        for suffix in (".json", ".speedscope.json"):
+            try:
+                os.remove(os.path.join(directory, f"{profile_id}{suffix}"))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(directory: str) -> list[dict]:
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json") or entry.name.endswith(".speedscope.json"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as fh:
+                summary = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        summary.pop("queries", None)
+        summary.pop("queries_by_statement", None)
+        profiles.append(summary)
+    return sorted(profiles, key=lambda item: item.get("created_at", ""), reverse=True)
+
+
+def load_profile(directory: str, profile_id: str, speedscope: bool = False) -> dict | None:
+    path = _profile_path(directory, profile_id, ".speedscope.json" if speedscope else ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+# --- Flask 整合 ---
+def _profile_requested() -> bool:
+    return request.headers.get("X-Profile") == "1" or request.args.get("__profile") == "1"
+
+
+def init_profiler(app, directory: str, interval_ms: float = 5, keep: int = 50):
+    install_db_instrumentation()
+    add_query_listener(_on_query)
+    app.config["PROFILE_DIR"] = directory
+
+    @app.before_request
+    def _start_profile():
+        if request.method == "OPTIONS" or not _profile_requested():
+            return None
+        # 只有持已驗證 token 的總店 / admin 才會被剖析（剖析會寫檔到 PROFILE_DIR），
+        # 舊版 X-Store-* 標頭可偽造，其他人帶旗標一律忽略
+        ctx = get_auth_context()
+        if ctx.source != "token" or not ctx.is_admin:
+            return None
+        session = ProfileSession(interval_ms / 1000)
+        g._profile_session = session
+        session.start()
+        return None
+
+    @app.after_request
+    def _finish_profile(response):
+        session = g.pop("_profile_session", None)
+        if session is None:
+            return response
+        session.stop()
+        meta = {
+            "method": request.method,
+            "path": request.path,
+            "query_string": request.query_string.decode("utf-8", "replace"),
+            "status": response.status_code,
+            "store_id": get_auth_context().store_id,
+        }
+        try:
+            save_profile(directory, session, meta, keep)
+            response.headers["X-Profile-ID"] = session.profile_id
+        except OSError as e:
+            print(f"儲存剖析結果失敗: {e}")
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request 未執行（例如未處理的例外）時確保取樣執行緒結束
+        session = g.pop("_profile_session", None)
+        if session is not None:
+            session.stop()
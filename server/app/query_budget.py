@@ -0,0 +1,186 @@
+# server/app/query_budget.py
+"""
+依端點類別限制查詢時間，避免單一慢查詢長時間佔住 worker 與資料庫連線。
+
+類別與預設預算（config.QUERY_BUDGET_*_MS）：
+  interactive  一般查詢 / 搜尋 / 列表（預設）
+  report       /api/reports 以及以 @time_budget("report") 標記的歷史明細
+  export       路徑含 export 的匯出端點、NDJSON 串流（Accept: application/x-ndjson）
+               以及 ?range=all 的完整歷史列表；這些回應邊讀邊送，不能以互動預算中斷
+
+請求開始時決定類別，該請求內建立的每條連線都會：
+  * 在每個 SELECT 加上 /*+ MAX_EXECUTION_TIME(n) */ 提示，由 MySQL 中止超時的查詢（錯誤 3024）；
+    提示隨查詢送出，不必為每條新連線多一次 SET SESSION 往返。不支援的伺服器（如 MariaDB）視為註解；
+  * GET 請求另設 pymysql read_timeout（預算 + 1 秒），伺服器未回應時由驅動程式中斷。
+    寫入請求不設讀取逾時，避免交易結果不明。
+查詢因此失敗時，不論路由本身如何處理例外，回應一律改為 504 + Retry-After；
+report / export 每個 worker 另有同時執行數上限，額滿時直接回傳 503。
+"""
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+import pymysql
+from flask import g, jsonify, request
+
+from app.streaming import wants_ndjson
+
+from app.config import (
+    QUERY_BUDGET_EXPORT_MS,
+    QUERY_BUDGET_EXPORT_SLOTS,
+    QUERY_BUDGET_INTERACTIVE_MS,
+    QUERY_BUDGET_REPORT_MS,
+    QUERY_BUDGET_REPORT_SLOTS,
+    QUERY_RETRY_AFTER_SECONDS,
+)
+
+BUDGETS_MS = {
+    "interactive": QUERY_BUDGET_INTERACTIVE_MS,
+    "report": QUERY_BUDGET_REPORT_MS,
+    "export": QUERY_BUDGET_EXPORT_MS,
+}
+SLOTS = {"report": QUERY_BUDGET_REPORT_SLOTS, "export": QUERY_BUDGET_EXPORT_SLOTS}
+# MySQL：超過 MAX_EXECUTION_TIME；pymysql：讀取逾時後連線中斷
+ER_QUERY_TIMEOUT = 3024
+CR_SERVER_LOST = 2013
+READ_TIMEOUT_GRACE_SECONDS = 1
+
+_current: ContextVar[dict | None] = ContextVar("query_budget", default=None)
+_semaphores = {kind: threading.BoundedSemaphore(limit) for kind, limit in SLOTS.items() if limit > 0}
+_original_connect = None
+_budget_cursor_classes: dict[type, type] = {}
+_SELECT_PREFIX = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+def time_budget(kind: str):
+    """標記路由的預算類別（未標記時依路徑判斷）。"""
+    if kind not in BUDGETS_MS:
+        raise ValueError(f"未知的查詢預算類別: {kind}")
+
+    def decorator(f):
+        f._time_budget = kind
+        return f
+
+    return decorator
+
+
+def classify(path: str, explicit: str | None = None, streaming: bool = False) -> str:
+    if explicit:
+        return explicit
+    if streaming or "export" in path.lower():
+        return "export"
+    if path.startswith("/api/reports"):
+        return "report"
+    return "interactive"
+
+
+def _is_timeout(error: Exception, state: dict, elapsed: float) -> bool:
+    code = error.args[0] if error.args else None
+    if code == ER_QUERY_TIMEOUT:
+        return True
+    read_timeout = state.get("read_timeout")
+    return code == CR_SERVER_LOST and read_timeout is not None and elapsed >= read_timeout
+
+
+def with_execution_hint(query, budget_ms: int):
+    """在 SELECT 後加上 MAX_EXECUTION_TIME 提示；其他語句或已有提示的查詢原樣回傳。"""
+    if not isinstance(query, str) or "MAX_EXECUTION_TIME" in query.upper():
+        return query
+    return _SELECT_PREFIX.sub(lambda m: f"{m.group(0)} /*+ MAX_EXECUTION_TIME({int(budget_ms)}) */", query, count=1)
+
+
+def _budget_cursor_class(base: type) -> type:
+    cls = _budget_cursor_classes.get(base)
+    if cls is None:
+        def execute(self, query, args=None):
+            state = _current.get()
+            if state is not None:
+                query = with_execution_hint(query, state["budget_ms"])
+            started = time.monotonic()
+            try:
+                return base.execute(self, query, args)
+            except pymysql.err.OperationalError as e:
+                state = _current.get()
+                if state is not None and _is_timeout(e, state, time.monotonic() - started):
+                    state["timed_out"] = True
+                raise
+
+        cls = type(f"Budget{base.__name__}", (base,), {"execute": execute})
+        _budget_cursor_classes[base] = cls
+    return cls
+
+
+def install_query_budget():
+    """包裝 pymysql.connect；只有在請求設定了預算時才調整連線。"""
+    global _original_connect
+    if _original_connect is not None:
+        return
+    _original_connect = pymysql.connect
+
+    def budgeted_connect(*args, **kwargs):
+        state = _current.get()
+        if state is None:
+            return _original_connect(*args, **kwargs)
+        if state.get("read_timeout") is not None:
+            kwargs.setdefault("read_timeout", state["read_timeout"])
+        conn = _original_connect(*args, **kwargs)
+        conn.cursorclass = _budget_cursor_class(conn.cursorclass)
+        return conn
+
+    pymysql.connect = budgeted_connect
+
+
+def uninstall_query_budget():
+    global _original_connect
+    if _original_connect is not None:
+        pymysql.connect = _original_connect
+        _original_connect = None
+
+
+def _error_response(status: int, message: str, kind: str):
+    response = jsonify({"error": message, "budget": kind})
+    response.status_code = status
+    response.headers["Retry-After"] = str(QUERY_RETRY_AFTER_SECONDS)
+    return response
+
+
+def init_query_budget(app):
+    install_query_budget()
+
+    @app.before_request
+    def _start_budget():
+        if request.method == "OPTIONS":
+            return None
+        view = app.view_functions.get(request.endpoint)
+        streaming = wants_ndjson() or (request.args.get("range") or "").lower() == "all"
+        kind = classify(request.path, getattr(view, "_time_budget", None), streaming)
+        budget_ms = BUDGETS_MS[kind]
+        if budget_ms <= 0:
+            return None
+        semaphore = _semaphores.get(kind)
+        if semaphore is not None:
+            if not semaphore.acquire(blocking=False):
+                return _error_response(503, "目前同類查詢過多，請稍後再試", kind)
+            g._query_budget_slot = semaphore
+        state = {"kind": kind, "budget_ms": budget_ms, "timed_out": False, "read_timeout": None}
+        if request.method == "GET":
+            state["read_timeout"] = budget_ms / 1000 + READ_TIMEOUT_GRACE_SECONDS
+        g._query_budget = state
+        _current.set(state)
+        return None
+
+    @app.after_request
+    def _timeout_response(response):
+        state = g.get("_query_budget")
+        if state is not None and state["timed_out"]:
+            return _error_response(504, "查詢逾時，請縮小查詢範圍或稍後再試", state["kind"])
+        return response
+
+    @app.teardown_request
+    def _end_budget(exc):
+        if g.pop("_query_budget", None) is not None:
+            _current.set(None)
+        semaphore = g.pop("_query_budget_slot", None)
+        if semaphore is not None:
+            semaphore.release()
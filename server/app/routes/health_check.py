@@ -1,5 +1,4 @@
 import io
-import xlsxwriter
 
 from flask import Blueprint, request, jsonify, send_file, g
 from app.models.health_check_model import (
@@ -104,6 +103,7 @@ def export_health_checks():
 
         # 建立 Excel 檔案
         output = io.BytesIO()
+        import xlsxwriter
         workbook = xlsxwriter.Workbook(output)
         worksheet = workbook.add_worksheet("健康檢查紀錄")
 
@@ -1,5 +1,4 @@
 from flask import Blueprint, request, jsonify, send_file
-import pandas as pd
 import io
 
 from app.models.inventory_model import (
@@ -22,12 +21,20 @@ from app.models.master_stock_model import (
     list_variants_for_master,
     receive_master_stock,
     ship_variant_stock,
+    transfer_master_stock,
     list_master_costs,
     upsert_master_cost_price,
+    get_inventory_valuation,
+    iter_inventory_valuation,
+    parse_valuation_date,
+    VALUATION_GROUPS,
     VALID_STORE_TYPES,
 )
 
 from app.middleware import auth_required, get_user_from_token
+from app.utils import resolve_history_since
+from app.query_budget import time_budget
+from app.streaming import ndjson_response
 
 inventory_bp = Blueprint("inventory", __name__)
 
@@ -143,6 +150,7 @@ def get_low_stock_items():
 
 @inventory_bp.route("/records", methods=["GET"])
 @auth_required
+@time_budget("report")
 def get_inventory_records():
     """取得庫存進出明細"""
     start_date = request.args.get("start_date")
@@ -151,6 +159,12 @@ def get_inventory_records():
     buyer = request.args.get("buyer")
     product_id = request.args.get("product_id")
     master_product_id = request.args.get("master_product_id")
+    if not start_date and not end_date:
+        # 未指定區間時預設只查近期，?range=all 取得完整歷史
+        try:
+            start_date = resolve_history_since(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     try:
         ctx = _get_auth_context()
         store_id_param = request.args.get("store_id")
@@ -333,6 +347,7 @@ def get_inventory_products():
 @auth_required
 def export_inventory():
     """匯出庫存資料為Excel"""
+    import pandas as pd
     try:
         ctx = _get_auth_context()
         store_id_param = request.args.get("store_id")
@@ -626,3 +641,99 @@ def master_stock_outbound():
         return jsonify({"error": "出貨失敗"}), 500
 
     return jsonify({"message": "已扣除主庫存", "stock": stock})
+
+
+@inventory_bp.route("/master/transfer", methods=["POST"])
+@auth_required
+def master_stock_transfer():
+    """
+    分店調撥：多筆明細在同一交易內扣除調出分店、增加調入分店的 master 庫存，回傳調撥單號。
+    body: {"lines": [{"from_store_id", "to_store_id", "variant_id" 或 "master_product_id", "quantity"}], "note"}
+    一般分店只能由自己的分店調出。
+    """
+    if getattr(request, "permission", None) == "therapist":
+        return jsonify({"error": "無操作權限"}), 403
+
+    data = request.json or {}
+    lines = data.get("lines")
+    if not isinstance(lines, list) or not lines:
+        return jsonify({"error": "lines 為必填"}), 400
+
+    user_info = get_user_from_token(request)
+    try:
+        for line in lines:
+            if isinstance(line, dict):
+                _resolve_store_id(line.get("from_store_id"), user_info)
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 403
+
+    staff_id = _safe_int(data.get("staff_id")) or _safe_int(user_info.get("staff_id"))
+
+    try:
+        transfer = transfer_master_stock(lines, staff_id, data.get("note"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:
+        print(f"[master_stock_transfer] {exc}")
+        return jsonify({"error": "調撥失敗"}), 500
+
+    return jsonify({"message": "調撥完成", **transfer})
+
+
+# =========================
+# 庫存估值（數量 × 店型進貨價）
+# =========================
+
+def _valuation_params():
+    """解析估值共用參數：回傳 (as_of, store_id)；admin 未指定分店時為全部分店。"""
+    if getattr(request, "permission", None) == "therapist":
+        raise PermissionError("無操作權限")
+    as_of = parse_valuation_date(request.args.get("as_of"))
+    user_info = get_user_from_token(request)
+    store_id, _, is_admin = _resolve_store_id(request.args.get("store_id"), user_info)
+    if is_admin and not request.args.get("store_id"):
+        store_id = None
+    elif not store_id:
+        raise ValueError("請提供有效的 store_id")
+    return as_of, store_id
+
+
+@inventory_bp.route("/valuation", methods=["GET"])
+@auth_required
+@time_budget("report")
+def inventory_valuation():
+    """
+    庫存估值：依 master 商品、分店或分類彙總庫存金額並附總計
+    參數：as_of (YYYY-MM-DD，預設今天)、store_id (僅總店可指定)、group_by (detail|product|store|category)
+    """
+    group_by = request.args.get("group_by") or "detail"
+    if group_by not in VALUATION_GROUPS:
+        return jsonify({"error": f"不支援的 group_by: {group_by}"}), 400
+    try:
+        as_of, store_id = _valuation_params()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 403
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        return jsonify(get_inventory_valuation(as_of, store_id, group_by))
+    except Exception as e:
+        print(f"[inventory_valuation] {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@inventory_bp.route("/valuation/export", methods=["GET"])
+@auth_required
+def export_inventory_valuation():
+    """以 NDJSON 串流匯出每個 master 商品 × 分店的估值明細（參數同 /valuation）"""
+    try:
+        as_of, store_id = _valuation_params()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 403
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        return ndjson_response(iter_inventory_valuation(as_of, store_id))
+    except Exception as e:
+        print(f"[inventory_valuation_export] {e}")
+        return jsonify({"error": str(e)}), 500
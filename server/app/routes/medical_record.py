@@ -2,7 +2,6 @@
 import io
 import json
 import traceback
-import pandas as pd
 
 from flask import Blueprint, request, jsonify, send_file
 from app.middleware import auth_required, admin_required, get_user_from_token
@@ -102,6 +101,7 @@ def delete(record_id):
 @auth_required
 def export_medical_records():
     """根據權限匯出健康理療記錄為Excel"""
+    import pandas as pd
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
@@ -1,6 +1,5 @@
 # server/app/routes/member.py
 
-import pandas as pd
 import io
 import traceback
 from flask import Blueprint, request, jsonify, send_file
@@ -18,6 +17,8 @@ from app.models.member_model import (
     delete_member_and_related_data as delete_member_model
 )
 from app.models.store_model import get_all_stores
+from app.models.sales_report_model import get_member_sales_buckets, refresh_sales_rollup_buckets
+from app.models.member_overview_model import get_member_overview, parse_sections
 
 member_bp = Blueprint("member", __name__)
 
@@ -116,8 +117,10 @@ def delete_member_route(member_id):
             return jsonify({"error": "權限不足，無法刪除非本店會員"}), 403
         # --- 權限檢查結束 ---
         
+        sales_buckets = get_member_sales_buckets(member_id)
         result = delete_member_model(member_id)
         if result.get("success"):
+            refresh_sales_rollup_buckets(sales_buckets)
             return jsonify(result), 200
         else:
             return jsonify({"error": result.get("error")}), 400
@@ -165,6 +168,7 @@ def update_member_route(member_id):
 @auth_required # <-- 改為使用 auth_required
 def export_members():
     """根據權限匯出會員資料為Excel檔案"""
+    import pandas as pd
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
@@ -237,6 +241,33 @@ def get_member_route(member_id):
         traceback.print_exc()
         return jsonify({"error": f"獲取會員資料時發生錯誤: {str(e)}"}), 500
 
+@member_bp.route("/<int:member_id>/overview", methods=["GET"])
+@auth_required
+def get_member_overview_route(member_id):
+    """
+    會員 360 總覽：一次取得會員資料、剩餘堂數、壓力測試、淨化紀錄、
+    健康理療紀錄、健康檢查與消費紀錄。
+    可用 ?sections=stress_tests,purchases 指定區塊。
+    """
+    try:
+        sections = parse_sections(request.args.get("sections"))
+        overview = get_member_overview(
+            member_id,
+            sections,
+            store_level=request.store_level,
+            store_id=request.store_id,
+        )
+        if overview is None:
+            return jsonify({"error": "會員不存在"}), 404
+        return jsonify(overview)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": f"獲取會員總覽時發生錯誤: {str(e)}"}), 500
+
 @member_bp.route("/code/<string:member_code>", methods=["GET"])
 @auth_required
 def get_member_by_code_route(member_code):
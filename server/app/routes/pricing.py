@@ -0,0 +1,29 @@
+from flask import Blueprint, request, jsonify
+from app.models.pricing_model import quote_cart, member_identity_type
+from app.middleware import auth_required
+
+pricing_bp = Blueprint("pricing", __name__)
+
+
+@pricing_bp.route("/quote", methods=["POST"])
+@auth_required
+def quote():
+    """
+    購物車報價
+    內容：{"member_id": 12, "identity_type": "會員", "items": [{"type": "product"|"therapy"|"product_bundle"|"therapy_bundle",
+          "id": 1, "quantity": 2, "discount": 0}]}
+    身份別以 identity_type 為準，未提供時採用會員的身份別，兩者皆無時以一般售價計算。
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        identity_type = data.get("identity_type")
+        member_id = data.get("member_id")
+        if not identity_type and member_id:
+            identity_type = member_identity_type(member_id)
+            if identity_type is None:
+                return jsonify({"error": "找不到會員"}), 404
+        return jsonify(quote_cart(data.get("items"), identity_type))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -2,13 +2,31 @@ from flask import Blueprint, request, jsonify
 from app.models.product_model import (
     create_product,
     delete_product,
+    find_existing_product_codes,
     find_products_with_prefix,
+    find_products_with_prefixes,
     update_product,
 )
 from app.middleware import admin_required
 
 product_bp = Blueprint("product", __name__)
 
+# 新增產品時以編號前幾碼偵測可能重複的商品
+CODE_PREFIX_LENGTH = 5
+MAX_CODE_CHECK_ITEMS = 5000
+
+
+def _prefix_conflicts(existing: list[dict], name: str) -> list[dict]:
+    return [
+        {
+            "product_id": product.get("product_id"),
+            "name": product.get("name"),
+            "code": product.get("code"),
+        }
+        for product in existing
+        if (product.get("name") or "").strip().lower() != name.lower()
+    ]
+
 @product_bp.route("/", methods=["POST"])
 @admin_required
 def add_product():
@@ -20,19 +38,10 @@ def add_product():
     if not code or not name:
         return jsonify({"error": "缺少必要欄位"}), 400
 
-    code_prefix = code[:5]
+    code_prefix = code[:CODE_PREFIX_LENGTH]
     conflicts = []
     if code_prefix:
-        existing = find_products_with_prefix(code_prefix)
-        conflicts = [
-            {
-                "product_id": product.get("product_id"),
-                "name": product.get("name"),
-                "code": product.get("code"),
-            }
-            for product in existing
-            if (product.get("name") or "").strip().lower() != name.lower()
-        ]
+        conflicts = _prefix_conflicts(find_products_with_prefix(code_prefix), name)
 
     if conflicts and not force_create:
         return (
@@ -58,6 +67,57 @@ def add_product():
         return jsonify({"error": str(e)}), 500
 
 
+@product_bp.route("/check-codes", methods=["POST"])
+@admin_required
+def check_product_codes():
+    """
+    批次檢查產品編號（供商品匯入前預檢）：
+    {"items": [{"code": "...", "name": "..."}]} → 每筆是否已存在、前綴衝突與批次內重複。
+    所有前綴與編號合併成少數幾個查詢，不會逐筆查詢資料庫。
+    """
+    data = request.json or {}
+    items = data.get("items")
+    if not isinstance(items, list):
+        return jsonify({"error": "items 必須為陣列"}), 400
+    if len(items) > MAX_CODE_CHECK_ITEMS:
+        return jsonify({"error": f"單次最多檢查 {MAX_CODE_CHECK_ITEMS} 筆"}), 400
+
+    normalized = []
+    for item in items:
+        item = item if isinstance(item, dict) else {"code": item}
+        code = str(item.get("code") or "").strip()
+        name = str(item.get("name") or "").strip()
+        normalized.append((code, name))
+
+    try:
+        codes = [code for code, _ in normalized if code]
+        existing_codes = {code.lower() for code in find_existing_product_codes(codes)}
+        prefix_matches = find_products_with_prefixes(code[:CODE_PREFIX_LENGTH] for code in codes)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    seen: dict[str, int] = {}
+    for code, _ in normalized:
+        if code:
+            seen[code.lower()] = seen.get(code.lower(), 0) + 1
+
+    results = []
+    for code, name in normalized:
+        if not code:
+            results.append({"code": code, "error": "缺少產品編號"})
+            continue
+        code_prefix = code[:CODE_PREFIX_LENGTH]
+        results.append({
+            "code": code,
+            "name": name,
+            "exists": code.lower() in existing_codes,
+            "duplicate_in_batch": seen[code.lower()] > 1,
+            "code_prefix": code_prefix,
+            "conflicts": _prefix_conflicts(prefix_matches.get(code_prefix, []), name),
+        })
+    return jsonify({"results": results})
+
+
 @product_bp.route("/<int:product_id>", methods=["PUT"])
 @admin_required
 def update_product_route(product_id):
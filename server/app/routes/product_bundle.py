@@ -6,6 +6,7 @@ from app.models.product_bundle_model import (
     get_bundle_details_by_id, update_product_bundle, delete_product_bundle
 )
 from app.middleware import admin_required, auth_required, get_user_from_token
+from app.http_cache import conditional_get
 
 # Blueprint 的建立方式不變
 product_bundle_bp = Blueprint(
@@ -13,8 +14,14 @@ product_bundle_bp = Blueprint(
     __name__
 )
 
+_BUNDLE_TABLES = (
+    "product_bundles", "product_bundle_items", "product_bundle_category",
+    "product_bundle_price_tier", "category", "product", "therapy",
+)
+
 @product_bundle_bp.route("/", methods=["GET"])
 @auth_required
+@conditional_get(*_BUNDLE_TABLES)
 def get_bundles():
     """獲取產品組合列表"""
     try:
@@ -52,6 +59,7 @@ def get_bundles():
 
 @product_bundle_bp.route("/available", methods=["GET"])
 @auth_required
+@conditional_get(*_BUNDLE_TABLES)
 def get_available_bundles():
     """根據店家權限取得可用的產品組合列表"""
     try:
@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify, send_file
-import pandas as pd
 import io
 from app.models.product_sell_model import (
     get_all_product_sells,
+    iter_all_product_sells,
     search_product_sells,
     get_product_sell_by_id,
     get_product_sells_by_order_reference,
@@ -14,6 +14,8 @@ from app.models.product_sell_model import (
     export_product_sells
 )
 from app.middleware import auth_required, admin_required, get_user_from_token
+from app.streaming import wants_ndjson, ndjson_response
+from app.utils import resolve_history_since
 
 product_sell_bp = Blueprint("product_sell", __name__, url_prefix='/api/product-sell')
 
@@ -22,13 +24,20 @@ product_sell_bp = Blueprint("product_sell", __name__, url_prefix='/api/product-s
 @auth_required
 def get_sales():
     """獲取產品銷售記錄 (已根據店家權限過濾)"""
+    try:
+        since = resolve_history_since(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
         user = get_user_from_token(request)
         store_id = user.get('store_id') if user and user.get('permission') != 'admin' else None
         
         # 如果是總店(admin)，store_id 為 None，獲取所有紀錄
         # 如果是分店，則只返回該店鋪的記錄
-        sales = get_all_product_sells(store_id=store_id)
+        # 預設只列近期紀錄，?range=all 取得完整歷史
+        if wants_ndjson():
+            return ndjson_response(iter_all_product_sells(store_id=store_id, since=since))
+        sales = get_all_product_sells(store_id=store_id, since=since)
         return jsonify(sales)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -243,6 +252,7 @@ def search_product():
 @auth_required
 def export_sales():
     """匯出產品銷售紀錄 (已根據店家權限過濾)"""
+    import pandas as pd
     try:
         user = get_user_from_token(request)
         store_id = user.get('store_id') if user and user.get('permission') != 'admin' else None
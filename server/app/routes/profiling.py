@@ -0,0 +1,47 @@
+import json
+from flask import Blueprint, Response, current_app, jsonify
+from app.middleware import admin_required
+from app.profiler import list_profiles, load_profile
+
+profiling_bp = Blueprint("profiling", __name__)
+
+
+def _profile_dir():
+    return current_app.config.get("PROFILE_DIR")
+
+
+@profiling_bp.route("/profiles", methods=["GET"])
+@admin_required
+def get_profiles():
+    """列出已儲存的請求剖析（不含查詢明細）"""
+    return jsonify(list_profiles(_profile_dir()) if _profile_dir() else [])
+
+
+@profiling_bp.route("/profiles/<profile_id>", methods=["GET"])
+@admin_required
+def get_profile(profile_id):
+    """單次剖析摘要：總耗時、SQL 耗時與依語句彙總的查詢明細"""
+    try:
+        summary = load_profile(_profile_dir(), profile_id) if _profile_dir() else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if summary is None:
+        return jsonify({"error": "找不到剖析結果"}), 404
+    return jsonify(summary)
+
+
+@profiling_bp.route("/profiles/<profile_id>/speedscope", methods=["GET"])
+@admin_required
+def download_speedscope(profile_id):
+    """下載 speedscope 格式的取樣堆疊（可於 speedscope.app 開啟）"""
+    try:
+        profile = load_profile(_profile_dir(), profile_id, speedscope=True) if _profile_dir() else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if profile is None:
+        return jsonify({"error": "找不到剖析結果"}), 404
+    return Response(
+        json.dumps(profile),
+        mimetype="application/json",
+        headers={"Content-Disposition": f"attachment; filename={profile_id}.speedscope.json"},
+    )
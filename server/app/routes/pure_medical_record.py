@@ -1,6 +1,5 @@
 # server/app/routes/pure_medical_record.py
 import io
-import pandas as pd
 import json
 import traceback
 
@@ -123,6 +122,7 @@ def delete_record(pure_id):
 @auth_required
 def export_records():
     """導出淨化健康紀錄為Excel檔案"""
+    import pandas as pd
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
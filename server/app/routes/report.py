@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta
+from flask import Blueprint, request, jsonify
+from app.models.sales_report_model import (
+    get_sales_report,
+    rebuild_sales_rollup,
+    parse_group_by,
+    ROLLUP_SOURCES,
+)
+from app.middleware import auth_required, admin_required, get_user_from_token
+
+report_bp = Blueprint("report", __name__)
+
+DEFAULT_REPORT_DAYS = 30
+
+
+def _parse_date(value: str | None, field: str):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip().replace("/", "-"), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{field} 日期格式錯誤，應為 YYYY-MM-DD")
+
+
+def _parse_sources(raw: str | None):
+    if not raw:
+        return None
+    sources = [part.strip() for part in raw.split(",") if part.strip()]
+    invalid = [s for s in sources if s not in ROLLUP_SOURCES]
+    if invalid:
+        raise ValueError(f"不支援的 source: {', '.join(invalid)}")
+    return sources
+
+
+@report_bp.route("/sales", methods=["GET"])
+@auth_required
+def sales_report():
+    """
+    銷售報表（讀取每日彙總表）
+    參數：start_date, end_date, group_by (date|week|month,store,staff,category,payment_method,source),
+          source, store_id (僅總店), compare (previous|previous_year)
+    """
+    try:
+        user = get_user_from_token(request)
+        permission = user.get("permission")
+        if permission == "therapist":
+            return jsonify({"error": "無操作權限"}), 403
+        is_admin = user.get("store_level") == "總店" or permission == "admin"
+
+        end = _parse_date(request.args.get("end_date"), "end_date") or date.today()
+        start = _parse_date(request.args.get("start_date"), "start_date") or (
+            end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+        )
+        if start > end:
+            return jsonify({"error": "start_date 不可晚於 end_date"}), 400
+
+        group_by = parse_group_by(request.args.get("group_by"))
+        sources = _parse_sources(request.args.get("source"))
+        compare = request.args.get("compare") or None
+
+        if is_admin:
+            store_id = request.args.get("store_id", type=int)
+        else:
+            store_id = user.get("store_id")
+
+        report = get_sales_report(
+            start,
+            end,
+            group_by=group_by,
+            store_id=store_id,
+            sources=sources,
+            compare=compare,
+        )
+        return jsonify(report)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"取得銷售報表失敗: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@report_bp.route("/sales/rebuild", methods=["POST"])
+@admin_required
+def rebuild_sales_report():
+    """重建每日銷售彙總（可指定日期區間與來源）"""
+    data = request.json or {}
+    try:
+        start = _parse_date(data.get("start_date"), "start_date")
+        end = _parse_date(data.get("end_date"), "end_date")
+        sources = data.get("sources")
+        if sources is not None:
+            if isinstance(sources, str):
+                sources = [sources]
+            invalid = [s for s in sources if s not in ROLLUP_SOURCES]
+            if invalid:
+                return jsonify({"error": f"不支援的 source: {', '.join(invalid)}"}), 400
+        rebuilt = rebuild_sales_rollup(
+            start.isoformat() if start else None,
+            end.isoformat() if end else None,
+            sources,
+        )
+        return jsonify({"message": "銷售彙總重建完成", "rows": rebuilt})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"重建銷售彙總失敗: {e}")
+        return jsonify({"error": str(e)}), 500
@@ -10,7 +10,6 @@ from app.models.sales_order_model import (
 )
 from datetime import datetime
 import traceback
-import pandas as pd
 import io
 from app.middleware import auth_required
 
@@ -71,6 +70,7 @@ def get_sales_orders_route():
 @auth_required
 def export_sales_orders_route():
     """匯出銷售單列表為 Excel"""
+    import pandas as pd
     try:
         if _finance_permission() == 'therapist':
             return jsonify({"error": "無操作權限"}), 403
@@ -120,6 +120,7 @@ def export_sales_orders_route():
 @auth_required
 def export_selected_sales_orders_route():
     """匯出勾選的銷售單列表為 Excel"""
+    import pandas as pd
     try:
         if _finance_permission() == 'therapist':
             return jsonify({"error": "無操作權限"}), 403
@@ -1,5 +1,4 @@
 from flask import Blueprint, request, jsonify, send_file
-import pandas as pd
 import io
 from app.models.staff_model import (
     get_all_staff,
@@ -20,6 +19,7 @@ from app.models.staff_model import (
     get_all_stores_for_dropdown
 )
 from app.middleware import auth_required, login_required, admin_required
+from app.http_cache import conditional_get
 staff_bp = Blueprint("staff", __name__)
 
 
@@ -31,6 +31,7 @@ def _forbid_therapist():
 # --- 這個是您原有的，用於獲取完整員工列表 ---
 @staff_bp.route("/list", methods=["GET"])
 @auth_required
+@conditional_get("staff", "store")
 def get_staff_list():
     """根據權限獲取員工列表"""
     try:
@@ -51,6 +52,7 @@ def get_staff_list():
 # --- vvvv 我們新增這個專門給下拉選單用的新路由 vvvv ---
 @staff_bp.route("/for-dropdown", methods=["GET"])
 @login_required
+@conditional_get("staff")
 def get_staff_for_dropdown_route():
     """提供給前端下拉選單使用的員工列表 (僅含id和name)"""
     try:
@@ -118,6 +120,7 @@ def get_staff_details_route(staff_id):
 @auth_required
 def export_staff_route():
     """匯出員工資料為 Excel 檔案"""
+    import pandas as pd
     try:
         denial = _forbid_therapist()
         if denial:
@@ -203,6 +206,7 @@ def export_staff_route():
 @auth_required
 def export_selected_staff_route():
     """匯出勾選的員工資料為 Excel 檔案"""
+    import pandas as pd
     try:
         denial = _forbid_therapist()
         if denial:
@@ -333,6 +337,8 @@ def delete_staff_route(staff_id):
         return jsonify({"error": str(e)}), 500
 
 @staff_bp.route("/permissions", methods=["GET"])
+@auth_required
+@conditional_get("staff")
 def get_permissions():
     """獲取所有權限等級"""
     try:
@@ -383,6 +389,7 @@ def update_account_route(staff_id):
 @admin_required
 def export_staff_accounts_route():
     """匯出所有員工帳號資料為 Excel"""
+    import pandas as pd
     try:
         keyword = request.args.get("keyword")
         if keyword:
@@ -442,6 +449,7 @@ def export_staff_accounts_route():
 @admin_required
 def export_selected_staff_accounts_route():
     """匯出勾選的員工帳號資料為 Excel"""
+    import pandas as pd
     try:
         data = request.json or {}
         ids = data.get("ids")
@@ -500,6 +508,7 @@ def export_selected_staff_accounts_route():
 # 總部專用：獲取所有分店列表，用於下拉式選單
 @staff_bp.route("/stores", methods=["GET"])
 @login_required  # 使用 login_required 即可，因為分店和總部可能都需要這個列表
+@conditional_get("store")
 def get_stores():
     """提供給前端下拉式選單所需要的所有分店列表。"""
     try:
@@ -511,6 +520,7 @@ def get_stores():
 # --- 專門為分店下拉選單新增的 API 路由 ---
 @staff_bp.route("/stores-for-dropdown", methods=["GET"])
 @login_required # 使用最基本的登入驗證即可
+@conditional_get("store")
 def get_stores_for_dropdown_route():
     """
     [新功能專用] 提供給前端分店下拉選單的 API。
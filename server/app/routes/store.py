@@ -2,12 +2,14 @@ import pymysql
 from flask import Blueprint, request, jsonify
 from app.models.store_model import create_store, get_all_stores, VALID_STORE_TYPES
 from app.middleware import admin_required
+from app.http_cache import conditional_get
 
 # 建立一個新的 Blueprint
 store_bp = Blueprint("store", __name__)
 
 @store_bp.route("/list", methods=["GET"])
 @admin_required
+@conditional_get("store", "store_account")
 def get_stores_list():
     """
     API 端點：獲取所有分店的列表
@@ -1,7 +1,6 @@
 # server/app/routes/stress_test.py
 from flask import Blueprint, request, jsonify, send_file
 import traceback
-import pandas as pd
 import io
 from app.models.stress_test_model import (
     get_all_stress_tests, 
@@ -14,7 +13,7 @@ from app.models.stress_test_model import (
     update_stress_test_with_answers, # ← 更新用這個
     get_stress_test_by_id_with_answers
 )
-from app.middleware import auth_required
+from app.middleware import auth_required, admin_required
 
 stress_test = Blueprint('stress_test', __name__)
 
@@ -45,6 +44,7 @@ def get_stress_tests():
 @auth_required
 def export_stress_tests_route():
     """匯出壓力測試列表為 Excel"""
+    import pandas as pd
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
@@ -112,6 +112,76 @@ def get_member_stress_tests(member_id):
         traceback.print_exc()
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _analytics_scope():
+    """分店只能看自己的資料；總店 / admin 可用 store_id 參數指定分店。"""
+    from app.models.stress_analytics_model import parse_analytics_date
+    if request.store_level == '分店':
+        store_id = request.store_id
+    else:
+        store_id = request.args.get('store_id', type=int)
+    start_date = parse_analytics_date(request.args.get('start_date'))
+    end_date = parse_analytics_date(request.args.get('end_date'))
+    return store_id, start_date, end_date
+
+@stress_test.route('/analytics/distribution', methods=['GET'])
+@auth_required
+def stress_distribution_route():
+    """壓力測試各向度分數分布"""
+    from app.models.stress_analytics_model import get_score_distribution
+    try:
+        store_id, start_date, end_date = _analytics_scope()
+        return jsonify({"success": True, "data": get_score_distribution(store_id, start_date, end_date)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@stress_test.route('/analytics/trend', methods=['GET'])
+@auth_required
+def stress_trend_route():
+    """壓力測試平均分數趨勢（interval=month|week|day）"""
+    from app.models.stress_analytics_model import get_score_trend
+    try:
+        store_id, start_date, end_date = _analytics_scope()
+        interval = request.args.get('interval', 'month')
+        return jsonify({"success": True, "data": get_score_trend(interval, store_id, start_date, end_date)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@stress_test.route('/analytics/stores', methods=['GET'])
+@auth_required
+def stress_store_breakdown_route():
+    """各分店壓力測試統計"""
+    from app.models.stress_analytics_model import get_store_breakdown
+    try:
+        store_id, start_date, end_date = _analytics_scope()
+        return jsonify({"success": True, "data": get_store_breakdown(store_id, start_date, end_date)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@stress_test.route('/analytics/rescore', methods=['POST'])
+@admin_required
+def stress_rescore_route():
+    """依目前題目對照表重新計算壓力測試分數（可 dry_run）"""
+    from app.models.stress_analytics_model import rescore_stress_tests
+    data = request.get_json(silent=True) or {}
+    try:
+        result = rescore_stress_tests(
+            store_id=data.get('store_id'),
+            dry_run=bool(data.get('dry_run', False)),
+        )
+        return jsonify({"success": True, "data": result})
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @stress_test.route('/<int:stress_id>', methods=['GET'])
 @auth_required
 def get_stress_test(stress_id):
@@ -1,12 +1,12 @@
 from flask import Blueprint, request, jsonify, send_file
 from app.middleware import login_required
-import pandas as pd
 import io
 from app.models.therapy_model import (
     insert_therapy_record,
     get_all_therapy_records,
     get_therapy_records_by_store,
     search_therapy_records,
+    iter_therapy_records,
     get_therapy_record_by_id,
     update_therapy_record,
     delete_therapy_record,
@@ -22,6 +22,9 @@ from app.models.therapy_model import (
     delete_therapy
 )
 from app.middleware import auth_required, admin_required, get_user_from_token
+from app.http_cache import conditional_get
+from app.streaming import wants_ndjson, ndjson_response
+from app.utils import resolve_history_since
 
 therapy_bp = Blueprint("therapy", __name__)
 
@@ -29,9 +32,13 @@ therapy_bp = Blueprint("therapy", __name__)
 @therapy_bp.route("/record", methods=["GET"])
 @auth_required
 def get_records():
-    """獲取所有療程紀錄"""
+    """獲取療程紀錄（預設只列近期，?range=all 取得完整歷史）"""
     try:
-        records = get_all_therapy_records()
+        since = resolve_history_since(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        records = get_all_therapy_records(since)
             
         return jsonify(records)
     except Exception as e:
@@ -68,6 +75,8 @@ def search_therapy_records_route():
         }
         
         # 將打包好的單一字典參數傳遞給 model 函式
+        if wants_ndjson():
+            return ndjson_response(iter_therapy_records(filters))
         records = search_therapy_records(filters)
         
         return jsonify(records)
@@ -159,6 +168,7 @@ def delete_record(record_id):
 @auth_required
 def export_records():
     """匯出療程紀錄"""
+    import pandas as pd
     try:
         # 根據登入者身分決定匯出範圍，分店僅匯出自己的紀錄，
         # 總店／admin 則可匯出所有店家資料
@@ -282,6 +292,7 @@ def delete_sale(sale_id):
 @therapy_bp.route("/sale/export", methods=["GET"])
 def export_sales():
     """匯出療程銷售"""
+    import pandas as pd
     try:
         sales = get_all_therapy_sells()
         
@@ -327,6 +338,7 @@ def export_sales():
 # vvvv 新增這個路由 vvvv
 @therapy_bp.route("/for-dropdown", methods=["GET"])
 @login_required
+@conditional_get("therapy", "therapy_category", "category", "therapy_price_tier")
 def get_therapy_list():
     """提供給前端下拉選單使用的療程列表"""
     try:
@@ -4,15 +4,22 @@ from app.models.therapy_bundle_model import (
     get_bundle_details_by_id, update_therapy_bundle, delete_therapy_bundle
 )
 from app.middleware import admin_required, auth_required, get_user_from_token
+from app.http_cache import conditional_get
 
 therapy_bundle_bp = Blueprint(
     "therapy_bundle",
     __name__
 )
 
+_BUNDLE_TABLES = (
+    "therapy_bundles", "therapy_bundle_items", "therapy_bundle_category",
+    "therapy_bundle_price_tier", "category", "therapy",
+)
+
 
 @therapy_bundle_bp.route("/", methods=["GET"])
 @auth_required
+@conditional_get(*_BUNDLE_TABLES)
 def get_bundles():
     """獲取療程組合列表"""
     try:
@@ -114,6 +121,7 @@ def delete_single_bundle(bundle_id):
 
 @therapy_bundle_bp.route("/available", methods=["GET"])
 @auth_required
+@conditional_get(*_BUNDLE_TABLES)
 def get_available_therapy_bundles():
     """根據店家權限取得可用的療程組合列表"""
     try:
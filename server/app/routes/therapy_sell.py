@@ -1,13 +1,15 @@
 from flask import Blueprint, request, jsonify, send_file
 from app.models.therapy_sell_model import (
-    get_all_therapy_sells, search_therapy_sells,
+    get_all_therapy_sells, iter_all_therapy_sells, search_therapy_sells,
     insert_many_therapy_sells , update_therapy_sell, delete_therapy_sell,
     get_all_therapy_packages, search_therapy_packages,
     get_all_members, get_all_staff, get_all_stores,
     get_remaining_sessions, get_remaining_sessions_bulk
 )
 from app.middleware import auth_required, get_user_from_token, login_required
-import pandas as pd
+from app.http_cache import conditional_get
+from app.streaming import wants_ndjson, ndjson_response
+from app.utils import resolve_history_since
 import io
 from datetime import datetime
 import logging
@@ -66,6 +68,7 @@ def add_therapy_transaction_route():
 
 @therapy_sell.route('/packages', methods=['GET'])
 @login_required
+@conditional_get("therapy", "therapy_category", "category", "therapy_price_tier")
 def get_packages():
     """獲取所有療程套餐"""
     try:
@@ -94,7 +97,11 @@ def search_packages():
 @therapy_sell.route('/sales', methods=['GET'])
 @auth_required
 def get_sales():
-    """根據權限獲取療程銷售紀錄"""
+    """根據權限獲取療程銷售紀錄（預設只列近期，?range=all 取得完整歷史）"""
+    try:
+        since = resolve_history_since(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
@@ -108,7 +115,9 @@ def get_sales():
         # 分店僅能查看自身紀錄
         target_store = store_id_param if is_admin else user_store_id
 
-        result = get_all_therapy_sells(target_store)
+        if wants_ndjson():
+            return ndjson_response(iter_all_therapy_sells(target_store, since))
+        result = get_all_therapy_sells(target_store, since)
         return jsonify(result)
     except Exception as e:
         print(f"獲取療程銷售失敗: {e}")
@@ -220,6 +229,7 @@ def delete_sale(sale_id):
 @auth_required
 def export_sales():
     """匯出療程銷售紀錄"""
+    import pandas as pd
     try:
         user_store_level = request.store_level
         user_store_id = request.store_id
@@ -0,0 +1,44 @@
+# server/app/streaming.py
+"""
+Accept: application/x-ndjson 時以串流方式輸出列表：每行一筆 JSON 紀錄。
+回應開始後無法再改變狀態碼，因此中途發生錯誤時會輸出最後一行 {"error": ...} 後結束。
+"""
+from flask import current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_ndjson() -> bool:
+    """只有用戶端明確要求 application/x-ndjson 時才使用串流模式（*/* 不算）。"""
+    return any(
+        value == NDJSON_MIMETYPE and quality > 0
+        for value, quality in request.accept_mimetypes
+    )
+
+
+def ndjson_response(rows, chunk_rows: int = 100):
+    provider = current_app.json
+    dump = getattr(provider, "dump_bytes", None) or (lambda obj: provider.dumps(obj).encode("utf-8"))
+
+    def generate():
+        buffer = []
+        try:
+            for row in rows:
+                buffer.append(dump(row))
+                if len(buffer) >= chunk_rows:
+                    yield b"\n".join(buffer) + b"\n"
+                    buffer = []
+        except Exception as e:
+            print(f"NDJSON 串流中斷: {e}")
+            buffer.append(dump({"error": str(e)}))
+        finally:
+            if hasattr(rows, "close"):
+                rows.close()
+        if buffer:
+            yield b"\n".join(buffer) + b"\n"
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    # 避免反向代理（nginx）緩衝整個回應
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Vary"] = "Accept"
+    return response
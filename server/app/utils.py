@@ -1,20 +1,22 @@
 # IPN_ERP/server/app/utils.py
 
+from datetime import date, timedelta
+
 from flask_login import current_user
-from flask import g 
+from app.config import SALES_RECENT_DAYS
+from app.middleware import get_auth_context
 
 def get_store_based_where_condition(table_alias=None):
     """
-    根據 g 物件中的使用者權限，產生 SQL 的 WHERE 條件句。
+    根據本次請求的 AuthContext（由 middleware 建立）產生 SQL 的 WHERE 條件句。
     """
-    # 檢查 g 物件中是否有 user 資訊 (由 middleware 注入)
-    if not hasattr(g, 'user'):
-        # 如果沒有，代表請求未經過驗證，回傳一個永遠為假的條件
+    ctx = get_auth_context()
+    if ctx.source != "token":
+        # 沒有有效 token，代表請求未經過驗證，回傳一個永遠為假的條件
         return (" AND 1=0 ", [])
 
-    user_info = g.user
-    permission = user_info.get('permission')
-    store_id = user_info.get('store_id')
+    permission = ctx.permission
+    store_id = ctx.store_id
 
     if permission == 'admin':
         return ("", [])
@@ -25,3 +27,24 @@ def get_store_based_where_condition(table_alias=None):
         return (f" AND {field} = %s ", [store_id])
 
     return (" AND 1=0 ", [])
+
+
+def resolve_history_since(args, default_days: int | None = None) -> str | None:
+    """
+    列表查詢的起始日期（YYYY-MM-DD），None 代表完整歷史：
+      ?range=all          → None
+      ?since=YYYY-MM-DD   → 指定日期
+      其他                → 今天往前 SALES_RECENT_DAYS 天（設定為 0 時回傳 None）
+    """
+    if (args.get("range") or "").lower() == "all":
+        return None
+    since = (args.get("since") or "").strip()
+    if since:
+        try:
+            return date.fromisoformat(since).isoformat()
+        except ValueError:
+            raise ValueError("since 必須為 YYYY-MM-DD 格式") from None
+    days = SALES_RECENT_DAYS if default_days is None else default_days
+    if days <= 0:
+        return None
+    return (date.today() - timedelta(days=days)).isoformat()
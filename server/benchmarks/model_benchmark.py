@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+熱點 model 函式的基準測試：直接呼叫 model（不經過 HTTP），量測每個案例多次執行的耗時，
+與 baselines/models.json 比較，任一案例超過容許比例即以非零狀態結束。
+
+先以 benchmarks.synthetic_data 在專用資料庫建立固定種子的資料，基準才有可比性：
+
+    python -m benchmarks.synthetic_data --scale medium --truncate
+    python -m benchmarks.model_benchmark --update-baseline
+    python -m benchmarks.model_benchmark                       # 比較基準
+    python -m benchmarks.model_benchmark --only search_members,inventory_history
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "models.json"
+DEFAULT_TOLERANCE = float(os.getenv("MODEL_REGRESSION_TOLERANCE", 0.25))
+# 低於此差距（秒）視為量測雜訊，不算退步
+NOISE_FLOOR_SECONDS = 0.005
+# 用來辨識資料集的資料表；筆數不同的基準不能互相比較
+FINGERPRINT_TABLES = ("store", "member", "product", "product_sell", "therapy_sell",
+                      "therapy_record", "stock_transaction", "master_stock")
+
+
+def _connect():
+    import pymysql
+    from app.config import DB_CONFIG
+
+    return pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+
+
+def dataset_fingerprint() -> dict[str, int]:
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            counts = {}
+            for table in FINGERPRINT_TABLES:
+                cursor.execute(f"SELECT COUNT(*) AS cnt FROM `{table}`")
+                counts[table] = int(cursor.fetchone()["cnt"])
+            return counts
+    finally:
+        conn.close()
+
+
+def pick_parameters() -> dict:
+    """從資料中挑選有代表性的參數：資料量最大的分店、療程銷售最多的會員及其姓氏。"""
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT store_id FROM product_sell GROUP BY store_id ORDER BY COUNT(*) DESC, store_id LIMIT 1"
+            )
+            row = cursor.fetchone()
+            store_id = row["store_id"] if row else 1
+            cursor.execute(
+                "SELECT member_id FROM therapy_sell GROUP BY member_id ORDER BY COUNT(*) DESC, member_id LIMIT 1"
+            )
+            row = cursor.fetchone()
+            member_id = row["member_id"] if row else 1
+            cursor.execute("SELECT name FROM member WHERE member_id = %s", (member_id,))
+            row = cursor.fetchone()
+            keyword = row["name"][:1] if row and row["name"] else "陳"
+    finally:
+        conn.close()
+    return {"store_id": store_id, "member_id": member_id, "keyword": keyword}
+
+
+def _consume(result) -> int:
+    """回傳結果筆數；產生器會被完整走訪，量到的是串流的總耗時。"""
+    if result is None:
+        return 0
+    if hasattr(result, "__len__"):
+        return len(result)
+    return sum(1 for _ in result)
+
+
+def build_cases(params: dict) -> dict:
+    """案例名稱 → 無參數的呼叫函式。model 於此才 import，避免未設定資料庫時載入失敗。"""
+    from app.models import (
+        inventory_model, member_model, product_sell_model, pure_medical_record_model,
+        therapy_model, therapy_sell_model,
+    )
+
+    store_id = params["store_id"]
+    return {
+        "product_sells_store": lambda: product_sell_model.get_all_product_sells(store_id),
+        "product_sells_all": lambda: product_sell_model.get_all_product_sells(None),
+        "product_sells_stream": lambda: product_sell_model.iter_all_product_sells(store_id),
+        "inventory_history": lambda: inventory_model.get_inventory_history(store_id=store_id),
+        "remaining_sessions_bulk": lambda: therapy_sell_model.get_remaining_sessions_bulk(params["member_id"]),
+        "search_members": lambda: member_model.search_members(params["keyword"], "分店", store_id),
+        "search_members_admin": lambda: member_model.search_members(params["keyword"], "總店", None),
+        "products_with_inventory": lambda: product_sell_model.get_all_products_with_inventory(store_id),
+        "export_product_sells": lambda: product_sell_model.export_product_sells(store_id),
+        "export_therapy_records": lambda: therapy_model.export_therapy_records(store_id),
+        "export_inventory": lambda: inventory_model.export_inventory_data(store_id),
+        "export_pure_records": lambda: pure_medical_record_model.export_pure_records("分店", store_id),
+    }
+
+
+def measure_case(func, runs: int = 5, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        _consume(func())
+    samples, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = _consume(func())
+        samples.append(time.perf_counter() - started)
+    return {
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "max_seconds": max(samples),
+        "rows": rows,
+    }
+
+
+def measure(runs: int = 5, only=None, log=print) -> dict:
+    params = pick_parameters()
+    cases = build_cases(params)
+    if only:
+        unknown = sorted(set(only) - set(cases))
+        if unknown:
+            raise ValueError(f"未知的案例: {', '.join(unknown)}")
+        cases = {name: cases[name] for name in only}
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure_case(func, runs)
+        log(f"  {name}: {results[name]['median_seconds'] * 1000:.1f}ms ({results[name]['rows']} 筆)")
+    return {
+        "dataset": dataset_fingerprint(),
+        "parameters": params,
+        "runs": runs,
+        "cases": results,
+    }
+
+
+def load_baseline(path: Path = BASELINE_PATH):
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(result: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """回傳退步項目的說明；空清單表示通過。基準中沒有的案例不比較。"""
+    if not baseline:
+        return []
+    if baseline.get("dataset") and result.get("dataset") != baseline["dataset"]:
+        return ["資料集與基準不同（請以相同的 scale / seed 重建資料，或更新基準）"]
+    problems = []
+    for name, current in result["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if not previous:
+            continue
+        limit = previous["median_seconds"] * (1 + tolerance)
+        if current["median_seconds"] > max(limit, previous["median_seconds"] + NOISE_FLOOR_SECONDS):
+            problems.append(
+                f"{name} {current['median_seconds'] * 1000:.1f}ms 超過基準 "
+                f"{previous['median_seconds'] * 1000:.1f}ms (+{tolerance:.0%})"
+            )
+        if previous.get("rows") is not None and current["rows"] != previous["rows"]:
+            problems.append(f"{name} 回傳 {current['rows']} 筆，基準為 {previous['rows']} 筆")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="熱點 model 函式基準測試")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", default=None, help="逗號分隔的案例名稱，預設全部")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    baseline = load_baseline(args.baseline)
+    if baseline is None and not args.update_baseline:
+        # 沒有基準時不能視為通過，否則退步檢查永遠不會執行
+        print(f"❌ 缺少基準 {args.baseline}，請在基準資料庫上執行 --update-baseline 並提交")
+        return 1
+    result = measure(args.runs, only)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.update_baseline:
+        baseline = baseline or {}
+        if only and baseline.get("dataset") == result["dataset"]:
+            # 只量部分案例時保留其他案例的既有基準
+            result["cases"] = {**baseline.get("cases", {}), **result["cases"]}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"已更新基準: {args.baseline}")
+        return 0
+
+    problems = compare(result, baseline, args.tolerance)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ model 效能未退步")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+POS 工作流程負載測試：以多個並行的模擬門市重播櫃台操作，回報每個步驟的吞吐量與 p50 / p95 / p99。
+
+每個模擬工作階段（session）依序執行：
+  login → reference_data（產品 / 組合 / 療程 / 員工下拉）→ search_member → sell_bundle
+  → deduct_session → inventory_history → export（依 --export-ratio 機率執行）
+步驟之間隨機等待 --think-min ~ --think-max 秒，模擬櫃台人員的操作間隔。
+
+請對本機 MySQL（docker compose up db）中以 benchmarks.synthetic_data 建立的資料執行，
+因為 sell_bundle / deduct_session 會實際寫入資料：
+
+    python -m benchmarks.synthetic_data --scale medium --truncate
+    python -m benchmarks.pos_load --base-url http://127.0.0.1:5000 --stores 5 --sessions-per-store 4 --duration 120
+    python -m benchmarks.pos_load --in-process --stores 2 --iterations 20 --think-max 0
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+from benchmarks.synthetic_data import BENCH_PASSWORD, SURNAMES
+
+STEPS = ("login", "reference_data", "search_member", "sell_bundle",
+         "deduct_session", "inventory_history", "export")
+REFERENCE_PATHS = (
+    "/api/product-sell/products",
+    "/api/product-bundles/available",
+    "/api/therapy-sell/packages",
+    "/api/staff/for-dropdown",
+)
+
+
+class StepFailed(Exception):
+    """步驟回應非 2xx；計入該步驟的錯誤數。"""
+
+
+def percentile(samples, pct: float) -> float:
+    """線性內插的百分位數（pct 為 0~100）。"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+# --- 傳輸層 ---
+class HttpTransport:
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body=None, headers=None) -> tuple[int, bytes]:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header("Accept-Encoding", "identity")
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            req.add_header(name, value)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+class InProcessTransport:
+    """以 Flask test client 直接呼叫 create_app()，不需另外啟動伺服器（仍會連線資料庫）。"""
+
+    def __init__(self):
+        from app import create_app
+
+        self.app = create_app()
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None) -> tuple[int, bytes]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        resp = client.open(path, method=method, json=body, headers=headers or {})
+        return resp.status_code, resp.get_data()
+
+
+# --- 統計 ---
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+        self.skipped = {step: 0 for step in STEPS}
+        self.requests = 0
+        self.iterations = 0
+
+    def record(self, step: str, elapsed: float, ok: bool, requests: int = 1):
+        with self._lock:
+            self.requests += requests
+            if ok:
+                self.samples[step].append(elapsed)
+            else:
+                self.errors[step] += 1
+
+    def skip(self, step: str):
+        with self._lock:
+            self.skipped[step] += 1
+
+    def finish_iteration(self):
+        with self._lock:
+            self.iterations += 1
+
+    def report(self, wall_seconds: float) -> dict:
+        steps = {}
+        for step in STEPS:
+            samples = self.samples[step]
+            if not samples and not self.errors[step] and not self.skipped[step]:
+                continue
+            steps[step] = {
+                "count": len(samples),
+                "errors": self.errors[step],
+                "skipped": self.skipped[step],
+                "throughput_per_sec": round(len(samples) / wall_seconds, 3) if wall_seconds else 0.0,
+                "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+            }
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "iterations": self.iterations,
+            "requests": self.requests,
+            "requests_per_sec": round(self.requests / wall_seconds, 3) if wall_seconds else 0.0,
+            "steps": steps,
+        }
+
+
+# --- 工作流程 ---
+class StoreSession:
+    def __init__(self, transport, account: str, password: str, stats: LoadStats, options: dict, seed: int):
+        self.transport = transport
+        self.account = account
+        self.password = password
+        self.stats = stats
+        self.options = options
+        self.rng = random.Random(seed)
+        self.headers: dict[str, str] = {}
+        self.user: dict = {}
+        self.bundles: list[dict] = []
+
+    def _think(self):
+        low, high = self.options["think_min"], self.options["think_max"]
+        if high > 0:
+            time.sleep(self.rng.uniform(low, high))
+
+    def _call(self, method: str, path: str, body=None):
+        status, payload = self.transport.request(method, path, body, self.headers)
+        if not 200 <= status < 300:
+            raise StepFailed(f"{method} {path} → {status}: {payload[:200]!r}")
+        return payload
+
+    def _json(self, method: str, path: str, body=None):
+        payload = self._call(method, path, body)
+        return json.loads(payload) if payload else None
+
+    def _step(self, step: str, func) -> bool:
+        started = time.perf_counter()
+        requests = [0]
+
+        def counted(method, path, body=None, as_json=True):
+            requests[0] += 1
+            return self._json(method, path, body) if as_json else self._call(method, path, body)
+
+        try:
+            result = func(counted)
+        except (StepFailed, OSError, ValueError) as e:
+            self.stats.record(step, time.perf_counter() - started, False, requests[0])
+            if self.options.get("verbose"):
+                print(f"[{self.account}] {step} 失敗: {e}")
+            return False
+        if result is False:
+            self.stats.skip(step)
+            return True
+        self.stats.record(step, time.perf_counter() - started, True, requests[0])
+        return True
+
+    def login(self) -> bool:
+        def run(call):
+            self.headers = {}
+            data = call("POST", "/api/login", {"account": self.account, "password": self.password})
+            self.user = data
+            self.headers = {"Authorization": f"Bearer {data['token']}"}
+
+        return self._step("login", run)
+
+    def reference_data(self):
+        def run(call):
+            for path in REFERENCE_PATHS:
+                data = call("GET", path)
+                if path == "/api/product-bundles/available" and isinstance(data, list):
+                    self.bundles = [b for b in data if b.get("bundle_id")]
+
+        return self._step("reference_data", run)
+
+    def iteration(self):
+        member = {}
+
+        def search(call):
+            keyword = self.rng.choice(SURNAMES)
+            results = call("GET", "/api/member/search?" + urllib.parse.urlencode({"keyword": keyword}))
+            if results:
+                member.update(self.rng.choice(results))
+
+        def sell_bundle(call):
+            if not member or not self.bundles:
+                return False
+            bundle = self.rng.choice(self.bundles)
+            price = float(bundle.get("selling_price") or bundle.get("calculated_price") or 0)
+            call("POST", "/api/product-sell/add", {
+                "bundle_id": bundle["bundle_id"],
+                "member_id": member["member_id"],
+                "store_id": self.user.get("store_id"),
+                "staff_id": self.user.get("staff_id"),
+                "date": date.today().isoformat(),
+                "quantity": 1,
+                "unit_price": price,
+                "discount_amount": 0,
+                "final_price": price,
+                "payment_method": "Cash",
+                "sale_category": "銷售",
+                "note": "pos_load",
+            })
+
+        def deduct_session(call):
+            if not member:
+                return False
+            remaining = call("POST", "/api/therapy-sell/remaining-sessions/bulk",
+                             {"member_id": member["member_id"]}).get("data") or {}
+            available = [int(tid) for tid, left in remaining.items() if int(left) > 0]
+            if not available:
+                return False
+            call("POST", "/api/therapy/record", {
+                "member_id": member["member_id"],
+                "therapy_id": self.rng.choice(available),
+                "deduct_sessions": 1,
+                "date": date.today().isoformat(),
+                "note": "pos_load",
+            })
+
+        def inventory_history(call):
+            end = date.today()
+            query = urllib.parse.urlencode({
+                "start_date": (end - timedelta(days=30)).isoformat(),
+                "end_date": end.isoformat(),
+            })
+            call("GET", f"/api/inventory/records?{query}")
+
+        def export(call):
+            if self.rng.random() >= self.options["export_ratio"]:
+                return False
+            call("GET", "/api/product-sell/export", as_json=False)
+
+        for step, func in (
+            ("search_member", search),
+            ("sell_bundle", sell_bundle),
+            ("deduct_session", deduct_session),
+            ("inventory_history", inventory_history),
+            ("export", export),
+        ):
+            self._step(step, func)
+            self._think()
+        self.stats.finish_iteration()
+
+    def run(self, deadline: float | None, iterations: int | None):
+        if not self.login():
+            return
+        self._think()
+        self.reference_data()
+        self._think()
+        done = 0
+        while (deadline is None or time.monotonic() < deadline) and (iterations is None or done < iterations):
+            # 每 --relogin-every 次重新登入並載入參考資料，模擬換班 / 重新整理頁面
+            relogin = self.options.get("relogin_every")
+            if relogin and done and done % relogin == 0:
+                if not self.login():
+                    return
+                self.reference_data()
+            self.iteration()
+            done += 1
+
+
+def build_accounts(stores: int, sessions_per_store: int, staff_per_store: int) -> list[str]:
+    """對應 synthetic_data 建立的帳號 bench_s<分店>_<序號>；同一分店的 session 輪流使用該店員工。"""
+    return [
+        f"bench_s{store}_{index % staff_per_store}"
+        for store in range(1, stores + 1)
+        for index in range(sessions_per_store)
+    ]
+
+
+def run_load(transport, accounts, options: dict, duration: float | None = None,
+             iterations: int | None = None, ramp_up: float = 0.0, seed: int = 42) -> dict:
+    stats = LoadStats()
+    deadline = time.monotonic() + ramp_up + duration if duration else None
+    threads = []
+    started = time.perf_counter()
+    for index, account in enumerate(accounts):
+        session = StoreSession(transport, account, options.get("password", BENCH_PASSWORD),
+                               stats, options, seed + index)
+        thread = threading.Thread(target=session.run, args=(deadline, iterations),
+                                  name=f"pos-{account}-{index}", daemon=True)
+        threads.append(thread)
+        thread.start()
+        if ramp_up and len(accounts) > 1:
+            time.sleep(ramp_up / (len(accounts) - 1))
+    for thread in threads:
+        thread.join()
+    report = stats.report(time.perf_counter() - started)
+    report["sessions"] = len(accounts)
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"sessions={report['sessions']} iterations={report['iterations']} "
+        f"requests={report['requests']} ({report['requests_per_sec']}/s) wall={report['wall_seconds']}s",
+        f"{'step':<18}{'ok':>7}{'err':>6}{'skip':>6}{'/s':>9}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}",
+    ]
+    for step, row in report["steps"].items():
+        lines.append(
+            f"{step:<18}{row['count']:>7}{row['errors']:>6}{row['skipped']:>6}{row['throughput_per_sec']:>9}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="POS 工作流程負載測試")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://127.0.0.1:5000")
+    target.add_argument("--in-process", action="store_true", help="在本行程內以 test client 呼叫 create_app()")
+    parser.add_argument("--stores", type=int, default=5, help="模擬的分店數（需與合成資料一致或較少）")
+    parser.add_argument("--sessions-per-store", type=int, default=2)
+    parser.add_argument("--staff-per-store", type=int, default=4, help="合成資料每店的員工數")
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--duration", type=float, default=None, help="執行秒數")
+    parser.add_argument("--iterations", type=int, default=None, help="每個 session 的循環次數")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="在此秒數內逐步啟動所有 session")
+    parser.add_argument("--think-min", type=float, default=0.5)
+    parser.add_argument("--think-max", type=float, default=2.0)
+    parser.add_argument("--export-ratio", type=float, default=0.1, help="每次循環執行匯出的機率")
+    parser.add_argument("--relogin-every", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="將 JSON 報告寫入檔案")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.duration is None and args.iterations is None:
+        args.iterations = 10
+    transport = InProcessTransport() if args.in_process else HttpTransport(args.base_url, args.timeout)
+    options = {
+        "think_min": args.think_min,
+        "think_max": max(args.think_max, args.think_min),
+        "export_ratio": args.export_ratio,
+        "relogin_every": args.relogin_every,
+        "password": args.password,
+        "verbose": args.verbose,
+    }
+    accounts = build_accounts(args.stores, args.sessions_per_store, args.staff_per_store)
+    report = run_load(transport, accounts, options, args.duration, args.iterations, args.ramp_up, args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"已寫入報告: {args.output}")
+    failed = sum(row["errors"] for row in report["steps"].values())
+    return 1 if failed and not any(row["count"] for row in report["steps"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+熱點查詢的執行計畫檢查：實際呼叫 model 函式、攔截其送出的 SELECT，逐一執行 EXPLAIN，
+在大型資料表出現全表掃描（type=ALL）或 filesort 時回報。
+
+攔截的是 model 實際執行的 SQL（透過 app.metrics 的查詢 listener），
+因此修改查詢後不需同步維護另一份 SQL。請對 benchmarks.synthetic_data 建立的資料庫執行，
+資料量太小時 MySQL 會偏好全表掃描，計畫不具代表性。
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --only remaining_sessions,inventory_history
+"""
+import argparse
+import sys
+
+# 筆數會隨營運成長的資料表；其他參考資料表（store、staff、product…）掃描成本可忽略
+LARGE_TABLES = ("member", "product_sell", "therapy_sell", "therapy_record",
+                "stock_transaction", "inventory", "master_stock")
+# EXPLAIN 估計筆數低於此值時不視為問題
+DEFAULT_MIN_ROWS = 1000
+
+
+def plan_problems(rows, allow=(), large_tables=LARGE_TABLES, min_rows: int = DEFAULT_MIN_ROWS) -> list[str]:
+    """
+    檢查一次 EXPLAIN（傳統表格格式）的輸出列。
+    allow 為允許的 (問題種類, 資料表) 組合，問題種類為 "full_scan" 或 "filesort"。
+    """
+    problems = []
+    allowed = set(allow)
+    for row in rows:
+        table = row.get("table") or ""
+        if table not in large_tables:
+            continue
+        estimated = int(row.get("rows") or 0)
+        if estimated < min_rows:
+            continue
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL" and ("full_scan", table) not in allowed:
+            problems.append(f"{table} 全表掃描（估計 {estimated} 筆）")
+        if "Using filesort" in extra and ("filesort", table) not in allowed:
+            problems.append(f"{table} 使用 filesort（估計 {estimated} 筆）")
+    return problems
+
+
+def _is_select(query) -> bool:
+    text = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+    head = text.lstrip().upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def capture_queries(func) -> list[tuple]:
+    """執行 func 並回傳其間送出的 (query, args)；產生器會被完整走訪。"""
+    from app.metrics import add_query_listener, install_db_instrumentation, remove_query_listener
+
+    install_db_instrumentation()
+    captured = []
+
+    def listener(query, args, elapsed):
+        if _is_select(query):
+            captured.append((query, args))
+
+    add_query_listener(listener)
+    try:
+        result = func()
+        if result is not None and not hasattr(result, "__len__"):
+            for _ in result:
+                pass
+    finally:
+        remove_query_listener(listener)
+    return captured
+
+
+def explain(query, args) -> list[dict]:
+    from benchmarks.model_benchmark import _connect
+
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN " + query, args)
+            return list(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def pick_parameters() -> dict:
+    from benchmarks.model_benchmark import _connect, pick_parameters as base_parameters
+
+    params = base_parameters()
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT therapy_id FROM therapy_sell WHERE member_id = %s "
+                "GROUP BY therapy_id ORDER BY COUNT(*) DESC, therapy_id LIMIT 1",
+                (params["member_id"],),
+            )
+            row = cursor.fetchone()
+            params["therapy_id"] = row["therapy_id"] if row else 1
+            cursor.execute("SELECT MAX(date) AS last_day FROM product_sell WHERE store_id = %s", (params["store_id"],))
+            row = cursor.fetchone()
+            params["end_date"] = str(row["last_day"]) if row and row["last_day"] else None
+            cursor.execute(
+                "SELECT order_reference FROM product_sell WHERE order_reference IS NOT NULL "
+                "ORDER BY product_sell_id DESC LIMIT 1"
+            )
+            row = cursor.fetchone()
+            params["order_reference"] = row["order_reference"] if row else ""
+    finally:
+        conn.close()
+    return params
+
+
+def build_cases(params: dict) -> dict:
+    """案例名稱 → (呼叫函式, 允許的問題)。"""
+    from datetime import date, timedelta
+
+    from app.models import (
+        inventory_model, member_overview_model, product_sell_model, therapy_model, therapy_sell_model,
+    )
+
+    store_id = params["store_id"]
+    member_id = params["member_id"]
+    end = date.fromisoformat(params["end_date"]) if params.get("end_date") else date.today()
+    start = (end - timedelta(days=30)).isoformat()
+    return {
+        "remaining_sessions": (
+            lambda: therapy_sell_model.get_remaining_sessions(member_id, params["therapy_id"]), ()),
+        "remaining_sessions_record": (
+            lambda: therapy_model.get_remaining_sessions(member_id, params["therapy_id"]), ()),
+        "remaining_sessions_bulk": (
+            lambda: therapy_sell_model.get_remaining_sessions_bulk(member_id), ()),
+        "member_overview": (
+            lambda: member_overview_model.get_member_overview(member_id), ()),
+        "store_inventory": (
+            lambda: inventory_model.get_all_inventory(store_id),
+            # master_product 每列都要出現；legacy inventory 表在新資料中很小
+            (("full_scan", "inventory"),)),
+        "inventory_history": (
+            lambda: inventory_model.get_inventory_history(store_id, start, end.isoformat()),
+            (("full_scan", "inventory"),)),
+        # 列表依分店名稱 / 會員編號等關聯欄位排序，filesort 無法避免，但不得全表掃描
+        "product_sells_store": (
+            lambda: product_sell_model.get_all_product_sells(store_id),
+            (("filesort", "product_sell"),)),
+        "product_sells_order": (
+            lambda: product_sell_model.get_product_sells_by_order_reference(params["order_reference"]), ()),
+    }
+
+
+def check(only=None, min_rows: int = DEFAULT_MIN_ROWS, log=print) -> dict[str, list[str]]:
+    """回傳 {案例: [問題...]}；空清單表示該案例通過。"""
+    cases = build_cases(pick_parameters())
+    if only:
+        unknown = sorted(set(only) - set(cases))
+        if unknown:
+            raise ValueError(f"未知的案例: {', '.join(unknown)}")
+        cases = {name: cases[name] for name in only}
+    results = {}
+    for name, (func, allow) in cases.items():
+        problems = []
+        for query, args in capture_queries(func):
+            for problem in plan_problems(explain(query, args), allow, min_rows=min_rows):
+                snippet = " ".join(str(query).split())[:120]
+                problems.append(f"{problem}: {snippet}")
+        results[name] = problems
+        log(f"{'❌' if problems else '✅'} {name}")
+        for problem in problems:
+            log(f"    {problem}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="熱點查詢執行計畫檢查")
+    parser.add_argument("--only", default=None, help="逗號分隔的案例名稱，預設全部")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS)
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    results = check(only, args.min_rows)
+    return 1 if any(results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
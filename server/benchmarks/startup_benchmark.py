@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+冷啟動時間量測：在全新的 Python 行程中 import app 並執行 create_app()，
+與 baselines/startup.json 比較，超過容許比例即以非零狀態結束。
+
+    python -m benchmarks.startup_benchmark               # 比較基準
+    python -m benchmarks.startup_benchmark --update-baseline
+    python -m benchmarks.startup_benchmark --features core,health
+    STARTUP_BENCHMARK=1 pytest tests/test_startup_time.py   # 以 pytest 執行同樣的比較
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+DEFAULT_TOLERANCE = float(os.getenv("STARTUP_REGRESSION_TOLERANCE", 0.3))
+# 這些套件只應在匯出 / 統計端點才載入
+HEAVY_MODULES = ("pandas", "numpy", "xlsxwriter", "openpyxl")
+
+_CHILD_CODE = """
+import json, sys, time
+features = json.loads(sys.argv[1])
+started = time.perf_counter()
+from app import create_app
+create_app(features)
+elapsed = time.perf_counter() - started
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "modules": len(sys.modules), "heavy_modules": heavy}))
+"""
+
+
+def _child_env():
+    env = os.environ.copy()
+    # config.py 需要這些變數才能 import；量測不會真的連線資料庫
+    env.setdefault("DB_PORT", "3306")
+    env.setdefault("JWT_SECRET_KEY", "startup-benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_once(features=None) -> dict:
+    """在新的行程中量測一次 create_app() 的冷啟動。"""
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD_CODE, json.dumps(features), json.dumps(HEAVY_MODULES)],
+        cwd=SERVER_DIR,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(runs: int = 5, features=None) -> dict:
+    samples = [measure_once(features) for _ in range(runs)]
+    return {
+        "median_seconds": statistics.median(s["seconds"] for s in samples),
+        "min_seconds": min(s["seconds"] for s in samples),
+        "modules": samples[-1]["modules"],
+        "heavy_modules": sorted({name for s in samples for name in s["heavy_modules"]}),
+        "runs": runs,
+        "features": features,
+    }
+
+
+def load_baseline(path: Path = BASELINE_PATH):
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(result: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """回傳退步項目的說明；空清單表示通過。"""
+    problems = []
+    if result["heavy_modules"]:
+        problems.append(f"啟動時載入了重量級套件: {', '.join(result['heavy_modules'])}")
+    if baseline:
+        limit = baseline["median_seconds"] * (1 + tolerance)
+        if result["median_seconds"] > limit:
+            problems.append(
+                f"冷啟動 {result['median_seconds']:.3f}s 超過基準 "
+                f"{baseline['median_seconds']:.3f}s (+{tolerance:.0%})"
+            )
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="create_app() 冷啟動量測")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--features", default=None, help="逗號分隔的功能組，預設全部")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    features = [f.strip() for f in args.features.split(",")] if args.features else None
+    result = measure(args.runs, features)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"已更新基準: {BASELINE_PATH}")
+        return 0
+
+    problems = compare(result, load_baseline(), args.tolerance)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 冷啟動未退步")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+以固定亂數種子產生多分店的合成資料，供 model / 負載基準測試使用。
+
+同一組 (scale, seed, end_date) 每次產生的資料完全相同，基準結果才能互相比較。
+各資料表使用各自的亂數串流，主鍵由 1 起依序指定，外鍵直接以 ID 範圍推算
+（例如會員 member_id 所屬分店固定為 (member_id - 1) % stores + 1），因此不需把整張表放在記憶體中。
+
+    python -m benchmarks.synthetic_data --scale small --truncate
+    python -m benchmarks.synthetic_data --scale production --seed 7 --truncate
+    python -m benchmarks.synthetic_data --scale small --set members=2000 --dry-run
+
+只應在專用的基準測試資料庫執行：預設遇到非空的資料表就中止，--truncate 才會清空重建。
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+SCALES = {
+    "small": {
+        "stores": 2, "staff_per_store": 4, "members": 500,
+        "products": 60, "therapies": 20, "product_bundles": 8, "therapy_bundles": 6,
+        "product_sells": 5_000, "therapy_sells": 3_000, "therapy_records": 2_000,
+        "stock_transactions": 5_000, "days": 180,
+    },
+    "medium": {
+        "stores": 5, "staff_per_store": 6, "members": 20_000,
+        "products": 300, "therapies": 80, "product_bundles": 40, "therapy_bundles": 25,
+        "product_sells": 200_000, "therapy_sells": 150_000, "therapy_records": 100_000,
+        "stock_transactions": 200_000, "days": 365,
+    },
+    # 接近正式環境的量級：5 間分店、10 萬會員、產品 / 療程銷售合計 2M、庫存異動 1M
+    "production": {
+        "stores": 5, "staff_per_store": 8, "members": 100_000,
+        "products": 400, "therapies": 120, "product_bundles": 60, "therapy_bundles": 40,
+        "product_sells": 1_000_000, "therapy_sells": 1_000_000, "therapy_records": 600_000,
+        "stock_transactions": 1_000_000, "days": 730,
+    },
+}
+
+IDENTITY_TYPES = ("會員", "直營店", "加盟店", "合夥商", "推廣商(分店能量師)", "B2B合作專案", "心耀商")
+IDENTITY_WEIGHTS = (80, 4, 4, 3, 4, 2, 3)
+PRICE_TIER_TYPES = IDENTITY_TYPES[1:]
+PAYMENT_METHODS = ("Cash", "CreditCard", "Transfer", "MobilePayment", "Pending", "Others")
+PAYMENT_WEIGHTS = (45, 30, 10, 10, 3, 2)
+THERAPY_SALE_CATEGORIES = ("Sell", "Gift", "Discount", "Ticket")
+THERAPY_SALE_WEIGHTS = (85, 5, 7, 3)
+TXN_TYPES = ("OUTBOUND", "INBOUND", "ADJUST")
+TXN_WEIGHTS = (60, 32, 8)
+SURNAMES = "陳林黃張李王吳劉蔡楊許鄭謝洪郭邱曾廖賴徐"
+GIVEN_NAMES = "怡君雅婷淑芬美玲志明俊傑家豪建宏欣怡佩珊宗翰冠宇"
+
+# 寫入順序即外鍵相依順序；清空時反向處理
+TABLES = (
+    ("store", ("store_id", "store_name", "store_location", "store_type")),
+    ("staff", ("staff_id", "name", "gender", "onboard_date", "position", "phone",
+               "account", "password", "permission", "store_id")),
+    ("category", ("category_id", "name", "target_type")),
+    ("member", ("member_id", "member_code", "name", "identity_type", "birthday", "gender",
+                "phone", "store_id")),
+    ("product", ("product_id", "code", "name", "price", "purchase_price", "status")),
+    ("product_category", ("product_id", "category_id")),
+    ("product_price_tier", ("product_id", "identity_type", "price")),
+    ("therapy", ("therapy_id", "code", "name", "price", "content", "status")),
+    ("therapy_category", ("therapy_id", "category_id")),
+    ("therapy_price_tier", ("therapy_id", "identity_type", "price")),
+    ("product_bundles", ("bundle_id", "bundle_code", "name", "calculated_price", "selling_price", "status")),
+    ("product_bundle_items", ("bundle_id", "item_id", "item_type", "quantity")),
+    ("product_bundle_price_tier", ("bundle_id", "identity_type", "price")),
+    ("therapy_bundles", ("bundle_id", "bundle_code", "name", "calculated_price", "selling_price", "status")),
+    ("therapy_bundle_items", ("bundle_id", "item_id", "item_type", "quantity")),
+    ("therapy_bundle_price_tier", ("bundle_id", "identity_type", "price")),
+    ("master_product", ("master_product_id", "master_product_code", "name", "status")),
+    ("product_variant", ("variant_id", "master_product_id", "variant_code", "display_name",
+                         "sale_price", "status")),
+    ("store_type_price", ("master_product_id", "store_type", "cost_price")),
+    ("master_stock", ("master_product_id", "store_id", "quantity_on_hand")),
+    ("stock_transaction", ("master_product_id", "variant_id", "store_id", "staff_id", "txn_type",
+                           "quantity", "reference_no", "note", "created_at")),
+    ("product_sell", ("product_sell_id", "member_id", "staff_id", "store_id", "product_id",
+                      "product_name", "date", "quantity", "unit_price", "discount_amount",
+                      "final_price", "payment_method", "sale_category", "note", "order_reference")),
+    ("therapy_sell", ("therapy_sell_id", "therapy_id", "therapy_name", "member_id", "store_id",
+                      "staff_id", "date", "amount", "discount", "final_price", "payment_method",
+                      "sale_category", "note")),
+    ("therapy_record", ("therapy_record_id", "therapy_id", "member_id", "store_id", "staff_id",
+                        "date", "note", "deduct_sessions", "remaining_sessions_at_time")),
+)
+BENCH_PASSWORD = "bench1234"
+PRODUCT_CATEGORIES = ("保養品", "保健食品", "精油", "器材")
+THERAPY_CATEGORIES = ("身體調理", "臉部保養", "能量療程")
+
+
+def resolve_scale(name: str, overrides: dict | None = None) -> dict:
+    if name not in SCALES:
+        raise ValueError(f"未知的規模: {name}（可用: {', '.join(SCALES)}）")
+    scale = dict(SCALES[name])
+    for key, value in (overrides or {}).items():
+        if key not in scale:
+            raise ValueError(f"未知的規模參數: {key}")
+        scale[key] = int(value)
+    return scale
+
+
+def _money(value: float) -> float:
+    return round(value, 2)
+
+
+def _skewed_index(rng: random.Random, size: int) -> int:
+    """偏斜分布（少數熱門商品 / 會員佔多數交易），回傳 0..size-1。"""
+    return min(int(rng.paretovariate(1.2)) - 1, size - 1) if rng.random() < 0.5 else rng.randrange(size)
+
+
+class SyntheticDataset:
+    def __init__(self, scale: dict, seed: int = 42, end_date: date | None = None):
+        self.scale = scale
+        self.seed = seed
+        self.end_date = end_date or date(2025, 12, 31)
+        self.start_date = self.end_date - timedelta(days=scale["days"] - 1)
+
+    # --- 共用推算 ---
+    def _rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def member_store(self, member_id: int) -> int:
+        return (member_id - 1) % self.scale["stores"] + 1
+
+    def store_staff(self, store_id: int) -> range:
+        per_store = self.scale["staff_per_store"]
+        first = (store_id - 1) * per_store + 1
+        return range(first, first + per_store)
+
+    def store_type(self, store_id: int) -> str:
+        return "DIRECT" if store_id % 3 != 0 else "FRANCHISE"
+
+    def product_price(self, product_id: int) -> float:
+        return float(300 + (product_id * 37) % 40 * 50)
+
+    def therapy_price(self, therapy_id: int) -> float:
+        return float(800 + (therapy_id * 53) % 30 * 100)
+
+    def product_name(self, product_id: int) -> str:
+        return f"測試產品{product_id:04d}"
+
+    def therapy_name(self, therapy_id: int) -> str:
+        return f"測試療程{therapy_id:03d}"
+
+    def _random_day(self, rng: random.Random) -> date:
+        return self.start_date + timedelta(days=rng.randrange(self.scale["days"]))
+
+    def _random_member(self, rng: random.Random, store_id: int | None = None) -> int:
+        members = self.scale["members"]
+        stores = self.scale["stores"]
+        member_id = _skewed_index(rng, members) + 1
+        if store_id is None:
+            return member_id
+        # 對齊到指定分店的會員（member_id ≡ store_id - 1 mod stores）
+        offset = (store_id - 1 - (member_id - 1)) % stores
+        candidate = member_id + offset
+        return candidate if candidate <= members else max(store_id, candidate - stores)
+
+    def _name(self, rng: random.Random) -> str:
+        return rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES) + rng.choice(GIVEN_NAMES)
+
+    # --- 參考資料 ---
+    def store_rows(self):
+        for store_id in range(1, self.scale["stores"] + 1):
+            yield (store_id, f"測試分店{store_id}", f"台北市測試路{store_id}號", self.store_type(store_id))
+
+    def staff_rows(self):
+        rng = self._rng("staff")
+        for store_id in range(1, self.scale["stores"] + 1):
+            for index, staff_id in enumerate(self.store_staff(store_id)):
+                # 第一間店的第一位員工為總部管理員，其餘店長為 basic，其他為療程師
+                if store_id == 1 and index == 0:
+                    permission = "admin"
+                elif index == 0:
+                    permission = "basic"
+                else:
+                    permission = "therapist"
+                yield (
+                    staff_id, self._name(rng), rng.choice(("Male", "Female")),
+                    self.start_date, "店長" if index == 0 else "療程師", f"09{rng.randrange(10**8):08d}",
+                    f"bench_s{store_id}_{index}", BENCH_PASSWORD, permission, store_id,
+                )
+
+    def category_rows(self):
+        category_id = 0
+        for name in PRODUCT_CATEGORIES:
+            category_id += 1
+            yield (category_id, name, "product")
+        for name in THERAPY_CATEGORIES:
+            category_id += 1
+            yield (category_id, name, "therapy")
+
+    def member_rows(self):
+        rng = self._rng("member")
+        for member_id in range(1, self.scale["members"] + 1):
+            birthday = date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 55))
+            yield (
+                member_id, f"M{member_id:07d}", self._name(rng),
+                rng.choices(IDENTITY_TYPES, IDENTITY_WEIGHTS)[0], birthday,
+                rng.choices(("Female", "Male", "Other"), (70, 28, 2))[0],
+                f"09{rng.randrange(10**8):08d}", self.member_store(member_id),
+            )
+
+    def product_rows(self):
+        for product_id in range(1, self.scale["products"] + 1):
+            price = self.product_price(product_id)
+            status = "UNPUBLISHED" if product_id % 25 == 0 else "PUBLISHED"
+            yield (product_id, f"P{product_id:05d}", self.product_name(product_id), price, _money(price * 0.45), status)
+
+    def product_category_rows(self):
+        for product_id in range(1, self.scale["products"] + 1):
+            yield (product_id, (product_id - 1) % len(PRODUCT_CATEGORIES) + 1)
+
+    def _tier_rows(self, count: int, base_price):
+        for item_id in range(1, count + 1):
+            price = base_price(item_id)
+            for offset, identity_type in enumerate(PRICE_TIER_TYPES):
+                # 約三分之一的品項設定身份別價格
+                if item_id % 3 == 0:
+                    yield (item_id, identity_type, _money(price * (0.6 + 0.05 * offset)))
+
+    def product_price_tier_rows(self):
+        return self._tier_rows(self.scale["products"], self.product_price)
+
+    def therapy_rows(self):
+        for therapy_id in range(1, self.scale["therapies"] + 1):
+            status = "UNPUBLISHED" if therapy_id % 20 == 0 else "PUBLISHED"
+            yield (
+                therapy_id, f"T{therapy_id:04d}", self.therapy_name(therapy_id),
+                self.therapy_price(therapy_id), "合成資料療程內容", status,
+            )
+
+    def therapy_category_rows(self):
+        offset = len(PRODUCT_CATEGORIES)
+        for therapy_id in range(1, self.scale["therapies"] + 1):
+            yield (therapy_id, offset + (therapy_id - 1) % len(THERAPY_CATEGORIES) + 1)
+
+    def therapy_price_tier_rows(self):
+        return self._tier_rows(self.scale["therapies"], self.therapy_price)
+
+    def _bundle_items(self, kind: str):
+        """每個組合 2~4 個項目；產品組合以產品為主，療程組合以療程為主。"""
+        rng = self._rng(f"{kind}_bundle_items")
+        count = self.scale[f"{kind}_bundles"]
+        items = {}
+        for bundle_id in range(1, count + 1):
+            lines = []
+            for _ in range(rng.randint(2, 4)):
+                use_therapy = rng.random() < (0.8 if kind == "therapy" else 0.2)
+                if use_therapy:
+                    lines.append((rng.randint(1, self.scale["therapies"]), "Therapy", rng.randint(1, 10)))
+                else:
+                    lines.append((rng.randint(1, self.scale["products"]), "Product", rng.randint(1, 3)))
+            items[bundle_id] = lines
+        return items
+
+    def _bundle_price(self, lines) -> float:
+        return sum(
+            (self.therapy_price(item_id) if item_type == "Therapy" else self.product_price(item_id)) * quantity
+            for item_id, item_type, quantity in lines
+        )
+
+    def _bundle_rows(self, kind: str, prefix: str):
+        for bundle_id, lines in self._bundle_items(kind).items():
+            calculated = self._bundle_price(lines)
+            status = "UNPUBLISHED" if bundle_id % 15 == 0 else "PUBLISHED"
+            yield (bundle_id, f"{prefix}{bundle_id:04d}", f"{prefix} 組合 {bundle_id}",
+                   _money(calculated), _money(calculated * 0.85), status)
+
+    def _bundle_item_rows(self, kind: str):
+        for bundle_id, lines in self._bundle_items(kind).items():
+            for item_id, item_type, quantity in lines:
+                yield (bundle_id, item_id, item_type, quantity)
+
+    def _bundle_tier_rows(self, kind: str):
+        for bundle_id, lines in self._bundle_items(kind).items():
+            if bundle_id % 2:
+                continue
+            selling = self._bundle_price(lines) * 0.85
+            for offset, identity_type in enumerate(PRICE_TIER_TYPES):
+                yield (bundle_id, identity_type, _money(selling * (0.7 + 0.04 * offset)))
+
+    def product_bundles_rows(self):
+        return self._bundle_rows("product", "PB")
+
+    def product_bundle_items_rows(self):
+        return self._bundle_item_rows("product")
+
+    def product_bundle_price_tier_rows(self):
+        return self._bundle_tier_rows("product")
+
+    def therapy_bundles_rows(self):
+        return self._bundle_rows("therapy", "TB")
+
+    def therapy_bundle_items_rows(self):
+        return self._bundle_item_rows("therapy")
+
+    def therapy_bundle_price_tier_rows(self):
+        return self._bundle_tier_rows("therapy")
+
+    # --- 主檔 / 庫存（master_product 與 product 一對一，沿用 product_id 當 variant_id） ---
+    def master_product_rows(self):
+        for product_id in range(1, self.scale["products"] + 1):
+            yield (product_id, f"MP{product_id:05d}", self.product_name(product_id), "ACTIVE")
+
+    def product_variant_rows(self):
+        for product_id in range(1, self.scale["products"] + 1):
+            yield (product_id, product_id, f"P{product_id:05d}", self.product_name(product_id),
+                   self.product_price(product_id), "ACTIVE")
+
+    def store_type_price_rows(self):
+        for product_id in range(1, self.scale["products"] + 1):
+            cost = self.product_price(product_id) * 0.45
+            yield (product_id, "DIRECT", _money(cost))
+            yield (product_id, "FRANCHISE", _money(cost * 1.15))
+
+    def master_stock_rows(self):
+        rng = self._rng("master_stock")
+        for store_id in range(1, self.scale["stores"] + 1):
+            for product_id in range(1, self.scale["products"] + 1):
+                # 約一成低於預設低庫存門檻 5
+                quantity = rng.randint(0, 4) if rng.random() < 0.1 else rng.randint(5, 200)
+                yield (product_id, store_id, quantity)
+
+    def stock_transaction_rows(self):
+        rng = self._rng("stock_transaction")
+        products = self.scale["products"]
+        stores = self.scale["stores"]
+        seconds = self.scale["days"] * 86400
+        start = datetime.combine(self.start_date, datetime.min.time())
+        for index in range(self.scale["stock_transactions"]):
+            product_id = _skewed_index(rng, products) + 1
+            store_id = rng.randint(1, stores)
+            txn_type = rng.choices(TXN_TYPES, TXN_WEIGHTS)[0]
+            if txn_type == "INBOUND":
+                quantity = rng.randint(10, 120)
+            elif txn_type == "OUTBOUND":
+                quantity = -rng.randint(1, 6)
+            else:
+                quantity = rng.randint(-5, 5) or 1
+            yield (
+                product_id, product_id, store_id, rng.choice(self.store_staff(store_id)), txn_type,
+                quantity, f"BENCH-{index + 1:08d}", None,
+                start + timedelta(seconds=rng.randrange(seconds)),
+            )
+
+    # --- 交易 ---
+    def product_sell_rows(self):
+        rng = self._rng("product_sell")
+        products = self.scale["products"]
+        stores = self.scale["stores"]
+        sell_id = 0
+        order_no = 0
+        while sell_id < self.scale["product_sells"]:
+            # 一張訂單 1~3 筆明細，共用 order_reference / 日期 / 付款方式
+            order_no += 1
+            store_id = rng.randint(1, stores)
+            member_id = self._random_member(rng, store_id)
+            staff_id = rng.choice(self.store_staff(store_id))
+            sold_on = self._random_day(rng)
+            payment = rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0]
+            reference = f"PS{sold_on:%Y%m%d}{order_no:07d}"
+            for _ in range(rng.randint(1, 3)):
+                if sell_id >= self.scale["product_sells"]:
+                    break
+                sell_id += 1
+                product_id = _skewed_index(rng, products) + 1
+                quantity = rng.randint(1, 3)
+                unit_price = self.product_price(product_id)
+                discount = _money(unit_price * quantity * 0.1) if rng.random() < 0.2 else 0.0
+                yield (
+                    sell_id, member_id, staff_id, store_id, product_id, self.product_name(product_id),
+                    sold_on, quantity, unit_price, discount, _money(unit_price * quantity - discount),
+                    payment, "銷售", None, reference,
+                )
+
+    def therapy_sell_rows(self):
+        rng = self._rng("therapy_sell")
+        therapies = self.scale["therapies"]
+        stores = self.scale["stores"]
+        for sell_id in range(1, self.scale["therapy_sells"] + 1):
+            store_id = rng.randint(1, stores)
+            therapy_id = _skewed_index(rng, therapies) + 1
+            amount = rng.choice((1, 1, 5, 10, 10, 20))
+            category = rng.choices(THERAPY_SALE_CATEGORIES, THERAPY_SALE_WEIGHTS)[0]
+            price = self.therapy_price(therapy_id) * amount
+            discount = _money(price * 0.1) if category == "Discount" else 0.0
+            final_price = 0.0 if category == "Gift" else _money(price - discount)
+            yield (
+                sell_id, therapy_id, self.therapy_name(therapy_id), self._random_member(rng, store_id),
+                store_id, rng.choice(self.store_staff(store_id)), self._random_day(rng), amount,
+                discount, final_price, rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0], category, None,
+            )
+
+    def therapy_record_rows(self):
+        """依療程銷售產生扣堂紀錄，每筆銷售扣的堂數不超過購買堂數，剩餘堂數因此不為負。"""
+        rng = self._rng("therapy_record")
+        target = self.scale["therapy_records"]
+        sells = self.scale["therapy_sells"]
+        if not sells:
+            return
+        record_id = 0
+        for index, sell in enumerate(self.therapy_sell_rows()):
+            _, therapy_id, _, member_id, store_id, staff_id, sold_on, amount = sell[:8]
+            # 以剩餘配額 / 剩餘銷售筆數決定本筆要扣幾堂，總數收斂到 target
+            remaining_quota = target - record_id
+            if remaining_quota <= 0:
+                break
+            expected = remaining_quota / (sells - index)
+            count = min(amount, int(expected) + (1 if rng.random() < expected % 1 else 0), remaining_quota)
+            day = sold_on
+            for used in range(1, count + 1):
+                record_id += 1
+                day = min(day + timedelta(days=rng.randint(0, 14)), self.end_date)
+                yield (record_id, therapy_id, member_id, store_id, staff_id, day, None, 1, amount - used)
+
+    def rows(self, table: str):
+        return getattr(self, f"{table}_rows")()
+
+
+# --- 寫入資料庫 ---
+def _insert_sql(table: str, columns) -> str:
+    placeholders = ", ".join(["%s"] * len(columns))
+    return f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) VALUES ({placeholders})"
+
+
+def _table_counts(cursor) -> dict[str, int]:
+    counts = {}
+    for table, _ in TABLES:
+        cursor.execute(f"SELECT COUNT(*) AS cnt FROM `{table}`")
+        counts[table] = int(cursor.fetchone()["cnt"])
+    return counts
+
+
+def load(dataset: SyntheticDataset, truncate: bool = False, batch_size: int = 5000, log=print) -> dict:
+    """
+    批次寫入合成資料並回傳各資料表筆數。
+    寫入期間停用外鍵與唯一性檢查以加速；資料表非空且未指定 truncate 時拋出 RuntimeError。
+    """
+    import pymysql
+    from app.config import DB_CONFIG
+
+    conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor, autocommit=False)
+    try:
+        with conn.cursor() as cursor:
+            existing = {table: cnt for table, cnt in _table_counts(cursor).items() if cnt}
+            if existing and not truncate:
+                raise RuntimeError(
+                    "資料表非空，請確認連線的是基準測試資料庫後加上 --truncate: "
+                    + ", ".join(f"{t}={c}" for t, c in existing.items())
+                )
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            cursor.execute("SET UNIQUE_CHECKS = 0")
+            if truncate:
+                for table, _ in reversed(TABLES):
+                    cursor.execute(f"TRUNCATE TABLE `{table}`")
+
+            counts = {}
+            for table, columns in TABLES:
+                started = time.perf_counter()
+                sql = _insert_sql(table, columns)
+                batch, total = [], 0
+                for row in dataset.rows(table):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        cursor.executemany(sql, batch)
+                        conn.commit()
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(sql, batch)
+                    conn.commit()
+                    total += len(batch)
+                counts[table] = total
+                log(f"  {table}: {total} 筆 ({time.perf_counter() - started:.1f}s)")
+
+            cursor.execute("SET UNIQUE_CHECKS = 1")
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            # TRUNCATE 與停用檢查的批次寫入不一定觸發 data_version 觸發器，手動遞增讓 ETag 失效
+            try:
+                from app.models.data_version_model import VERSIONED_TABLES, bump_table_versions
+
+                bump_table_versions(cursor, *[t for t, _ in TABLES if t in VERSIONED_TABLES])
+                conn.commit()
+            except pymysql.err.ProgrammingError:
+                conn.rollback()
+            return counts
+    finally:
+        conn.close()
+
+
+def _parse_overrides(values) -> dict:
+    overrides = {}
+    for item in values or ():
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--set 需要 key=value 格式: {item}")
+        overrides[key.strip()] = int(value)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="產生多分店合成資料")
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default="2025-12-31", help="資料的最後一天 (YYYY-MM-DD)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="覆寫規模參數，例如 members=5000")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--truncate", action="store_true", help="先清空相關資料表（僅限基準測試資料庫）")
+    parser.add_argument("--dry-run", action="store_true", help="只產生資料並統計筆數，不寫入資料庫")
+    args = parser.parse_args(argv)
+
+    scale = resolve_scale(args.scale, _parse_overrides(args.set))
+    dataset = SyntheticDataset(scale, args.seed, date.fromisoformat(args.end_date))
+    print(f"規模 {args.scale} / seed {args.seed}: {json.dumps(scale, ensure_ascii=False)}")
+
+    if args.dry_run:
+        for table, _ in TABLES:
+            print(f"  {table}: {sum(1 for _ in dataset.rows(table))} 筆")
+        return 0
+
+    try:
+        load(dataset, truncate=args.truncate, batch_size=args.batch_size)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print("✅ 合成資料寫入完成")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""為銷售 / 庫存異動分割表預先建立下一年度的分割區（建議每年排程執行一次）。"""
+import argparse
+
+from app.models.partition_model import PARTITIONED_TABLES, ensure_future_partitions, list_partitions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years-ahead", type=int, default=1, help="預先建立到今年之後幾年，預設 1")
+    parser.add_argument("--dry-run", action="store_true", help="只列出會新增的分割區，不寫入")
+    parser.add_argument("--status", action="store_true", help="列出目前各分割區的估計筆數")
+    args = parser.parse_args()
+
+    if args.status:
+        for table in PARTITIONED_TABLES:
+            print(table)
+            for partition in list_partitions(table):
+                print(f"  {partition['name']:<10} < {partition['upper_bound']:<24} 約 {partition['estimated_rows']} 筆")
+    else:
+        result = ensure_future_partitions(years_ahead=args.years_ahead, dry_run=args.dry_run)
+        action = "將新增" if args.dry_run else "已新增"
+        for table, years in result.items():
+            print(f"{table}: {action} {', '.join(f'p{year}' for year in years)}" if years else f"{table}: 已是最新")
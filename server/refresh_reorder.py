@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""刷新依出貨速度計算的補貨建議（建議每 15 分鐘排程執行一次）。"""
+import argparse
+
+from app.models.reorder_model import refresh_reorder_suggestions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--full", action="store_true", help="由 stock_transaction 重建每日出貨彙總")
+    args = parser.parse_args()
+
+    result = refresh_reorder_suggestions(full=args.full)
+    print(
+        f"已重算 {result['recomputed_since']} 起的出貨彙總（txn_id 至 {result['last_txn_id']}），"
+        f"自 {result['window_start']} 起共 {result['suggestions']} 筆補貨建議"
+    )
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""依目前的壓力測試題目對照表，批次重新計算 ipn_stress 的 a/b/c/d 分數。"""
+import argparse
+
+from app.models.stress_analytics_model import rescore_stress_tests
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store-id", type=int, default=None, help="只重算指定分店")
+    parser.add_argument("--dry-run", action="store_true", help="只統計會變動的筆數，不寫入")
+    args = parser.parse_args()
+
+    result = rescore_stress_tests(store_id=args.store_id, dry_run=args.dry_run)
+    action = "將更新" if args.dry_run else "已更新"
+    print(f"檢查 {result['checked']} 筆測驗，{action} {result['updated']} 筆分數")
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+
+import jwt
+import pytest
+from flask import Flask, g, jsonify, request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import middleware
+from app.config import JWT_SECRET_KEY
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    middleware.clear_token_cache()
+    yield
+    middleware.clear_token_cache()
+
+
+@pytest.fixture
+def counting_decode(monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+
+    def fake_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(middleware.jwt, 'decode', fake_decode)
+    return calls
+
+
+def make_token(exp_delta=3600, **claims):
+    payload = {'store_id': 2, 'store_level': '分店', 'permission': 'basic', 'staff_id': 5}
+    payload.update(claims)
+    payload['exp'] = int(time.time()) + exp_delta
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/auth')
+    @middleware.auth_required
+    def auth_view():
+        user = middleware.get_user_from_token(request)
+        return jsonify({'store_id': request.store_id, 'user': user})
+
+    @app.route('/admin')
+    @middleware.admin_required
+    def admin_view():
+        return jsonify({'store_level': request.store_level})
+
+    @app.route('/login')
+    @middleware.login_required
+    def login_view():
+        return jsonify(g.user)
+
+    return app
+
+
+def test_verify_token_is_cached(counting_decode):
+    token = make_token()
+    first = middleware.verify_token(token)
+    second = middleware.verify_token(token)
+    assert first == second
+    assert len(counting_decode) == 1
+
+
+def test_expired_cache_entry_is_reverified(counting_decode):
+    token = make_token(exp_delta=-10)
+    digest = middleware._token_digest(token)
+    # 模擬在到期前已快取的 token
+    middleware._token_cache[digest] = ({'store_id': 2}, time.time() - 10)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        middleware.verify_token(token)
+    assert digest not in middleware._token_cache
+    assert counting_decode == [token]
+
+
+def test_cached_claims_are_not_shared_between_callers():
+    token = make_token()
+    first = middleware.verify_token(token)
+    first['store_id'] = 99
+    assert middleware.verify_token(token)['store_id'] == 2
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(middleware, 'JWT_VERIFY_CACHE_SIZE', 2)
+    tokens = [make_token(staff_id=i) for i in range(3)]
+    for token in tokens:
+        middleware.verify_token(token)
+    assert len(middleware._token_cache) == 2
+    assert middleware._token_digest(tokens[0]) not in middleware._token_cache
+
+
+def test_context_built_once_per_request(counting_decode):
+    app = make_app()
+    token = make_token()
+    with app.test_client() as client:
+        resp = client.get('/auth', headers={'Authorization': f'Bearer {token}'})
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data['store_id'] == 2
+        assert data['user']['staff_id'] == 5
+
+        resp = client.get('/login', headers={'Authorization': f'Bearer {token}'})
+        assert resp.status_code == 200
+        assert resp.get_json()['store_id'] == 2
+    assert len(counting_decode) == 1
+
+
+def test_header_fallback_and_admin():
+    app = make_app()
+    with app.test_client() as client:
+        resp = client.get('/auth', headers={'X-Store-ID': '3', 'X-Store-Level': '分店'})
+        assert resp.status_code == 200
+        assert resp.get_json()['user']['store_id'] == 3
+
+        # 標頭可任意偽造，不能取得管理員權限
+        resp = client.get('/admin', headers={'X-Store-ID': '1', 'X-Store-Level': '總店'})
+        assert resp.status_code == 401
+        resp = client.get('/admin', headers={'X-Store-ID': '1', 'X-Store-Level': '分店', 'X-Permission': 'admin'})
+        assert resp.status_code == 401
+        resp = client.get('/admin')
+        assert resp.status_code == 401
+
+        resp = client.get('/admin', headers={'Authorization': f'Bearer {make_token()}'})
+        assert resp.status_code == 403
+
+        admin_token = make_token(store_id=1, store_level='總店')
+        resp = client.get('/admin', headers={'Authorization': f'Bearer {admin_token}'})
+        assert resp.status_code == 200
+
+        resp = client.get('/login', headers={'X-Store-ID': '1', 'X-Store-Level': '總店'})
+        assert resp.status_code == 401
+
+
+def test_expired_and_invalid_tokens():
+    app = make_app()
+    expired = make_token(exp_delta=-10)
+    with app.test_client() as client:
+        resp = client.get('/auth', headers={'Authorization': f'Bearer {expired}'})
+        assert resp.status_code == 401
+        assert resp.get_json()['error'] == '認證已過期，請重新登入'
+
+        resp = client.get('/login', headers={'Authorization': 'Bearer not-a-token'})
+        assert resp.get_json()['error'] == '無效的 Token'
+
+        resp = client.get('/login', headers={'Authorization': 'Token abc'})
+        assert resp.get_json()['error'] == '無效的 Token 格式'
+
+
+def test_store_condition_uses_context():
+    from app.utils import get_store_based_where_condition
+
+    app = make_app()
+    token = make_token()
+    with app.test_request_context('/', headers={'Authorization': f'Bearer {token}'}):
+        assert get_store_based_where_condition('tr') == (' AND tr.store_id = %s ', [2])
+
+    with app.test_request_context('/'):
+        assert get_store_based_where_condition() == (' AND 1=0 ', [])
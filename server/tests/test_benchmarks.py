@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks import model_benchmark, synthetic_data
+
+
+def _dataset(seed=42, **overrides):
+    scale = synthetic_data.resolve_scale("small", overrides)
+    return synthetic_data.SyntheticDataset(scale, seed, date(2025, 6, 30))
+
+
+def test_same_seed_generates_identical_rows():
+    first, second = _dataset(), _dataset()
+    for table in ("member", "product_sell", "therapy_record", "stock_transaction"):
+        assert list(first.rows(table)) == list(second.rows(table))
+    assert list(_dataset(seed=7).rows("product_sell")) != list(first.rows("product_sell"))
+
+
+def test_row_counts_follow_scale():
+    dataset = _dataset(members=300, product_sells=1234, therapy_records=500)
+    assert sum(1 for _ in dataset.rows("member")) == 300
+    assert sum(1 for _ in dataset.rows("product_sell")) == 1234
+    assert sum(1 for _ in dataset.rows("therapy_record")) == 500
+    assert sum(1 for _ in dataset.rows("master_stock")) == dataset.scale["products"] * dataset.scale["stores"]
+
+
+def test_generated_rows_are_consistent():
+    dataset = _dataset()
+    scale = dataset.scale
+    for row in dataset.rows("product_sell"):
+        member_id, staff_id, store_id = row[1], row[2], row[3]
+        assert 1 <= member_id <= scale["members"]
+        assert dataset.member_store(member_id) == store_id
+        assert staff_id in dataset.store_staff(store_id)
+        assert dataset.start_date <= row[6] <= dataset.end_date
+
+    sold = {}
+    for row in dataset.rows("therapy_sell"):
+        key = (row[3], row[1])
+        sold[key] = sold.get(key, 0) + row[7]
+    used = {}
+    for row in dataset.rows("therapy_record"):
+        key = (row[2], row[1])
+        used[key] = used.get(key, 0) + row[7]
+    assert all(used[key] <= sold[key] for key in used)
+
+
+def test_resolve_scale_rejects_unknown_keys():
+    with pytest.raises(ValueError):
+        synthetic_data.resolve_scale("small", {"nope": 1})
+    with pytest.raises(ValueError):
+        synthetic_data.resolve_scale("huge")
+
+
+def test_compare_flags_slow_cases_and_dataset_changes():
+    dataset = {"member": 500}
+    baseline = {"dataset": dataset, "cases": {
+        "search_members": {"median_seconds": 0.1, "rows": 20},
+        "inventory_history": {"median_seconds": 0.001, "rows": 5},
+    }}
+    ok = {"dataset": dataset, "cases": {
+        "search_members": {"median_seconds": 0.12, "rows": 20},
+        # 差距低於雜訊門檻，即使比例超過也不算退步
+        "inventory_history": {"median_seconds": 0.003, "rows": 5},
+        "new_case": {"median_seconds": 9.0, "rows": 1},
+    }}
+    slow = {"dataset": dataset, "cases": {"search_members": {"median_seconds": 0.2, "rows": 19}}}
+    assert model_benchmark.compare(ok, baseline, tolerance=0.25) == []
+    assert len(model_benchmark.compare(slow, baseline, tolerance=0.25)) == 2
+    assert len(model_benchmark.compare({**ok, "dataset": {"member": 1}}, baseline)) == 1
+
+
+def test_missing_model_baseline_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_benchmark, 'measure', lambda *args, **kwargs: pytest.fail('should not measure'))
+    assert model_benchmark.main(['--baseline', str(tmp_path / 'models.json')]) == 1
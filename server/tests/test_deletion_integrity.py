@@ -33,9 +33,21 @@ def stub_app_module(monkeypatch):
     sys.modules["pymysql"] = pymysql_module
     sys.modules["pymysql.cursors"] = cursors_module
 
+    overview_module = types.ModuleType("app.models.member_overview_model")
+    overview_module.member_overview_changed = lambda *member_ids: None
+    overview_module.bump_member_overview_versions = lambda member_ids=None: None
+
+    replica_module = types.ModuleType("app.models.replica")
+    replica_module.connect_for_read = lambda **kwargs: None
+    row_stream_module = types.ModuleType("app.models.row_stream")
+    row_stream_module.stream_rows = lambda *args, **kwargs: iter(())
+
     sys.modules["app"] = app_module
     sys.modules["app.config"] = config_module
     sys.modules["app.utils"] = utils_module
+    monkeypatch.setitem(sys.modules, "app.models.member_overview_model", overview_module)
+    monkeypatch.setitem(sys.modules, "app.models.replica", replica_module)
+    monkeypatch.setitem(sys.modules, "app.models.row_stream", row_stream_module)
     yield
     sys.modules.pop("app.config", None)
     sys.modules.pop("app.utils", None)
@@ -103,7 +115,8 @@ def test_delete_stress_test_cascades_answers(monkeypatch):
 
     stress_test_model.delete_stress_test(1)
 
-    queries = fake_conn.cursor_obj.queries
+    # 刪除前會先查詢所屬會員（供總覽失效），只檢查刪除順序
+    queries = [q for q in fake_conn.cursor_obj.queries if q.startswith("DELETE")]
     assert queries[0].startswith("DELETE FROM ipn_stress_answer"), "answers not removed first"
     assert queries[1].startswith("DELETE FROM ipn_stress"), "stress record not deleted"
 
@@ -0,0 +1,137 @@
+import os
+import sys
+
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import http_cache
+from app.middleware import auth_required
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    state = {'store': 1}
+    monkeypatch.setattr(http_cache, 'get_table_versions', lambda tables: dict(state))
+    return state
+
+
+@pytest.fixture
+def app_and_calls():
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/stores')
+    @auth_required
+    @http_cache.conditional_get('store')
+    def stores():
+        calls.append(1)
+        return jsonify([{'store_id': 1}])
+
+    return app, calls
+
+
+def branch_headers(store_id='2'):
+    return {'X-Store-ID': store_id, 'X-Store-Level': '分店', 'X-Permission': 'basic'}
+
+
+def test_not_modified_skips_handler(versions, app_and_calls):
+    app, calls = app_and_calls
+    client = app.test_client()
+    first = client.get('/stores', headers=branch_headers())
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.get('/stores', headers={**branch_headers(), 'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert len(calls) == 1
+
+
+def test_version_bump_changes_etag(versions, app_and_calls):
+    app, calls = app_and_calls
+    client = app.test_client()
+    etag = client.get('/stores', headers=branch_headers()).headers['ETag']
+    versions['store'] = 2
+    resp = client.get('/stores', headers={**branch_headers(), 'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+
+
+def test_etag_is_scoped_to_caller(versions, app_and_calls):
+    app, _ = app_and_calls
+    client = app.test_client()
+    etag = client.get('/stores', headers=branch_headers('2')).headers['ETag']
+    resp = client.get('/stores', headers={**branch_headers('3'), 'If-None-Match': etag})
+    assert resp.status_code == 200
+
+
+def test_without_migration_falls_through(monkeypatch, app_and_calls):
+    monkeypatch.setattr(http_cache, 'get_table_versions', lambda tables: None)
+    app, calls = app_and_calls
+    resp = app.test_client().get('/stores', headers=branch_headers())
+    assert resp.status_code == 200
+    assert 'ETag' not in resp.headers
+
+
+def test_etag_matches():
+    etag = 'W/"abc"'
+    assert http_cache.etag_matches('"abc"', etag)
+    assert http_cache.etag_matches('W/"x", W/"abc"', etag)
+    assert http_cache.etag_matches('*', etag)
+    assert not http_cache.etag_matches('"abd"', etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+def test_high_write_tables_are_not_versioned(monkeypatch):
+    from app.models import data_version_model
+
+    monkeypatch.setattr(data_version_model, 'data_version_available', lambda: True)
+    for table in ('member', 'master_stock', 'inventory'):
+        assert table not in data_version_model.VERSIONED_TABLES
+        with pytest.raises(ValueError):
+            data_version_model.get_table_versions([table])
+
+
+def test_data_version_probe_rechecks_after_failure(monkeypatch):
+    from app.models import data_version_model
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {'1': 1}
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('connection reset')
+        return Conn()
+
+    clock = {'now': 100.0}
+    monkeypatch.setattr(data_version_model, 'connect_to_db', connect)
+    monkeypatch.setattr(data_version_model.time, 'monotonic', lambda: clock['now'])
+    monkeypatch.setattr(data_version_model, '_available_state', {'available': False, 'checked_at': 0.0})
+
+    assert data_version_model.data_version_available() is False
+    assert data_version_model.data_version_available() is False
+    clock['now'] += data_version_model._AVAILABLE_RECHECK_SECONDS
+    assert data_version_model.data_version_available() is True
+    assert data_version_model.data_version_available() is True
+    assert len(calls) == 2
@@ -0,0 +1,96 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import master_stock_model as msm
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        self.conn.executed.append((query, list(args or [])))
+        if 'FROM store_type_price LIMIT 1' in query and self.conn.missing_primary_table:
+            raise pymysql.err.ProgrammingError(1146, "Table 'store_type_price' doesn't exist")
+        if 'GROUP BY category_name' in query:
+            self._rows = [
+                {'category_name': '保養', 'quantity': 12, 'stock_value': 600, 'missing_cost_count': 0},
+                {'category_name': '彩妝', 'quantity': 3, 'stock_value': None, 'missing_cost_count': 3},
+            ]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+class FakeConn:
+    def __init__(self, missing_primary_table=False):
+        self.executed = []
+        self.missing_primary_table = missing_primary_table
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+def test_detail_sql_rolls_back_later_transactions_for_past_dates():
+    as_of = date(2025, 6, 30)
+    query, params = msm._valuation_detail_sql('store_type_price', as_of, 3)
+    assert 'stock_transaction' in query
+    assert 'stp.store_type = s.store_type' in query
+    assert params == [date(2025, 7, 1), 3]
+
+    current, current_params = msm._valuation_detail_sql('store_type_price', None, None)
+    assert 'stock_transaction' not in current
+    assert current_params == []
+
+
+def test_parse_valuation_date():
+    assert msm.parse_valuation_date(None) is None
+    assert msm.parse_valuation_date(date.today().isoformat()) is None
+    assert msm.parse_valuation_date('2025/01/31') == date(2025, 1, 31)
+    with pytest.raises(ValueError):
+        msm.parse_valuation_date('31-01-2025')
+    with pytest.raises(ValueError):
+        msm.parse_valuation_date((date.today() + timedelta(days=1)).isoformat())
+
+
+def test_valuation_groups_in_sql_and_falls_back_to_legacy_price_table(monkeypatch):
+    conn = FakeConn(missing_primary_table=True)
+    monkeypatch.setattr(msm, 'connect_for_read', lambda: conn)
+
+    result = msm.get_inventory_valuation(date(2025, 6, 30), '2', 'category')
+
+    assert result['as_of'] == '2025-06-30'
+    assert result['store_id'] == 2
+    assert [row['category_name'] for row in result['rows']] == ['保養', '彩妝']
+    # 總計由分組結果加總，明細子查詢只執行一次
+    assert result['totals'] == {'quantity': 15, 'stock_value': 600, 'missing_cost_count': 3}
+    assert len([query for query, _ in conn.executed if 'LEFT JOIN stock_type_price' in query]) == 1
+    grouped_sql, grouped_params = conn.executed[-1]
+    assert 'LEFT JOIN stock_type_price stp' in grouped_sql
+    assert 'GROUP BY category_name' in grouped_sql
+    assert grouped_params == [date(2025, 7, 1), 2]
+
+
+def test_unknown_group_rejected():
+    with pytest.raises(ValueError):
+        msm.get_inventory_valuation(group_by='staff')
@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.json_provider import init_json_provider, _encode_default
+from app.compression import init_compression, choose_encoding
+
+
+def make_app(encoder='auto', min_size=100):
+    app = Flask(__name__)
+    init_json_provider(app, encoder)
+    init_compression(app, min_size)
+
+    @app.route('/rows')
+    def rows():
+        return jsonify([
+            {'id': i, 'price': Decimal('12.50'), 'date': date(2024, 3, 1), 'name': '測試'}
+            for i in range(50)
+        ])
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app
+
+
+def test_encode_default_values():
+    assert _encode_default(Decimal('1.25')) == 1.25
+    assert _encode_default(date(2024, 1, 2)) == '2024-01-02'
+    assert _encode_default(datetime(2024, 1, 2, 3, 4, 5)) == '2024-01-02T03:04:05'
+    assert _encode_default(timedelta(hours=9, minutes=30)) == '09:30:00'
+
+
+def test_stdlib_and_orjson_output_match():
+    payload = {'price': Decimal('3.10'), 'day': date(2024, 5, 6), 'name': '會員'}
+    for encoder in ('auto', 'stdlib'):
+        app = make_app(encoder)
+        assert json.loads(app.json.dumps(payload)) == {
+            'price': 3.1, 'day': '2024-05-06', 'name': '會員'
+        }
+
+
+def test_large_response_is_gzipped():
+    app = make_app()
+    client = app.test_client()
+    resp = client.get('/rows', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    rows = json.loads(gzip.decompress(resp.data))
+    assert rows[0] == {'id': 0, 'price': 12.5, 'date': '2024-03-01', 'name': '測試'}
+
+
+def test_small_or_unaccepted_response_is_not_compressed():
+    client = make_app().test_client()
+    resp = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+
+    resp = client.get('/rows')
+    assert 'Content-Encoding' not in resp.headers
+    assert len(resp.get_json()) == 50
+
+
+def test_choose_encoding():
+    assert choose_encoding('gzip, deflate, br', brotli_available=True) == 'br'
+    assert choose_encoding('gzip, deflate, br', brotli_available=False) == 'gzip'
+    assert choose_encoding('br;q=0.5, gzip;q=0.8', brotli_available=True) == 'gzip'
+    assert choose_encoding('gzip;q=0', brotli_available=False) is None
+    assert choose_encoding(None) is None
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import medical_record_model
+
+
+def test_list_query_uses_latest_pure_lookup_instead_of_join():
+    query = " ".join(medical_record_model.MEDICAL_RECORD_LIST_QUERY.split())
+    assert "JOIN ipn_pure" not in query
+    assert "GROUP BY" not in query
+    assert "ORDER BY ip.date DESC, ip.ipn_pure_id DESC LIMIT 1" in query
+
+
+def test_format_record_decodes_merged_history_once():
+    record = {
+        'medical_record_id': 3,
+        'store_name': '台北店',
+        'member_code': 'M001',
+        'name': '王小明',
+        'height': 170,
+        'weight': 60,
+        'blood_preasure': '120/80',
+        'history_items': '["頭痛", "", "高血壓", "其他說明"]',
+        'micro_surgery': None,
+        'micro_surgery_description': None,
+    }
+    assert medical_record_model.format_record(record) == (
+        3, '台北店', 'M001', '王小明', 170, 60, '120/80',
+        '頭痛, 高血壓, 其他說明', 'No', '',
+    )
@@ -0,0 +1,177 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import member_overview_model as overview
+
+
+class DummyCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+class DummyConn:
+    def cursor(self):
+        return DummyCursor()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stubbed_sections(monkeypatch):
+    calls = []
+
+    def loader(name):
+        def _load(cursor, member_id, scope_store_id):
+            calls.append(name)
+            return [name]
+        return _load
+
+    monkeypatch.setattr(overview, "connect_to_db", lambda: DummyConn())
+    monkeypatch.setattr(
+        overview, "_load_member", lambda cursor, member_id, scope: {"member_id": member_id, "store_id": 1}
+    )
+    monkeypatch.setattr(
+        overview,
+        "OVERVIEW_SECTIONS",
+        overview.OrderedDict((name, loader(name)) for name in overview.OVERVIEW_SECTIONS),
+    )
+    overview.invalidate_member_overview()
+    yield calls
+    overview.invalidate_member_overview()
+
+
+def test_parse_sections_defaults_and_validation():
+    assert overview.parse_sections(None) == list(overview.OVERVIEW_SECTIONS)
+    assert overview.parse_sections("purchases, stress_tests,purchases") == ["purchases", "stress_tests"]
+    with pytest.raises(ValueError):
+        overview.parse_sections("purchases,unknown")
+
+
+def test_overview_is_cached_per_section_and_invalidated(stubbed_sections):
+    first = overview.get_member_overview(7, ["stress_tests"])
+    assert first == {"member": {"member_id": 7, "store_id": 1}, "stress_tests": ["stress_tests"]}
+
+    overview.get_member_overview(7, ["stress_tests", "purchases"])
+    assert stubbed_sections == ["stress_tests", "purchases"]
+
+    overview.invalidate_member_overview(7)
+    overview.get_member_overview(7, ["stress_tests"])
+    assert stubbed_sections == ["stress_tests", "purchases", "stress_tests"]
+
+
+def test_branch_cannot_read_other_store_member(stubbed_sections):
+    with pytest.raises(PermissionError):
+        overview.get_member_overview(7, ["purchases"], store_level="分店", store_id=2)
+    assert stubbed_sections == []
+
+
+def test_version_change_from_another_worker_invalidates_cache(stubbed_sections, monkeypatch):
+    versions = {"current": (1, 0)}
+    monkeypatch.setattr(overview, "_read_overview_version", lambda cursor, member_id: versions["current"])
+
+    overview.get_member_overview(7, ["purchases"])
+    overview.get_member_overview(7, ["purchases"])
+    assert stubbed_sections == ["purchases"]
+
+    # 其他 worker 寫入後遞增全域版本：本程序的快取不再命中
+    versions["current"] = (1, 1)
+    overview.get_member_overview(7, ["purchases"])
+    assert stubbed_sections == ["purchases", "purchases"]
+
+
+def test_bump_without_member_ids_increments_global_version(monkeypatch):
+    executed = []
+
+    class Cursor(DummyCursor):
+        def executemany(self, query, rows):
+            executed.append(rows)
+
+    class Conn(DummyConn):
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    monkeypatch.setattr(overview, "_version_table_available", lambda: True)
+    monkeypatch.setattr(overview, "connect_to_db", lambda: Conn())
+
+    overview.bump_member_overview_versions({"3", 5})
+    overview.bump_member_overview_versions(None)
+    overview.bump_member_overview_versions({"abc"})
+    assert executed == [[(3,), (5,)], [(0,)], [(0,)]]
+
+
+def test_member_overview_changed_skips_walk_in_sales(monkeypatch):
+    bumped = []
+    monkeypatch.setattr(overview, "bump_member_overview_versions", lambda ids: bumped.append(ids))
+
+    overview.member_overview_changed(None, "")
+    overview.member_overview_changed(3, None, 3)
+    assert bumped == [{3}]
+
+
+def test_therapy_record_update_bumps_old_and_new_member(monkeypatch):
+    from app.models import therapy_model
+
+    class Cursor(DummyCursor):
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {"deduct_sessions": 1, "member_id": 4}
+
+    class Conn(DummyConn):
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    changed = []
+    monkeypatch.setattr(therapy_model, "connect_to_db", lambda: Conn())
+    monkeypatch.setattr(therapy_model, "get_remaining_sessions", lambda member_id, therapy_id: 5)
+    monkeypatch.setattr(therapy_model, "member_overview_changed", lambda *ids: changed.append(ids))
+
+    therapy_model.update_therapy_record(11, {"member_id": 9, "therapy_id": 2, "deduct_sessions": 1})
+    assert changed == [(4, 9)]
+
+
+def test_health_check_probe_rechecks_after_failure(monkeypatch):
+    class Cursor(DummyCursor):
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {"1": 1}
+
+    class Conn(DummyConn):
+        def cursor(self):
+            return Cursor()
+
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        return Conn()
+
+    clock = {"now": 50.0}
+    monkeypatch.setattr(overview, "connect_to_db", connect)
+    monkeypatch.setattr(overview.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(overview, "_health_check_state", {"available": False, "checked_at": 0.0})
+
+    assert overview._health_check_table_available() is False
+    assert overview._health_check_table_available() is False
+    clock["now"] += overview._HEALTH_CHECK_RECHECK_SECONDS
+    assert overview._health_check_table_available() is True
+    assert overview._health_check_table_available() is True
+    assert len(calls) == 2
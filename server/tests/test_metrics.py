@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import metrics
+from app.middleware import auth_required
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+    metrics.uninstall_db_instrumentation()
+
+
+def make_app(token=''):
+    app = Flask(__name__)
+    metrics.init_metrics(app, token)
+
+    @app.route('/items/<int:item_id>')
+    @auth_required
+    def item(item_id):
+        return jsonify({'id': item_id})
+
+    @app.route('/boom')
+    def boom():
+        return jsonify({'error': 'x'}), 500
+
+    return app
+
+
+def test_histogram_and_counter_rendering():
+    registry = metrics.MetricsRegistry()
+    registry.observe('ipn_http_request_duration_seconds', 0.02, {'route': '/a'})
+    registry.observe('ipn_http_request_duration_seconds', 3, {'route': '/a'})
+    registry.inc('ipn_http_requests_total', {'route': '/a', 'status': '200'}, 2)
+    text = registry.render()
+    assert '# TYPE ipn_http_request_duration_seconds histogram' in text
+    assert 'ipn_http_request_duration_seconds_bucket{route="/a",le="0.025"} 1' in text
+    assert 'ipn_http_request_duration_seconds_bucket{route="/a",le="5"} 2' in text
+    assert 'ipn_http_request_duration_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'ipn_http_request_duration_seconds_count{route="/a"} 2' in text
+    assert 'ipn_http_requests_total{route="/a",status="200"} 2' in text
+
+
+def test_cache_hit_ratio():
+    metrics.record_cache('jwt', hits=3, misses=1)
+    assert 'ipn_cache_hit_ratio{cache="jwt"} 0.75' in metrics.registry.render()
+
+
+def test_requests_are_labelled_by_route_and_store():
+    app = make_app(token='secret')
+    client = app.test_client()
+    client.get('/items/1', headers={'X-Store-ID': '2', 'X-Store-Level': '分店'})
+    client.get('/items/2', headers={'X-Store-ID': '2', 'X-Store-Level': '分店'})
+    client.get('/boom')
+
+    labels = {'route': '/items/<int:item_id>', 'method': 'GET', 'store_id': '2', 'store_level': '分店'}
+    assert metrics.registry.counter_value('ipn_http_requests_total', {**labels, 'status': '200'}) == 2
+    assert metrics.registry.counter_value(
+        'ipn_http_request_errors_total',
+        {'route': '/boom', 'method': 'GET', 'store_id': '', 'store_level': ''},
+    ) == 1
+
+    body = client.get('/metrics', headers={'Authorization': 'Bearer secret'}).get_data(as_text=True)
+    assert 'ipn_http_request_duration_seconds_count{method="GET",route="/items/<int:item_id>"' in body
+
+
+def test_metrics_token():
+    client = make_app(token='secret').test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_metrics_endpoint_not_registered_without_token():
+    assert make_app().test_client().get('/metrics').status_code == 404
@@ -0,0 +1,98 @@
+import sys
+import types
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def partition_model(monkeypatch):
+    config_module = types.ModuleType("app.config")
+    config_module.DB_CONFIG = {}
+    pymysql_module = types.ModuleType("pymysql")
+    cursors_module = types.ModuleType("pymysql.cursors")
+    cursors_module.DictCursor = object
+    pymysql_module.cursors = cursors_module
+    monkeypatch.setitem(sys.modules, "app", types.ModuleType("app"))
+    monkeypatch.setitem(sys.modules, "app.config", config_module)
+    monkeypatch.setitem(sys.modules, "pymysql", pymysql_module)
+    monkeypatch.setitem(sys.modules, "pymysql.cursors", cursors_module)
+
+    spec = importlib.util.spec_from_file_location("partition_model", BASE_DIR / "app/models/partition_model.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_plan_adds_years_after_latest(partition_model):
+    assert partition_model.plan_yearly_partitions([2023, 2024, 2025, 2026], 2028) == [2027, 2028]
+    assert partition_model.plan_yearly_partitions([2023, 2026], 2026) == []
+
+
+def test_plan_requires_existing_partitions(partition_model):
+    with pytest.raises(ValueError):
+        partition_model.plan_yearly_partitions([], 2027)
+
+
+def test_reorganize_statement_uses_column_type(partition_model):
+    date_sql = partition_model.reorganize_statement("product_sell", [2027])
+    assert "REORGANIZE PARTITION p_future INTO" in date_sql
+    assert "PARTITION p2027 VALUES LESS THAN ('2028-01-01')" in date_sql
+    assert date_sql.endswith("PARTITION p_future VALUES LESS THAN (MAXVALUE))")
+
+    datetime_sql = partition_model.reorganize_statement("stock_transaction", [2027, 2028])
+    assert "('2028-01-01 00:00:00')" in datetime_sql
+    assert "('2029-01-01 00:00:00')" in datetime_sql
+
+
+def test_ensure_future_partitions_skips_up_to_date_tables(partition_model, monkeypatch):
+    executed = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            executed.append(sql)
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+        def close(self):
+            pass
+
+    this_year = partition_model.date.today().year
+    existing = {
+        "product_sell": [this_year, this_year + 1],
+        "therapy_sell": [this_year],
+        "therapy_record": [this_year + 1],
+        "stock_transaction": [this_year - 1],
+    }
+    monkeypatch.setattr(partition_model, "partitioning_available", lambda: True)
+    monkeypatch.setattr(partition_model, "connect_to_db", Conn)
+    monkeypatch.setattr(
+        partition_model,
+        "list_partitions",
+        lambda table: [{"name": "p_legacy"}] + [{"name": f"p{y}"} for y in existing[table]] + [{"name": "p_future"}],
+    )
+
+    result = partition_model.ensure_future_partitions(years_ahead=1)
+
+    assert result == {
+        "product_sell": [],
+        "therapy_sell": [this_year + 1],
+        "therapy_record": [],
+        "stock_transaction": [this_year, this_year + 1],
+    }
+    assert len(executed) == 2
+    assert all(sql.startswith("ALTER TABLE") for sql in executed)
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks import pos_load
+
+
+class FakeTransport:
+    def __init__(self, remaining=None):
+        self.calls = []
+        self.remaining = remaining if remaining is not None else {"3": 2, "4": 0}
+
+    def request(self, method, path, body=None, headers=None):
+        self.calls.append((method, path.split("?")[0], body, dict(headers or {})))
+        if path == "/api/login":
+            return 200, json.dumps({"token": "t", "store_id": 2, "staff_id": 5}).encode()
+        if path == "/api/product-bundles/available":
+            return 200, json.dumps([{"bundle_id": 7, "selling_price": "1200.00"}]).encode()
+        if path.startswith("/api/member/search"):
+            return 200, json.dumps([{"member_id": 11}]).encode()
+        if path == "/api/therapy-sell/remaining-sessions/bulk":
+            return 200, json.dumps({"data": self.remaining}).encode()
+        if path.startswith("/api/inventory/records"):
+            return 500, b'{"error": "boom"}'
+        if method == "POST":
+            return 201, b'{"id": 1}'
+        return 200, b"[]"
+
+
+OPTIONS = {"think_min": 0, "think_max": 0, "export_ratio": 1.0}
+
+
+def test_percentile_interpolates():
+    samples = [0.1, 0.2, 0.3, 0.4]
+    assert pos_load.percentile(samples, 50) == 0.25
+    assert pos_load.percentile(samples, 100) == 0.4
+    assert pos_load.percentile([], 99) == 0.0
+
+
+def test_workflow_runs_every_step_and_records_errors():
+    transport = FakeTransport()
+    report = pos_load.run_load(transport, ["bench_s2_0"], OPTIONS, iterations=2)
+
+    steps = report["steps"]
+    assert report["iterations"] == 2
+    assert steps["login"]["count"] == 1
+    assert steps["sell_bundle"]["count"] == 2
+    assert steps["deduct_session"]["count"] == 2
+    assert steps["export"]["count"] == 2
+    assert steps["inventory_history"]["errors"] == 2
+    assert steps["search_member"]["p99_ms"] >= steps["search_member"]["p50_ms"]
+
+    sale = next(body for method, path, body, _ in transport.calls if path == "/api/product-sell/add")
+    assert sale["bundle_id"] == 7 and sale["member_id"] == 11 and sale["final_price"] == 1200.0
+    record = next(body for method, path, body, _ in transport.calls if path == "/api/therapy/record")
+    assert record["therapy_id"] == 3
+    assert all(headers.get("Authorization") == "Bearer t"
+               for _, path, _, headers in transport.calls if path != "/api/login")
+
+
+def test_deduct_is_skipped_without_remaining_sessions():
+    report = pos_load.run_load(FakeTransport(remaining={}), ["bench_s1_0"], OPTIONS, iterations=1)
+    assert report["steps"]["deduct_session"]["skipped"] == 1
+    assert report["steps"]["deduct_session"]["count"] == 0
+
+
+def test_build_accounts_cycles_store_staff():
+    assert pos_load.build_accounts(2, 3, 2) == [
+        "bench_s1_0", "bench_s1_1", "bench_s1_0", "bench_s2_0", "bench_s2_1", "bench_s2_0",
+    ]
@@ -0,0 +1,232 @@
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import pricing_model as pricing
+
+ROWS = {
+    'FROM product_price_tier': [
+        {'item_id': 1, 'identity_type': '會員', 'price': Decimal('90.00')},
+        {'item_id': 2, 'identity_type': '一般售價', 'price': Decimal('190.00')},
+    ],
+    'FROM product_bundle_price_tier': [
+        {'item_id': 10, 'identity_type': '會員', 'price': Decimal('250.00')},
+    ],
+    'FROM therapy_price_tier': [],
+    'FROM therapy_bundle_price_tier': [],
+    'FROM product_bundle_items': [
+        {'bundle_id': 10, 'item_id': 1, 'item_type': 'Product', 'quantity': 1},
+        {'bundle_id': 10, 'item_id': 2, 'item_type': 'Product', 'quantity': 2},
+        {'bundle_id': 10, 'item_id': 5, 'item_type': 'Therapy', 'quantity': 1},
+    ],
+    'FROM therapy_bundle_items': [
+        {'bundle_id': 20, 'item_id': 5, 'quantity': 3},
+    ],
+    'FROM product_bundles': [
+        {'item_id': 10, 'name': '保養組', 'status': 'PUBLISHED', 'price': Decimal('300.00')},
+    ],
+    'FROM therapy_bundles': [
+        {'item_id': 20, 'name': '療程組', 'status': 'PUBLISHED', 'price': None},
+    ],
+    'FROM product': [
+        {'item_id': 1, 'name': '乳液', 'status': 'PUBLISHED', 'price': Decimal('100.00')},
+        {'item_id': 2, 'name': '精華', 'status': 'PUBLISHED', 'price': Decimal('200.00')},
+        {'item_id': 3, 'name': '舊品', 'status': 'UNPUBLISHED', 'price': Decimal('50.00')},
+    ],
+    'FROM therapy': [
+        {'item_id': 5, 'name': '舒壓', 'status': 'PUBLISHED', 'price': Decimal('1000.00')},
+    ],
+}
+
+
+class FakeCursor:
+    def __init__(self):
+        self.queries = []
+        self._rows = []
+
+    def execute(self, query, args=None):
+        self.queries.append(query)
+        # 由最長的片段開始比對，避免 "FROM product" 吃掉 "FROM product_price_tier"
+        for fragment in sorted(ROWS, key=len, reverse=True):
+            if fragment in query:
+                self._rows = [dict(row) for row in ROWS[fragment]]
+                return
+        raise AssertionError(f'unexpected query: {query}')
+
+    def fetchall(self):
+        return self._rows
+
+
+@pytest.fixture
+def matrix():
+    return pricing.load_matrix(FakeCursor())
+
+
+def test_matrix_resolves_identity_then_general_then_base(matrix):
+    assert matrix.unit_price('product', 1, '會員') == (Decimal('90.00'), '會員')
+    assert matrix.unit_price('product', 1, '加盟店') == (Decimal('100.00'), None)
+    assert matrix.unit_price('product', 2, '會員') == (Decimal('190.00'), '一般售價')
+    assert matrix.unit_price('therapy_bundle', 20) == (None, None)
+    assert matrix.unit_price('product', 99) == (None, None)
+
+
+def test_bundle_components_are_flattened_by_sale_kind(matrix):
+    assert matrix.components('product_bundle', 10) == [('product', 1, 1), ('product', 2, 2), ('therapy', 5, 1)]
+    assert pricing.sale_components(matrix, 'product_bundle', 10) == [('product', 1, 1), ('product', 2, 2)]
+    assert pricing.sale_components(matrix, 'therapy_bundle', 20) == [('therapy', 5, 3)]
+
+
+def test_distribute_bundle_total_keeps_remainder_on_last_row():
+    totals = [Decimal('100'), Decimal('100'), Decimal('100')]
+    rows = pricing.distribute_bundle_total(totals, Decimal('200'), Decimal('100'))
+    assert rows == [
+        (Decimal('33.33'), Decimal('66.67')),
+        (Decimal('33.33'), Decimal('66.67')),
+        (Decimal('33.34'), Decimal('66.66')),
+    ]
+    assert sum(final for _, final in rows) == Decimal('200')
+    # 原價合計為 0 時平均分配
+    assert pricing.distribute_bundle_total([Decimal('0'), Decimal('0')], Decimal('10'), Decimal('0')) == [
+        (Decimal('0'), Decimal('5')),
+        (Decimal('0'), Decimal('5')),
+    ]
+
+
+def test_resolve_bundle_target_prefers_final_price_then_discount():
+    total = Decimal('500')
+    assert pricing.resolve_bundle_target(total, final_price='300') == (Decimal('300'), Decimal('200'))
+    assert pricing.resolve_bundle_target(total, final_price=0, unit_price='450') == (Decimal('450'), Decimal('50'))
+    assert pricing.resolve_bundle_target(total, discount='120') == (Decimal('380'), Decimal('120'))
+    assert pricing.resolve_bundle_target(total, discount='600') == (Decimal('500'), Decimal('0'))
+    assert pricing.resolve_bundle_target(Decimal('0'), final_price='80') == (Decimal('80'), Decimal('0'))
+    # 只帶成交價 0 表示整組免費
+    assert pricing.resolve_bundle_target(total, final_price=0) == (Decimal('0'), Decimal('500'))
+    assert pricing.resolve_bundle_target(total, final_price=None) == (Decimal('500'), Decimal('0'))
+
+
+def test_quote_cart_prices_every_line_for_identity(matrix):
+    quote = pricing.quote_cart(
+        [
+            {'type': 'product', 'id': 1, 'quantity': 2, 'discount': '10'},
+            {'type': 'product_bundle', 'id': 10, 'quantity': 1},
+        ],
+        identity_type='會員',
+        matrix=matrix,
+    )
+    product_line, bundle_line = quote['lines']
+    assert product_line['unit_price'] == Decimal('90.00')
+    assert product_line['total'] == Decimal('170.00')
+    assert bundle_line['unit_price'] == Decimal('250.00')
+    assert bundle_line['price_tier'] == '會員'
+    # 組合只拆出產品，成交金額依原價比例攤提（100 : 400）
+    assert [(c['id'], c['quantity'], c['final_price']) for c in bundle_line['components']] == [
+        (1, 1, Decimal('50.00')),
+        (2, 2, Decimal('200.00')),
+    ]
+    assert quote['subtotal'] == Decimal('430.00')
+    assert quote['discount'] == Decimal('10.00')
+    assert quote['total'] == Decimal('420.00')
+
+
+def test_quote_cart_fully_discounted_bundle_has_zero_components(matrix):
+    quote = pricing.quote_cart(
+        [{'type': 'product_bundle', 'id': 10, 'quantity': 1, 'discount': '300'}],
+        matrix=matrix,
+    )
+    (line,) = quote['lines']
+    assert line['total'] == Decimal('0.00')
+    assert [c['final_price'] for c in line['components']] == [Decimal('0.00'), Decimal('0.00')]
+    assert sum(c['discount'] for c in line['components']) == Decimal('500.00')
+
+
+def test_quote_cart_rejects_unavailable_items(matrix):
+    with pytest.raises(ValueError, match='已下架'):
+        pricing.quote_cart([{'type': 'product', 'id': 3}], matrix=matrix)
+    with pytest.raises(ValueError, match='未設定售價'):
+        pricing.quote_cart([{'type': 'therapy_bundle', 'id': 20}], matrix=matrix)
+    with pytest.raises(ValueError):
+        pricing.quote_cart([{'type': 'gift', 'id': 1}], matrix=matrix)
+    with pytest.raises(ValueError):
+        pricing.quote_cart([], matrix=matrix)
+
+
+def test_get_matrix_reloads_only_when_versions_change(monkeypatch):
+    state = {'versions': {'product': 1}, 'loads': 0}
+
+    def fake_load():
+        state['loads'] += 1
+        return pricing.PriceMatrix()
+
+    monkeypatch.setattr(pricing, 'get_table_versions', lambda tables: dict(state['versions']))
+    monkeypatch.setattr(pricing, '_load', fake_load)
+    monkeypatch.setattr(pricing, 'PRICING_CHECK_INTERVAL', 3600)
+    monkeypatch.setattr(pricing, '_matrix', None)
+
+    first = pricing.get_matrix()
+    assert pricing.get_matrix() is first
+    assert pricing.get_matrix(verify=True) is first
+    assert state['loads'] == 1
+
+    # 其他 worker 改價：報價等到下次檢查，銷售寫入立即重新載入
+    state['versions'] = {'product': 2}
+    assert pricing.get_matrix() is first
+    assert pricing.get_matrix(verify=True) is not first
+    assert state['loads'] == 2
+
+
+def test_get_matrix_loads_without_holding_the_lock(monkeypatch):
+    def fake_load():
+        # 載入期間其他執行緒仍可取得鎖
+        assert pricing._lock.acquire(blocking=False)
+        pricing._lock.release()
+        return pricing.PriceMatrix()
+
+    monkeypatch.setattr(pricing, 'get_table_versions', lambda tables: {'product': 1})
+    monkeypatch.setattr(pricing, '_load', fake_load)
+    monkeypatch.setattr(pricing, '_matrix', None)
+
+    assert isinstance(pricing.get_matrix(verify=True), pricing.PriceMatrix)
+
+
+def test_sale_matrix_without_versions_checks_status_in_sql(monkeypatch, matrix):
+    monkeypatch.setattr(pricing, 'get_table_versions', lambda tables: None)
+    monkeypatch.setattr(pricing, '_load', lambda: matrix)
+    monkeypatch.setattr(pricing, 'PRICING_CHECK_INTERVAL', 3600)
+    monkeypatch.setattr(pricing, '_matrix', None)
+
+    assert pricing.get_sale_matrix() == (matrix, True)
+    # 沿用舊快照又無法核對版本：不可信任快照內的上架狀態
+    assert pricing.get_sale_matrix() == (matrix, False)
+
+    executed = []
+
+    class Cursor:
+        def execute(self, query, params=None):
+            executed.append((query, params))
+
+        def fetchone(self):
+            return {'status': 'UNPUBLISHED'}
+
+    assert pricing.is_published(Cursor(), pricing.PRODUCT, 1) is False
+    assert executed == [('SELECT status FROM product WHERE product_id = %s', (1,))]
+
+
+def test_invalidate_forces_reload(monkeypatch):
+    loads = []
+
+    def fake_load():
+        loads.append(1)
+        return pricing.PriceMatrix()
+
+    monkeypatch.setattr(pricing, 'get_table_versions', lambda tables: {'product': 1})
+    monkeypatch.setattr(pricing, '_load', fake_load)
+    monkeypatch.setattr(pricing, 'PRICING_CHECK_INTERVAL', 3600)
+    monkeypatch.setattr(pricing, '_matrix', None)
+
+    first = pricing.get_matrix()
+    pricing.invalidate()
+    assert pricing.get_matrix() is not first
+    assert len(loads) == 2
@@ -0,0 +1,106 @@
+import sys
+import types
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+PRODUCTS = [
+    {"product_id": 1, "name": "玫瑰精油", "code": "OIL01-A"},
+    {"product_id": 2, "name": "薰衣草精油", "code": "oil01-B"},
+    {"product_id": 3, "name": "按摩床", "code": "BED_1"},
+    {"product_id": 4, "name": "按摩巾", "code": "BEDX1"},
+]
+
+
+@pytest.fixture
+def product_model(monkeypatch):
+    config_module = types.ModuleType("app.config")
+    config_module.DB_CONFIG = {}
+    pymysql_module = types.ModuleType("pymysql")
+    cursors_module = types.ModuleType("pymysql.cursors")
+    cursors_module.DictCursor = object
+    pymysql_module.cursors = cursors_module
+    monkeypatch.setitem(sys.modules, "app", types.ModuleType("app"))
+    monkeypatch.setitem(sys.modules, "app.config", config_module)
+    monkeypatch.setitem(sys.modules, "pymysql", pymysql_module)
+    monkeypatch.setitem(sys.modules, "pymysql.cursors", cursors_module)
+
+    spec = importlib.util.spec_from_file_location("product_model", BASE_DIR / "app/models/product_model.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    conn = FakeConnection()
+    monkeypatch.setattr(module, "connect_to_db", lambda: conn)
+    module.fake_conn = conn
+    return module
+
+
+def _unescape(pattern):
+    """把 'a!_b%' 還原成前綴 'a_b'（只支援結尾單一 %）。"""
+    assert pattern.endswith("%")
+    out, chars = [], iter(pattern[:-1])
+    for ch in chars:
+        out.append(next(chars) if ch == "!" else ch)
+    return "".join(out)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.queries = []
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.queries.append((sql, list(params or ())))
+        if "LIKE" in sql:
+            assert "LEFT(" not in sql
+            prefixes = [_unescape(p).lower() for p in params]
+            self.rows = [dict(p) for p in PRODUCTS if any(p["code"].lower().startswith(x) for x in prefixes)]
+        else:
+            wanted = {c.lower() for c in params}
+            self.rows = [{"code": p["code"]} for p in PRODUCTS if p["code"].lower() in wanted]
+
+    def fetchall(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_obj = FakeCursor()
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def close(self):
+        pass
+
+
+def test_prefix_lookup_uses_like_and_escapes_wildcards(product_model):
+    rows = product_model.find_products_with_prefix("BED_")
+    sql, params = product_model.fake_conn.cursor_obj.queries[0]
+    assert "code LIKE %s ESCAPE '!'" in sql
+    assert params == ["BED!_%"]
+    assert [row["product_id"] for row in rows] == [3]
+
+
+def test_batch_prefix_lookup_runs_one_query(product_model):
+    matches = product_model.find_products_with_prefixes(["OIL01", "BED", "OIL01", "ZZZ", ""])
+    assert len(product_model.fake_conn.cursor_obj.queries) == 1
+    assert sorted(row["product_id"] for row in matches["OIL01"]) == [1, 2]
+    assert sorted(row["product_id"] for row in matches["BED"]) == [3, 4]
+    assert matches["ZZZ"] == []
+    assert set(matches) == {"OIL01", "BED", "ZZZ"}
+
+
+def test_batch_lookup_is_chunked(product_model, monkeypatch):
+    monkeypatch.setattr(product_model, "CODE_LOOKUP_CHUNK_SIZE", 2)
+    existing = product_model.find_existing_product_codes(["OIL01-A", "BED_1", "NEW-1"])
+    assert existing == {"OIL01-A", "BED_1"}
+    assert len(product_model.fake_conn.cursor_obj.queries) == 2
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import time
+
+import jwt
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import metrics, profiler
+from app.config import JWT_SECRET_KEY
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    profiler.init_profiler(app, str(tmp_path), interval_ms=1, keep=2)
+
+    @app.route('/slow')
+    def slow():
+        # 模擬兩筆查詢（與 metrics 的計時游標呼叫 listener 的方式相同）
+        for listener in metrics._query_listeners:
+            listener('SELECT *  FROM member\n WHERE member_id = %s', (1,), 0.004)
+            listener('SELECT * FROM member WHERE member_id = %s', (2,), 0.006)
+        time.sleep(0.02)
+        return jsonify({'ok': True})
+
+    yield app
+    metrics.remove_query_listener(profiler._on_query)
+    metrics.uninstall_db_instrumentation()
+
+
+def bearer(**claims):
+    payload = {'store_id': 1, 'store_level': '總店', 'permission': 'admin', 'exp': int(time.time()) + 3600}
+    payload.update(claims)
+    return {'Authorization': f"Bearer {jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')}"}
+
+
+ADMIN = {**bearer(), 'X-Profile': '1'}
+
+
+def test_admin_request_is_profiled(app, tmp_path):
+    resp = app.test_client().get('/slow', headers=ADMIN)
+    profile_id = resp.headers['X-Profile-ID']
+
+    summary = profiler.load_profile(str(tmp_path), profile_id)
+    assert summary['path'] == '/slow'
+    assert summary['query_count'] == 2
+    assert summary['sql_ms'] == pytest.approx(10.0)
+    assert summary['queries_by_statement'][0]['count'] == 2
+    assert summary['total_ms'] >= 20
+
+    speedscope = profiler.load_profile(str(tmp_path), profile_id, speedscope=True)
+    assert speedscope['profiles'][0]['type'] == 'sampled'
+    assert len(speedscope['profiles'][0]['samples']) == len(speedscope['profiles'][0]['weights'])
+
+
+def test_flag_ignored_for_branch_users(app, tmp_path):
+    resp = app.test_client().get(
+        '/slow', headers={**bearer(store_id=2, store_level='分店', permission='basic'), 'X-Profile': '1'}
+    )
+    assert 'X-Profile-ID' not in resp.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_forged_admin_headers_are_not_profiled(app, tmp_path):
+    resp = app.test_client().get('/slow', headers={'X-Store-ID': '1', 'X-Store-Level': '總店', 'X-Profile': '1'})
+    assert resp.status_code == 200
+    assert 'X-Profile-ID' not in resp.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_old_profiles_are_pruned(app, tmp_path):
+    client = app.test_client()
+    ids = [client.get('/slow?__profile=1', headers=bearer()).headers['X-Profile-ID']
+           for _ in range(3)]
+    listed = [item['profile_id'] for item in profiler.list_profiles(str(tmp_path))]
+    assert len(listed) == 2
+    assert ids[0] not in listed
+
+
+def test_invalid_profile_id_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        profiler.load_profile(str(tmp_path), '../etc/passwd')
@@ -0,0 +1,165 @@
+import os
+import sys
+import threading
+
+import pymysql
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import query_budget
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        self.conn.executed.append((query, args))
+        if 'slow_table' in query:
+            raise pymysql.err.OperationalError(3024, 'maximum statement execution time exceeded')
+
+    def fetchall(self):
+        return []
+
+
+class FakeConn:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.cursorclass = FakeCursor
+        self.executed = []
+
+    def cursor(self):
+        return self.cursorclass(self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def app(monkeypatch):
+    connections = []
+
+    def fake_connect(**kwargs):
+        conn = FakeConn(**kwargs)
+        connections.append(conn)
+        return conn
+
+    # 先移除其他測試的 create_app 留下的包裝，再換成假連線
+    query_budget.uninstall_query_budget()
+    monkeypatch.setattr(query_budget.pymysql, 'connect', fake_connect)
+    monkeypatch.setitem(query_budget.BUDGETS_MS, 'interactive', 2000)
+    monkeypatch.setitem(query_budget.BUDGETS_MS, 'export', 60000)
+    app = Flask(__name__)
+    query_budget.init_query_budget(app)
+
+    @app.route('/items', methods=['GET', 'POST'])
+    def items():
+        conn = pymysql.connect(host='db')
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT * FROM item')
+        return jsonify({'ok': True})
+
+    @app.route('/search')
+    def search():
+        # 與既有路由相同：例外被轉成 500，逾時仍應回傳 504
+        try:
+            conn = pymysql.connect(host='db')
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT * FROM slow_table')
+            return jsonify([])
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/history')
+    @query_budget.time_budget('report')
+    def history():
+        return jsonify({'ok': True})
+
+    @app.route('/thing/export')
+    def export():
+        return jsonify({'ok': True})
+
+    app.connections = connections
+    yield app
+    query_budget.uninstall_query_budget()
+
+
+def test_classify_by_path_and_marker():
+    assert query_budget.classify('/api/product-sell/export') == 'export'
+    assert query_budget.classify('/api/reports/sales') == 'report'
+    assert query_budget.classify('/api/product-sell/search') == 'interactive'
+    assert query_budget.classify('/api/inventory/records', 'report') == 'report'
+    assert query_budget.classify('/api/product-sell/list', streaming=True) == 'export'
+    with pytest.raises(ValueError):
+        query_budget.time_budget('batch')
+
+
+def test_get_request_hints_select_and_sets_read_timeout(app):
+    resp = app.test_client().get('/items')
+    assert resp.status_code == 200
+    conn = app.connections[0]
+    assert conn.kwargs['read_timeout'] == pytest.approx(3.0)
+    # 預算隨查詢送出，沒有額外的 SET SESSION
+    assert conn.executed == [('SELECT /*+ MAX_EXECUTION_TIME(2000) */ * FROM item', None)]
+    # 請求結束後不再套用預算
+    pymysql.connect(host='db')
+    assert 'read_timeout' not in app.connections[-1].kwargs
+
+
+@pytest.mark.parametrize('path, headers', [
+    ('/items', {'Accept': 'application/x-ndjson'}),
+    ('/items?range=all', {}),
+])
+def test_streaming_and_full_history_use_export_budget(app, monkeypatch, path, headers):
+    monkeypatch.setitem(query_budget._semaphores, 'export', threading.BoundedSemaphore(1))
+    resp = app.test_client().get(path, headers=headers)
+    assert resp.status_code == 200
+    conn = app.connections[0]
+    assert conn.executed[0] == ('SELECT /*+ MAX_EXECUTION_TIME(60000) */ * FROM item', None)
+    assert conn.kwargs['read_timeout'] == pytest.approx(61.0)
+
+
+def test_write_request_has_no_read_timeout(app):
+    app.test_client().post('/items')
+    conn = app.connections[0]
+    assert 'read_timeout' not in conn.kwargs
+    assert conn.executed[0][0] == 'SELECT /*+ MAX_EXECUTION_TIME(2000) */ * FROM item'
+
+
+def test_execution_hint_only_touches_select():
+    hint = query_budget.with_execution_hint
+    assert hint('\n  select id FROM t', 500) == '\n  select /*+ MAX_EXECUTION_TIME(500) */ id FROM t'
+    assert hint('UPDATE t SET a = 1', 500) == 'UPDATE t SET a = 1'
+    assert hint('SELECT /*+ MAX_EXECUTION_TIME(10) */ 1', 500) == 'SELECT /*+ MAX_EXECUTION_TIME(10) */ 1'
+    assert hint('SELECTED_ITEMS', 500) == 'SELECTED_ITEMS'
+
+
+def test_timed_out_query_returns_504_with_retry_after(app):
+    resp = app.test_client().get('/search')
+    assert resp.status_code == 504
+    assert resp.headers['Retry-After'] == str(query_budget.QUERY_RETRY_AFTER_SECONDS)
+    assert resp.get_json()['budget'] == 'interactive'
+
+
+def test_export_slots_exhausted_returns_503(app, monkeypatch):
+    slot = threading.BoundedSemaphore(1)
+    monkeypatch.setitem(query_budget._semaphores, 'export', slot)
+    client = app.test_client()
+
+    assert client.get('/thing/export').status_code == 200
+    slot.acquire()
+    try:
+        resp = client.get('/thing/export')
+        assert resp.status_code == 503
+        assert 'Retry-After' in resp.headers
+    finally:
+        slot.release()
+    # report 類別不受 export 額滿影響
+    assert client.get('/history').status_code == 200
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks import query_plans
+
+
+def _row(table, type_="ref", rows=50_000, extra=None):
+    return {"table": table, "type": type_, "rows": rows, "Extra": extra}
+
+
+def test_full_scan_and_filesort_on_large_tables_are_reported():
+    rows = [
+        _row("product_sell", "ALL", extra="Using where; Using filesort"),
+        _row("therapy_record", "ALL"),
+    ]
+    problems = query_plans.plan_problems(rows)
+    assert len(problems) == 3
+    assert any("product_sell" in p and "filesort" in p for p in problems)
+
+
+def test_index_access_small_and_reference_tables_pass():
+    rows = [
+        _row("therapy_sell", "ref", extra="Using index condition"),
+        _row("store", "ALL", rows=5_000_000),
+        _row("member", "ALL", rows=20),
+        _row("<derived2>", "ALL", extra="Using filesort"),
+    ]
+    assert query_plans.plan_problems(rows) == []
+
+
+def test_allowed_problems_are_ignored():
+    rows = [_row("product_sell", "range", extra="Using filesort")]
+    assert query_plans.plan_problems(rows, allow=(("filesort", "product_sell"),)) == []
+    assert query_plans.plan_problems(rows, allow=(("full_scan", "product_sell"),)) != []
+
+
+@pytest.mark.skipif(
+    os.getenv("QUERY_PLAN_TESTS") != "1",
+    reason="需要以 benchmarks.synthetic_data 建立的資料庫：QUERY_PLAN_TESTS=1 pytest tests/test_query_plans.py",
+)
+def test_hot_queries_use_indexes():
+    results = query_plans.check(log=lambda *_: None)
+    failures = {name: problems for name, problems in results.items() if problems}
+    assert failures == {}
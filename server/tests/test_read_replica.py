@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import replica
+
+PRIMARY = {"host": "primary"}
+REPLICA = {"host": "replica"}
+
+
+class StatusCursor:
+    def __init__(self, lag):
+        self.lag = lag
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return {"Seconds_Behind_Source": self.lag}
+
+
+class FakeConn:
+    def __init__(self, host, lag=0):
+        self.host = host
+        self.lag = lag
+
+    def cursor(self):
+        return StatusCursor(self.lag)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """記錄每次連線的 host；replica_lag / replica_down 控制複本狀態。"""
+    state = {"hosts": [], "replica_lag": 0, "replica_down": False}
+
+    def fake_connect(**kwargs):
+        host = kwargs["host"]
+        state["hosts"].append(host)
+        if host == "replica" and state["replica_down"]:
+            raise OSError("connection refused")
+        return FakeConn(host, state["replica_lag"])
+
+    monkeypatch.setattr(replica.pymysql, "connect", fake_connect)
+    monkeypatch.setattr(replica, "DB_CONFIG", PRIMARY)
+    monkeypatch.setattr(replica, "REPLICA_DB_CONFIG", REPLICA)
+    monkeypatch.setattr(replica, "REPLICA_MAX_LAG_SECONDS", 30)
+    monkeypatch.setattr(replica, "REPLICA_CHECK_INTERVAL", 60)
+    monkeypatch.setattr(replica, "_state", {"healthy": False, "checked_at": None, "lag": None, "reason": ""})
+    return state
+
+
+def test_reads_primary_when_replica_not_configured(connections, monkeypatch):
+    monkeypatch.setattr(replica, "REPLICA_DB_CONFIG", None)
+    assert replica.connect_for_read().host == "primary"
+    assert connections["hosts"] == ["primary"]
+
+
+def test_reads_replica_within_lag_tolerance(connections):
+    connections["replica_lag"] = 5
+    assert replica.connect_for_read().host == "replica"
+    # 狀態檢查結果在 REPLICA_CHECK_INTERVAL 內重複使用
+    assert replica.connect_for_read().host == "replica"
+    assert connections["hosts"] == ["replica", "replica", "replica"]
+    assert replica.replica_status()["lag"] == 5
+
+
+def test_falls_back_to_primary_when_replica_lags(connections):
+    connections["replica_lag"] = 120
+    assert replica.connect_for_read().host == "primary"
+    assert replica.connect_for_read().host == "primary"
+    assert connections["hosts"] == ["replica", "primary", "primary"]
+    assert replica.replica_status()["healthy"] is False
+
+
+def test_falls_back_to_primary_when_replica_down(connections):
+    connections["replica_down"] = True
+    assert replica.connect_for_read().host == "primary"
+
+
+def test_primary_reads_context_forces_primary(connections):
+    with replica.primary_reads():
+        assert replica.connect_for_read().host == "primary"
+    assert connections["hosts"] == ["primary"]
+    assert replica.connect_for_read().host == "replica"
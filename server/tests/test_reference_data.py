@@ -0,0 +1,109 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import reference_data_model as ref
+
+STORES = [
+    {'store_id': 2, 'store_name': '中山店', 'store_location': '台北', 'store_type': 'DIRECT'},
+    {'store_id': 1, 'store_name': '總店', 'store_location': '台北', 'store_type': 'DIRECT'},
+]
+STAFF = [
+    {'staff_id': 5, 'name': '王小明', 'store_id': 2, 'account': 'ming', 'permission': 'basic'},
+    {'staff_id': 3, 'name': '林美美', 'store_id': 1, 'account': 'admin', 'permission': 'admin'},
+    {'staff_id': 4, 'name': '陳大文', 'store_id': 1, 'account': None, 'permission': ''},
+]
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    state = {'versions': {'store': 1, 'store_account': 1, 'staff': 1, 'category': 1}, 'loads': [], 'version_reads': 0}
+
+    def fake_versions(tables):
+        state['version_reads'] += 1
+        return None if state['versions'] is None else {t: state['versions'][t] for t in tables}
+
+    def fake_load(name):
+        state['loads'].append(name)
+        data = {'stores': STORES, 'staff': STAFF, 'identity_types': [
+            {'identity_type_code': 'VIP', 'identity_type_name': '貴賓', 'display_name': 'VIP 會員'},
+        ]}
+        return [dict(row) for row in data.get(name, [])]
+
+    monkeypatch.setattr(ref, 'get_table_versions', fake_versions)
+    monkeypatch.setattr(ref, '_load', fake_load)
+    monkeypatch.setattr(ref, 'REFERENCE_DATA_CHECK_INTERVAL', 3600)
+    monkeypatch.setattr(ref, '_cache', {})
+    monkeypatch.setattr(ref, '_versions', None)
+    monkeypatch.setattr(ref, '_versions_checked_at', None)
+    return state
+
+
+def test_datasets_are_loaded_once_until_version_changes(repo, monkeypatch):
+    assert [row['store_id'] for row in ref.stores_by_id()] == [1, 2]
+    assert [row['store_name'] for row in ref.stores_by_name()] == ['中山店', '總店']
+    assert repo['loads'] == ['stores']
+    assert repo['version_reads'] == 1
+
+    # 其他 worker 寫入：版本改變且超過檢查間隔後重新載入
+    repo['versions']['store'] = 2
+    ref.stores_by_id()
+    assert repo['loads'] == ['stores']
+    monkeypatch.setattr(ref, 'REFERENCE_DATA_CHECK_INTERVAL', 0)
+    ref.stores_by_id()
+    assert repo['loads'] == ['stores', 'stores']
+
+
+def test_local_write_invalidates_dependent_datasets(repo):
+    ref.get('stores')
+    ref.get('staff')
+    ref.invalidate('staff')
+    ref.get('stores')
+    ref.get('staff')
+    assert repo['loads'] == ['stores', 'staff', 'staff']
+
+
+def test_callers_receive_copies(repo):
+    rows = ref.get('stores')
+    rows[0]['store_name'] = 'changed'
+    assert ref.get('stores')[0]['store_name'] == '中山店'
+
+
+def test_derived_views(repo):
+    assert ref.store_ids_with_staff() == [1, 2]
+    assert ref.staff_permissions() == ['basic', 'admin']
+    joined = ref.stores_with_staff()
+    assert [(row['store_id'], row['staff_id']) for row in joined] == [(1, 3), (1, 4), (2, 5)]
+    assert ref.resolve_identity_type('貴賓') == 'VIP'
+    assert ref.resolve_identity_type('VIP 會員') == 'VIP'
+    assert ref.resolve_identity_type('一般') is None
+
+
+def test_untracked_or_unavailable_versions_fall_back_to_interval(repo, monkeypatch):
+    repo['versions'] = None
+    ref.get('stores')
+    ref.get('stores')
+    assert repo['loads'] == ['stores']
+    monkeypatch.setattr(ref, 'REFERENCE_DATA_CHECK_INTERVAL', 0)
+    ref.get('stores')
+    assert repo['loads'] == ['stores', 'stores']
+
+
+def test_unknown_dataset_rejected(repo):
+    with pytest.raises(ValueError):
+        ref.get('members')
+
+
+def test_load_runs_outside_the_lock(repo, monkeypatch):
+    def fake_load(name):
+        assert ref._lock.acquire(blocking=False)
+        ref._lock.release()
+        # 載入期間本 worker 寫入：舊資料不寫回快取
+        ref.invalidate('store')
+        return [dict(row) for row in STORES]
+
+    monkeypatch.setattr(ref, '_load', fake_load)
+    assert len(ref.get('stores')) == 2
+    assert 'stores' not in ref._cache
@@ -0,0 +1,142 @@
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import reorder_model as reorder
+
+START = date(2025, 3, 1)
+
+
+def _rows(daily):
+    return [
+        {'master_product_id': key[0], 'store_id': key[1], 'sale_date': START + timedelta(days=day), 'quantity': qty}
+        for key, days in daily.items()
+        for day, qty in days.items()
+    ]
+
+
+def test_demand_matrix_fills_missing_days_with_zero():
+    rows = _rows({(7, 1): {0: 3, 2: 5}, (7, 2): {6: 4}, (8, 1): {9: 1}})
+    keys, matrix = reorder.build_demand_matrix(rows, START, 7)
+    # 視窗外的出貨不計入；只出現在視窗外的組合不產生列
+    assert keys == [(7, 1), (7, 2)]
+    assert matrix.tolist() == [[3, 0, 5, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 4]]
+
+
+def test_suggestions_use_mean_and_stddev_per_row():
+    keys, matrix = reorder.build_demand_matrix(
+        _rows({(1, 1): {day: 2 for day in range(28)}, (2, 1): {0: 28}}), START, 28
+    )
+    result = reorder.compute_suggestions(matrix, on_hand=[10, 30], lead_days=7, review_days=7, z=1.65)
+
+    # 穩定出貨：沒有波動，安全庫存就是前置天數內的需求
+    assert result['avg'][0] == pytest.approx(2.0)
+    assert result['std'][0] == pytest.approx(0.0)
+    assert result['reorder_point'][0] == 14
+    assert result['order_up_to'][0] == 28
+    assert result['suggested_qty'][0] == 18
+    assert result['days_of_cover'][0] == pytest.approx(5.0)
+
+    # 日均相同但集中在一天：波動大，安全庫存較高
+    std = math.sqrt(27) * 1.0
+    assert result['avg'][1] == pytest.approx(1.0)
+    assert result['std'][1] == pytest.approx(std)
+    assert result['reorder_point'][1] == math.ceil(7 + 1.65 * std * math.sqrt(7))
+    assert result['reorder_point'][1] > result['reorder_point'][0]
+
+
+def test_suggested_qty_never_negative_and_idle_rows_have_no_cover():
+    result = reorder.compute_suggestions([[0, 0, 0], [1, 1, 1]], on_hand=[5, 100], lead_days=2, review_days=1, z=0)
+    assert result['suggested_qty'].tolist() == [0, 0]
+    assert math.isnan(result['days_of_cover'][0])
+    assert result['days_of_cover'][1] == pytest.approx(100.0)
+
+
+def test_threshold_sql_falls_back_to_fixed_threshold(monkeypatch):
+    monkeypatch.setattr(reorder, 'reorder_available', lambda: False)
+    assert reorder.threshold_sql('mp.master_product_id', '%s') == ('', '5', 'NULL', 'NULL')
+
+    monkeypatch.setattr(reorder, 'reorder_available', lambda: True)
+    join, threshold, avg_demand, order_up_to = reorder.threshold_sql('mp.master_product_id', 'ms.store_id')
+    assert 'rs.master_product_id = mp.master_product_id AND rs.store_id = ms.store_id' in join
+    assert threshold == 'COALESCE(rs.reorder_point, 5)'
+    assert (avg_demand, order_up_to) == ('rs.avg_daily_demand', 'rs.order_up_to')
+
+
+def test_recompute_since_covers_last_refresh_and_lookback(monkeypatch):
+    from datetime import datetime
+
+    monkeypatch.setattr(reorder, 'REORDER_LOOKBACK_MINUTES', 60)
+    window_start = date(2025, 1, 1)
+    now = datetime(2025, 3, 10, 0, 30)
+    # 剛過午夜：回溯範圍涵蓋前一天
+    assert reorder.recompute_since(window_start, datetime(2025, 3, 10, 0, 15), now, False) == date(2025, 3, 9)
+    # 排程停擺多日：從上次刷新當日重算
+    assert reorder.recompute_since(window_start, datetime(2025, 3, 5, 12, 0), now, False) == date(2025, 3, 5)
+    assert reorder.recompute_since(window_start, datetime(2024, 12, 1), now, False) == window_start
+    assert reorder.recompute_since(window_start, None, now, False) == window_start
+    assert reorder.recompute_since(window_start, datetime(2025, 3, 10), now, True) == window_start
+
+
+def test_rebuild_outbound_nets_returns_and_skips_transfers():
+    class Cursor:
+        def __init__(self):
+            self.executed = []
+
+        def execute(self, query, args=None):
+            self.executed.append((query, args))
+
+    cursor = Cursor()
+    reorder._rebuild_outbound(cursor, date(2025, 3, 9), date(2025, 1, 1))
+    (delete_sql, delete_args), (insert_sql, insert_args) = cursor.executed
+    assert delete_args == (date(2025, 3, 9), date(2025, 1, 1))
+    assert "txn_type = 'INBOUND'" in insert_sql and 'o.reference_no = r.reference_no' in insert_sql
+    assert insert_args == (date(2025, 3, 9), 'TRF-%', date(2025, 3, 9), 'TRF-%')
+
+
+def test_reorder_probe_rechecks_after_failure(monkeypatch):
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {'1': 1}
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('connection reset')
+        return Conn()
+
+    clock = {'now': 10.0}
+    monkeypatch.setattr(reorder, 'connect_to_db', connect)
+    monkeypatch.setattr(reorder.time, 'monotonic', lambda: clock['now'])
+    monkeypatch.setattr(reorder, '_available_state', {'available': False, 'checked_at': 0.0})
+
+    # 失敗後的請求不再逐次查詢 information_schema
+    assert reorder.reorder_available() is False
+    assert reorder.reorder_available() is False
+    assert len(calls) == 1
+    clock['now'] += reorder._AVAILABLE_RECHECK_SECONDS
+    assert reorder.reorder_available() is True
+    assert reorder.reorder_available() is True
+    assert len(calls) == 2
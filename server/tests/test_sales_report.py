@@ -0,0 +1,91 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import sales_report_model
+
+
+def test_parse_group_by_rejects_unknown_and_multiple_time_dimensions():
+    assert sales_report_model.parse_group_by("store, month") == ["store", "month"]
+    with pytest.raises(ValueError):
+        sales_report_model.parse_group_by("store,colour")
+    with pytest.raises(ValueError):
+        sales_report_model.parse_group_by("date,month")
+
+
+def test_comparison_range_previous_and_previous_year():
+    assert sales_report_model.comparison_range(
+        date(2024, 3, 1), date(2024, 3, 10), "previous"
+    ) == (date(2024, 2, 20), date(2024, 2, 29))
+    assert sales_report_model.comparison_range(
+        date(2024, 2, 29), date(2024, 2, 29), "previous_year"
+    ) == (date(2023, 2, 28), date(2023, 2, 28))
+
+
+def test_refresh_sales_rollup_recomputes_each_bucket_once(monkeypatch):
+    monkeypatch.setattr(sales_report_model, "_rollup_table_available", lambda: True)
+    executed = []
+
+    class DummyCursor:
+        def execute(self, query, params=None):
+            executed.append((" ".join(query.split()), params))
+
+    buckets = [
+        sales_report_model.sales_bucket(1, date(2024, 5, 1)),
+        sales_report_model.sales_bucket("1", "2024/05/01"),
+        sales_report_model.sales_bucket(None, None),
+    ]
+    sales_report_model.refresh_sales_rollup(DummyCursor(), "product", buckets)
+
+    assert len(executed) == 2
+    assert executed[0][0].startswith("DELETE FROM sales_daily_rollup")
+    assert executed[0][1] == ("product", 1, "2024-05-01")
+    assert executed[1][0].startswith("INSERT INTO sales_daily_rollup")
+    assert executed[1][1] == (1, "2024-05-01")
+
+
+def test_rollup_check_retries_after_failure_and_caches_success(monkeypatch):
+    calls = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {"1": 1}
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        return Conn()
+
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(sales_report_model, "connect_to_db", connect)
+    monkeypatch.setattr(sales_report_model.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(sales_report_model, "_rollup_state", {"available": False, "checked_at": 0.0})
+
+    assert sales_report_model._rollup_table_available() is False
+    assert sales_report_model._rollup_table_available() is False
+    assert len(calls) == 1
+
+    clock["now"] += sales_report_model._ROLLUP_RECHECK_SECONDS
+    assert sales_report_model._rollup_table_available() is True
+    assert sales_report_model._rollup_table_available() is True
+    assert len(calls) == 2
@@ -0,0 +1,106 @@
+import inspect
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import single_flight as sf
+
+
+def test_key_normalizes_positional_keyword_and_types():
+    def lookup(store_id=None, status='PUBLISHED'):
+        pass
+
+    signature = inspect.signature(lookup)
+    assert sf.make_key('x', signature, (1,), {}) == sf.make_key('x', signature, (), {'store_id': '1'})
+    assert sf.make_key('x', signature, (None,), {}) == sf.make_key('x', signature, ('',), {})
+    assert sf.make_key('x', signature, (1,), {}) != sf.make_key('x', signature, (2,), {})
+    assert sf.make_key('x', signature, (1,), {}) != sf.make_key('x', signature, (1, 'DRAFT'), {})
+
+
+def test_concurrent_identical_calls_execute_once():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @sf.single_flight('test_rows')
+    def load(store_id):
+        calls.append(store_id)
+        started.set()
+        release.wait(5)
+        return [{'store_id': store_id, 'rows': [1, 2]}]
+
+    results = []
+
+    def worker(value):
+        results.append(load(value))
+
+    leader = threading.Thread(target=worker, args=(1,))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=worker, args=('1',)) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    # 等待者全部加入後才放行
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with sf._calls_lock:
+            call = next(iter(sf._calls.values()), None)
+            if call is not None and call.waiters == 3:
+                break
+        time.sleep(0.005)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert calls == [1]
+    assert len(results) == 4
+    assert all(result == [{'store_id': 1, 'rows': [1, 2]}] for result in results)
+    # 每個呼叫者拿到獨立的物件
+    assert len({id(result) for result in results}) == 4
+    assert sf._calls == {}
+
+
+def test_sequential_calls_are_not_cached():
+    counter = {'n': 0}
+
+    @sf.single_flight('test_counter')
+    def load():
+        counter['n'] += 1
+        return counter['n']
+
+    assert load() == 1
+    assert load() == 2
+
+
+def test_waiters_receive_leader_error():
+    started = threading.Event()
+    release = threading.Event()
+
+    @sf.single_flight('test_error')
+    def load():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('db down')
+
+    errors = []
+
+    def worker():
+        try:
+            load()
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=worker)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ['db down', 'db down']
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks import startup_benchmark
+
+
+def test_create_app_does_not_import_heavy_dependencies():
+    result = startup_benchmark.measure_once()
+    assert result["heavy_modules"] == []
+
+
+# 牆鐘時間受機器負載影響，預設不執行；量測環境固定時以 STARTUP_BENCHMARK=1 啟用
+@pytest.mark.skipif(
+    os.getenv("STARTUP_BENCHMARK") != "1",
+    reason="冷啟動量測：STARTUP_BENCHMARK=1 pytest tests/test_startup_time.py",
+)
+def test_cold_start_has_not_regressed():
+    baseline = startup_benchmark.load_baseline()
+    if baseline is None:
+        pytest.fail("缺少 benchmarks/baselines/startup.json，請執行 python -m benchmarks.startup_benchmark --update-baseline 並提交")
+    result = startup_benchmark.measure(runs=3)
+    assert startup_benchmark.compare(result, baseline) == []
+
+
+def test_compare_flags_slow_start_and_heavy_imports():
+    baseline = {"median_seconds": 1.0}
+    ok = {"median_seconds": 1.2, "heavy_modules": []}
+    slow = {"median_seconds": 1.5, "heavy_modules": ["pandas"]}
+    assert startup_benchmark.compare(ok, baseline, tolerance=0.3) == []
+    assert len(startup_benchmark.compare(slow, baseline, tolerance=0.3)) == 2
@@ -0,0 +1,167 @@
+import os
+import sys
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import master_stock_model as msm
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        args = list(args or [])
+        self.conn.executed.append((query, args))
+        if 'FROM product_variant' in query:
+            self._rows = [{'variant_id': 101, 'master_product_id': 7}]
+        elif 'FROM master_product' in query:
+            self._rows = [{'master_product_id': value} for value in args if value in (5, 7)]
+        elif 'FROM store' in query:
+            self._rows = [{'store_id': value} for value in args if value in (1, 2, 3)]
+        elif 'FROM master_stock' in query:
+            if self.conn.deadlocks:
+                self.conn.deadlocks -= 1
+                raise pymysql.err.OperationalError(1213, 'Deadlock found when trying to get lock')
+            self._rows = [
+                {'master_product_id': master_id, 'store_id': store_id, 'quantity_on_hand': qty}
+                for (master_id, store_id), qty in sorted(self.conn.stock.items())
+            ]
+        else:
+            self._rows = []
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        self.conn.executed_many.append((query, rows))
+        if 'INSERT IGNORE' in query:
+            for master_id, store_id in rows:
+                self.conn.stock.setdefault((master_id, store_id), 0)
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, stock, deadlocks=0):
+        self.stock = stock
+        self.deadlocks = deadlocks
+        self.executed = []
+        self.executed_many = []
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+
+def test_transfer_deltas_are_netted_and_sorted():
+    lines = [
+        {'master_product_id': 7, 'from_store_id': 2, 'to_store_id': 1, 'quantity': 3},
+        {'master_product_id': 5, 'from_store_id': 1, 'to_store_id': 3, 'quantity': 4},
+        {'master_product_id': 7, 'from_store_id': 1, 'to_store_id': 3, 'quantity': 1},
+    ]
+    assert msm.transfer_deltas(lines) == [(5, 1, -4), (5, 3, 4), (7, 1, 2), (7, 2, -3), (7, 3, 1)]
+
+
+def test_transfer_lines_are_validated():
+    with pytest.raises(ValueError):
+        msm.normalize_transfer_lines([])
+    with pytest.raises(ValueError, match='相同'):
+        msm.normalize_transfer_lines([{'from_store_id': 1, 'to_store_id': 1, 'master_product_id': 5, 'quantity': 1}])
+    with pytest.raises(ValueError, match='variant_id'):
+        msm.normalize_transfer_lines([{'from_store_id': 1, 'to_store_id': 2, 'quantity': 1}])
+    with pytest.raises(ValueError, match='大於 0'):
+        msm.normalize_transfer_lines([{'from_store_id': 1, 'to_store_id': 2, 'variant_id': 101, 'quantity': 0}])
+
+
+def test_transfer_locks_in_key_order_and_writes_in_bulk(monkeypatch):
+    conn = FakeConn({(7, 2): 10, (5, 1): 4, (7, 1): 0})
+    monkeypatch.setattr(msm, 'connect_to_db', lambda: conn)
+
+    result = msm.transfer_master_stock(
+        [
+            {'from_store_id': 2, 'to_store_id': 1, 'variant_id': 101, 'quantity': 3},
+            {'from_store_id': 1, 'to_store_id': 3, 'master_product_id': 5, 'quantity': 4},
+        ],
+        staff_id=9,
+    )
+
+    assert conn.committed and not conn.rolled_back
+    assert result['transfer_no'].startswith(msm.TRANSFER_REFERENCE_PREFIX)
+    lock_query, lock_params = next(item for item in conn.executed if 'FOR UPDATE' in item[0])
+    assert 'ORDER BY master_product_id, store_id' in lock_query
+    assert lock_params == [5, 1, 5, 3, 7, 1, 7, 2]
+
+    # 缺少的目的地列先依主鍵順序補 0，再鎖定
+    (zero_sql, zero_rows), (_, stock_rows), (_, txn_rows) = conn.executed_many
+    assert 'INSERT IGNORE' in zero_sql
+    assert zero_rows == [(5, 3)]
+    assert stock_rows == [(5, 1, -4), (5, 3, 4), (7, 1, 3), (7, 2, -3)]
+    assert [row[2:6] for row in txn_rows] == [
+        (2, 9, 'OUTBOUND', -3),
+        (1, 9, 'INBOUND', 3),
+        (1, 9, 'OUTBOUND', -4),
+        (3, 9, 'INBOUND', 4),
+    ]
+    assert {row[6] for row in txn_rows} == {result['transfer_no']}
+    assert result['stock'] == [
+        {'master_product_id': 5, 'store_id': 1, 'quantity_on_hand': 0},
+        {'master_product_id': 5, 'store_id': 3, 'quantity_on_hand': 4},
+        {'master_product_id': 7, 'store_id': 1, 'quantity_on_hand': 3},
+        {'master_product_id': 7, 'store_id': 2, 'quantity_on_hand': 7},
+    ]
+
+
+def test_transfer_rolls_back_when_any_source_is_short(monkeypatch):
+    conn = FakeConn({(7, 2): 10, (5, 1): 2})
+    monkeypatch.setattr(msm, 'connect_to_db', lambda: conn)
+
+    with pytest.raises(ValueError, match='庫存不足'):
+        msm.transfer_master_stock(
+            [
+                {'from_store_id': 2, 'to_store_id': 1, 'master_product_id': 7, 'quantity': 3},
+                {'from_store_id': 1, 'to_store_id': 3, 'master_product_id': 5, 'quantity': 4},
+            ],
+            staff_id=None,
+        )
+    assert conn.rolled_back and not conn.committed
+    assert [query for query, _ in conn.executed_many if 'INSERT IGNORE' not in query] == []
+
+
+def test_transfer_retries_deadlock_victim(monkeypatch):
+    conn = FakeConn({(7, 2): 10, (7, 1): 0}, deadlocks=1)
+    monkeypatch.setattr(msm, 'connect_to_db', lambda: conn)
+
+    result = msm.transfer_master_stock(
+        [{'from_store_id': 2, 'to_store_id': 1, 'master_product_id': 7, 'quantity': 3}],
+        staff_id=None,
+    )
+    assert conn.rolled_back and conn.committed
+    assert result['stock'][0] == {'master_product_id': 7, 'store_id': 1, 'quantity_on_hand': 3}
+
+    stuck = FakeConn({(7, 2): 10}, deadlocks=msm.TRANSFER_DEADLOCK_RETRIES + 1)
+    monkeypatch.setattr(msm, 'connect_to_db', lambda: stuck)
+    with pytest.raises(pymysql.err.OperationalError):
+        msm.transfer_master_stock(
+            [{'from_store_id': 2, 'to_store_id': 1, 'master_product_id': 7, 'quantity': 3}],
+            staff_id=None,
+        )
+    assert not stuck.committed
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+from flask import Flask
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.json_provider import init_json_provider
+from app.streaming import ndjson_response, wants_ndjson, NDJSON_MIMETYPE
+from app.models import row_stream
+
+
+def make_app(rows_factory):
+    app = Flask(__name__)
+    init_json_provider(app)
+
+    @app.route('/rows')
+    def rows():
+        if wants_ndjson():
+            return ndjson_response(rows_factory(), chunk_rows=2)
+        return {'mode': 'json'}
+
+    return app
+
+
+def test_ndjson_only_when_requested():
+    app = make_app(lambda: iter([]))
+    client = app.test_client()
+    assert client.get('/rows', headers={'Accept': 'application/json, */*'}).get_json() == {'mode': 'json'}
+    resp = client.get('/rows', headers={'Accept': NDJSON_MIMETYPE})
+    assert resp.mimetype == NDJSON_MIMETYPE
+    assert resp.data == b''
+
+
+def test_rows_are_streamed_one_per_line():
+    rows = [{'id': i, 'price': Decimal('1.5'), 'date': date(2024, 1, i + 1)} for i in range(5)]
+    app = make_app(lambda: iter(rows))
+    resp = app.test_client().get('/rows', headers={'Accept': NDJSON_MIMETYPE})
+    lines = resp.data.decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': i, 'price': 1.5, 'date': f'2024-01-0{i + 1}'} for i in range(5)
+    ]
+
+
+def test_error_mid_stream_emits_error_line():
+    def broken():
+        yield {'id': 1}
+        raise RuntimeError('boom')
+
+    app = make_app(broken)
+    lines = app.test_client().get('/rows', headers={'Accept': NDJSON_MIMETYPE}).data.splitlines()
+    assert json.loads(lines[0]) == {'id': 1}
+    assert json.loads(lines[-1]) == {'error': 'boom'}
+
+
+class FakeSSCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetch_sizes = []
+
+    def execute(self, sql, params=None):
+        self.sql = sql
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_obj = FakeSSCursor(rows)
+        self.closed = False
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_rows_fetches_in_batches(monkeypatch):
+    conn = FakeConnection([{'id': i} for i in range(5)])
+    monkeypatch.setattr(row_stream.pymysql, 'connect', lambda **kwargs: conn)
+    rows = list(row_stream.stream_rows('SELECT 1', (), transform=lambda r: r['id'], batch_size=2))
+    assert rows == [0, 1, 2, 3, 4]
+    assert conn.cursor_obj.fetch_sizes == [2, 2, 2, 2]
+    assert conn.closed
+
+
+def test_stream_rows_closes_connection_when_abandoned(monkeypatch):
+    conn = FakeConnection([{'id': i} for i in range(5)])
+    monkeypatch.setattr(row_stream.pymysql, 'connect', lambda **kwargs: conn)
+    stream = row_stream.stream_rows('SELECT 1', (), batch_size=2)
+    next(stream)
+    stream.close()
+    assert conn.closed
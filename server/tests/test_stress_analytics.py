@@ -0,0 +1,202 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models import stress_analytics_model as analytics
+from app.models import stress_test_model
+from app.models.stress_test_model import calc_stress_scores, pack_stress_answers
+
+
+def test_vectorized_scores_match_calc_stress_scores():
+    rng = random.Random(7)
+    rows, expected = [], {}
+    for stress_id in range(1, 51):
+        answers = {}
+        for question in analytics.QUESTION_NOS:
+            choice = rng.choice(["甲", "乙", "A", "B", None])
+            if choice is None:
+                continue
+            # 舊資料的題號可能沒有補零
+            answers[question.lstrip("0") if rng.random() < 0.3 else question] = choice
+        expected[stress_id] = calc_stress_scores(answers)
+        rows.extend(
+            {"ipn_stress_id": stress_id, "question_no": q, "answer": a} for q, a in answers.items()
+        )
+    rng.shuffle(rows)
+
+    stress_ids, matrix = analytics.build_answer_matrix(rows)
+    scores = analytics.score_answer_matrix(matrix)
+
+    for i, stress_id in enumerate(stress_ids.tolist()):
+        assert dict(zip(analytics.SCORE_KEYS, scores[i].tolist())) == expected[stress_id]
+
+    by_test = {}
+    for row in rows:
+        by_test.setdefault(row["ipn_stress_id"], {})[row["question_no"]] = row["answer"]
+    packed_ids, packed_matrix = analytics.build_packed_answer_matrix(
+        [{"ipn_stress_id": sid, "answers_packed": pack_stress_answers(ans)} for sid, ans in by_test.items()]
+    )
+    assert packed_ids.tolist() == stress_ids.tolist()
+    assert (packed_matrix == matrix).all()
+
+
+def test_update_answers_use_single_upsert(monkeypatch):
+    monkeypatch.setattr(stress_test_model, "_stress_answer_storage_migrated", lambda: True)
+    executed = []
+
+    class DummyCursor:
+        def execute(self, query, params=None):
+            executed.append((" ".join(query.split()), params))
+
+    stress_test_model._write_stress_answers(DummyCursor(), 9, {"1": "甲", "02": "B"}, replace=True)
+
+    assert [q for q, _ in executed] == [
+        "DELETE FROM ipn_stress_answer WHERE ipn_stress_id = %s AND question_no NOT IN (%s, %s)",
+        "INSERT INTO ipn_stress_answer (ipn_stress_id, question_no, answer) VALUES (%s, %s, %s), (%s, %s, %s)"
+        " ON DUPLICATE KEY UPDATE answer = VALUES(answer)",
+        "UPDATE ipn_stress SET answers_packed = %s WHERE ipn_stress_id = %s",
+    ]
+    assert executed[1][1] == (9, "01", "甲", 9, "02", "B")
+    assert executed[2][1] == ("AB" + "-" * 18, 9)
+
+
+def test_rescore_updates_only_changed_tests(monkeypatch):
+    executed = []
+
+    class DummyCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            pass
+
+        def execute(self, query, params=None):
+            self.last = query
+
+        def fetchall(self):
+            if "FROM ipn_stress_answer" in self.last:
+                return [
+                    {"ipn_stress_id": 1, "question_no": "01", "answer": "甲"},
+                    {"ipn_stress_id": 2, "question_no": "01", "answer": "乙"},
+                ]
+            return [
+                {"ipn_stress_id": 1, "a_score": 1, "b_score": 0, "c_score": 0, "d_score": 0},
+                {"ipn_stress_id": 2, "a_score": 0, "b_score": 0, "c_score": 0, "d_score": 0},
+                {"ipn_stress_id": 3, "a_score": 5, "b_score": 5, "c_score": 5, "d_score": 5},
+            ]
+
+        def executemany(self, query, params):
+            executed.extend(params)
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(analytics, "connect_to_db", lambda: DummyConn())
+    monkeypatch.setattr(analytics, "_stress_answer_storage_migrated", lambda: False)
+    bumped = []
+    monkeypatch.setattr(analytics, "bump_member_overview_versions", lambda member_ids=None: bumped.append(member_ids))
+    result = analytics.rescore_stress_tests()
+
+    assert result == {"checked": 2, "updated": 1, "dry_run": False}
+    assert executed == [(0, 1, 0, 0, 2)]
+    # 重算可能涉及大量會員，以全域版本讓總覽快取失效
+    assert bumped == [None]
+
+
+def test_packed_storage_probe_rechecks_after_failure(monkeypatch):
+    calls = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return {"1": 1}
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        return Conn()
+
+    clock = {"now": 500.0}
+    monkeypatch.setattr(stress_test_model, "connect_to_db", connect)
+    monkeypatch.setattr(stress_test_model.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(stress_test_model, "_packed_state", {"available": False, "checked_at": 0.0})
+
+    assert stress_test_model._stress_answer_storage_migrated() is False
+    assert stress_test_model._stress_answer_storage_migrated() is False
+    assert len(calls) == 1
+
+    clock["now"] += stress_test_model._PACKED_RECHECK_SECONDS
+    assert stress_test_model._stress_answer_storage_migrated() is True
+    assert stress_test_model._stress_answer_storage_migrated() is True
+    assert len(calls) == 2
+
+
+def test_distribution_scores_from_answers_not_stored_columns(monkeypatch):
+    queries = []
+
+    class DummyCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            pass
+
+        def execute(self, query, params=None):
+            queries.append((" ".join(query.split()), params))
+
+        def fetchall(self):
+            if "FROM ipn_stress_answer" in queries[-1][0]:
+                return [{"ipn_stress_id": 1, "question_no": "01", "answer": "甲"}]
+            # 儲存的分數已過時；沒有作答紀錄的 2 號沿用儲存值
+            return [
+                {"ipn_stress_id": 1, "a_score": 0, "b_score": 0, "c_score": 0, "d_score": 3},
+                {"ipn_stress_id": 2, "a_score": 0, "b_score": 2, "c_score": 0, "d_score": 0},
+            ]
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(analytics, "connect_to_db", lambda: DummyConn())
+    monkeypatch.setattr(analytics, "_stress_answer_storage_migrated", lambda: False)
+    result = analytics.get_score_distribution(store_id=4)
+
+    expected = calc_stress_scores({"01": "甲"})
+    for key in analytics.SCORE_KEYS:
+        assert result["summary"][key]["mean"] == round((expected[key] + (2 if key == "b" else 0)) / 2, 2)
+    assert result["histogram"]["d"][3] == 0
+    # 答案以相同的分店條件載入
+    assert queries[1][0].startswith(
+        "SELECT a.ipn_stress_id, a.question_no, a.answer FROM ipn_stress_answer a JOIN ipn_stress s"
+    )
+    assert queries[1][1] == (4,)
@@ -30,13 +30,46 @@ def test_export_therapy_records_queries_use_store_name(monkeypatch):
         def close(self):
             pass
 
+    # 匯出經由 replica.connect_for_read 連線
+    monkeypatch.setattr(therapy_model, 'connect_for_read', lambda **kwargs: DummyConn())
+
     # Without store filter
-    monkeypatch.setattr(therapy_model, 'connect_to_db', lambda: DummyConn())
     therapy_model.export_therapy_records()
 
     # With store filter
-    monkeypatch.setattr(therapy_model, 'connect_to_db', lambda: DummyConn())
     therapy_model.export_therapy_records(store_id=1)
 
     assert 's.store_name as store_name' in queries[0].lower()
     assert 's.store_name as store_name' in queries[1].lower()
+
+
+def test_record_search_reads_primary(monkeypatch):
+    # 新增紀錄後前端立即重新搜尋，不能讀到落後的複本
+    class DummyCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            pass
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchall(self):
+            return [{'therapy_record_id': 1}]
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+        def close(self):
+            pass
+
+    def replica(**kwargs):
+        raise AssertionError('search must not use the replica')
+
+    monkeypatch.setattr(therapy_model, 'connect_for_read', replica)
+    monkeypatch.setattr(therapy_model, 'connect_to_db', lambda: DummyConn())
+    monkeypatch.setattr(therapy_model, 'get_store_based_where_condition', lambda alias=None: ('', []))
+
+    assert therapy_model.search_therapy_records({}) == [{'therapy_record_id': 1}]